@@ -1,5 +1,7 @@
 import 'package:flutter/material.dart';
 import 'package:firebase_core/firebase_core.dart';
+import 'package:firebase_auth/firebase_auth.dart';
+import 'package:cloud_firestore/cloud_firestore.dart';
 import 'package:provider/provider.dart';
 import 'package:sizer/sizer.dart';
 import 'package:responsive_framework/responsive_framework.dart';
@@ -13,6 +15,7 @@ import 'package:invoiceflow/theme/app_theme.dart';
 import 'firebase_options.dart';
 
 import 'package:invoiceflow/services/invoice_service.dart';
+import 'package:invoiceflow/services/startup_orchestrator.dart';
 import 'package:google_sign_in/google_sign_in.dart';
 import 'package:invoiceflow/constants/app_scaling.dart';
 import 'package:invoiceflow/utils/app_logger.dart';
@@ -20,22 +23,63 @@ import 'package:invoiceflow/utils/app_logger.dart';
 import 'package:invoiceflow/routes/app_routes.dart';
 import 'package:invoiceflow/presentation/inventory_screen/inventory_detail_screen.dart';
 
+// Set with --dart-define=USE_FIREBASE_EMULATOR=true for E2E runs
+// (testsprite_tests/harness) against `firebase emulators:start`.
+const bool _useFirebaseEmulator = bool.fromEnvironment('USE_FIREBASE_EMULATOR');
+const String _firebaseEmulatorHost =
+    String.fromEnvironment('FIREBASE_EMULATOR_HOST', defaultValue: 'localhost');
+
+const String _csvPath = 'assets/images/data/invoices.csv';
+
 void main() async {
+  // First use starts the startup clock.
+  final startup = StartupOrchestrator.instance;
   WidgetsFlutterBinding.ensureInitialized();
 
-  try {
-    await Firebase.initializeApp(
-      options: DefaultFirebaseOptions.currentPlatform,
-    );
+  startup.register([
+    StartupTask('firebase', () async {
+      await Firebase.initializeApp(
+        options: DefaultFirebaseOptions.currentPlatform,
+      );
 
-    // Initialize Google Sign In
-    await GoogleSignIn().signInSilently();
+      // List reads are served from synced mirrors that restart from this
+      // cache (see SyncedCollection), so keep all of it.
+      FirebaseFirestore.instance.settings = const Settings(
+        persistenceEnabled: true,
+        cacheSizeBytes: Settings.CACHE_SIZE_UNLIMITED,
+      );
 
-    await InvoiceService.initialize(csvPath: 'assets/images/data/invoices.csv');
-    AppLogger.info('Firebase and Google Services initialized successfully', 'App');
-  } catch (e) {
-    AppLogger.error('Initialization error', 'App', e);
-  }
+      if (_useFirebaseEmulator) {
+        await FirebaseAuth.instance.useAuthEmulator(_firebaseEmulatorHost, 9099);
+        FirebaseFirestore.instance.useFirestoreEmulator(_firebaseEmulatorHost, 8080);
+        AppLogger.info('Using Firebase emulators on $_firebaseEmulatorHost', 'App');
+      }
+    }),
+    StartupTask(
+      'invoiceService',
+      () => InvoiceService.initialize(csvPath: _csvPath),
+      dependsOn: const ['firebase'],
+    ),
+    // Nothing on the first screen needs the Google session.
+    StartupTask(
+      'googleSignIn',
+      () => GoogleSignIn().signInSilently(),
+      phase: StartupPhase.afterFirstFrame,
+    ),
+    StartupTask(
+      'csvMigration',
+      () async {
+        // Writes under the signed-in user.
+        await FirebaseAuth.instance.authStateChanges().firstWhere((user) => user != null);
+        await InvoiceService.instance.migrateCsvIfNeeded();
+      },
+      dependsOn: const ['invoiceService'],
+      phase: StartupPhase.afterFirstFrame,
+    ),
+  ]);
+
+  await startup.runBeforeFirstFrame();
+  AppLogger.info('Firebase and app services initialized', 'App');
 
   runApp(
     Sizer(
@@ -44,6 +88,7 @@ void main() async {
       },
     ),
   );
+  startup.runAfterFirstFrame();
 }
 
 class MyApp extends StatelessWidget {
@@ -81,7 +126,7 @@ class MyApp extends StatelessWidget {
         routes: {
           '/': (context) => const AuthGate(),
           '/home': (context) => const HomeDashboard(
-                csvPath: 'assets/images/data/invoices.csv',
+                csvPath: _csvPath,
               ),
           // Include all routes from AppRoutes
           ...AppRoutes.routes,
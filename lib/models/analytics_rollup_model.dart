@@ -0,0 +1,170 @@
+import 'invoice_model.dart';
+
+/// Invoice totals for a run of days, summed from the daily documents in
+/// users/{uid}/analytics_rollups/{yyyy-MM-dd}.
+///
+/// Each day document holds, per invoice type ('sales' / 'purchase'):
+/// invoiceCount, revenue, paid, remaining, quantity, an `items` map of
+/// name -> {quantity, revenue} and a `customers` map of
+/// customerId -> {name, phone, invoiceCount, quantity, revenue, paid,
+/// outstanding}. Cancelled invoices are not counted.
+class AnalyticsRollup {
+  AnalyticsRollup._(this.totals, this.dailySalesRevenue);
+
+  /// Sums day documents as returned by Firestore.
+  factory AnalyticsRollup.fromDays(Iterable<Map<String, dynamic>> days) {
+    final totals = <String, dynamic>{};
+    final daily = <String, double>{};
+    for (final day in days) {
+      final key = day['day'] as String?;
+      if (key == null) continue;
+      addInto(totals, Map<String, dynamic>.from(day)..remove('day'));
+      final sales = day['sales'];
+      if (sales is Map && sales['invoiceCount'] is num && (sales['invoiceCount'] as num) > 0) {
+        daily[key] = (daily[key] ?? 0.0) + ((sales['revenue'] as num?)?.toDouble() ?? 0.0);
+      }
+    }
+    return AnalyticsRollup._(totals, daily);
+  }
+
+  final Map<String, dynamic> totals;
+
+  /// Sales revenue per day key, for days with at least one sales invoice.
+  final Map<String, double> dailySalesRevenue;
+
+  static String dayKey(DateTime date) =>
+      '${date.year}-${date.month.toString().padLeft(2, '0')}-${date.day.toString().padLeft(2, '0')}';
+
+  /// The day an invoice is rolled up under and what it adds there, or null
+  /// for cancelled invoices.
+  static MapEntry<String, Map<String, dynamic>>? share(InvoiceModel invoice) {
+    if (invoice.status.toLowerCase() == 'cancelled') return null;
+    final isSales = invoice.invoiceType == 'sales';
+    final items = <String, dynamic>{};
+    var quantity = 0;
+    var itemsTotal = 0.0;
+    for (final item in invoice.items) {
+      if (item.quantity <= 0) continue;
+      final lineTotal = item.price * item.quantity;
+      quantity += item.quantity;
+      itemsTotal += lineTotal;
+      final name = item.name.trim();
+      if (name.isEmpty) continue;
+      final totals = items.putIfAbsent(name, () => <String, dynamic>{'quantity': 0, 'revenue': 0.0}) as Map;
+      totals['quantity'] += item.quantity;
+      totals['revenue'] += lineTotal;
+    }
+    final customerId = invoice.customerId?.isNotEmpty == true ? invoice.customerId! : 'unknown';
+    final clientName = invoice.clientName.trim();
+    return MapEntry(dayKey(invoice.date), {
+      invoice.invoiceType: {
+        'invoiceCount': 1,
+        // Purchases have no refund adjustments, so they are valued from items.
+        'revenue': isSales ? invoice.effectiveRevenue : itemsTotal,
+        'paid': invoice.amountPaid,
+        'remaining': invoice.remainingAmount,
+        'quantity': quantity,
+        'items': items,
+        'customers': {
+          customerId: {
+            'name': clientName.isEmpty ? 'Unknown Customer' : clientName,
+            'phone': invoice.customerPhone ?? '',
+            'invoiceCount': 1,
+            'quantity': quantity,
+            'revenue': invoice.effectiveRevenue,
+            'paid': invoice.amountPaid,
+            'outstanding': invoice.remainingAmount,
+          },
+        },
+      },
+    });
+  }
+
+  /// Net change to each day's totals when every invoice in [changes] goes
+  /// from `before` to `after` (null for none), pruned as in [pruned]. Days
+  /// with nothing left to change are omitted.
+  static Map<String, Map<String, dynamic>> deltas(Iterable<(InvoiceModel?, InvoiceModel?)> changes) {
+    final deltas = <String, Map<String, dynamic>>{};
+    for (final (before, after) in changes) {
+      if (before != null) {
+        if (share(before) case final old?) addInto(deltas.putIfAbsent(old.key, () => {}), old.value, -1);
+      }
+      if (after != null) {
+        if (share(after) case final now?) addInto(deltas.putIfAbsent(now.key, () => {}), now.value);
+      }
+    }
+    return {
+      for (final MapEntry(key: day, value: delta) in deltas.entries)
+        if (pruned(delta) case final changed when changed.isNotEmpty) day: changed,
+    };
+  }
+
+  /// [delta] without zero changes, and without maps left with only labels
+  /// (customer name and phone). Empty if nothing changes.
+  static Map<String, dynamic> pruned(Map delta) {
+    final kept = <String, dynamic>{};
+    var changed = false;
+    delta.forEach((key, value) {
+      if (value is num) {
+        if (value.abs() < 1e-9) return;
+        kept[key as String] = value;
+        changed = true;
+      } else if (value is Map) {
+        final nested = pruned(value);
+        if (nested.isEmpty) return;
+        kept[key as String] = nested;
+        changed = true;
+      } else {
+        kept[key as String] = value;
+      }
+    });
+    return changed ? kept : const {};
+  }
+
+  /// Adds [source] into [target] ([sign] -1 subtracts): numbers are summed,
+  /// nested maps merged and anything else overwritten.
+  static void addInto(Map<String, dynamic> target, Map source, [int sign = 1]) {
+    source.forEach((key, value) {
+      if (value is num) {
+        target[key] = ((target[key] as num?) ?? 0) + sign * value;
+      } else if (value is Map) {
+        final nested = target[key] is Map ? Map<String, dynamic>.from(target[key] as Map) : <String, dynamic>{};
+        addInto(nested, value, sign);
+        target[key] = nested;
+      } else if (sign > 0) {
+        target[key] = value;
+      }
+    });
+  }
+
+  Map<String, dynamic> _type(String invoiceType) =>
+      Map<String, dynamic>.from(totals[invoiceType] as Map? ?? const {});
+
+  int invoiceCount(String invoiceType) => (_type(invoiceType)['invoiceCount'] as num?)?.toInt() ?? 0;
+  double revenue(String invoiceType) => (_type(invoiceType)['revenue'] as num?)?.toDouble() ?? 0.0;
+  double paid(String invoiceType) => (_type(invoiceType)['paid'] as num?)?.toDouble() ?? 0.0;
+  double remaining(String invoiceType) => (_type(invoiceType)['remaining'] as num?)?.toDouble() ?? 0.0;
+  int quantity(String invoiceType) => (_type(invoiceType)['quantity'] as num?)?.toInt() ?? 0;
+
+  /// Items with a positive quantity: name -> (quantity, revenue).
+  Map<String, ({int quantity, double revenue})> items(String invoiceType) {
+    final items = _type(invoiceType)['items'] as Map? ?? const {};
+    return {
+      for (final MapEntry(:key, :value) in items.entries)
+        if (((value as Map)['quantity'] as num? ?? 0) > 0)
+          (key as String): (
+            quantity: (value['quantity'] as num).toInt(),
+            revenue: (value['revenue'] as num?)?.toDouble() ?? 0.0,
+          ),
+    };
+  }
+
+  /// Customers with at least one invoice, keyed by customer id.
+  Map<String, Map<String, dynamic>> customers(String invoiceType) {
+    final customers = _type(invoiceType)['customers'] as Map? ?? const {};
+    return {
+      for (final MapEntry(:key, :value) in customers.entries)
+        if (((value as Map)['invoiceCount'] as num? ?? 0) > 0) (key as String): Map<String, dynamic>.from(value),
+    };
+  }
+}
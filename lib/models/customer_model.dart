@@ -11,6 +11,8 @@ class CustomerModel {
   final double totalPaid; // Lifetime total paid
   final int invoiceCount; // Total number of invoices
   final DateTime? lastPurchaseDate; // Last invoice date
+  final double outstandingBalance; // Sum of unpaid remainders of open invoices
+  final DateTime? statsReconciledAt; // Last time the stats were checked against invoices
 
   CustomerModel({
     required this.id,
@@ -23,6 +25,8 @@ class CustomerModel {
     this.totalPaid = 0.0,
     this.invoiceCount = 0,
     this.lastPurchaseDate,
+    this.outstandingBalance = 0.0,
+    this.statsReconciledAt,
   });
 
   Map<String, dynamic> toMap() {
@@ -37,6 +41,8 @@ class CustomerModel {
       'totalPaid': totalPaid,
       'invoiceCount': invoiceCount,
       'lastPurchaseDate': lastPurchaseDate?.toIso8601String(),
+      'outstandingBalance': outstandingBalance,
+      'statsReconciledAt': statsReconciledAt?.toIso8601String(),
     };
   }
 
@@ -52,6 +58,8 @@ class CustomerModel {
       totalPaid: (map['totalPaid'] ?? 0.0).toDouble(),
       invoiceCount: (map['invoiceCount'] ?? 0) as int,
       lastPurchaseDate: map['lastPurchaseDate'] != null ? DateTime.parse(map['lastPurchaseDate']) : null,
+      outstandingBalance: (map['outstandingBalance'] ?? 0.0).toDouble(),
+      statsReconciledAt: map['statsReconciledAt'] != null ? DateTime.parse(map['statsReconciledAt']) : null,
     );
   }
 
@@ -66,6 +74,8 @@ class CustomerModel {
     double? totalPaid,
     int? invoiceCount,
     DateTime? lastPurchaseDate,
+    double? outstandingBalance,
+    DateTime? statsReconciledAt,
   }) {
     return CustomerModel(
       id: id ?? this.id,
@@ -78,6 +88,8 @@ class CustomerModel {
       totalPaid: totalPaid ?? this.totalPaid,
       invoiceCount: invoiceCount ?? this.invoiceCount,
       lastPurchaseDate: lastPurchaseDate ?? this.lastPurchaseDate,
+      outstandingBalance: outstandingBalance ?? this.outstandingBalance,
+      statsReconciledAt: statsReconciledAt ?? this.statsReconciledAt,
     );
   }
 
@@ -0,0 +1,62 @@
+import 'invoice_model.dart';
+
+/// Filters for a paged invoice query. Null fields do not filter.
+class InvoiceFilter {
+  const InvoiceFilter({
+    this.status,
+    this.invoiceType,
+    this.customerId,
+    this.from,
+    this.to,
+  });
+
+  final String? status;
+  final String? invoiceType;
+  final String? customerId;
+
+  /// Inclusive bounds on the invoice date.
+  final DateTime? from;
+  final DateTime? to;
+
+  /// Whether [invoice] passes the filters, as the server query tests them.
+  bool matches(InvoiceModel invoice) =>
+      (status == null || invoice.status == status) &&
+      (invoiceType == null || invoice.invoiceType == invoiceType) &&
+      (customerId == null || invoice.customerId == customerId) &&
+      (from == null || !invoice.date.isBefore(from!)) &&
+      (to == null || !invoice.date.isAfter(to!));
+
+  @override
+  bool operator ==(Object other) =>
+      other is InvoiceFilter &&
+      other.status == status &&
+      other.invoiceType == invoiceType &&
+      other.customerId == customerId &&
+      other.from == from &&
+      other.to == to;
+
+  @override
+  int get hashCode => Object.hash(status, invoiceType, customerId, from, to);
+}
+
+/// Position after an invoice in (date desc, id desc) order. Holds just the
+/// two ordering values, so a cursor is kept for every page visited without
+/// keeping its documents.
+class InvoiceCursor {
+  const InvoiceCursor(this.date, this.id);
+
+  InvoiceCursor.after(InvoiceModel invoice) : this(invoice.date, invoice.id);
+
+  final DateTime date;
+  final String id;
+}
+
+/// One page of a paged invoice query.
+class InvoicePage {
+  const InvoicePage(this.invoices, this.next);
+
+  final List<InvoiceModel> invoices;
+
+  /// Where the following page starts; null on the last page.
+  final InvoiceCursor? next;
+}
@@ -10,6 +10,7 @@ import '../services/stock_map_service.dart';
 import '../services/return_service.dart';
 import '../services/catalog_service.dart';
 import '../services/inventory_service.dart';
+import '../services/search_index.dart';
 import '../utils/app_logger.dart';
 import '../widgets/enhanced_payment_details_widget.dart';
 import '../widgets/rate_edit_dialog.dart';
@@ -45,6 +46,10 @@ class _ChooseItemsInvoiceScreenState extends State<ChooseItemsInvoiceScreen> wit
   List<CatalogItem> _itemCatalog = [];
   Map<int, int> _stockMap = {};
   bool _catalogLoading = true;
+  final SearchIndex<CatalogItem> _catalogIndex = SearchIndex(
+    idOf: (item) => item.id.toString(),
+    fields: [(item) => item.name, (item) => item.category],
+  );
   
   // Performance optimizations
   Timer? _searchDebounce;
@@ -148,6 +153,7 @@ class _ChooseItemsInvoiceScreenState extends State<ChooseItemsInvoiceScreen> wit
       if (mounted) {
         setState(() {
           _itemCatalog = catalog;
+          _catalogIndex.replaceAll(catalog);
           _stockMap = stockMap;
           _catalogLoading = false;
         });
@@ -692,11 +698,9 @@ class _ChooseItemsInvoiceScreenState extends State<ChooseItemsInvoiceScreen> wit
     // Note: For sales invoices, _itemCatalog is already filtered to inventory items
     // in _loadCatalog(), so no additional filtering needed here
 
-    // Apply search filter
-    if (_search.isNotEmpty) {
-      filteredItems = filteredItems
-          .where((item) => item.name.toLowerCase().contains(_search.toLowerCase()))
-          .toList();
+    // Apply search filter (ranked, best match first)
+    if (_search.trim().isNotEmpty) {
+      filteredItems = _catalogIndex.search(_search);
     }
 
     // Apply category filter
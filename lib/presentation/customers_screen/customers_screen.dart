@@ -75,25 +75,21 @@ class _CustomersScreenState extends State<CustomersScreen> {
     _searchDebounce?.cancel();
 
     // Create new timer for 500ms debounce
-    _searchDebounce = Timer(const Duration(milliseconds: 500), () {
-      if (mounted) {
-        setState(() {
-          _searchQuery = query;
-
-          if (query.isEmpty) {
-            _filteredCustomers = List.from(_allCustomers);
-          } else {
-            final lowerQuery = query.toLowerCase();
-            _filteredCustomers = _allCustomers.where((customer) {
-              return customer.name.toLowerCase().contains(lowerQuery) ||
-                     customer.phoneNumber.contains(query);
-            }).toList();
-          }
+    _searchDebounce = Timer(const Duration(milliseconds: 500), () async {
+      if (!mounted) return;
+      _searchQuery = query;
+      // Name and phone are looked up in the customer search index.
+      final matches = query.trim().isEmpty
+          ? List<CustomerModel>.from(_allCustomers)
+          : await _customerService.searchCustomers(query);
+      // A newer query may have been typed while this one ran.
+      if (!mounted || _searchQuery != query) return;
+      setState(() {
+        _filteredCustomers = matches;
 
-          // Apply sorting after filtering
-          _sortCustomers();
-        });
-      }
+        // Apply sorting after filtering
+        _sortCustomers();
+      });
     });
   }
   
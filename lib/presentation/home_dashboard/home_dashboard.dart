@@ -11,14 +11,16 @@ import '../invoice_type_selection_screen.dart';
 import '../catalogue/business_type_selection_screen.dart';
 import '../../models/invoice_model.dart';
 import '../../models/customer_model.dart';
+import '../../models/inventory_item_model.dart';
 import '../../services/invoice_service.dart';
 import '../../services/csv_invoice_service.dart';
 import '../../services/notification_service.dart';
 import '../../services/background_service.dart';
-import '../../services/inventory_service.dart';
-import '../../services/event_service.dart';
 import '../../services/customer_service.dart';
+import '../../services/dashboard_repository.dart';
+import '../../services/startup_orchestrator.dart';
 import '../../utils/app_logger.dart';
+import '../../utils/perf_marks.dart';
 import './widgets/metric_card_widget.dart';
 import './widgets/recent_invoice_item_widget.dart';
 import '../../widgets/enhanced_bottom_nav.dart';
@@ -46,12 +48,12 @@ class _HomeDashboardState extends State<HomeDashboard> {
   late final CsvInvoiceService _csvInvoiceService;
   final InvoiceService _invoiceService = InvoiceService.instance;
   final CustomerService _customerService = CustomerService.instance;
-  final EventService _eventService = EventService();
+  final DashboardRepository _dashboard = DashboardRepository.instance;
   bool _isLoading = true;
   bool _isRefreshing = false;
   int _selectedIndex = 0;
   String _errorMessage = '';
-  StreamSubscription<String>? _eventSubscription;
+  StreamSubscription<DashboardDiff>? _dashboardSubscription;
 
   @override
   void initState() {
@@ -122,35 +124,37 @@ class _HomeDashboardState extends State<HomeDashboard> {
   }
 
   void _setupEventListening() {
-    _eventSubscription = _eventService.eventStream.listen((event) {
-      if (event == 'DashboardUpdated' || event == 'InventoryUpdated') {
-        _loadDashboardData();
-      }
+    // The repository follows invoice and inventory changes and sends only
+    // what changed; nothing is reloaded here.
+    _dashboardSubscription = _dashboard.diffs.listen((diff) {
+      if (!mounted || _isLoading) return;
+      setState(() {
+        _snapshot = diff.current;
+      });
     });
   }
 
   @override
   void dispose() {
-    _eventSubscription?.cancel();
+    _dashboardSubscription?.cancel();
     super.dispose();
   }
 
-  // Data from CSV
-  Map<String, dynamic> dashboardData = {};
-  List<InvoiceModel> recentInvoices = [];
-  List<InvoiceModel> allInvoices = [];
-  int inStockSKUs = 0;
-  int lowStockCount = 0;
-  int totalUnits = 0;
-  double inventoryValue = 0.0;
-  List<dynamic> lowStockItems = [];
+  // Materialized by DashboardRepository
+  DashboardSnapshot _snapshot = DashboardSnapshot.empty;
+  List<InvoiceModel> get recentInvoices => _snapshot.recentInvoices;
+  int get inStockSKUs => _snapshot.inStockSKUs;
+  int get lowStockCount => _snapshot.lowStockCount;
+  int get totalUnits => _snapshot.totalUnits;
+  double get inventoryValue => _snapshot.inventoryValue;
+  List<InventoryItem> get lowStockItems => _snapshot.lowStockItems;
   
   // Feature flag for new inventory UI
   static const bool kNewInventoryHome = true;
 
 
-  /// Loads dashboard data from CSV
-  Future<void> _loadDashboardData() async {
+  /// Loads the dashboard snapshot; [refresh] rebuilds it from the data
+  Future<void> _loadDashboardData({bool refresh = false}) async {
     if (!mounted) return;
     
     try {
@@ -161,30 +165,20 @@ class _HomeDashboardState extends State<HomeDashboard> {
 
       // Skip debug operations for performance
       
-      // Fetch dashboard metrics and invoices concurrently from CSV
-      final inventoryService = InventoryService();
-      final results = await Future.wait([
-        _invoiceService.fetchDashboardMetrics(),
-        _invoiceService.fetchRecentInvoices(),
-        _invoiceService.fetchAllInvoices(),
-        _getInventoryMetrics(),
-      ]);
+      // Built once, then kept current by the repository
+      final snapshot = await PerfMarks.measure(
+        'loadDashboardData',
+        () => refresh ? _dashboard.refresh() : _dashboard.load(),
+      );
       
       // Check if widget is still mounted before updating state
       if (!mounted) return;
 
       setState(() {
-        dashboardData = results[0] as Map<String, dynamic>;
-        recentInvoices = results[1] as List<InvoiceModel>;
-        allInvoices = results[2] as List<InvoiceModel>;
-        final inventoryData = results[3] as Map<String, dynamic>;
-        inStockSKUs = inventoryData['inStockSKUs'];
-        lowStockCount = inventoryData['lowStockCount'];
-        totalUnits = inventoryData['totalUnits'];
-        inventoryValue = inventoryData['inventoryValue'];
-        lowStockItems = inventoryData['lowStockItems'];
+        _snapshot = snapshot;
         _isLoading = false;
       });
+      StartupOrchestrator.instance.markInteractive();
 
       // Skip connection validation for faster loading
     } catch (e) {
@@ -241,7 +235,7 @@ class _HomeDashboardState extends State<HomeDashboard> {
     });
 
     try {
-      await _loadDashboardData();
+      await _loadDashboardData(refresh: true);
 
       if (mounted) {
         ScaffoldMessenger.of(context).showSnackBar(
@@ -619,7 +613,7 @@ class _HomeDashboardState extends State<HomeDashboard> {
                                   ),
                                   SizedBox(height: 0.5.h),
                                   Text(
-                                    'Last updated: ${dashboardData["lastUpdated"] != null ? _formatLastUpdated(dashboardData["lastUpdated"]) : 'Unknown'}',
+                                    'Last updated: ${_snapshot.lastUpdated != null ? _formatLastUpdated(_snapshot.lastUpdated!.toIso8601String()) : 'Unknown'}',
                                     style: Theme.of(context)
                                         .textTheme
                                         .bodySmall
@@ -680,11 +674,8 @@ class _HomeDashboardState extends State<HomeDashboard> {
                                   ),
                                 ).then((newInvoice) async {
                                   if (newInvoice != null && newInvoice is InvoiceModel) {
-                                    setState(() {
-                                      recentInvoices.insert(0, newInvoice);
-                                    });
+                                    // Reaches the dashboard as a change
                                     await _invoiceService.addInvoice(newInvoice);
-                                    await _loadDashboardData();
                                     ScaffoldMessenger.of(context).showSnackBar(
                                       SnackBar(content: Text('${newInvoice.invoiceType.substring(0, 1).toUpperCase()}${newInvoice.invoiceType.substring(1)} invoice added!')),
                                     );
@@ -736,42 +727,12 @@ class _HomeDashboardState extends State<HomeDashboard> {
   int _selectedFollowUpTab = 0; // 0 = Customer Dues, 1 = Your Dues
 
   Widget _buildPendingFollowupsSection() {
-    final now = DateTime.now();
-    final today = DateTime(now.year, now.month, now.day);
     final isDark = Theme.of(context).brightness == Brightness.dark;
     
-    // Filter customer pending invoices (sales invoices)
-    final pendingCustomerInvoices = allInvoices
-        .where((invoice) => 
-            invoice.invoiceType == 'sales' && 
-            invoice.status.toLowerCase() != 'paid' &&
-            invoice.paymentStatus == PaymentStatus.balanceDue &&
-            (invoice.followUpDate == null || 
-             DateTime(invoice.followUpDate!.year, invoice.followUpDate!.month, invoice.followUpDate!.day).isBefore(today) ||
-             DateTime(invoice.followUpDate!.year, invoice.followUpDate!.month, invoice.followUpDate!.day).isAtSameMomentAs(today)))
-        .toList();
-    
-    // Filter shopkeeper's own pending invoices (purchase invoices)
-    final pendingPurchaseInvoices = allInvoices
-        .where((invoice) => 
-            invoice.invoiceType == 'purchase' && 
-            invoice.status.toLowerCase() != 'paid' &&
-            invoice.paymentStatus == PaymentStatus.balanceDue)
-        .toList();
-    
-    // Sort customer invoices by remaining amount (highest first) and date (oldest first)
-    pendingCustomerInvoices.sort((a, b) {
-      final amountComparison = b.absoluteRemainingAmount.compareTo(a.absoluteRemainingAmount);
-      if (amountComparison != 0) return amountComparison;
-      return a.date.compareTo(b.date);
-    });
-    
-    // Sort purchase invoices by remaining amount (highest first) and date (oldest first)
-    pendingPurchaseInvoices.sort((a, b) {
-      final amountComparison = b.absoluteRemainingAmount.compareTo(a.absoluteRemainingAmount);
-      if (amountComparison != 0) return amountComparison;
-      return a.date.compareTo(b.date);
-    });
+    // Sales invoices due for follow-up and unpaid purchase invoices, each
+    // sorted by remaining amount (highest first) and date (oldest first)
+    final pendingCustomerInvoices = _snapshot.customerDues;
+    final pendingPurchaseInvoices = _snapshot.supplierDues;
     
     return Column(
       crossAxisAlignment: CrossAxisAlignment.start,
@@ -1314,21 +1275,11 @@ class _HomeDashboardState extends State<HomeDashboard> {
     try {
       final customers = await _customerService.getAllCustomers();
       final customersWithDues = <Map<String, dynamic>>[];
+      final dueByCustomer = _snapshot.dueByCustomer;
 
       for (final customer in customers) {
-        final allInvoices = await _invoiceService.fetchAllInvoices();
-        final invoices = allInvoices.where((inv) => inv.customerId == customer.id).toList();
-        final unpaidInvoices = invoices.where((inv) =>
-          inv.invoiceType == 'sales' &&
-          inv.paymentStatus == PaymentStatus.balanceDue
-        ).toList();
-
-        if (unpaidInvoices.isNotEmpty) {
-          final totalDue = unpaidInvoices.fold<double>(
-            0.0,
-            (sum, inv) => sum + inv.remainingAmount,
-          );
-
+        final totalDue = dueByCustomer[customer.id];
+        if (totalDue != null) {
           customersWithDues.add({
             'customer': customer,
             'due': totalDue,
@@ -1576,16 +1527,11 @@ class _HomeDashboardState extends State<HomeDashboard> {
   }
 
   void _markAsPaid(InvoiceModel invoice) {
-    // Update invoice status to paid
-    setState(() {
-      final index = allInvoices.indexWhere((inv) => inv.id == invoice.id);
-      if (index != -1) {
-        allInvoices[index] = invoice.copyWith(
-          status: 'paid',
-          amountPaid: invoice.total,
-        );
-      }
-    });
+    // Update invoice status to paid; the snapshot diff redraws the lists
+    _dashboard.applyInvoice(invoice.copyWith(
+      status: 'paid',
+      amountPaid: invoice.total,
+    ));
     
     // Show success message
     ScaffoldMessenger.of(context).showSnackBar(
@@ -1648,9 +1594,6 @@ void _showSnoozeDialog(InvoiceModel invoice) {
       
       Navigator.pop(context);
       
-      // Refresh the dashboard
-      await _loadDashboardData();
-      
       ScaffoldMessenger.of(context).showSnackBar(
         SnackBar(
           content: Text('Reminder snoozed for $days days'),
@@ -1773,7 +1716,6 @@ void _showSnoozeDialog(InvoiceModel invoice) {
 
   List<Widget> _buildRecentCustomers() {
     final isDark = Theme.of(context).brightness == Brightness.dark;
-    final uniqueCustomers = <String, InvoiceModel>{};
     final colors = [
       AppTheme.primaryLight,
       AppTheme.primaryVariantLight,
@@ -1784,11 +1726,9 @@ void _showSnoozeDialog(InvoiceModel invoice) {
     ];
 
     // Get unique customers from recent invoices, prioritizing most recent
-    for (final invoice in allInvoices.reversed) {
-      if (!uniqueCustomers.containsKey(invoice.clientName) && uniqueCustomers.length < 6) {
-        uniqueCustomers[invoice.clientName] = invoice;
-      }
-    }
+    final uniqueCustomers = {
+      for (final invoice in _snapshot.recentCustomers) invoice.clientName: invoice,
+    };
 
     if (uniqueCustomers.isEmpty) {
       return [
@@ -2282,24 +2222,6 @@ void _showSnoozeDialog(InvoiceModel invoice) {
     );
   }
 
-  Future<Map<String, dynamic>> _getInventoryMetrics() async {
-    final inventoryService = InventoryService();
-    final allItems = await inventoryService.getAllItems();
-    final lowStockItems = await inventoryService.getLowStockItems();
-    
-    final inStockSKUs = allItems.where((item) => item.currentStock > 0).length;
-    final totalUnits = allItems.fold<int>(0, (sum, item) => sum + item.currentStock.toInt());
-    final inventoryValue = allItems.fold<double>(0, (sum, item) => sum + (item.currentStock * item.avgCost));
-    
-    return {
-      'inStockSKUs': inStockSKUs,
-      'lowStockCount': lowStockItems.length,
-      'totalUnits': totalUnits,
-      'inventoryValue': inventoryValue,
-      'lowStockItems': lowStockItems,
-    };
-  }
-
   // Builds the inventory summary card with key metrics
   Widget _buildInventorySummaryCard() {
     final isDark = Theme.of(context).brightness == Brightness.dark;
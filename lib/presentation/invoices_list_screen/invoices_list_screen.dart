@@ -1,6 +1,8 @@
 import 'dart:async';
 import 'package:flutter/material.dart';
 import '../../models/invoice_model.dart';
+import '../../models/invoice_page_model.dart';
+import '../../services/invoice_page_repository.dart';
 import '../../services/invoice_service.dart';
 import 'package:sizer/sizer.dart';
 
@@ -23,182 +25,111 @@ class InvoicesListScreen extends StatefulWidget {
 class _InvoicesListScreenState extends State<InvoicesListScreen>
     with TickerProviderStateMixin {
   late TabController _tabController;
-  final ScrollController _scrollController = ScrollController();
   final TextEditingController _searchController = TextEditingController();
   Timer? _searchDebounce;
 
-  bool _isLoading = false;
-  bool _isLoadingMore = false;
-  bool _hasMore = true;
-  dynamic _lastDocument;
   bool _isMultiSelectMode = false;
   String _searchQuery = '';
+  List<InvoiceModel> _searchMatches = [];
   DateTimeRange? _selectedDateRange;
   String? _selectedInvoiceType;
   List<String> _selectedInvoices = [];
 
   final InvoiceService _invoiceService = InvoiceService.instance;
-  List<InvoiceModel> _allInvoices = [];
-  List<InvoiceModel> _filteredInvoices = [];
 
-  static const int _pageSize = 50;
+  // Invoices are paged from Firestore by filter; only a window of pages
+  // around the visible rows is held in memory.
+  InvoicePageRepository? _repository;
+  StreamSubscription<InvoiceListSnapshot>? _snapshotSubscription;
+  InvoiceListSnapshot _snapshot =
+      const InvoiceListSnapshot(offset: 0, invoices: [], hasMore: false, loading: true);
 
   @override
   void initState() {
     super.initState();
     _tabController = TabController(length: 3, vsync: this);
     _tabController.addListener(_onTabChanged);
-    _loadInvoices();
-    _scrollController.addListener(_onScroll);
+    _openRepository();
   }
   
   void _onTabChanged() {
-    _filterInvoices();
+    if (!_tabController.indexIsChanging) _openRepository();
   }
-  
 
+  /// Server-side filter for the current tab and filter sheet, or null when
+  /// they ask for different invoice types and nothing can match.
+  InvoiceFilter? _currentFilter() {
+    final tabType = switch (_tabController.index) {
+      1 => 'sales',
+      2 => 'purchase',
+      _ => null,
+    };
+    if (tabType != null && _selectedInvoiceType != null && tabType != _selectedInvoiceType) {
+      return null;
+    }
+    final range = _selectedDateRange;
+    return InvoiceFilter(
+      invoiceType: tabType ?? _selectedInvoiceType,
+      from: range?.start,
+      to: range == null ? null : DateTime(range.end.year, range.end.month, range.end.day, 23, 59, 59, 999),
+    );
+  }
 
-  Future<void> _loadInvoices() async {
-    if (_isLoading || _isLoadingMore) return;
+  void _openRepository() {
+    if (_searchQuery.isNotEmpty) _runSearch();
+    final filter = _currentFilter();
+    if (_repository != null && _repository!.filter == filter) return;
+
+    _snapshotSubscription?.cancel();
+    _repository?.dispose();
+    _repository = null;
+    if (filter == null) {
+      setState(() {
+        _snapshot = const InvoiceListSnapshot(offset: 0, invoices: [], hasMore: false);
+      });
+      return;
+    }
 
-    setState(() {
-      _isLoading = true;
-      _allInvoices = [];
-      _lastDocument = null;
-      _hasMore = true;
+    final repository = InvoicePageRepository(filter: filter);
+    _repository = repository;
+    _snapshotSubscription = repository.snapshots.listen((snapshot) {
+      if (mounted) setState(() => _snapshot = snapshot);
     });
-
-    try {
-      final result = await _invoiceService.fetchInvoicesPaginated(
-        limit: _pageSize,
-        lastDocument: null,
-        invoiceType: null,
-      );
-
-      if (mounted) {
-        setState(() {
-          _allInvoices = result['invoices'] as List<InvoiceModel>;
-          _lastDocument = result['lastDocument'];
-          _hasMore = result['hasMore'] as bool;
-          _isLoading = false;
-        });
-        _filterInvoices();
-      }
-    } catch (e) {
-      if (mounted) {
-        setState(() {
-          _isLoading = false;
-        });
-      }
-      // Optionally handle error (e.g., show toast)
-    }
+    unawaited(repository.start());
   }
 
   @override
   void dispose() {
     _tabController.dispose();
-    _scrollController.dispose();
     _searchController.dispose();
     _searchDebounce?.cancel();
+    _snapshotSubscription?.cancel();
+    _repository?.dispose();
     super.dispose();
   }
 
-  void _onScroll() {
-    // Load more when user is 80% through the list (not at the very bottom)
-    final threshold = _scrollController.position.maxScrollExtent * 0.8;
-    if (_scrollController.position.pixels >= threshold) {
-      _loadMoreInvoices();
-    }
-  }
-
-  Future<void> _loadMoreInvoices() async {
-    if (_isLoading || _isLoadingMore || !_hasMore) return;
-
-    setState(() {
-      _isLoadingMore = true;
-    });
-
-    try {
-      final result = await _invoiceService.fetchInvoicesPaginated(
-        limit: _pageSize,
-        lastDocument: _lastDocument,
-        invoiceType: null,
-      );
-
-      if (mounted) {
-        setState(() {
-          final newInvoices = result['invoices'] as List<InvoiceModel>;
-          _allInvoices.addAll(newInvoices);
-          _lastDocument = result['lastDocument'];
-          _hasMore = result['hasMore'] as bool;
-          _isLoadingMore = false;
-        });
-        _filterInvoices();
-      }
-    } catch (e) {
-      if (mounted) {
-        setState(() {
-          _isLoadingMore = false;
-        });
-      }
-      // Optionally handle error
-    }
-  }
-
   Future<void> _refreshInvoices() async {
-    setState(() {
-      
-    });
-    await _loadInvoices();
-    setState(() {
-      
-    });
+    await _repository?.refresh();
   }
 
-  void _filterInvoices() {
-    // Get base invoices for current tab
-    List<InvoiceModel> baseInvoices;
-    switch (_tabController.index) {
-      case 0: // All
-        baseInvoices = List.from(_allInvoices);
-        break;
-      case 1: // Sales
-        baseInvoices = _allInvoices.where((invoice) => invoice.invoiceType == 'sales').toList();
-        break;
-      case 2: // Purchase
-        baseInvoices = _allInvoices.where((invoice) => invoice.invoiceType == 'purchase').toList();
-        break;
-      default:
-        baseInvoices = List.from(_allInvoices);
+  /// Looks [_searchQuery] up in the invoice search index (number, client
+  /// name, phone) across all invoices, then applies the tab and filters.
+  Future<void> _runSearch() async {
+    final query = _searchQuery;
+    final filter = _currentFilter();
+    var matches = <InvoiceModel>[];
+    if (query.trim().isNotEmpty && filter != null) {
+      matches = (await _invoiceService.searchInvoices(query)).where((invoice) {
+        if (filter.invoiceType != null && invoice.invoiceType != filter.invoiceType) return false;
+        if (filter.from != null && invoice.date.isBefore(filter.from!)) return false;
+        if (filter.to != null && invoice.date.isAfter(filter.to!)) return false;
+        return true;
+      }).toList();
+    }
+    // A newer query may have been typed while this one ran.
+    if (mounted && query == _searchQuery) {
+      setState(() => _searchMatches = matches);
     }
-    
-    // Apply filters to base invoices
-    final searchLower = _searchQuery.toLowerCase();
-    
-    List<InvoiceModel> filtered = baseInvoices.where((invoice) {
-      if (_searchQuery.isNotEmpty) {
-        final matchesSearch = invoice.invoiceNumber.toLowerCase().contains(searchLower) ||
-                            invoice.clientName.toLowerCase().contains(searchLower);
-        if (!matchesSearch) return false;
-      }
-
-      if (_selectedDateRange != null) {
-        final matchesDateRange = invoice.date.isAfter(_selectedDateRange!.start) && 
-                               invoice.date.isBefore(_selectedDateRange!.end);
-        if (!matchesDateRange) return false;
-      }
-
-      if (_selectedInvoiceType != null) {
-        final matchesType = invoice.invoiceType == _selectedInvoiceType;
-        if (!matchesType) return false;
-      }
-
-      return true;
-    }).toList();
-
-    setState(() {
-      _filteredInvoices = filtered;
-    });
   }
 
   void _onSearchChanged(String query) {
@@ -211,7 +142,7 @@ class _InvoicesListScreenState extends State<InvoicesListScreen>
         setState(() {
           _searchQuery = query;
         });
-        _filterInvoices();
+        _runSearch();
       }
     });
   }
@@ -235,7 +166,7 @@ class _InvoicesListScreenState extends State<InvoicesListScreen>
           });
         },
         onApplyFilters: () {
-          _filterInvoices();
+          _openRepository();
           Navigator.pop(context);
         },
         onClearFilters: () {
@@ -243,7 +174,7 @@ class _InvoicesListScreenState extends State<InvoicesListScreen>
             _selectedDateRange = null;
             _selectedInvoiceType = null;
           });
-          _filterInvoices();
+          _openRepository();
           Navigator.pop(context);
         },
       ),
@@ -301,7 +232,8 @@ class _InvoicesListScreenState extends State<InvoicesListScreen>
                 }
                 
                 // Refresh the invoice list from database
-                await _loadInvoices();
+                await _repository?.refresh();
+                if (_searchQuery.isNotEmpty) await _runSearch();
                 
                 setState(() {
                   _selectedInvoices.clear();
@@ -370,11 +302,14 @@ class _InvoicesListScreenState extends State<InvoicesListScreen>
   }
 
   PreferredSizeWidget _buildAppBar() {
-    // Calculate counts for each tab
-    final allCount = _allInvoices.length;
-    final salesCount = _allInvoices.where((invoice) => invoice.invoiceType == 'sales').length;
-    final purchaseCount = _allInvoices.where((invoice) => invoice.invoiceType == 'purchase').length;
-    
+    // Only the open tab is loaded, and only page by page: it shows how many
+    // invoices have been fetched so far, with '+' while more pages remain.
+    final loadedCount = _snapshot.itemCount;
+    String tabLabel(int index, String label) {
+      if (_tabController.index != index || _snapshot.loading && loadedCount == 0) return label;
+      return '$label ($loadedCount${_snapshot.hasMore ? '+' : ''})';
+    }
+
     return AppBar(
       backgroundColor: AppTheme.lightTheme.appBarTheme.backgroundColor,
       elevation: AppTheme.lightTheme.appBarTheme.elevation,
@@ -384,9 +319,9 @@ class _InvoicesListScreenState extends State<InvoicesListScreen>
         unselectedLabelColor: Colors.white.withOpacity(0.7),
         indicatorColor: Colors.white,
         tabs: [
-          Tab(text: 'All ($allCount)'),
-          Tab(text: 'Sales ($salesCount)'),
-          Tab(text: 'Purchase ($purchaseCount)'),
+          Tab(text: tabLabel(0, 'All')),
+          Tab(text: tabLabel(1, 'Sales')),
+          Tab(text: tabLabel(2, 'Purchase')),
         ],
       ) : null,
       title: _isMultiSelectMode
@@ -471,60 +406,72 @@ class _InvoicesListScreenState extends State<InvoicesListScreen>
               _onSearchChanged('');
             },
           ),
-        Expanded(
-          child: _filteredInvoices.isEmpty
-              ? const EmptyStateWidget()
-              : RefreshIndicator(
-                  onRefresh: _refreshInvoices,
-                  color: AppTheme.lightTheme.colorScheme.primary,
-                  child: ListView.builder(
-                    controller: _scrollController,
-                    padding: EdgeInsets.symmetric(
-                      horizontal: 4.w,
-                      vertical: 2.h,
-                    ),
-                    // Use cacheExtent to improve scrolling performance
-                    cacheExtent: 500,
-                    itemCount: _filteredInvoices.length + (_isLoadingMore ? 1 : 0),
-                    // Add key to help Flutter optimize rebuilds
-                    key: PageStorageKey('invoice_list'),
-                    itemBuilder: (context, index) {
-                      if (index == _filteredInvoices.length) {
-                        return _buildLoadingIndicator();
-                      }
-
-                      final invoice = _filteredInvoices[index];
-                      final isSelected =
-                          _selectedInvoices.contains(invoice.id);
-
-                      // Add key to each item for better list performance
-                      return KeyedSubtree(
-                        key: ValueKey(invoice.id),
-                        child: InvoiceCardWidget(
-                          invoice: invoice,
-                          isMultiSelectMode: _isMultiSelectMode,
-                          isSelected: isSelected,
-                          onTap: () => _onInvoiceTap(invoice),
-                          onLongPress: () => _onInvoiceLongPress(invoice),
-                          onEdit: () {
-                            // Handle edit action
-                          },
-                          onShare: () {
-                            // Handle share action
-                          },
-                          onDelete: () {
-                            // Handle delete action
-                          },
-                        ),
-                      );
-                    },
-                  ),
-                ),
-        ),
+        Expanded(child: _buildList()),
       ],
     );
   }
 
+  Widget _buildList() {
+    final searching = _searchQuery.isNotEmpty;
+    final results = searching ? _searchMatches : null;
+    final rowCount = results?.length ?? _snapshot.itemCount;
+
+    if (rowCount == 0) {
+      return _snapshot.loading ? const Center(child: AppLoadingIndicator.inline()) : const EmptyStateWidget();
+    }
+    return RefreshIndicator(
+      onRefresh: _refreshInvoices,
+      color: AppTheme.lightTheme.colorScheme.primary,
+      child: ListView.builder(
+        padding: EdgeInsets.symmetric(
+          horizontal: 4.w,
+          vertical: 2.h,
+        ),
+        // Use cacheExtent to improve scrolling performance
+        cacheExtent: 500,
+        itemCount: rowCount + (!searching && _snapshot.hasMore ? 1 : 0),
+        // Add key to help Flutter optimize rebuilds
+        key: PageStorageKey('invoice_list_${_tabController.index}'),
+        itemBuilder: (context, index) {
+          if (!searching) _repository?.didShow(index);
+          if (index == rowCount) {
+            return _buildLoadingIndicator();
+          }
+
+          final invoice = results != null ? results[index] : _snapshot[index];
+          if (invoice == null) {
+            // Row of a page dropped from the window; it is reloaded as the
+            // user scrolls back towards it.
+            return SizedBox(height: 15.h);
+          }
+          final isSelected =
+              _selectedInvoices.contains(invoice.id);
+
+          // Add key to each item for better list performance
+          return KeyedSubtree(
+            key: ValueKey(invoice.id),
+            child: InvoiceCardWidget(
+              invoice: invoice,
+              isMultiSelectMode: _isMultiSelectMode,
+              isSelected: isSelected,
+              onTap: () => _onInvoiceTap(invoice),
+              onLongPress: () => _onInvoiceLongPress(invoice),
+              onEdit: () {
+                // Handle edit action
+              },
+              onShare: () {
+                // Handle share action
+              },
+              onDelete: () {
+                // Handle delete action
+              },
+            ),
+          );
+        },
+      ),
+    );
+  }
+
   Widget _buildLoadingIndicator() {
     return Container(
       padding: EdgeInsets.all(4.w),
@@ -3,8 +3,7 @@ import 'package:sizer/sizer.dart';
 import 'package:file_picker/file_picker.dart';
 import 'package:provider/provider.dart';
 import 'dart:io';
-import 'package:csv/csv.dart';
-import 'package:invoiceflow/services/items_service.dart';
+import 'package:invoiceflow/services/csv_import_service.dart';
 import 'package:invoiceflow/providers/auth_provider.dart';
 import '../../home_dashboard/home_dashboard.dart';
 
@@ -16,12 +15,15 @@ class CsvUploadScreen extends StatefulWidget {
 }
 
 class _CsvUploadScreenState extends State<CsvUploadScreen> {
-  final ItemsService _itemsService = ItemsService();
   bool _isLoading = false;
   String _fileName = '';
   String _status = '';
   bool _hasValidFile = false;
-  List<Map<String, dynamic>> _previewData = [];
+  // Only the first rows are read for the preview; the import streams the
+  // whole file.
+  String? _filePath;
+  int _rowCount = 0;
+  List<Map<String, String>> _previewData = [];
 
   @override
   Widget build(BuildContext context) {
@@ -196,7 +198,7 @@ class _CsvUploadScreenState extends State<CsvUploadScreen> {
                 ),
                 Spacer(),
                 Text(
-                  '${_previewData.length} items',
+                  '$_rowCount items',
                   style: TextStyle(
                     fontSize: 11.sp,
                     color: Colors.grey[600],
@@ -276,7 +278,7 @@ class _CsvUploadScreenState extends State<CsvUploadScreen> {
               ],
             )
           : Text(
-              'Import ${_previewData.length} Items to Catalog',
+              'Import $_rowCount Items to Catalog',
               style: TextStyle(
                 fontSize: 13.sp,
                 fontWeight: FontWeight.w600,
@@ -324,23 +326,14 @@ class _CsvUploadScreenState extends State<CsvUploadScreen> {
 
   Future<void> _processFile(File file) async {
     try {
-      final input = await file.readAsString();
-      final List<List<dynamic>> rows = const CsvToListConverter().convert(input);
-      
-      if (rows.isNotEmpty) {
-        final headers = rows.first.map((e) => e.toString()).toList();
-        final List<Map<String, dynamic>> data = [];
-        
-        for (var i = 1; i < rows.length; i++) {
-          final Map<String, dynamic> rowData = {};
-          for (var j = 0; j < headers.length; j++) {
-            rowData[headers[j]] = rows[i][j];
-          }
-          data.add(rowData);
-        }
-        
+      final preview = await CsvImportService.preview(file.path);
+      final rowCount = await CsvImportService.countRows(file.path);
+
+      if (preview.isNotEmpty) {
         setState(() {
-          _previewData = data;
+          _filePath = file.path;
+          _previewData = preview;
+          _rowCount = rowCount;
           _hasValidFile = true;
           _status = 'File processed successfully';
         });
@@ -354,45 +347,41 @@ class _CsvUploadScreenState extends State<CsvUploadScreen> {
   }
 
   Future<void> _importItems() async {
+    final path = _filePath;
+    if (path == null) return;
     setState(() {
       _isLoading = true;
       _status = 'Importing items...';
     });
 
     try {
-      List<ProductCatalogItem> catalogItems = [];
-      List<String> errors = [];
-
-      for (int i = 0; i < _previewData.length; i++) {
-        try {
-          final item = _createItemFromRow(_previewData[i], i);
-          if (item != null) {
-            catalogItems.add(item);
-          }
-        } catch (e) {
-          errors.add('Row ${i + 1} error: $e');
-        }
-      }
+      // Rows are parsed in a background isolate and committed in batches;
+      // a failed import resumes where it stopped when retried.
+      final result = await CsvImportService.instance.importFile(
+        path,
+        CsvImportKind.items,
+        onProgress: (progress) {
+          if (!mounted) return;
+          setState(() {
+            _status = 'Imported ${progress.imported} items (${(progress.fraction * 100).round()}%)';
+          });
+        },
+      );
 
-      // Import all items to catalog in batch
-      if (catalogItems.isNotEmpty) {
-        await _itemsService.addMultipleItems(catalogItems);
-      }
-      
       // Show success message
       ScaffoldMessenger.of(context).showSnackBar(
         SnackBar(
-          content: Text('Successfully imported ${catalogItems.length} items to your catalog!'),
+          content: Text('Successfully imported ${result.imported} items to your catalog!'),
           backgroundColor: Colors.green,
           behavior: SnackBarBehavior.floating,
         ),
       );
 
-      if (errors.isNotEmpty) {
+      if (result.invalid > 0 || result.duplicates > 0) {
         // Show error details if needed
         ScaffoldMessenger.of(context).showSnackBar(
           SnackBar(
-            content: Text('${errors.length} items had errors'),
+            content: Text('${result.invalid} items had errors, ${result.duplicates} were already in your catalog'),
             backgroundColor: Colors.orange,
             behavior: SnackBarBehavior.floating,
           ),
@@ -429,59 +418,4 @@ class _CsvUploadScreenState extends State<CsvUploadScreen> {
       });
     }
   }
-
-  ProductCatalogItem? _createItemFromRow(Map<String, dynamic> row, int index) {
-    String? name;
-    double? price;
-    String? sku;
-    String category = 'General';
-    String unit = 'pcs';
-    String? description;
-    String? barcode;
-
-    // Extract data from row
-    for (final entry in row.entries) {
-      final key = entry.key.toString().toLowerCase();
-      final value = entry.value?.toString().trim();
-
-      if (value == null || value.isEmpty) continue;
-
-      if (key.contains('name') || key.contains('item')) {
-        name = value;
-      } else if (key.contains('price') || key.contains('rate') || key.contains('cost')) {
-        price = double.tryParse(value);
-      } else if (key.contains('sku') || key.contains('code')) {
-        sku = value;
-      } else if (key.contains('category') || key.contains('type')) {
-        category = value;
-      } else if (key.contains('unit') || key.contains('uom')) {
-        unit = value;
-      } else if (key.contains('description') || key.contains('desc')) {
-        description = value;
-      } else if (key.contains('barcode') || key.contains('bar_code')) {
-        barcode = value;
-      }
-    }
-
-    // Validate required fields
-    if (name == null || name.isEmpty || price == null || price <= 0) {
-      return null;
-    }
-
-    // Generate SKU if not provided
-    sku = sku?.isNotEmpty == true ? sku : 'CSV${DateTime.now().millisecondsSinceEpoch.toString().substring(8)}_$index';
-
-    return ProductCatalogItem(
-      id: '${DateTime.now().millisecondsSinceEpoch}_csv_$index',
-      name: name,
-      sku: sku!,
-      category: category,
-      unit: unit,
-      rate: price,
-      barcode: barcode,
-      description: description,
-      createdAt: DateTime.now(),
-      updatedAt: DateTime.now(),
-    );
-  }
-}
\ No newline at end of file
+}
@@ -4,8 +4,13 @@ import 'package:flutter/material.dart';
 import 'package:firebase_auth/firebase_auth.dart';
 import 'package:shared_preferences/shared_preferences.dart';
 
+import '../services/analytics_cache.dart';
 import '../services/auth_service.dart';
+import '../services/dashboard_repository.dart';
+import '../services/firestore_service.dart';
+import '../services/inventory_firestore_service.dart';
 import '../services/items_service.dart';
+import '../services/pdf_cache.dart';
 
 class AuthProvider extends ChangeNotifier {
   final AuthService _authService = AuthService();
@@ -203,6 +208,12 @@ class AuthProvider extends ChangeNotifier {
     try {
       _setLoading(true);
       _error = null;
+      DashboardRepository.instance.clear();
+      FirestoreService.instance.stopSync();
+      InventoryFirestoreService.instance.stopSync();
+      _itemsService.stopSync();
+      await AnalyticsCache.instance.clear();
+      await PdfCache.instance.clear();
       await _authService.signOut();
       // authStateChanges listener will update _user -> null and notify
     } catch (e) {
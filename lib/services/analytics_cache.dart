@@ -0,0 +1,219 @@
+import 'dart:async';
+import 'dart:collection';
+import 'dart:convert';
+
+import 'package:shared_preferences/shared_preferences.dart';
+
+import '../models/analytics_rollup_model.dart';
+import '../utils/app_logger.dart';
+import 'event_service.dart';
+
+/// Data an analytics result is computed from.
+enum AnalyticsDependency { invoices, returns, customers }
+
+/// Two-tier cache for analytics results.
+///
+/// Results are kept as the objects the caller computed, in an LRU of
+/// [maxEntries]. Callers that pass `fromJson` also get a copy on disk
+/// (SharedPreferences). The disk copy is read only after a memory miss,
+/// e.g. after a restart.
+///
+/// An entry is dropped when the [EventService] reports a change to data it
+/// depends on: InvoicesUpdated, ReturnsUpdated or CustomersUpdated.
+/// FirestoreService raises these for its own writes and for changes its
+/// listeners pick up from other devices. DashboardUpdated drops everything.
+/// A result whose dependencies change while it is being computed is
+/// returned but not cached.
+///
+/// Results cover ranges such as 'Today' or 'Last 7 days', so everything,
+/// on disk too, is also dropped on the first read of a new day.
+class AnalyticsCache {
+  static final AnalyticsCache instance = AnalyticsCache._internal();
+  AnalyticsCache._internal() {
+    EventService().eventStream.listen(_onEvent);
+  }
+
+  static const String _diskPrefix = 'analytics_cache.v2.';
+  static const String _diskIndexKey = '${_diskPrefix}index';
+  static const String _diskDayKey = '${_diskPrefix}day';
+
+  int maxEntries = 32;
+
+  /// Tells the cache what day it is.
+  DateTime Function() clock = DateTime.now;
+
+  /// Day key the cached entries were computed on.
+  String? _day;
+
+  final LinkedHashMap<String, _CacheEntry> _memory = LinkedHashMap<String, _CacheEntry>();
+  final Map<String, Future<Object?>> _inFlight = {};
+  final Map<AnalyticsDependency, int> _generations = {for (final d in AnalyticsDependency.values) d: 0};
+
+  /// Disk key -> dependencies, loaded on first disk access.
+  Map<String, Set<AnalyticsDependency>>? _diskIndex;
+
+  /// Returns the cached result for [key], computing it with [compute] on a
+  /// miss. Concurrent misses for the same key share one computation.
+  Future<T> get<T>(
+    String key,
+    Set<AnalyticsDependency> dependsOn,
+    Future<T> Function() compute, {
+    T Function(Object? json)? fromJson,
+  }) async {
+    final today = AnalyticsRollup.dayKey(clock());
+    if (_day != today) await _rollOver(today);
+
+    final hit = _memory.remove(key);
+    if (hit != null) {
+      _memory[key] = hit; // most recently used
+      return hit.value as T;
+    }
+    final pending = _inFlight[key];
+    if (pending != null) return await pending as T;
+
+    final future = _load<T>(key, dependsOn, compute, fromJson);
+    _inFlight[key] = future;
+    try {
+      return await future;
+    } finally {
+      if (identical(_inFlight[key], future)) _inFlight.remove(key);
+    }
+  }
+
+  Future<T> _load<T>(
+    String key,
+    Set<AnalyticsDependency> dependsOn,
+    Future<T> Function() compute,
+    T Function(Object? json)? fromJson,
+  ) async {
+    final generations = {for (final d in dependsOn) d: _generations[d]!};
+    bool unchanged() => generations.entries.every((e) => _generations[e.key] == e.value);
+
+    if (fromJson != null) {
+      final stored = await _readDisk(key);
+      if (stored != null && unchanged()) {
+        try {
+          final value = fromJson(stored);
+          _remember(key, value, dependsOn);
+          return value;
+        } catch (e) {
+          AppLogger.debug('Analytics cache entry $key unreadable: $e', 'Analytics');
+        }
+      }
+    }
+
+    final value = await compute();
+    if (!unchanged()) return value;
+    _remember(key, value, dependsOn);
+    if (fromJson != null) unawaited(_writeDisk(key, value, dependsOn));
+    return value;
+  }
+
+  void _remember(String key, Object? value, Set<AnalyticsDependency> dependsOn) {
+    _memory[key] = _CacheEntry(value, dependsOn);
+    while (_memory.length > maxEntries) {
+      _memory.remove(_memory.keys.first);
+    }
+  }
+
+  /// Drops every entry that depends on any of [dependencies].
+  Future<void> invalidate(Iterable<AnalyticsDependency> dependencies) async {
+    final changed = dependencies.toSet();
+    if (changed.isEmpty) return;
+    for (final d in changed) {
+      _generations[d] = _generations[d]! + 1;
+    }
+    _memory.removeWhere((_, entry) => entry.dependsOn.any(changed.contains));
+    _inFlight.clear();
+
+    final prefs = await SharedPreferences.getInstance();
+    final index = await _loadDiskIndex(prefs);
+    final stale = [
+      for (final MapEntry(:key, :value) in index.entries)
+        if (value.any(changed.contains)) key,
+    ];
+    if (stale.isEmpty) return;
+    for (final key in stale) {
+      index.remove(key);
+      await prefs.remove('$_diskPrefix$key');
+    }
+    await _saveDiskIndex(prefs, index);
+  }
+
+  /// Drops entries computed on an earlier day, including ones left on disk
+  /// by an earlier run.
+  Future<void> _rollOver(String today) async {
+    _day = today;
+    final prefs = await SharedPreferences.getInstance();
+    if (prefs.getString(_diskDayKey) == today) return;
+    await clear();
+    await prefs.setString(_diskDayKey, today);
+  }
+
+  /// Drops everything, in memory and on disk (e.g. on sign-out).
+  Future<void> clear() => invalidate(AnalyticsDependency.values);
+
+  void _onEvent(String event) {
+    final dependencies = switch (event) {
+      'InvoicesUpdated' => const [AnalyticsDependency.invoices],
+      'ReturnsUpdated' => const [AnalyticsDependency.returns],
+      'CustomersUpdated' => const [AnalyticsDependency.customers],
+      'DashboardUpdated' => AnalyticsDependency.values,
+      _ => const <AnalyticsDependency>[],
+    };
+    unawaited(invalidate(dependencies));
+  }
+
+  Future<Object?> _readDisk(String key) async {
+    final prefs = await SharedPreferences.getInstance();
+    if (!(await _loadDiskIndex(prefs)).containsKey(key)) return null;
+    final json = prefs.getString('$_diskPrefix$key');
+    return json == null ? null : jsonDecode(json);
+  }
+
+  Future<void> _writeDisk(String key, Object? value, Set<AnalyticsDependency> dependsOn) async {
+    try {
+      final prefs = await SharedPreferences.getInstance();
+      final index = await _loadDiskIndex(prefs);
+      await prefs.setString('$_diskPrefix$key', jsonEncode(value));
+      index[key] = dependsOn;
+      await _saveDiskIndex(prefs, index);
+    } catch (e) {
+      AppLogger.debug('Analytics cache entry $key not stored: $e', 'Analytics');
+    }
+  }
+
+  Future<Map<String, Set<AnalyticsDependency>>> _loadDiskIndex(SharedPreferences prefs) async {
+    final loaded = _diskIndex;
+    if (loaded != null) return loaded;
+
+    // Entries of the old time-expiring JSON cache are never read again.
+    for (final key in prefs.getKeys().where((k) => k.startsWith('analytics_cache_')).toList()) {
+      await prefs.remove(key);
+    }
+    final index = <String, Set<AnalyticsDependency>>{};
+    final json = prefs.getString(_diskIndexKey);
+    if (json != null) {
+      (jsonDecode(json) as Map<String, dynamic>).forEach((key, names) {
+        index[key] = {
+          for (final name in names as List)
+            for (final d in AnalyticsDependency.values)
+              if (d.name == name) d,
+        };
+      });
+    }
+    return _diskIndex ??= index;
+  }
+
+  Future<void> _saveDiskIndex(SharedPreferences prefs, Map<String, Set<AnalyticsDependency>> index) =>
+      prefs.setString(_diskIndexKey, jsonEncode({
+        for (final MapEntry(:key, :value) in index.entries) key: [for (final d in value) d.name],
+      }));
+}
+
+class _CacheEntry {
+  _CacheEntry(this.value, this.dependsOn);
+
+  final Object? value;
+  final Set<AnalyticsDependency> dependsOn;
+}
@@ -1,25 +1,23 @@
+import '../models/analytics_rollup_model.dart';
 import '../models/customer_model.dart';
 import '../models/invoice_model.dart';
 import '../models/product_categories.dart';
 import '../models/return_model.dart';
+import '../utils/app_logger.dart';
+import './analytics_cache.dart';
 import './firestore_service.dart';
-import 'package:shared_preferences/shared_preferences.dart';
-import 'dart:convert';
 
 class AnalyticsService {
   final FirestoreService _fs = FirestoreService.instance;
+  final AnalyticsCache _cache = AnalyticsCache.instance;
 
-  // Cache expiry duration (30 minutes for better performance, still reasonable for multi-device sync)
-  static const int _cacheExpiryMinutes = 30;
+  static List<Map<String, dynamic>> _rowsFromJson(Object? json) =>
+      [for (final row in json as List) Map<String, dynamic>.from(row as Map)];
 
   /// Invalidate all analytics cache
   Future<void> invalidateCache() async {
-    final prefs = await SharedPreferences.getInstance();
-    final keys = prefs.getKeys().where((k) => k.startsWith('analytics_cache_')).toList();
-    for (final key in keys) {
-      await prefs.remove(key);
-    }
-    print('✓ Analytics cache cleared (${keys.length} entries)');
+    await _cache.clear();
+    print('✓ Analytics cache cleared');
   }
 
   /// Force refresh analytics (bypasses cache)
@@ -31,38 +29,6 @@ class AnalyticsService {
     return await getFilteredAnalytics(dateRange, salesOnly: salesOnly);
   }
 
-  /// Get cached data or compute and cache
-  Future<T?> _getCached<T>(String cacheKey, Future<T> Function() compute) async {
-    final prefs = await SharedPreferences.getInstance();
-    final cachedJson = prefs.getString('analytics_cache_$cacheKey');
-    final cachedTime = prefs.getInt('analytics_cache_time_$cacheKey');
-
-    // Check if cache is valid
-    if (cachedJson != null && cachedTime != null) {
-      final age = DateTime.now().millisecondsSinceEpoch - cachedTime;
-      if (age < _cacheExpiryMinutes * 60 * 1000) {
-        try {
-          return jsonDecode(cachedJson) as T;
-        } catch (e) {
-          print('Cache decode error for $cacheKey: $e');
-        }
-      }
-    }
-
-    // Compute fresh data
-    final result = await compute();
-
-    // Cache the result
-    try {
-      await prefs.setString('analytics_cache_$cacheKey', jsonEncode(result));
-      await prefs.setInt('analytics_cache_time_$cacheKey', DateTime.now().millisecondsSinceEpoch);
-    } catch (e) {
-      print('Cache encode error for $cacheKey: $e');
-    }
-
-    return result;
-  }
-
   DateTime _calculateStartDate(String dateRange) {
     final now = DateTime.now();
     switch (dateRange) {
@@ -111,18 +77,37 @@ class AnalyticsService {
   // Get customer purchase history and analytics
   // Add methods needed by analytics_screen.dart
   Future<List<Map<String, dynamic>>> getFilteredAnalytics(String dateRange, {bool salesOnly = true}) async {
-    // Use cache for analytics
-    final cacheKey = 'filtered_analytics_${dateRange}_${salesOnly}';
-    final cached = await _getCached<List<dynamic>>(cacheKey, () async => await _computeFilteredAnalytics(dateRange, salesOnly));
-
-    return cached?.cast<Map<String, dynamic>>() ?? [];
+    final rows = await _cache.get(
+      'filtered_analytics_${dateRange}_$salesOnly',
+      const {AnalyticsDependency.invoices},
+      () => _computeFilteredAnalytics(dateRange, salesOnly),
+      fromJson: _rowsFromJson,
+    );
+    return List.of(rows);
   }
 
   Future<List<Map<String, dynamic>>> _computeFilteredAnalytics(String dateRange, bool salesOnly) async {
     try {
-      // SCALABILITY FIX: Use date-filtered query instead of fetching all invoices
       final DateTime startDate = _calculateStartDate(dateRange);
 
+      final rollup = await _fs.getAnalyticsRollup(start: startDate);
+      if (rollup != null) {
+        final result = [
+          for (final type in salesOnly ? const ['sales'] : const ['sales', 'purchase'])
+            for (final MapEntry(key: itemName, value: totals) in rollup.items(type).entries)
+              {
+                'itemName': itemName,
+                'quantitySold': totals.quantity,
+                'revenue': totals.revenue,
+                'averagePrice': totals.revenue > 0 ? double.parse((totals.revenue / totals.quantity).toStringAsFixed(2)) : 0.0,
+                'invoiceType': type,
+              },
+        ]..sort((a, b) => (b['revenue'] as double).compareTo(a['revenue'] as double));
+        AppLogger.debug('${result.length} items from analytics rollups ($dateRange, salesOnly: $salesOnly)', 'Analytics');
+        return result;
+      }
+
+      // Rollups still backfilling: group the invoices here.
       final invoices = await _fs.getInvoicesByDateRange(
         startDate: startDate,
         invoiceType: salesOnly ? 'sales' : null,
@@ -234,28 +219,15 @@ class AnalyticsService {
     }
   }
   
-  Future<Map<String, dynamic>> getChartAnalytics(String dateRange) async {
-    try {
-      // SCALABILITY FIX: Use date-filtered query
-      final DateTime startDate = _calculateStartDate(dateRange);
-      final filteredInvoices = await _fs.getInvoicesByDateRange(
-        startDate: startDate,
-        limit: 5000,
+  Future<Map<String, dynamic>> getChartAnalytics(String dateRange) => _cache.get(
+        'chart_analytics_$dateRange',
+        const {AnalyticsDependency.invoices, AnalyticsDependency.returns},
+        () => _computeChartAnalytics(dateRange),
       );
 
-      // Warn if result may be truncated
-      if (filteredInvoices.length >= 5000) {
-        print('⚠️ WARNING: Chart analytics may be incomplete. Result limit (5000) reached.');
-      }
-
-      if (filteredInvoices.isEmpty) {
-        return {
-          'salesVsPurchases': {'sales': 0.0, 'purchases': 0.0},
-          'revenueTrend': [],
-          'topSellingItems': [],
-          'outstandingPayments': {'paid': 0.0, 'remaining': 0.0},
-        };
-      }
+  Future<Map<String, dynamic>> _computeChartAnalytics(String dateRange) async {
+    try {
+      final DateTime startDate = _calculateStartDate(dateRange);
 
       // Sales vs Purchases
       double salesRevenue = 0.0;
@@ -272,50 +244,82 @@ class AnalyticsService {
       Map<String, double> itemRevenue = {};
       Map<String, int> itemQuantity = {};
 
-      for (final invoice in filteredInvoices) {
-        final dateKey = '${invoice.date.year}-${invoice.date.month.toString().padLeft(2, '0')}-${invoice.date.day.toString().padLeft(2, '0')}';
-
-        // Use effectiveRevenue (adjustedTotal) instead of calculating from items
-        // This properly accounts for refund adjustments
-        final invoiceRevenue = invoice.effectiveRevenue;
+      final rollup = await _fs.getAnalyticsRollup(start: startDate);
+      if (rollup != null) {
+        salesRevenue = rollup.revenue('sales');
+        purchaseRevenue = rollup.revenue('purchase');
+        totalPaid = rollup.paid('sales');
+        totalRemaining = rollup.remaining('sales');
+        dailyRevenue = Map.of(rollup.dailySalesRevenue);
+        rollup.items('sales').forEach((itemName, totals) {
+          itemRevenue[itemName] = totals.revenue;
+          itemQuantity[itemName] = totals.quantity;
+        });
+      } else {
+        final filteredInvoices = await _fs.getInvoicesByDateRange(
+          startDate: startDate,
+          limit: 5000,
+        );
+
+        // Warn if result may be truncated
+        if (filteredInvoices.length >= 5000) {
+          print('⚠️ WARNING: Chart analytics may be incomplete. Result limit (5000) reached.');
+        }
 
-        // Top items (only for sales) - still track gross items for item-level analytics
-        // Note: These will be adjusted for returns in a separate method
-        if (invoice.invoiceType == 'sales') {
-          for (final item in invoice.items) {
-            final quantity = item.quantity;
-            final price = item.price;
+        if (filteredInvoices.isEmpty) {
+          return {
+            'salesVsPurchases': {'sales': 0.0, 'purchases': 0.0},
+            'revenueTrend': [],
+            'topSellingItems': [],
+            'outstandingPayments': {'paid': 0.0, 'remaining': 0.0},
+          };
+        }
 
-            // Skip items with zero or negative quantity
-            if (quantity <= 0) {
-              continue;
+        for (final invoice in filteredInvoices) {
+          final dateKey = '${invoice.date.year}-${invoice.date.month.toString().padLeft(2, '0')}-${invoice.date.day.toString().padLeft(2, '0')}';
+
+          // Use effectiveRevenue (adjustedTotal) instead of calculating from items
+          // This properly accounts for refund adjustments
+          final invoiceRevenue = invoice.effectiveRevenue;
+
+          // Top items (only for sales) - still track gross items for item-level analytics
+          // Note: These will be adjusted for returns in a separate method
+          if (invoice.invoiceType == 'sales') {
+            for (final item in invoice.items) {
+              final quantity = item.quantity;
+              final price = item.price;
+
+              // Skip items with zero or negative quantity
+              if (quantity <= 0) {
+                continue;
+              }
+
+              final itemTotal = price * quantity;
+              final itemName = item.name;
+              itemRevenue[itemName] = (itemRevenue[itemName] ?? 0.0) + itemTotal;
+              itemQuantity[itemName] = (itemQuantity[itemName] ?? 0) + quantity;
             }
-
-            final itemTotal = price * quantity;
-            final itemName = item.name;
-            itemRevenue[itemName] = (itemRevenue[itemName] ?? 0.0) + itemTotal;
-            itemQuantity[itemName] = (itemQuantity[itemName] ?? 0) + quantity;
           }
-        }
 
-        if (invoice.invoiceType == 'sales') {
-          salesRevenue += invoiceRevenue;
-          totalPaid += invoice.amountPaid;
-          totalRemaining += invoice.remainingAmount;
-          // Revenue trend (only sales)
-          dailyRevenue[dateKey] = (dailyRevenue[dateKey] ?? 0.0) + invoiceRevenue;
-        } else {
-          // For purchase invoices, calculate from items (no refund adjustments on purchases)
-          double purchaseInvoiceRevenue = 0.0;
-          for (final item in invoice.items) {
-            if (item.quantity > 0) {
-              purchaseInvoiceRevenue += item.price * item.quantity;
+          if (invoice.invoiceType == 'sales') {
+            salesRevenue += invoiceRevenue;
+            totalPaid += invoice.amountPaid;
+            totalRemaining += invoice.remainingAmount;
+            // Revenue trend (only sales)
+            dailyRevenue[dateKey] = (dailyRevenue[dateKey] ?? 0.0) + invoiceRevenue;
+          } else {
+            // For purchase invoices, calculate from items (no refund adjustments on purchases)
+            double purchaseInvoiceRevenue = 0.0;
+            for (final item in invoice.items) {
+              if (item.quantity > 0) {
+                purchaseInvoiceRevenue += item.price * item.quantity;
+              }
             }
+            purchaseRevenue += purchaseInvoiceRevenue;
           }
-          purchaseRevenue += purchaseInvoiceRevenue;
         }
       }
-      
+
       // Subtract returns from item analytics
       try {
         final allReturns = await _fs.getReturns();
@@ -381,19 +385,15 @@ class AnalyticsService {
     }
   }
   
-  Future<Map<String, dynamic>> fetchPerformanceInsights(String dateRange) async {
-    // SCALABILITY FIX: Use date-filtered query
-    final DateTime startDate = _calculateStartDate(dateRange);
-    final invoices = await _fs.getInvoicesByDateRange(
-      startDate: startDate,
-      limit: 5000,
-    );
-
-    // Warn if result may be truncated
-    if (invoices.length >= 5000) {
-      print('⚠️ WARNING: Performance insights may be incomplete. Result limit (5000) reached.');
-    }
+  Future<Map<String, dynamic>> fetchPerformanceInsights(String dateRange) => _cache.get(
+        'performance_insights_$dateRange',
+        const {AnalyticsDependency.invoices, AnalyticsDependency.customers},
+        () => _computePerformanceInsights(dateRange),
+      );
 
+  Future<Map<String, dynamic>> _computePerformanceInsights(String dateRange) async {
+    final DateTime startDate = _calculateStartDate(dateRange);
+    final DateTime previousStartDate = _calculatePreviousPeriodStartDate(dateRange, startDate);
     final customers = await _fs.getAllCustomers();
 
     // Calculate insights
@@ -405,39 +405,89 @@ class AnalyticsService {
     int purchaseCount = 0;
     double salesRevenue = 0.0;
     double purchaseRevenue = 0.0;
+    int currentItemsSold = 0;
+    double previousRevenue = 0.0;
+    int previousItemsSold = 0;
 
-    for (final invoice in invoices) {
-      // Track unique items
-      for (final item in invoice.items) {
-        if (item.quantity > 0) {
-          uniqueItems.add(item.name);
-        }
+    final rollup = await _fs.getAnalyticsRollup(start: startDate);
+    // The previous period ends the day before the current one starts.
+    final previousRollup = rollup == null
+        ? null
+        : await _fs.getAnalyticsRollup(start: previousStartDate, end: startDate.subtract(const Duration(days: 1)));
+    if (rollup != null && previousRollup != null) {
+      uniqueItems = {...rollup.items('sales').keys, ...rollup.items('purchase').keys};
+      for (final totals in rollup.customers('sales').values) {
+        final clientName = totals['name'] as String? ?? 'Unknown Customer';
+        clientRevenue[clientName] = (clientRevenue[clientName] ?? 0.0) + ((totals['revenue'] as num?)?.toDouble() ?? 0.0);
+        clientInvoiceCount[clientName] = (clientInvoiceCount[clientName] ?? 0) + (totals['invoiceCount'] as num).toInt();
+      }
+      salesRevenue = totalRevenue = rollup.revenue('sales');
+      salesCount = rollup.invoiceCount('sales');
+      purchaseRevenue = rollup.revenue('purchase');
+      purchaseCount = rollup.invoiceCount('purchase');
+      currentItemsSold = rollup.quantity('sales');
+      previousRevenue = previousRollup.revenue('sales');
+      previousItemsSold = previousRollup.quantity('sales');
+    } else {
+      // Rollups still backfilling: group the invoices here.
+      final invoices = await _fs.getInvoicesByDateRange(
+        startDate: startDate,
+        limit: 5000,
+      );
+
+      // Warn if result may be truncated
+      if (invoices.length >= 5000) {
+        print('⚠️ WARNING: Performance insights may be incomplete. Result limit (5000) reached.');
       }
 
-      // Only count sales revenue for total revenue (use effectiveRevenue for refund adjustments)
-      if (invoice.invoiceType == 'sales') {
-        final invoiceRevenue = invoice.effectiveRevenue;
-        totalRevenue += invoiceRevenue;
-        salesCount++;
-        salesRevenue += invoiceRevenue;
-
-        // Track client revenue (only sales)
-        final clientName = invoice.clientName;
-        clientRevenue[clientName] = (clientRevenue[clientName] ?? 0.0) + invoiceRevenue;
-        clientInvoiceCount[clientName] = (clientInvoiceCount[clientName] ?? 0) + 1;
-      } else {
-        // For purchase invoices, calculate from items (no refund adjustments)
-        double invoiceRevenue = 0.0;
+      for (final invoice in invoices) {
+        // Track unique items
         for (final item in invoice.items) {
           if (item.quantity > 0) {
-            invoiceRevenue += item.price * item.quantity;
+            uniqueItems.add(item.name);
           }
         }
-        purchaseCount++;
-        purchaseRevenue += invoiceRevenue;
+
+        // Only count sales revenue for total revenue (use effectiveRevenue for refund adjustments)
+        if (invoice.invoiceType == 'sales') {
+          final invoiceRevenue = invoice.effectiveRevenue;
+          totalRevenue += invoiceRevenue;
+          salesCount++;
+          salesRevenue += invoiceRevenue;
+          currentItemsSold += invoice.items.fold(0, (s, item) => s + item.quantity);
+
+          // Track client revenue (only sales)
+          final clientName = invoice.clientName;
+          clientRevenue[clientName] = (clientRevenue[clientName] ?? 0.0) + invoiceRevenue;
+          clientInvoiceCount[clientName] = (clientInvoiceCount[clientName] ?? 0) + 1;
+        } else {
+          // For purchase invoices, calculate from items (no refund adjustments)
+          double invoiceRevenue = 0.0;
+          for (final item in invoice.items) {
+            if (item.quantity > 0) {
+              invoiceRevenue += item.price * item.quantity;
+            }
+          }
+          purchaseCount++;
+          purchaseRevenue += invoiceRevenue;
+        }
+      }
+
+      // Calculate previous period revenue for comparison
+      final previousInvoices = await _fs.getInvoicesByDateRange(
+        startDate: previousStartDate,
+        endDate: startDate,
+        limit: 5000,
+      );
+
+      for (final invoice in previousInvoices) {
+        if (invoice.invoiceType == 'sales') {
+          previousRevenue += invoice.effectiveRevenue;
+          previousItemsSold += invoice.items.fold(0, (sum, item) => sum + item.quantity);
+        }
       }
     }
-    
+
     // Top clients
     final topClients = clientRevenue.entries.map((entry) => {
       'clientName': entry.key,
@@ -450,23 +500,6 @@ class AnalyticsService {
     
     topClients.sort((a, b) => (b['totalRevenue'] as double).compareTo(a['totalRevenue'] as double));
 
-    // Calculate previous period revenue for comparison
-    final DateTime previousStartDate = _calculatePreviousPeriodStartDate(dateRange, startDate);
-    final previousInvoices = await _fs.getInvoicesByDateRange(
-      startDate: previousStartDate,
-      endDate: startDate,
-      limit: 5000,
-    );
-
-    double previousRevenue = 0.0;
-    int previousItemsSold = 0;
-    for (final invoice in previousInvoices) {
-      if (invoice.invoiceType == 'sales') {
-        previousRevenue += invoice.effectiveRevenue;
-        previousItemsSold += invoice.items.fold(0, (sum, item) => sum + item.quantity);
-      }
-    }
-
     // Calculate percentage changes
     double revenueChange = 0.0;
     if (previousRevenue > 0) {
@@ -475,8 +508,6 @@ class AnalyticsService {
       revenueChange = 100.0; // If previous was 0 but current has revenue, it's 100% increase
     }
 
-    final currentItemsSold = invoices.where((inv) => inv.invoiceType == 'sales')
-        .fold(0, (sum, inv) => sum + inv.items.fold(0, (s, item) => s + item.quantity));
     double itemsSoldChange = 0.0;
     if (previousItemsSold > 0) {
       itemsSoldChange = ((currentItemsSold - previousItemsSold) / previousItemsSold) * 100;
@@ -509,7 +540,7 @@ class AnalyticsService {
       'categoryPerformance': {
         'General': {
           'itemCount': uniqueItems.length,
-          'totalQuantity': invoices.where((inv) => inv.invoiceType == 'sales').fold(0, (sum, inv) => sum + inv.items.fold(0, (s, item) => s + item.quantity)),
+          'totalQuantity': currentItemsSold,
           'totalRevenue': salesRevenue,
         }
       },
@@ -657,81 +688,29 @@ class AnalyticsService {
 
   // Get customer-wise revenue breakdown with date range filtering
   Future<List<Map<String, dynamic>>> getCustomerWiseRevenue(String dateRange, {bool salesOnly = true}) async {
+    final rows = await _cache.get(
+      'customer_revenue_${dateRange}_$salesOnly',
+      const {AnalyticsDependency.invoices, AnalyticsDependency.returns},
+      () => _computeCustomerWiseRevenue(dateRange, salesOnly),
+      fromJson: _rowsFromJson,
+    );
+    return List.of(rows);
+  }
+
+  Future<List<Map<String, dynamic>>> _computeCustomerWiseRevenue(String dateRange, bool salesOnly) async {
     try {
-      // SCALABILITY FIX: Use date-filtered query
       final DateTime startDate = _calculateStartDate(dateRange);
 
-      final invoices = await _fs.getInvoicesByDateRange(
-        startDate: startDate,
-        invoiceType: salesOnly ? 'sales' : null,
-        limit: 5000,
-      );
-
-      print('Found ${invoices.length} invoices for customer-wise revenue (date range: $dateRange, salesOnly: $salesOnly)');
+      final rollup = await _fs.getAnalyticsRollup(start: startDate);
+      final customerAnalytics = rollup != null
+          ? _customerAnalyticsFromRollup(rollup, salesOnly)
+          : await _customerAnalyticsFromInvoices(startDate, dateRange, salesOnly);
 
-      // Warn if result may be truncated
-      if (invoices.length >= 5000) {
-        print('⚠️ WARNING: Customer-wise revenue may be incomplete. Result limit (5000) reached.');
-      }
-
-      final allCustomers = await _fs.getAllCustomers();
-
-      if (invoices.isEmpty) {
+      if (customerAnalytics.isEmpty) {
         print('No invoices found for the selected date range');
         return [];
       }
 
-      // Track customer analytics
-      final Map<String, Map<String, dynamic>> customerAnalytics = {};
-
-      for (final invoice in invoices) {
-        // Skip non-sales invoices when salesOnly is true
-        if (salesOnly && invoice.invoiceType.toLowerCase() != 'sales') {
-          continue;
-        }
-
-        final customerId = invoice.customerId ?? 'unknown';
-        final customerName = invoice.clientName.trim().isEmpty ? 'Unknown Customer' : invoice.clientName.trim();
-
-        // Use effectiveRevenue (adjustedTotal) for accurate revenue after refunds
-        final invoiceRevenue = invoice.effectiveRevenue;
-
-        // Count total quantity of items
-        int totalQuantity = 0;
-        for (final item in invoice.items) {
-          if (item.quantity > 0) {
-            totalQuantity += item.quantity;
-          }
-        }
-
-        if (!customerAnalytics.containsKey(customerId)) {
-          customerAnalytics[customerId] = {
-            'customerId': customerId,
-            'customerName': customerName,
-            'customerPhone': invoice.customerPhone ?? '',
-            'invoiceCount': 0,
-            'totalQuantity': 0,
-            'totalRevenue': 0.0,
-            'totalPaid': 0.0,
-            'outstandingAmount': 0.0,
-          };
-        }
-
-        customerAnalytics[customerId]!['invoiceCount'] = (customerAnalytics[customerId]!['invoiceCount'] as int) + 1;
-        customerAnalytics[customerId]!['totalQuantity'] = (customerAnalytics[customerId]!['totalQuantity'] as int) + totalQuantity;
-        customerAnalytics[customerId]!['totalRevenue'] = (customerAnalytics[customerId]!['totalRevenue'] as double) + invoiceRevenue;
-        customerAnalytics[customerId]!['totalPaid'] = (customerAnalytics[customerId]!['totalPaid'] as double) + invoice.amountPaid;
-        customerAnalytics[customerId]!['outstandingAmount'] = (customerAnalytics[customerId]!['outstandingAmount'] as double) + invoice.remainingAmount;
-
-        // Debug logging for Dadu (Tejas)
-        if (customerName.toLowerCase().contains('dadu') || customerName.toLowerCase().contains('tejas')) {
-          print('DEBUG ${customerName} Invoice: ${invoice.invoiceNumber}');
-          print('  Total: ${invoice.total}, RefundAdj: ${invoice.refundAdjustment}, Paid: ${invoice.amountPaid}');
-          print('  AdjustedTotal: ${invoice.adjustedTotal}, RemainingAmount: ${invoice.remainingAmount}');
-          print('  Running Outstanding: ${customerAnalytics[customerId]!['outstandingAmount']}');
-        }
-      }
-
       // Add pending refunds tracking
       try {
         final allReturns = await _fs.getReturns();
@@ -782,6 +761,108 @@ class AnalyticsService {
     }
   }
 
+  /// Per-customer totals from the daily rollups, shaped like
+  /// [_customerAnalyticsFromInvoices].
+  Map<String, Map<String, dynamic>> _customerAnalyticsFromRollup(AnalyticsRollup rollup, bool salesOnly) {
+    final Map<String, Map<String, dynamic>> customerAnalytics = {};
+    for (final type in salesOnly ? const ['sales'] : const ['sales', 'purchase']) {
+      for (final MapEntry(key: customerId, value: totals) in rollup.customers(type).entries) {
+        final customer = customerAnalytics.putIfAbsent(customerId, () => {
+              'customerId': customerId,
+              'customerName': totals['name'] ?? 'Unknown Customer',
+              'customerPhone': totals['phone'] ?? '',
+              'invoiceCount': 0,
+              'totalQuantity': 0,
+              'totalRevenue': 0.0,
+              'totalPaid': 0.0,
+              'outstandingAmount': 0.0,
+            });
+        customer['invoiceCount'] = (customer['invoiceCount'] as int) + (totals['invoiceCount'] as num).toInt();
+        customer['totalQuantity'] = (customer['totalQuantity'] as int) + ((totals['quantity'] as num?)?.toInt() ?? 0);
+        customer['totalRevenue'] = (customer['totalRevenue'] as double) + ((totals['revenue'] as num?)?.toDouble() ?? 0.0);
+        customer['totalPaid'] = (customer['totalPaid'] as double) + ((totals['paid'] as num?)?.toDouble() ?? 0.0);
+        customer['outstandingAmount'] =
+            (customer['outstandingAmount'] as double) + ((totals['outstanding'] as num?)?.toDouble() ?? 0.0);
+      }
+    }
+    AppLogger.debug('${customerAnalytics.length} customers from analytics rollups', 'Analytics');
+    return customerAnalytics;
+  }
+
+  /// Per-customer totals grouped from the invoices themselves, used until
+  /// the rollups cover every invoice.
+  Future<Map<String, Map<String, dynamic>>> _customerAnalyticsFromInvoices(
+    DateTime startDate,
+    String dateRange,
+    bool salesOnly,
+  ) async {
+    final invoices = await _fs.getInvoicesByDateRange(
+      startDate: startDate,
+      invoiceType: salesOnly ? 'sales' : null,
+      limit: 5000,
+    );
+
+    print('Found ${invoices.length} invoices for customer-wise revenue (date range: $dateRange, salesOnly: $salesOnly)');
+
+    // Warn if result may be truncated
+    if (invoices.length >= 5000) {
+      print('⚠️ WARNING: Customer-wise revenue may be incomplete. Result limit (5000) reached.');
+    }
+
+    // Track customer analytics
+    final Map<String, Map<String, dynamic>> customerAnalytics = {};
+
+    for (final invoice in invoices) {
+      // Skip non-sales invoices when salesOnly is true
+      if (salesOnly && invoice.invoiceType.toLowerCase() != 'sales') {
+        continue;
+      }
+
+      final customerId = invoice.customerId ?? 'unknown';
+      final customerName = invoice.clientName.trim().isEmpty ? 'Unknown Customer' : invoice.clientName.trim();
+
+      // Use effectiveRevenue (adjustedTotal) for accurate revenue after refunds
+      final invoiceRevenue = invoice.effectiveRevenue;
+
+      // Count total quantity of items
+      int totalQuantity = 0;
+      for (final item in invoice.items) {
+        if (item.quantity > 0) {
+          totalQuantity += item.quantity;
+        }
+      }
+
+      if (!customerAnalytics.containsKey(customerId)) {
+        customerAnalytics[customerId] = {
+          'customerId': customerId,
+          'customerName': customerName,
+          'customerPhone': invoice.customerPhone ?? '',
+          'invoiceCount': 0,
+          'totalQuantity': 0,
+          'totalRevenue': 0.0,
+          'totalPaid': 0.0,
+          'outstandingAmount': 0.0,
+        };
+      }
+
+      customerAnalytics[customerId]!['invoiceCount'] = (customerAnalytics[customerId]!['invoiceCount'] as int) + 1;
+      customerAnalytics[customerId]!['totalQuantity'] = (customerAnalytics[customerId]!['totalQuantity'] as int) + totalQuantity;
+      customerAnalytics[customerId]!['totalRevenue'] = (customerAnalytics[customerId]!['totalRevenue'] as double) + invoiceRevenue;
+      customerAnalytics[customerId]!['totalPaid'] = (customerAnalytics[customerId]!['totalPaid'] as double) + invoice.amountPaid;
+      customerAnalytics[customerId]!['outstandingAmount'] = (customerAnalytics[customerId]!['outstandingAmount'] as double) + invoice.remainingAmount;
+
+      // Debug logging for Dadu (Tejas)
+      if (customerName.toLowerCase().contains('dadu') || customerName.toLowerCase().contains('tejas')) {
+        print('DEBUG ${customerName} Invoice: ${invoice.invoiceNumber}');
+        print('  Total: ${invoice.total}, RefundAdj: ${invoice.refundAdjustment}, Paid: ${invoice.amountPaid}');
+        print('  AdjustedTotal: ${invoice.adjustedTotal}, RemainingAmount: ${invoice.remainingAmount}');
+        print('  Running Outstanding: ${customerAnalytics[customerId]!['outstandingAmount']}');
+      }
+    }
+
+    return customerAnalytics;
+  }
+
   /// Get overdue payments organized by aging buckets (customer and item view)
   Future<Map<String, dynamic>> getOverduePaymentsBuckets() async {
     try {
@@ -1,6 +1,7 @@
 import '../models/catalog_item.dart';
 import './firestore_service.dart';
 import './items_service.dart';
+import './search_index.dart';
 import '../utils/app_logger.dart';
 
 class CatalogService {
@@ -22,6 +23,13 @@ class CatalogService {
   DateTime? _lastCacheUpdate;
   static const _cacheValidityDuration = Duration(minutes: 5);
 
+  // Search index over the cached catalog, rebuilt when the cache reloads
+  final SearchIndex<CatalogItem> _searchIndex = SearchIndex(
+    idOf: (item) => item.id.toString(),
+    fields: [(item) => item.name, (item) => item.category],
+  );
+  Map<int, CatalogItem>? _indexedCatalog;
+
   // ID mapping: integer ID (hash) -> string ID (Firestore)
   final Map<int, String> _idMapping = {};
 
@@ -228,14 +236,17 @@ class CatalogService {
     _idMapping.clear(); // Clear ID mapping when clearing cache
   }
 
-  // Search items by name
+  // Search items by name or category, best match first
   Future<List<CatalogItem>> searchItems(String query) async {
     try {
       final allItems = await getAllItems();
-      final lowerQuery = query.toLowerCase();
-      return allItems.where((item) =>
-        item.name.toLowerCase().contains(lowerQuery)
-      ).toList();
+      if (query.trim().isEmpty) return allItems;
+      final catalog = _catalogCache;
+      if (catalog == null || !identical(catalog, _indexedCatalog)) {
+        _searchIndex.replaceAll(allItems);
+        _indexedCatalog = catalog;
+      }
+      return _searchIndex.search(query);
     } catch (e) {
       AppLogger.error('Failed to search items', 'CatalogService', e);
       return [];
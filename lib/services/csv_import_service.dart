@@ -0,0 +1,493 @@
+import 'dart:async';
+import 'dart:convert';
+import 'dart:io';
+import 'dart:isolate';
+
+import 'package:csv/csv.dart';
+import 'package:shared_preferences/shared_preferences.dart';
+
+import '../models/invoice_model.dart';
+import '../utils/app_logger.dart';
+import 'firestore_service.dart';
+import 'items_service.dart';
+
+/// What a CSV file holds.
+enum CsvImportKind {
+  /// Catalogue items: a header row, then one item per row.
+  items,
+
+  /// The invoice ledger CsvInvoiceService writes: blocks of item rows,
+  /// each starting with a 'Sr. No.' header row.
+  invoices,
+}
+
+class CsvImportProgress {
+  const CsvImportProgress({
+    required this.imported,
+    required this.duplicates,
+    required this.invalid,
+    required this.bytesRead,
+    required this.totalBytes,
+  });
+
+  final int imported;
+  final int duplicates;
+  final int invalid;
+  final int bytesRead;
+  final int totalBytes;
+
+  double get fraction => totalBytes == 0 ? 1.0 : (bytesRead / totalBytes).clamp(0.0, 1.0);
+}
+
+class CsvImportResult {
+  const CsvImportResult({
+    required this.imported,
+    required this.duplicates,
+    required this.invalid,
+    required this.errors,
+    required this.resumedAt,
+  });
+
+  final int imported;
+
+  /// Records skipped because their SKU or invoice number already exists.
+  final int duplicates;
+
+  /// Rows that could not be turned into a record.
+  final int invalid;
+
+  /// Messages for the first few invalid rows.
+  final List<String> errors;
+
+  /// Records a previous, interrupted run of the same file had already
+  /// handled; 0 for a fresh import.
+  final int resumedAt;
+}
+
+/// Imports large CSV files into Firestore without holding them in memory.
+///
+/// A background isolate parses the file as a stream of CSV rows, so quoted
+/// fields may span lines, and turns rows into records, [chunkSize] at a
+/// time. It only parses the next chunk when asked,
+/// so at most two chunks exist at once: the one being written and the one
+/// being parsed. Each chunk is checked against the SKUs or invoice numbers
+/// and ids already stored or seen earlier in the file, then committed in
+/// batches of at most 450 writes.
+///
+/// After every committed chunk the position in the file is saved. If an
+/// import fails, importing the same unchanged file again resumes after the
+/// last committed chunk.
+class CsvImportService {
+  static final CsvImportService instance = CsvImportService._internal();
+  CsvImportService._internal();
+
+  static const int chunkSize = 450;
+  static const String _checkpointPrefix = 'csv_import.';
+
+  Future<CsvImportResult> importFile(
+    String path,
+    CsvImportKind kind, {
+    void Function(CsvImportProgress progress)? onProgress,
+  }) async {
+    final file = File(path);
+    final stat = await file.stat();
+    final prefs = await SharedPreferences.getInstance();
+    // Only the same file, unchanged, resumes.
+    final checkpointKey =
+        '$_checkpointPrefix${kind.name}.${path.hashCode}.${stat.size}.${stat.modified.millisecondsSinceEpoch}';
+    final resumedAt = prefs.getInt(checkpointKey) ?? 0;
+    if (resumedAt > 0) {
+      AppLogger.info('Resuming ${kind.name} import of $path after record $resumedAt', 'CsvImport');
+    }
+
+    final seen = await _existingKeys(kind);
+    var imported = 0;
+    var duplicates = 0;
+    var invalid = 0;
+    final errors = <String>[];
+
+    final replies = ReceivePort();
+    final isolate = await Isolate.spawn(
+      _csvImportWorker,
+      _WorkerStart(replies.sendPort, path, kind, resumedAt),
+      onError: replies.sendPort,
+      onExit: replies.sendPort,
+    );
+    final messages = StreamIterator(replies);
+    try {
+      if (!await messages.moveNext() || messages.current is! SendPort) {
+        throw StateError('CSV import worker did not start: ${messages.current}');
+      }
+      final pulls = messages.current as SendPort;
+      pulls.send(true);
+      while (await messages.moveNext()) {
+        final message = messages.current;
+        if (message is _WorkerDone) break;
+        if (message is! _ParsedChunk) throw StateError('CSV import worker failed: $message');
+        // Parse the next chunk while this one is written.
+        pulls.send(true);
+
+        final fresh = <Object>[];
+        for (final record in message.records) {
+          final keys = _keysOf(record);
+          if (keys.any(seen.contains)) {
+            duplicates++;
+          } else {
+            seen.addAll(keys);
+            fresh.add(record);
+          }
+        }
+        await _write(kind, fresh);
+        imported += fresh.length;
+        invalid += message.invalid;
+        errors.addAll(message.errors.take(20 - errors.length));
+        await prefs.setInt(checkpointKey, message.position);
+
+        onProgress?.call(CsvImportProgress(
+          imported: imported,
+          duplicates: duplicates,
+          invalid: invalid,
+          bytesRead: message.bytesRead,
+          totalBytes: stat.size,
+        ));
+      }
+      await prefs.remove(checkpointKey);
+    } finally {
+      await messages.cancel();
+      isolate.kill(priority: Isolate.immediate);
+    }
+
+    AppLogger.info(
+      'Imported $imported ${kind.name} from $path ($duplicates duplicates, $invalid invalid rows)',
+      'CsvImport',
+    );
+    return CsvImportResult(
+      imported: imported,
+      duplicates: duplicates,
+      invalid: invalid,
+      errors: errors,
+      resumedAt: resumedAt,
+    );
+  }
+
+  Future<Set<String>> _existingKeys(CsvImportKind kind) async {
+    switch (kind) {
+      case CsvImportKind.items:
+        return {for (final item in await ItemsService().getAllItems()) item.sku.toLowerCase()};
+      case CsvImportKind.invoices:
+        return {
+          for (final invoice in await FirestoreService.instance.getAllInvoices()) ..._keysOf(invoice),
+        };
+    }
+  }
+
+  /// Keys a record must not share with one already stored or imported.
+  /// Invoices also count by document id: different numbers can map to the
+  /// same id, and an import never overwrites an invoice.
+  static List<String> _keysOf(Object record) => switch (record) {
+        ProductCatalogItem item => [item.sku.toLowerCase()],
+        InvoiceModel invoice => [invoice.invoiceNumber.toLowerCase(), 'id:${invoice.id}'],
+        _ => throw ArgumentError.value(record, 'record'),
+      };
+
+  Future<void> _write(CsvImportKind kind, List<Object> records) async {
+    if (records.isEmpty) return;
+    switch (kind) {
+      case CsvImportKind.items:
+        await ItemsService().addMultipleItems(records.cast<ProductCatalogItem>());
+      case CsvImportKind.invoices:
+        await FirestoreService.instance.importInvoices(records.cast<InvoiceModel>());
+    }
+  }
+
+  /// Reads the header and the first [rows] rows of a CSV file, e.g. for a
+  /// preview.
+  static Future<List<Map<String, String>>> preview(String path, {int rows = 5}) async {
+    final csvRows = _rows(File(path).openRead()).where((fields) => !_isBlank(fields)).take(rows + 1);
+    List<String>? headers;
+    final preview = <Map<String, String>>[];
+    await for (final fields in csvRows) {
+      if (headers == null) {
+        headers = fields;
+        continue;
+      }
+      preview.add({
+        for (var i = 0; i < headers.length; i++) headers[i]: i < fields.length ? fields[i] : '',
+      });
+    }
+    return preview;
+  }
+
+  /// Counts the non-empty rows after the header, reading the file in
+  /// chunks.
+  static Future<int> countRows(String path) async {
+    var count = 0;
+    await for (final fields in _rows(File(path).openRead())) {
+      if (!_isBlank(fields)) count++;
+    }
+    return count > 0 ? count - 1 : 0;
+  }
+}
+
+/// The rows of a CSV file, fields trimmed. A quoted field may hold line
+/// breaks; a stray '\r' before a line break is trimmed with the field.
+Stream<List<String>> _rows(Stream<List<int>> bytes) => bytes
+    .transform(utf8.decoder)
+    .transform(const CsvToListConverter(shouldParseNumbers: false, eol: '\n'))
+    .map((row) => [for (final field in row) field.toString().trim()]);
+
+bool _isBlank(List<String> fields) => fields.every((field) => field.isEmpty);
+
+class _WorkerStart {
+  const _WorkerStart(this.replies, this.path, this.kind, this.skip);
+
+  final SendPort replies;
+  final String path;
+  final CsvImportKind kind;
+
+  /// Records to pass over, already handled by an earlier run.
+  final int skip;
+}
+
+class _ParsedChunk {
+  const _ParsedChunk(this.records, this.invalid, this.errors, this.position, this.bytesRead);
+
+  final List<Object> records;
+  final int invalid;
+  final List<String> errors;
+
+  /// Records (valid or not) from the start of the file to the end of this
+  /// chunk; what a resumed run skips.
+  final int position;
+  final int bytesRead;
+}
+
+class _WorkerDone {
+  const _WorkerDone();
+}
+
+class _RowError {
+  const _RowError(this.message);
+  final String message;
+}
+
+/// Runs in the import isolate: sends its own port, then one chunk for every
+/// `true` it receives, and [_WorkerDone] at the end of the file.
+Future<void> _csvImportWorker(_WorkerStart start) async {
+  final pulls = ReceivePort();
+  start.replies.send(pulls.sendPort);
+  final requests = StreamIterator(pulls);
+  final chunks = StreamIterator(_parseChunks(start));
+  while (await requests.moveNext() && requests.current == true) {
+    if (!await chunks.moveNext()) {
+      start.replies.send(const _WorkerDone());
+      break;
+    }
+    start.replies.send(chunks.current);
+  }
+  await chunks.cancel();
+  pulls.close();
+}
+
+Stream<_ParsedChunk> _parseChunks(_WorkerStart start) async* {
+  var bytesRead = 0;
+  final csvRows = _rows(File(start.path).openRead().map((bytes) {
+    bytesRead += bytes.length;
+    return bytes;
+  }));
+  final parser = switch (start.kind) {
+    CsvImportKind.items => _ItemRowParser(),
+    CsvImportKind.invoices => _LedgerRowParser(),
+  };
+
+  var position = 0;
+  var records = <Object>[];
+  var invalid = 0;
+  var errors = <String>[];
+
+  void take(Object? output) {
+    if (output == null) return;
+    position++;
+    if (position <= start.skip) return;
+    if (output is _RowError) {
+      invalid++;
+      if (errors.length < 20) errors.add(output.message);
+    } else {
+      records.add(output);
+    }
+  }
+
+  var row = 0;
+  await for (final fields in csvRows) {
+    row++;
+    if (_isBlank(fields)) continue;
+    take(parser.add(fields, row));
+    if (records.length + invalid >= CsvImportService.chunkSize) {
+      yield _ParsedChunk(records, invalid, errors, position, bytesRead);
+      records = <Object>[];
+      invalid = 0;
+      errors = <String>[];
+    }
+  }
+  take(parser.finish());
+  if (records.isNotEmpty || invalid > 0) {
+    yield _ParsedChunk(records, invalid, errors, position, bytesRead);
+  }
+}
+
+abstract class _RowParser {
+  /// Takes one row; returns a record, a [_RowError] or null if the row only
+  /// adds to a record still being built.
+  Object? add(List<String> fields, int row);
+
+  /// The record still being built at the end of the file, if any.
+  Object? finish() => null;
+}
+
+/// One catalogue item per row, columns recognised by their header.
+class _ItemRowParser extends _RowParser {
+  List<String>? _headers;
+  int _index = 0;
+
+  @override
+  Object? add(List<String> fields, int row) {
+    final headers = _headers;
+    if (headers == null) {
+      _headers = [for (final header in fields) header.toLowerCase()];
+      return null;
+    }
+    final index = _index++;
+    String? name;
+    double? price;
+    String? sku;
+    String category = 'General';
+    String unit = 'pcs';
+    String? description;
+    String? barcode;
+
+    for (var i = 0; i < headers.length && i < fields.length; i++) {
+      final key = headers[i];
+      final value = fields[i];
+      if (value.isEmpty) continue;
+
+      if (key.contains('name') || key.contains('item')) {
+        name = value;
+      } else if (key.contains('price') || key.contains('rate') || key.contains('cost')) {
+        price = double.tryParse(value);
+      } else if (key.contains('sku') || key.contains('code')) {
+        sku = value;
+      } else if (key.contains('category') || key.contains('type')) {
+        category = value;
+      } else if (key.contains('unit') || key.contains('uom')) {
+        unit = value;
+      } else if (key.contains('description') || key.contains('desc')) {
+        description = value;
+      } else if (key.contains('barcode') || key.contains('bar_code')) {
+        barcode = value;
+      }
+    }
+
+    // Validate required fields
+    if (name == null || name.isEmpty) return _RowError('Row $row: missing item name');
+    if (price == null || price <= 0) return _RowError('Row $row: missing or invalid price');
+
+    final now = DateTime.now();
+    // Generate SKU if not provided
+    sku ??= 'CSV${now.millisecondsSinceEpoch.toString().substring(8)}_$index';
+    return ProductCatalogItem(
+      id: '${now.millisecondsSinceEpoch}_csv_$index',
+      name: name,
+      sku: sku,
+      category: category,
+      unit: unit,
+      rate: price,
+      barcode: barcode,
+      description: description,
+      createdAt: now,
+      updatedAt: now,
+    );
+  }
+}
+
+/// The ledger format: 'Sr. No.' header rows open an invoice, item rows
+/// carry the invoice number in column 6 and a row with an empty first
+/// column holds the invoice total.
+class _LedgerRowParser extends _RowParser {
+  final List<InvoiceItem> _items = [];
+  String _invoiceNumber = '';
+  double _total = 0.0;
+  int _counter = 1;
+
+  @override
+  Object? add(List<String> fields, int row) {
+    final first = fields.isEmpty ? '' : fields.first;
+    // Detect new invoice table by header
+    if (first.startsWith('Sr. No.') || first.startsWith('Sr No.')) {
+      return finish();
+    }
+
+    // Detect subtotal row
+    if (fields.length >= 5 && first.isEmpty && fields[4].isNotEmpty) {
+      _total = double.tryParse(fields[4].replaceAll(RegExp(r'[^0-9.]'), '')) ?? 0.0;
+      return null;
+    }
+
+    // Parse item row
+    if (fields.length >= 6 && first.isNotEmpty && fields[1].isNotEmpty) {
+      // Try to extract quantity as int from e.g. "45 nos"
+      final qtyMatch = RegExp(r'(\d+)').firstMatch(fields[2]);
+      _items.add(InvoiceItem(
+        name: fields[1],
+        quantity: qtyMatch != null ? int.parse(qtyMatch.group(1)!) : 1,
+        price: double.tryParse(fields[3].replaceAll(RegExp(r'[^0-9.]'), '')) ?? 0.0,
+      ));
+      if (fields[5].isNotEmpty) _invoiceNumber = fields[5];
+      return null;
+    }
+    return _RowError('Row $row: not an item, total or header row');
+  }
+
+  @override
+  Object? finish() {
+    if (_items.isEmpty) return null;
+    final now = DateTime.now();
+    final number = _invoiceNumber.isNotEmpty ? _invoiceNumber : 'Invoice $_counter';
+    final invoice = InvoiceModel(
+      id: _firestoreSafeId(_invoiceNumber.isNotEmpty ? _invoiceNumber : 'INV$_counter'),
+      invoiceNumber: number,
+      clientName: '',
+      date: now, // No date in CSV
+      revenue: _total,
+      status: 'paid',
+      items: List.of(_items),
+      notes: null,
+      createdAt: now,
+      updatedAt: now,
+      amountPaid: _total, // Set amount paid to match total for paid invoices
+      paymentMethod: 'Cash',
+    );
+    _counter++;
+    _items.clear();
+    _total = 0.0;
+    _invoiceNumber = '';
+    return invoice;
+  }
+}
+
+String _firestoreSafeId(String id) {
+  // Replace characters not allowed or problematic in document IDs
+  // Firestore allows most characters, but slashes create path segments.
+  var safe = id.trim();
+  if (safe.isEmpty) {
+    return 'INV_${DateTime.now().millisecondsSinceEpoch}';
+  }
+  // Replace forward/back slashes and control whitespace with underscore
+  safe = safe.replaceAll(RegExp(r"[\\/\n\r\t]"), '_');
+  // Collapse multiple underscores
+  safe = safe.replaceAll(RegExp(r'_+'), '_');
+  // Limit length to a reasonable size
+  if (safe.length > 150) {
+    safe = safe.substring(0, 150);
+  }
+  return safe;
+}
@@ -19,6 +19,8 @@ class CustomerService {
   Future<List<CustomerModel>> getAllCustomers() async => _fs.getAllCustomers();
   
   Future<CustomerModel?> getCustomerByPhone(String phoneNumber) async => _fs.getCustomerByPhone(phoneNumber);
+
+  Future<List<CustomerModel>> searchCustomers(String query, {int? limit}) async => _fs.searchCustomers(query, limit: limit);
   
   Future<CustomerModel?> getCustomerById(String id) async => _fs.getCustomerById(id);
   
@@ -119,38 +121,24 @@ https://play.google.com/store/apps/details?id=com.invoiceflow.app''';
 
   // Add pending return amount to customer
   Future<void> addPendingReturn(String customerId, double amount) async {
-    final customer = await getCustomerById(customerId);
-    if (customer != null) {
-      final updatedCustomer = customer.copyWith(
-        pendingReturnAmount: customer.pendingReturnAmount + amount,
-        updatedAt: DateTime.now(),
-      );
-      await _fs.upsertCustomer(updatedCustomer);
-    }
+    await _fs.incrementPendingReturn(customerId, amount);
   }
 
   // Remove pending return amount from customer
   Future<void> removePendingReturn(String customerId, double amount) async {
     final customer = await getCustomerById(customerId);
     if (customer != null) {
-      final newAmount = (customer.pendingReturnAmount - amount).clamp(0.0, double.infinity);
-      final updatedCustomer = customer.copyWith(
-        pendingReturnAmount: newAmount,
-        updatedAt: DateTime.now(),
-      );
-      await _fs.upsertCustomer(updatedCustomer);
+      // Never take the pending amount below zero
+      final removed = amount < customer.pendingReturnAmount ? amount : customer.pendingReturnAmount;
+      await _fs.incrementPendingReturn(customerId, -removed);
     }
   }
 
   // Clear all pending returns for a customer
   Future<void> clearPendingReturns(String customerId) async {
     final customer = await getCustomerById(customerId);
-    if (customer != null) {
-      final updatedCustomer = customer.copyWith(
-        pendingReturnAmount: 0.0,
-        updatedAt: DateTime.now(),
-      );
-      await _fs.upsertCustomer(updatedCustomer);
+    if (customer != null && customer.pendingReturnAmount != 0) {
+      await _fs.incrementPendingReturn(customerId, -customer.pendingReturnAmount);
     }
   }
 
@@ -164,39 +152,13 @@ https://play.google.com/store/apps/details?id=com.invoiceflow.app''';
     await _fs.adjustCustomerOutstandingBalance(customerId, newOutstandingAmount);
   }
 
-  /// Update denormalized customer stats (called when invoices change)
-  /// This provides instant analytics without querying all invoices
+  /// Verify one customer's denormalized stats against their invoices and
+  /// repair them if they drifted. Invoice writes keep the stats current, so
+  /// this is only needed after a failure or for old data.
   Future<void> updateCustomerStats(String customerId) async {
-    final customer = await getCustomerById(customerId);
-    if (customer == null) return;
-
-    // Get all invoices for this customer
-    final invoices = await _fs.getInvoicesByCustomerId(customerId);
-
-    double totalSpent = 0.0;
-    double totalPaid = 0.0;
-    DateTime? lastPurchaseDate;
-
-    for (final invoice in invoices) {
-      if (invoice.invoiceType.toLowerCase() == 'sales') {
-        totalSpent += invoice.adjustedTotal;
-        totalPaid += invoice.amountPaid;
-
-        if (lastPurchaseDate == null || invoice.date.isAfter(lastPurchaseDate)) {
-          lastPurchaseDate = invoice.date;
-        }
-      }
-    }
-
-    // Update customer with denormalized stats
-    final updatedCustomer = customer.copyWith(
-      totalSpent: totalSpent,
-      totalPaid: totalPaid,
-      invoiceCount: invoices.where((inv) => inv.invoiceType.toLowerCase() == 'sales').length,
-      lastPurchaseDate: lastPurchaseDate,
-      updatedAt: DateTime.now(),
-    );
-
-    await _fs.upsertCustomer(updatedCustomer);
+    await _fs.reconcileCustomerStats(customerIds: [customerId]);
   }
-}
\ No newline at end of file
+
+  /// Verify every customer's denormalized stats; returns the ids that were repaired.
+  Future<List<String>> reconcileCustomerStats() => _fs.reconcileCustomerStats();
+}
@@ -0,0 +1,596 @@
+import 'dart:async';
+
+import 'package:firebase_auth/firebase_auth.dart';
+
+import '../models/inventory_item_model.dart';
+import '../models/invoice_model.dart';
+import '../utils/app_logger.dart';
+import 'event_service.dart';
+import 'firestore_service.dart';
+import 'inventory_firestore_service.dart';
+import 'synced_collection.dart';
+
+/// Parts of the dashboard a [DashboardDiff] can touch.
+enum DashboardSection { metrics, recentInvoices, dues, inventory }
+
+/// Everything the home dashboard shows, at one moment. Lists and maps are
+/// unmodifiable.
+class DashboardSnapshot {
+  const DashboardSnapshot({
+    this.totalRevenue = 0,
+    this.totalItemsSold = 0,
+    this.totalInvoices = 0,
+    this.recentInvoices = const [],
+    this.recentCustomers = const [],
+    this.customerDues = const [],
+    this.supplierDues = const [],
+    this.dueByCustomer = const {},
+    this.inStockSKUs = 0,
+    this.totalUnits = 0,
+    this.inventoryValue = 0,
+    this.lowStockItems = const [],
+    this.lastUpdated,
+  });
+
+  static const DashboardSnapshot empty = DashboardSnapshot();
+
+  /// Over the last [DashboardRepository.metricsWindow].
+  final double totalRevenue;
+  final int totalItemsSold;
+  final int totalInvoices;
+
+  /// Newest first.
+  final List<InvoiceModel> recentInvoices;
+
+  /// The latest invoice of each of the most recently billed clients.
+  final List<InvoiceModel> recentCustomers;
+
+  /// Sales invoices with a balance due whose follow-up is due, largest
+  /// balance first.
+  final List<InvoiceModel> customerDues;
+
+  /// Unpaid purchase invoices, largest balance first.
+  final List<InvoiceModel> supplierDues;
+
+  /// Balance due on sales invoices, by customer id.
+  final Map<String, double> dueByCustomer;
+
+  final int inStockSKUs;
+  final int totalUnits;
+  final double inventoryValue;
+  final List<InventoryItem> lowStockItems;
+
+  int get lowStockCount => lowStockItems.length;
+
+  /// When the metrics were last recomputed.
+  final DateTime? lastUpdated;
+
+  DashboardSnapshot copyWith({
+    double? totalRevenue,
+    int? totalItemsSold,
+    int? totalInvoices,
+    List<InvoiceModel>? recentInvoices,
+    List<InvoiceModel>? recentCustomers,
+    List<InvoiceModel>? customerDues,
+    List<InvoiceModel>? supplierDues,
+    Map<String, double>? dueByCustomer,
+    int? inStockSKUs,
+    int? totalUnits,
+    double? inventoryValue,
+    List<InventoryItem>? lowStockItems,
+    DateTime? lastUpdated,
+  }) {
+    return DashboardSnapshot(
+      totalRevenue: totalRevenue ?? this.totalRevenue,
+      totalItemsSold: totalItemsSold ?? this.totalItemsSold,
+      totalInvoices: totalInvoices ?? this.totalInvoices,
+      recentInvoices: recentInvoices ?? this.recentInvoices,
+      recentCustomers: recentCustomers ?? this.recentCustomers,
+      customerDues: customerDues ?? this.customerDues,
+      supplierDues: supplierDues ?? this.supplierDues,
+      dueByCustomer: dueByCustomer ?? this.dueByCustomer,
+      inStockSKUs: inStockSKUs ?? this.inStockSKUs,
+      totalUnits: totalUnits ?? this.totalUnits,
+      inventoryValue: inventoryValue ?? this.inventoryValue,
+      lowStockItems: lowStockItems ?? this.lowStockItems,
+      lastUpdated: lastUpdated ?? this.lastUpdated,
+    );
+  }
+}
+
+/// One update of the dashboard: the snapshots before and after, and which
+/// sections differ. Sections not in [changed] are the same objects in both.
+class DashboardDiff {
+  const DashboardDiff(this.previous, this.current, this.changed);
+
+  final DashboardSnapshot previous;
+  final DashboardSnapshot current;
+  final Set<DashboardSection> changed;
+}
+
+/// Keeps one materialized [DashboardSnapshot] and publishes a
+/// [DashboardDiff] on [diffs] whenever part of it changes.
+///
+/// The first [load] for a user reads the invoice and inventory mirrors
+/// (see SyncedCollection) once. After that the repository follows their
+/// change batches. Each changed invoice or item adjusts running totals
+/// and the due and low-stock sets, and only the sections it touched are
+/// rebuilt. Keeping the dashboard current therefore costs in proportion
+/// to the change, not to the number of invoices. The metrics window and
+/// the follow-up dates move with the calendar, so they are recomputed
+/// once a day.
+///
+/// DashboardUpdated on [EventService] (e.g. after a bulk migration),
+/// [refresh] and a restarted mirror rebuild everything from the mirrors.
+/// Items named in an InventoryUpdated event are re-read and applied like
+/// any other item change. Sign-out calls [clear].
+class DashboardRepository {
+  static final DashboardRepository instance = DashboardRepository._internal();
+  DashboardRepository._internal() {
+    FirestoreService.instance.invoiceChanges.listen(_onInvoiceChanges);
+    InventoryFirestoreService.instance.itemChanges.listen(_onItemChanges);
+    EventService().eventStream.listen(_onEvent);
+    EventService().inventoryItemUpdates.listen(_onInventoryUpdated);
+  }
+
+  static const Duration metricsWindow = Duration(days: 90);
+  static const int recentInvoiceCount = 5;
+  static const int recentCustomerCount = 6;
+
+  /// Newest invoices kept sorted for the recent sections.
+  static const int _recentWindow = 50;
+
+  final FirebaseAuth _auth = FirebaseAuth.instance;
+  final StreamController<DashboardDiff> _diffs = StreamController<DashboardDiff>.broadcast();
+
+  String? _uid;
+  bool _loaded = false;
+  /// The rebuild in flight and the user it is for.
+  (String, Future<void>)? _loading;
+  final List<SyncedChanges<InvoiceModel>> _pendingInvoiceChanges = [];
+  final List<SyncedChanges<InventoryItem>> _pendingItemChanges = [];
+
+  final Map<String, InvoiceModel> _invoices = {};
+  DateTime _today = DateTime(0);
+  DateTime _windowStart = DateTime(0);
+  double _revenue = 0;
+  int _itemsSold = 0;
+  int _invoiceCount = 0;
+  List<InvoiceModel> _recent = [];
+  /// Invoices by client name, and each client's newest invoice, newest
+  /// first, so recent customers follow a change without a sort.
+  final Map<String, Map<String, InvoiceModel>> _byClient = {};
+  List<InvoiceModel> _latestPerClient = [];
+  final Map<String, InvoiceModel> _salesDue = {};
+  final Map<String, InvoiceModel> _purchaseDue = {};
+
+  final Map<String, InventoryItem> _items = {};
+  final Map<String, InventoryItem> _lowStock = {};
+  int _inStock = 0;
+  int _units = 0;
+  double _stockValue = 0;
+
+  DashboardSnapshot _current = DashboardSnapshot.empty;
+
+  Stream<DashboardDiff> get diffs => _diffs.stream;
+  DashboardSnapshot get current => _current;
+
+  String _requireUid() {
+    final uid = _auth.currentUser?.uid;
+    if (uid == null) {
+      throw StateError('User must be signed in for dashboard data');
+    }
+    return uid;
+  }
+
+  /// The current snapshot, built on the first call for the signed-in user.
+  Future<DashboardSnapshot> load() async {
+    final uid = _requireUid();
+    if (_uid != uid || !_loaded) {
+      var loading = _loading;
+      if (loading == null || loading.$1 != uid) {
+        final rebuild = _rebuild(uid);
+        _loading = loading = (uid, rebuild);
+        unawaited(rebuild.whenComplete(() {
+          if (identical(_loading?.$2, rebuild)) _loading = null;
+        }).then((_) {}, onError: (Object _) {}));
+      }
+      await loading.$2;
+    }
+    _rollOver();
+    return _current;
+  }
+
+  /// Rebuilds the snapshot from the mirrors.
+  Future<DashboardSnapshot> refresh() {
+    _loaded = false;
+    return load();
+  }
+
+  /// Shows [invoice] as changed before the change is saved, e.g. for an
+  /// optimistic update. The saved version replaces it when it arrives.
+  void applyInvoice(InvoiceModel invoice) {
+    if (!_loaded) return;
+    _publish(_putInvoice(invoice.id, invoice));
+  }
+
+  Future<void> _rebuild(String uid) async {
+    _uid = uid;
+    _loaded = false;
+    final stopwatch = Stopwatch()..start();
+    final (invoices, items) = await (
+      FirestoreService.instance.getAllInvoices(),
+      InventoryFirestoreService.instance.getAllItems(),
+    ).wait;
+    if (_uid != uid) return;
+
+    _invoices
+      ..clear()
+      ..addAll({for (final invoice in invoices) invoice.id: invoice});
+    _today = DateTime(0); // forces the metrics and dues below
+    _rollOver(publish: false);
+    _recent = _newest(_invoices.values);
+    _byClient.clear();
+    for (final invoice in invoices) {
+      (_byClient[invoice.clientName] ??= {})[invoice.id] = invoice;
+    }
+    _latestPerClient = [for (final clientInvoices in _byClient.values) _latestOf(clientInvoices.values)]
+      ..sort(_byDate);
+
+    _items.clear();
+    _lowStock.clear();
+    _inStock = 0;
+    _units = 0;
+    _stockValue = 0;
+    for (final item in items) {
+      _putItem(item.id, item);
+    }
+
+    _loaded = true;
+    // Changes that arrived while the mirrors were read.
+    for (final changes in _pendingInvoiceChanges) {
+      _applyInvoiceChanges(changes);
+    }
+    for (final changes in _pendingItemChanges) {
+      _applyItemChanges(changes);
+    }
+    _pendingInvoiceChanges.clear();
+    _pendingItemChanges.clear();
+    _publish(DashboardSection.values.toSet());
+    AppLogger.performance(
+      'Dashboard snapshot built',
+      stopwatch.elapsed,
+      '${_invoices.length} invoices, ${_items.length} items',
+    );
+  }
+
+  /// Forgets the snapshot, e.g. on sign-out. Call before the mirrors are
+  /// stopped, so their reset is not taken for a failed listener.
+  void clear() {
+    if (_uid != null) _drop();
+    _loading = null;
+  }
+
+  /// A mirror was dropped while its user is still signed in, e.g. after a
+  /// failed listener: rebuild from it.
+  void _reset(String uid) {
+    _loaded = false;
+    if (_auth.currentUser?.uid == uid) {
+      unawaited(load().then((_) {}, onError: (Object e, StackTrace stackTrace) {
+        AppLogger.error('Dashboard rebuild failed', 'Dashboard', e, stackTrace);
+      }));
+      return;
+    }
+    _drop();
+  }
+
+  void _drop() {
+    _uid = null;
+    _loaded = false;
+    _invoices.clear();
+    _recent = [];
+    _byClient.clear();
+    _latestPerClient = [];
+    _salesDue.clear();
+    _purchaseDue.clear();
+    _items.clear();
+    _lowStock.clear();
+    _pendingInvoiceChanges.clear();
+    _pendingItemChanges.clear();
+    final previous = _current;
+    _current = DashboardSnapshot.empty;
+    _diffs.add(DashboardDiff(previous, _current, DashboardSection.values.toSet()));
+  }
+
+  void _onInvoiceChanges(SyncedChanges<InvoiceModel> changes) {
+    if (changes.uid != _uid) return;
+    if (changes.reset) return _reset(changes.uid);
+    if (!_loaded) {
+      _pendingInvoiceChanges.add(changes);
+      return;
+    }
+    _publish(_applyInvoiceChanges(changes));
+  }
+
+  void _onItemChanges(SyncedChanges<InventoryItem> changes) {
+    if (changes.uid != _uid) return;
+    if (changes.reset) return _reset(changes.uid);
+    if (!_loaded) {
+      _pendingItemChanges.add(changes);
+      return;
+    }
+    _publish(_applyItemChanges(changes));
+  }
+
+  void _onEvent(String event) {
+    if (_uid == null || !_loaded) return;
+    switch (event) {
+      case 'DashboardUpdated':
+        unawaited(refresh().then((_) {}, onError: (Object e, StackTrace stackTrace) {
+          AppLogger.error('Dashboard refresh failed', 'Dashboard', e, stackTrace);
+        }));
+    }
+  }
+
+  /// Stock moved in transactions reaches the item mirror late, so the named
+  /// items are read from Firestore.
+  void _onInventoryUpdated(Set<String> itemIds) {
+    final uid = _uid;
+    if (uid == null || !_loaded) return;
+    final service = InventoryFirestoreService.instance;
+    unawaited(Future.wait(itemIds.map(service.getItemById)).then((items) {
+      if (_uid != uid || !_loaded) return;
+      final found = {for (final item in items.nonNulls) item.id: item};
+      final changes = SyncedChanges<InventoryItem>(
+        uid,
+        updated: found,
+        removed: itemIds.where((id) => !found.containsKey(id)).toSet(),
+      );
+      _publish(_applyItemChanges(changes));
+    }, onError: (Object e, StackTrace stackTrace) {
+      AppLogger.error('Dashboard inventory refresh failed', 'Dashboard', e, stackTrace);
+    }));
+  }
+
+  Set<DashboardSection> _applyInvoiceChanges(SyncedChanges<InvoiceModel> changes) {
+    final changed = <DashboardSection>{};
+    changes.updated.forEach((id, invoice) => changed.addAll(_putInvoice(id, invoice)));
+    for (final id in changes.removed) {
+      changed.addAll(_putInvoice(id, null));
+    }
+    return changed;
+  }
+
+  Set<DashboardSection> _applyItemChanges(SyncedChanges<InventoryItem> changes) {
+    var changed = false;
+    changes.updated.forEach((id, item) => changed |= _putItem(id, item));
+    for (final id in changes.removed) {
+      changed |= _putItem(id, null);
+    }
+    return changed ? {DashboardSection.inventory} : const {};
+  }
+
+  /// Replaces or, with a null [invoice], removes one invoice, and returns
+  /// the sections that changed.
+  Set<DashboardSection> _putInvoice(String id, InvoiceModel? invoice) {
+    final old = _invoices[id];
+    if (invoice != null) {
+      _invoices[id] = invoice;
+    } else {
+      _invoices.remove(id);
+    }
+    final changed = <DashboardSection>{};
+
+    if (_countInMetrics(old, -1) | _countInMetrics(invoice, 1)) changed.add(DashboardSection.metrics);
+
+    final wasDue = _salesDue.remove(id) != null || _purchaseDue.remove(id) != null;
+    var isDue = false;
+    if (invoice != null && _isSalesDue(invoice)) {
+      _salesDue[id] = invoice;
+      isDue = true;
+    } else if (invoice != null && _isPurchaseDue(invoice)) {
+      _purchaseDue[id] = invoice;
+      isDue = true;
+    }
+    if (wasDue || isDue) changed.add(DashboardSection.dues);
+
+    if (_putRecent(id, invoice) | _putClient(old, invoice)) changed.add(DashboardSection.recentInvoices);
+    return changed;
+  }
+
+  /// Adds ([sign] 1) or takes out (-1) [invoice]'s share of the metrics;
+  /// false if it is outside the window.
+  bool _countInMetrics(InvoiceModel? invoice, int sign) {
+    if (invoice == null || invoice.date.isBefore(_windowStart)) return false;
+    _revenue += sign * invoice.revenue;
+    _itemsSold += sign * invoice.items.fold(0, (sum, item) => sum + item.quantity);
+    _invoiceCount += sign;
+    return true;
+  }
+
+  static bool _isSalesDue(InvoiceModel invoice) =>
+      invoice.invoiceType == 'sales' && invoice.paymentStatus == PaymentStatus.balanceDue;
+
+  static bool _isPurchaseDue(InvoiceModel invoice) =>
+      invoice.invoiceType == 'purchase' &&
+      invoice.status.toLowerCase() != 'paid' &&
+      invoice.paymentStatus == PaymentStatus.balanceDue;
+
+  static int _byDate(InvoiceModel a, InvoiceModel b) => b.date.compareTo(a.date);
+
+  /// The newest invoices, at most [_recentWindow].
+  static List<InvoiceModel> _newest(Iterable<InvoiceModel> invoices) {
+    final sorted = List<InvoiceModel>.of(invoices)..sort(_byDate);
+    return sorted.length > _recentWindow ? sorted.sublist(0, _recentWindow) : sorted;
+  }
+
+  static InvoiceModel _latestOf(Iterable<InvoiceModel> invoices) =>
+      invoices.reduce((a, b) => _byDate(a, b) <= 0 ? a : b);
+
+  /// Inserts [invoice] into [newest], which is sorted by [_byDate].
+  static void _insertByDate(List<InvoiceModel> newest, InvoiceModel invoice) {
+    var low = 0;
+    var high = newest.length;
+    while (low < high) {
+      final mid = (low + high) >> 1;
+      if (_byDate(newest[mid], invoice) <= 0) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    newest.insert(low, invoice);
+  }
+
+  /// Keeps [_recent] in step; true if it changed.
+  bool _putRecent(String id, InvoiceModel? invoice) {
+    final at = _recent.indexWhere((i) => i.id == id);
+    if (at >= 0) _recent.removeAt(at);
+    var changed = at >= 0;
+    if (invoice != null && (_recent.length < _recentWindow || _byDate(invoice, _recent.last) < 0)) {
+      _insertByDate(_recent, invoice);
+      if (_recent.length > _recentWindow) _recent.removeLast();
+      changed = true;
+    }
+    // An invoice left the window and an older one may belong in it.
+    if (_recent.length < _recentWindow && _recent.length < _invoices.length) {
+      _recent = _newest(_invoices.values);
+      changed = true;
+    }
+    return changed;
+  }
+
+  /// Moves [old]'s and [invoice]'s clients in [_latestPerClient]; true if
+  /// the recent customers changed.
+  bool _putClient(InvoiceModel? old, InvoiceModel? invoice) {
+    if (old != null) _byClient[old.clientName]?.remove(old.id);
+    if (invoice != null) (_byClient[invoice.clientName] ??= {})[invoice.id] = invoice;
+    final shown = _latestPerClient.take(recentCustomerCount).toList();
+    for (final name in {if (old != null) old.clientName, if (invoice != null) invoice.clientName}) {
+      _latestPerClient.removeWhere((latest) => latest.clientName == name);
+      final clientInvoices = _byClient[name];
+      if (clientInvoices == null || clientInvoices.isEmpty) {
+        _byClient.remove(name);
+      } else {
+        _insertByDate(_latestPerClient, _latestOf(clientInvoices.values));
+      }
+    }
+    final now = _latestPerClient.take(recentCustomerCount).toList();
+    if (now.length != shown.length) return true;
+    for (var i = 0; i < now.length; i++) {
+      if (!identical(now[i], shown[i])) return true;
+    }
+    return false;
+  }
+
+  /// Replaces or removes one item; true if the inventory section changed.
+  bool _putItem(String id, InventoryItem? item) {
+    final old = item != null ? _items[id] : _items.remove(id);
+    if (item != null) _items[id] = item;
+    if (old != null) {
+      if (old.currentStock > 0) _inStock--;
+      _units -= old.currentStock.toInt();
+      _stockValue -= old.currentStock * old.avgCost;
+      _lowStock.remove(id);
+    }
+    if (item != null) {
+      if (item.currentStock > 0) _inStock++;
+      _units += item.currentStock.toInt();
+      _stockValue += item.currentStock * item.avgCost;
+      if (item.currentStock <= item.reorderPoint) _lowStock[id] = item;
+    }
+    return _shown(old) != _shown(item);
+  }
+
+  /// The fields of [item] the inventory section depends on. The low-stock
+  /// list also shows the item's labels.
+  static Object? _shown(InventoryItem? item) {
+    if (item == null) return null;
+    final low = item.currentStock <= item.reorderPoint;
+    return (item.currentStock, item.avgCost, item.reorderPoint, low ? (item.name, item.sku, item.unit) : null);
+  }
+
+  /// Moves the metrics window and follow-up dates to today, once a day.
+  void _rollOver({bool publish = true}) {
+    final now = DateTime.now();
+    final today = DateTime(now.year, now.month, now.day);
+    if (today == _today) return;
+    _today = today;
+    _windowStart = today.subtract(metricsWindow);
+    _revenue = 0;
+    _itemsSold = 0;
+    _invoiceCount = 0;
+    _salesDue.clear();
+    _purchaseDue.clear();
+    for (final invoice in _invoices.values) {
+      _countInMetrics(invoice, 1);
+      if (_isSalesDue(invoice)) {
+        _salesDue[invoice.id] = invoice;
+      } else if (_isPurchaseDue(invoice)) {
+        _purchaseDue[invoice.id] = invoice;
+      }
+    }
+    if (publish) _publish({DashboardSection.metrics, DashboardSection.dues});
+  }
+
+  void _publish(Set<DashboardSection> changed) {
+    if (changed.isEmpty) return;
+    final previous = _current;
+    var next = previous;
+    if (changed.contains(DashboardSection.metrics)) {
+      next = next.copyWith(
+        totalRevenue: _revenue,
+        totalItemsSold: _itemsSold,
+        totalInvoices: _invoiceCount,
+        lastUpdated: DateTime.now(),
+      );
+    }
+    if (changed.contains(DashboardSection.recentInvoices)) {
+      next = next.copyWith(
+        recentInvoices: List.unmodifiable(_recent.take(recentInvoiceCount)),
+        recentCustomers: List.unmodifiable(_recentCustomers()),
+      );
+    }
+    if (changed.contains(DashboardSection.dues)) {
+      final dueByCustomer = <String, double>{};
+      for (final invoice in _salesDue.values) {
+        final customerId = invoice.customerId;
+        if (customerId == null) continue;
+        dueByCustomer[customerId] = (dueByCustomer[customerId] ?? 0) + invoice.remainingAmount;
+      }
+      next = next.copyWith(
+        customerDues: List.unmodifiable(_byBalance(_salesDue.values.where(_followUpDue))),
+        supplierDues: List.unmodifiable(_byBalance(_purchaseDue.values)),
+        dueByCustomer: Map.unmodifiable(dueByCustomer),
+      );
+    }
+    if (changed.contains(DashboardSection.inventory)) {
+      next = next.copyWith(
+        inStockSKUs: _inStock,
+        totalUnits: _units,
+        inventoryValue: _stockValue,
+        lowStockItems: List.unmodifiable(_lowStock.values),
+      );
+    }
+    _current = next;
+    _diffs.add(DashboardDiff(previous, next, Set.unmodifiable(changed)));
+  }
+
+  List<InvoiceModel> _recentCustomers() => _latestPerClient.take(recentCustomerCount).toList();
+
+  bool _followUpDue(InvoiceModel invoice) {
+    if (invoice.status.toLowerCase() == 'paid') return false;
+    final followUp = invoice.followUpDate;
+    return followUp == null || !DateTime(followUp.year, followUp.month, followUp.day).isAfter(_today);
+  }
+
+  /// Largest balance first, then oldest first.
+  static List<InvoiceModel> _byBalance(Iterable<InvoiceModel> invoices) {
+    return List<InvoiceModel>.of(invoices)
+      ..sort((a, b) {
+        final amountComparison = b.absoluteRemainingAmount.compareTo(a.absoluteRemainingAmount);
+        if (amountComparison != 0) return amountComparison;
+        return a.date.compareTo(b.date);
+      });
+  }
+}
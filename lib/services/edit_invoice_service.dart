@@ -3,6 +3,7 @@ import '../models/return_model.dart';
 import '../utils/app_logger.dart';
 import './firestore_service.dart';
 import './inventory_service.dart';
+import './pdf_cache.dart';
 import './return_service.dart';
 
 /// Service to handle invoice editing with comprehensive business logic
@@ -253,6 +254,7 @@ class EditInvoiceService {
 
       // Step 8: Save updated invoice
       await _firestoreService.upsertInvoice(updatedInvoice);
+      await PdfCache.instance.invalidate(oldInvoice.id);
 
       AppLogger.info('Invoice edited successfully: ${oldInvoice.id}', 'EditInvoiceService');
 
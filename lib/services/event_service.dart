@@ -7,9 +7,17 @@ class EventService {
 
   final StreamController<String> _eventController = StreamController<String>.broadcast();
 
+  final StreamController<Set<String>> _inventoryItemsController = StreamController<Set<String>>.broadcast();
+
   Stream<String> get eventStream => _eventController.stream;
 
-  void triggerInventoryUpdated() {
+  /// The item ids named by [triggerInventoryUpdated], for listeners that
+  /// only need to re-read those items.
+  Stream<Set<String>> get inventoryItemUpdates => _inventoryItemsController.stream;
+
+  void triggerInventoryUpdated([Iterable<String> itemIds = const []]) {
+    final ids = itemIds.toSet();
+    if (ids.isNotEmpty) _inventoryItemsController.add(ids);
     _eventController.add('InventoryUpdated');
   }
 
@@ -17,7 +25,20 @@ class EventService {
     _eventController.add('DashboardUpdated');
   }
 
+  void triggerInvoicesUpdated() {
+    _eventController.add('InvoicesUpdated');
+  }
+
+  void triggerReturnsUpdated() {
+    _eventController.add('ReturnsUpdated');
+  }
+
+  void triggerCustomersUpdated() {
+    _eventController.add('CustomersUpdated');
+  }
+
   void dispose() {
     _eventController.close();
+    _inventoryItemsController.close();
   }
 }
\ No newline at end of file
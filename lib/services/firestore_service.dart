@@ -3,11 +3,17 @@ import 'dart:async';
 import 'package:cloud_firestore/cloud_firestore.dart';
 import 'package:firebase_auth/firebase_auth.dart';
 
+import '../models/analytics_rollup_model.dart';
 import '../models/customer_model.dart';
 import '../models/invoice_model.dart';
+import '../models/invoice_page_model.dart';
 import '../models/return_model.dart';
 import '../models/catalog_item.dart';
 import '../utils/app_logger.dart';
+import 'analytics_cache.dart';
+import 'event_service.dart';
+import 'search_index.dart';
+import 'synced_collection.dart';
 
 /// FirestoreService provides CRUD operations and a one-time migration from the
 /// existing local SQLite database (DatabaseService) to Cloud Firestore.
@@ -16,6 +22,8 @@ import '../utils/app_logger.dart';
 /// - users/{uid}/customers/{customerId}
 /// - users/{uid}/invoices/{invoiceId}
 ///   (items stored inline as an array on the invoice document)
+/// - users/{uid}/analytics_rollups/{yyyy-MM-dd}
+///   (per-day invoice totals, see AnalyticsRollup)
 class FirestoreService {
   FirestoreService._();
   static final FirestoreService instance = FirestoreService._();
@@ -44,6 +52,58 @@ class FirestoreService {
   CollectionReference<Map<String, dynamic>> _catalogRatesCol(String uid) =>
       _fs.collection('users').doc(uid).collection('catalog_rates');
 
+  CollectionReference<Map<String, dynamic>> _analyticsRollupsCol(String uid) =>
+      _fs.collection('users').doc(uid).collection('analytics_rollups');
+
+  // Offline-first mirrors serving the list reads below (see SyncedCollection).
+  // Their changes, local or from other devices, are announced on EventService.
+  late final SyncedCollection<CustomerModel> _customers = SyncedCollection(
+    name: 'customers',
+    collection: _customersCol,
+    decode: (id, data) => _customerFromFirestore(data..['id'] = id),
+    order: (a, b) => a.name.compareTo(b.name),
+    onChanged: EventService().triggerCustomersUpdated,
+    index: SearchIndex(idOf: (c) => c.id, fields: [(c) => c.name, (c) => c.phoneNumber]),
+  );
+
+  late final SyncedCollection<InvoiceModel> _invoices = SyncedCollection(
+    name: 'invoices',
+    collection: _invoicesCol,
+    decode: (id, data) => _invoiceFromFirestore(data..['id'] = id),
+    order: (a, b) => _newestFirst((a.date, a.id), (b.date, b.id)),
+    onChanged: EventService().triggerInvoicesUpdated,
+    index: SearchIndex(
+      idOf: (i) => i.id,
+      fields: [(i) => i.invoiceNumber, (i) => i.clientName, (i) => i.customerPhone],
+    ),
+  );
+
+  late final SyncedCollection<ReturnModel> _returns = SyncedCollection(
+    name: 'returns',
+    collection: _returnsCol,
+    decode: (id, data) => _returnFromFirestore(data..['id'] = id),
+    order: (a, b) => b.returnDate.compareTo(a.returnDate),
+    onChanged: EventService().triggerReturnsUpdated,
+  );
+
+  late final SyncedCollection<CatalogItem> _catalogRates = SyncedCollection(
+    name: 'catalog_rates',
+    collection: _catalogRatesCol,
+    decode: (id, data) => CatalogItem(
+      id: data['id'] as int,
+      name: data['name'] as String? ?? '',
+      rate: (data['rate'] as num?)?.toDouble() ?? 0.0,
+    ),
+  );
+
+  /// Stops the offline mirrors, e.g. on sign-out.
+  void stopSync() {
+    _customers.stop();
+    _invoices.stop();
+    _returns.stop();
+    _catalogRates.stop();
+  }
+
   // ----------------------
   // Customer operations
   // ----------------------
@@ -51,6 +111,7 @@ class FirestoreService {
     final uid = _requireUid();
     final doc = _customersCol(uid).doc(customer.id);
     await doc.set(_customerToFirestore(customer), SetOptions(merge: true));
+    _customers.put(uid, customer.id, customer);
   }
 
   Future<CustomerModel?> getCustomer(String customerId) async {
@@ -66,26 +127,36 @@ class FirestoreService {
   // Lookup customer by phone number
   Future<CustomerModel?> getCustomerByPhone(String phoneNumber) async {
     final uid = _requireUid();
-    final q = await _customersCol(uid)
-        .where('phoneNumber', isEqualTo: phoneNumber)
-        .limit(1)
-        .get();
-    if (q.docs.isEmpty) return null;
-    final d = q.docs.first;
-    return _customerFromFirestore(d.data()..['id'] = d.id);
+    for (final c in await _customers.lookup(uid, phoneNumber)) {
+      if (c.phoneNumber == phoneNumber) return c;
+    }
+    return null;
+  }
+
+  /// Customers whose name or phone number matches [query], best first.
+  Future<List<CustomerModel>> searchCustomers(String query, {int? limit}) async {
+    final uid = _requireUid();
+    return _customers.search(uid, query, limit: limit);
   }
 
   Future<List<CustomerModel>> getAllCustomers() async {
     final uid = _requireUid();
-    final q = await _customersCol(uid).orderBy('name').get();
-    return q.docs
-        .map((d) => _customerFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+    return _customers.all(uid);
   }
 
   Future<void> deleteCustomer(String customerId) async {
     final uid = _requireUid();
     await _customersCol(uid).doc(customerId).delete();
+    _customers.remove(uid, customerId);
+  }
+
+  /// Atomically adds [delta] (negative to remove) to a customer's pending return amount.
+  Future<void> incrementPendingReturn(String customerId, double delta) async {
+    final uid = _requireUid();
+    await _customersCol(uid).doc(customerId).update({
+      'pendingReturnAmount': FieldValue.increment(delta),
+      'updatedAt': Timestamp.now(),
+    });
   }
 
   // ----------------------
@@ -94,8 +165,18 @@ class FirestoreService {
   Future<void> upsertInvoice(InvoiceModel invoice) async {
     final uid = _requireUid();
     final doc = _invoicesCol(uid).doc(invoice.id);
+    final data = {..._invoiceToFirestore(invoice), 'rolledUp': true};
     try {
-      await doc.set(_invoiceToFirestore(invoice), SetOptions(merge: true));
+      await _fs.runTransaction<void>((tx) async {
+        final before = (await tx.get(doc)).data();
+        // What the merge below leaves in the document.
+        final after = {...?before, ...data};
+        final customers = await _readStatsCustomers(tx, uid, [before, after]);
+        tx.set(doc, data, SetOptions(merge: true));
+        _writeStatsChanges(tx, customers, [(before, after)]);
+        _writeRollupChanges(tx, uid, [(before, after)]);
+      });
+      _invoices.put(uid, invoice.id, invoice);
       AppLogger.firebase('upsertInvoice', 'success', invoice.id);
     } catch (e) {
       AppLogger.error('Firestore upsertInvoice failed', 'Firestore', e);
@@ -103,6 +184,53 @@ class FirestoreService {
     }
   }
 
+  /// Writes new invoices in batches of at most 450 operations, each with
+  /// its share of the daily rollups. Meant for bulk imports: there are no
+  /// reads, so the invoices must not exist yet and must have no customer,
+  /// whose aggregates a batch cannot check. Anything else goes through
+  /// [upsertInvoice].
+  Future<void> importInvoices(List<InvoiceModel> invoices) async {
+    const maxOps = 450; // leave headroom for safety
+    final uid = _requireUid();
+    final direct = [
+      for (final invoice in invoices)
+        if (invoice.customerId?.isNotEmpty == true) invoice,
+    ];
+    for (final invoice in direct) {
+      await upsertInvoice(invoice);
+    }
+
+    final pending = [
+      for (final invoice in invoices)
+        if (invoice.customerId?.isNotEmpty != true) invoice,
+    ];
+    var start = 0;
+    while (start < pending.length) {
+      // Grow the batch while its invoices plus rollup days fit.
+      final days = <String>{};
+      var end = start;
+      while (end < pending.length) {
+        final day = AnalyticsRollup.dayKey(pending[end].date);
+        if (end - start + days.length + (days.contains(day) ? 0 : 1) >= maxOps) break;
+        days.add(day);
+        end++;
+      }
+      final slice = pending.sublist(start, end);
+      final batch = _fs.batch();
+      final changes = <(Map<String, dynamic>?, Map<String, dynamic>?)>[];
+      for (final invoice in slice) {
+        final data = {..._invoiceToFirestore(invoice), 'rolledUp': true};
+        batch.set(_invoicesCol(uid).doc(invoice.id), data);
+        changes.add((null, data));
+      }
+      _rollupWrites(uid, changes).forEach((doc, data) => batch.set(doc, data, SetOptions(merge: true)));
+      await batch.commit();
+      _invoices.putAll(uid, {for (final invoice in slice) invoice.id: invoice});
+      start = end;
+    }
+    AppLogger.firebase('importInvoices', 'success', '${invoices.length} invoices');
+  }
+
   Future<InvoiceModel?> getInvoice(String invoiceId) async {
     final uid = _requireUid();
     final snap = await _invoicesCol(uid).doc(invoiceId).get();
@@ -152,12 +280,12 @@ class FirestoreService {
 
   /// Get all invoices (DEPRECATED - use getInvoicesByDateRange for better performance)
   /// WARNING: This fetches ALL invoices and should only be used for small datasets
+  /// Invoices changed since the mirror started, in batches.
+  Stream<SyncedChanges<InvoiceModel>> get invoiceChanges => _invoices.changes;
+
   Future<List<InvoiceModel>> getAllInvoices() async {
     final uid = _requireUid();
-    final q = await _invoicesCol(uid).orderBy('date', descending: true).get();
-    return q.docs
-        .map((d) => _invoiceFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+    return _invoices.all(uid);
   }
 
   /// Get invoices within a date range (RECOMMENDED for scalability)
@@ -168,85 +296,108 @@ class FirestoreService {
     String? invoiceType,
   }) async {
     final uid = _requireUid();
-    var query = _invoicesCol(uid).orderBy('date', descending: true);
-
-    if (startDate != null) {
-      query = query.where('date', isGreaterThanOrEqualTo: Timestamp.fromDate(startDate)) as Query<Map<String, dynamic>>;
-    }
-    if (endDate != null) {
-      query = query.where('date', isLessThanOrEqualTo: Timestamp.fromDate(endDate)) as Query<Map<String, dynamic>>;
-    }
-    if (invoiceType != null) {
-      query = query.where('invoiceType', isEqualTo: invoiceType) as Query<Map<String, dynamic>>;
-    }
-    if (limit != null) {
-      query = query.limit(limit) as Query<Map<String, dynamic>>;
-    }
+    final matches = (await _invoices.all(uid)).where((inv) =>
+        (startDate == null || !inv.date.isBefore(startDate)) &&
+        (endDate == null || !inv.date.isAfter(endDate)) &&
+        (invoiceType == null || inv.invoiceType == invoiceType));
+    return (limit != null ? matches.take(limit) : matches).toList();
+  }
 
-    final q = await query.get();
-    return q.docs
-        .map((d) => _invoiceFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+  /// (date desc, id desc), the order of both the mirror and paged queries.
+  static int _newestFirst((DateTime, String) a, (DateTime, String) b) {
+    final byDate = b.$1.compareTo(a.$1);
+    return byDate != 0 ? byDate : b.$2.compareTo(a.$2);
   }
 
-  /// Get paginated invoices
-  Future<Map<String, dynamic>> getInvoicesPaginated({
+  /// One page of invoices matching [filter], newest first, starting after
+  /// [after]. Once the invoice mirror is synced, pages are cut from it and
+  /// cost no reads. Until then the filters run on the server; see
+  /// firestore.indexes.json for the combinations that are indexed. Both
+  /// paths use the same order, so a cursor from one works on the other.
+  Future<InvoicePage> getInvoicePage(
+    InvoiceFilter filter, {
+    InvoiceCursor? after,
     int limit = 50,
-    DocumentSnapshot? startAfter,
-    String? invoiceType,
   }) async {
     final uid = _requireUid();
-    var query = _invoicesCol(uid).orderBy('date', descending: true).limit(limit);
+    final mirrored = await _invoices.mirrored(uid);
+    if (mirrored != null) return _mirroredPage(mirrored, filter, after, limit);
+
+    Query<Map<String, dynamic>> query = _invoicesCol(uid);
+    if (filter.status != null) query = query.where('status', isEqualTo: filter.status);
+    if (filter.invoiceType != null) query = query.where('invoiceType', isEqualTo: filter.invoiceType);
+    if (filter.customerId != null) query = query.where('customerId', isEqualTo: filter.customerId);
+    if (filter.from != null) {
+      query = query.where('date', isGreaterThanOrEqualTo: Timestamp.fromDate(filter.from!));
+    }
+    if (filter.to != null) query = query.where('date', isLessThanOrEqualTo: Timestamp.fromDate(filter.to!));
+    // The id breaks ties between invoices with the same date.
+    query = query.orderBy('date', descending: true).orderBy(FieldPath.documentId, descending: true);
+    if (after != null) query = query.startAfter([Timestamp.fromDate(after.date), after.id]);
+
+    final q = await query.limit(limit).get();
+    final invoices = q.docs.map((d) => _invoiceFromFirestore(d.data()..['id'] = d.id)).toList();
+    return InvoicePage(
+      invoices,
+      invoices.length == limit ? InvoiceCursor.after(invoices.last) : null,
+    );
+  }
 
-    if (invoiceType != null) {
-      query = query.where('invoiceType', isEqualTo: invoiceType) as Query<Map<String, dynamic>>;
+  InvoicePage _mirroredPage(List<InvoiceModel> ordered, InvoiceFilter filter, InvoiceCursor? after, int limit) {
+    // Binary search for the first invoice past the cursor.
+    var start = 0;
+    if (after != null) {
+      var end = ordered.length;
+      while (start < end) {
+        final mid = (start + end) >> 1;
+        if (_newestFirst((ordered[mid].date, ordered[mid].id), (after.date, after.id)) <= 0) {
+          start = mid + 1;
+        } else {
+          end = mid;
+        }
+      }
     }
-    if (startAfter != null) {
-      query = query.startAfterDocument(startAfter) as Query<Map<String, dynamic>>;
+    final invoices = <InvoiceModel>[];
+    for (var i = start; i < ordered.length && invoices.length < limit; i++) {
+      final invoice = ordered[i];
+      if (filter.from != null && invoice.date.isBefore(filter.from!)) break;
+      if (filter.matches(invoice)) invoices.add(invoice);
     }
+    return InvoicePage(
+      invoices,
+      invoices.length == limit ? InvoiceCursor.after(invoices.last) : null,
+    );
+  }
 
-    final q = await query.get();
-    final invoices = q.docs
-        .map((d) => _invoiceFromFirestore(d.data()..['id'] = d.id))
-        .toList();
-
-    return {
-      'invoices': invoices,
-      'lastDocument': q.docs.isNotEmpty ? q.docs.last : null,
-      'hasMore': invoices.length == limit,
-    };
+  /// Invoices whose number, client name or phone matches [query], best
+  /// first.
+  Future<List<InvoiceModel>> searchInvoices(String query, {int? limit}) async {
+    final uid = _requireUid();
+    return _invoices.search(uid, query, limit: limit);
   }
 
   Future<List<InvoiceModel>> getRecentInvoices({int limit = 5}) async {
     final uid = _requireUid();
-    final q = await _invoicesCol(uid)
-        .orderBy('date', descending: true)
-        .limit(limit)
-        .get();
-    return q.docs
-        .map((d) => _invoiceFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+    return (await _invoices.all(uid)).take(limit).toList();
   }
 
   Future<List<InvoiceModel>> getInvoicesByCustomerId(String customerId, {int? limit}) async {
     final uid = _requireUid();
-    var query = _invoicesCol(uid)
-        .where('customerId', isEqualTo: customerId)
-        .orderBy('date', descending: true);
-
-    if (limit != null) {
-      query = query.limit(limit) as Query<Map<String, dynamic>>;
-    }
-
-    final q = await query.get();
-    return q.docs
-        .map((d) => _invoiceFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+    final matches = (await _invoices.all(uid)).where((inv) => inv.customerId == customerId);
+    return (limit != null ? matches.take(limit) : matches).toList();
   }
 
   Future<void> deleteInvoice(String invoiceId) async {
     final uid = _requireUid();
-    await _invoicesCol(uid).doc(invoiceId).delete();
+    final doc = _invoicesCol(uid).doc(invoiceId);
+    await _fs.runTransaction<void>((tx) async {
+      final before = (await tx.get(doc)).data();
+      final customers = await _readStatsCustomers(tx, uid, [before]);
+      tx.delete(doc);
+      _writeStatsChanges(tx, customers, [(before, null)]);
+      _writeRollupChanges(tx, uid, [(before, null)]);
+    });
+    _invoices.remove(uid, invoiceId);
   }
 
   /// Deletes all invoices for the current user. Use with caution.
@@ -257,6 +408,7 @@ class FirestoreService {
     int count = 0;
     for (final d in q.docs) {
       batch.delete(d.reference);
+      _invoices.remove(uid, d.id);
       count++;
       if (count >= 450) {
         await batch.commit();
@@ -267,31 +419,25 @@ class FirestoreService {
     if (count > 0) {
       await batch.commit();
     }
+    // With no invoices left every customer's stats and every rollup are zero.
+    await reconcileCustomerStats();
+    await _clearAnalyticsRollups(uid);
   }
 
+  /// Outstanding dues per customer, read from the customer aggregates.
+  /// Customers whose aggregates were never reconciled are seeded first.
   Future<Map<String, double>> getCustomerOutstandingBalances() async {
-    // Safer query: limit to sales invoices; filter null/empty customerId and cancelled locally
     final uid = _requireUid();
-    final q = await _invoicesCol(uid)
-        .where('invoiceType', isEqualTo: 'sales')
-        .get();
-    final balances = <String, double>{};
-    for (final d in q.docs) {
-      final data = d.data();
-      final String? customerId = data['customerId'] as String?;
-      final String status = (data['status'] as String?)?.toLowerCase() ?? 'pending';
-      if (customerId == null || customerId.isEmpty) continue;
-      if (status == 'cancelled') continue;
-      final total = (data['revenue'] as num?)?.toDouble() ?? 0.0;
-      final refundAdjustment = (data['refundAdjustment'] as num?)?.toDouble() ?? 0.0;
-      final paid = (data['amountPaid'] as num?)?.toDouble() ?? 0.0;
-      final adjustedTotal = total - refundAdjustment;
-      final remaining = adjustedTotal - paid;
-      if (remaining > 0) {
-        balances[customerId] = (balances[customerId] ?? 0.0) + remaining;
-      }
+    var customers = await _customers.all(uid);
+    final unseeded = [for (final c in customers) if (c.statsReconciledAt == null) c.id];
+    if (unseeded.isNotEmpty) {
+      await reconcileCustomerStats(customerIds: unseeded);
+      customers = await _customers.all(uid);
     }
-    return balances;
+    return {
+      for (final c in customers)
+        if (c.outstandingBalance > 0) c.id: c.outstandingBalance,
+    };
   }
 
   /// Adjust customer's outstanding balance by updating invoice payments
@@ -299,80 +445,92 @@ class FirestoreService {
   Future<void> adjustCustomerOutstandingBalance(String customerId, double newOutstandingAmount) async {
     final uid = _requireUid();
 
-    // Get all unpaid sales invoices for this customer
+    // Get all sales invoices for this customer; they are read again in the transaction
     final q = await _invoicesCol(uid)
         .where('customerId', isEqualTo: customerId)
         .where('invoiceType', isEqualTo: 'sales')
         .get();
 
-    // Filter out cancelled invoices and collect unpaid ones
-    final unpaidInvoices = <Map<String, dynamic>>[];
-    double currentOutstanding = 0.0;
-
-    for (final d in q.docs) {
-      final data = d.data();
-      final String status = (data['status'] as String?)?.toLowerCase() ?? 'pending';
-      if (status == 'cancelled') continue;
-
-      final total = (data['revenue'] as num?)?.toDouble() ?? 0.0;
-      final refundAdjustment = (data['refundAdjustment'] as num?)?.toDouble() ?? 0.0;
-      final paid = (data['amountPaid'] as num?)?.toDouble() ?? 0.0;
-      final adjustedTotal = total - refundAdjustment;
-      final remaining = adjustedTotal - paid;
-
-      if (remaining > 0) {
-        currentOutstanding += remaining;
-        unpaidInvoices.add({
-          'id': d.id,
-          'total': adjustedTotal,
-          'paid': paid,
-          'remaining': remaining,
-          'date': data['date'],
-        });
+    await _fs.runTransaction<void>((tx) async {
+      final snaps = await Future.wait(q.docs.map((d) => tx.get(d.reference)));
+      final customers = await _readStatsCustomers(tx, uid, [for (final d in snaps) d.data()]);
+
+      // Filter out cancelled invoices and collect unpaid ones
+      final unpaidInvoices = <Map<String, dynamic>>[];
+      double currentOutstanding = 0.0;
+
+      for (final d in snaps) {
+        final data = d.data();
+        if (data == null || data['customerId'] != customerId) continue;
+        final String status = (data['status'] as String?)?.toLowerCase() ?? 'pending';
+        if (status == 'cancelled') continue;
+
+        final total = (data['revenue'] as num?)?.toDouble() ?? 0.0;
+        final refundAdjustment = (data['refundAdjustment'] as num?)?.toDouble() ?? 0.0;
+        final paid = (data['amountPaid'] as num?)?.toDouble() ?? 0.0;
+        final adjustedTotal = total - refundAdjustment;
+        final remaining = adjustedTotal - paid;
+
+        if (remaining > 0) {
+          currentOutstanding += remaining;
+          unpaidInvoices.add({
+            'id': d.id,
+            'total': adjustedTotal,
+            'paid': paid,
+            'remaining': remaining,
+            'date': data['date'],
+            'data': data,
+          });
+        }
       }
-    }
 
-    if (unpaidInvoices.isEmpty) {
-      throw StateError('No unpaid invoices found for this customer');
-    }
+      if (unpaidInvoices.isEmpty) {
+        throw StateError('No unpaid invoices found for this customer');
+      }
 
-    // Sort invoices by date (oldest first)
-    unpaidInvoices.sort((a, b) {
-      final dateA = (a['date'] as Timestamp?)?.toDate() ?? DateTime.now();
-      final dateB = (b['date'] as Timestamp?)?.toDate() ?? DateTime.now();
-      return dateA.compareTo(dateB);
-    });
+      // Sort invoices by date (oldest first)
+      unpaidInvoices.sort((a, b) {
+        final dateA = (a['date'] as Timestamp?)?.toDate() ?? DateTime.now();
+        final dateB = (b['date'] as Timestamp?)?.toDate() ?? DateTime.now();
+        return dateA.compareTo(dateB);
+      });
 
-    // Calculate the payment amount (reduction in outstanding)
-    final paymentAmount = currentOutstanding - newOutstandingAmount;
+      // Calculate the payment amount (reduction in outstanding)
+      final paymentAmount = currentOutstanding - newOutstandingAmount;
 
-    if (paymentAmount < 0) {
-      throw ArgumentError('New outstanding amount cannot be greater than current outstanding');
-    }
+      if (paymentAmount < 0) {
+        throw ArgumentError('New outstanding amount cannot be greater than current outstanding');
+      }
 
-    // Distribute the payment across invoices (oldest first)
-    double remainingPayment = paymentAmount;
-    final batch = _fs.batch();
+      // Distribute the payment across invoices (oldest first)
+      double remainingPayment = paymentAmount;
+      final changes = <(Map<String, dynamic>?, Map<String, dynamic>?)>[];
 
-    for (final invoice in unpaidInvoices) {
-      if (remainingPayment <= 0) break;
+      for (final invoice in unpaidInvoices) {
+        if (remainingPayment <= 0) break;
 
-      final remaining = invoice['remaining'] as double;
-      final currentPaid = invoice['paid'] as double;
-      final invoiceId = invoice['id'] as String;
+        final remaining = invoice['remaining'] as double;
+        final currentPaid = invoice['paid'] as double;
+        final invoiceId = invoice['id'] as String;
 
-      // Pay as much as possible on this invoice
-      final paymentForThisInvoice = remainingPayment > remaining ? remaining : remainingPayment;
-      final newPaidAmount = currentPaid + paymentForThisInvoice;
+        // Pay as much as possible on this invoice
+        final paymentForThisInvoice = remainingPayment > remaining ? remaining : remainingPayment;
+        final newPaidAmount = currentPaid + paymentForThisInvoice;
 
-      // Update the invoice
-      final ref = _invoicesCol(uid).doc(invoiceId);
-      batch.update(ref, {'amountPaid': newPaidAmount});
+        // Update the invoice
+        final ref = _invoicesCol(uid).doc(invoiceId);
+        // updatedAt moves so other devices' delta listeners pick this up.
+        final update = {'amountPaid': newPaidAmount, 'updatedAt': Timestamp.now(), 'rolledUp': true};
+        tx.update(ref, update);
+        final before = invoice['data'] as Map<String, dynamic>;
+        changes.add((before, {...before, ...update}));
 
-      remainingPayment -= paymentForThisInvoice;
-    }
+        remainingPayment -= paymentForThisInvoice;
+      }
 
-    await batch.commit();
+      _writeStatsChanges(tx, customers, changes);
+      _writeRollupChanges(tx, uid, changes);
+    });
     AppLogger.firebase('adjustCustomerOutstandingBalance', 'success', customerId);
   }
 
@@ -380,12 +538,23 @@ class FirestoreService {
   Future<void> clearInvoiceFields(String invoiceId, List<String> fieldNames) async {
     final uid = _requireUid();
     final ref = _invoicesCol(uid).doc(invoiceId);
-    final payload = <String, Object?>{};
+    final payload = <String, Object?>{'updatedAt': Timestamp.now(), 'rolledUp': true};
     for (final f in fieldNames) {
       payload[f] = FieldValue.delete();
     }
     try {
-      await ref.update(payload);
+      await _fs.runTransaction<void>((tx) async {
+        final before = (await tx.get(ref)).data();
+        final after = before == null
+            ? null
+            : ({...before}
+              ..removeWhere((k, _) => fieldNames.contains(k))
+              ..['rolledUp'] = true);
+        final customers = await _readStatsCustomers(tx, uid, [before, after]);
+        tx.update(ref, payload);
+        _writeStatsChanges(tx, customers, [(before, after)]);
+        _writeRollupChanges(tx, uid, [(before, after)]);
+      });
       AppLogger.firebase('clearInvoiceFields', 'success', invoiceId);
     } catch (e) {
       AppLogger.error('Firestore clearInvoiceFields failed', 'Firestore', e);
@@ -399,7 +568,18 @@ class FirestoreService {
   Future<void> createReturn(ReturnModel returnModel) async {
     final uid = _requireUid();
     final doc = _returnsCol(uid).doc(returnModel.id);
-    await doc.set(_returnToFirestore(returnModel));
+    final pending = _pendingReturnShare(returnModel);
+    await _fs.runTransaction<void>((tx) async {
+      final customer = pending == null ? null : await tx.get(_customersCol(uid).doc(returnModel.customerId!));
+      tx.set(doc, _returnToFirestore(returnModel));
+      if (customer != null && customer.exists) {
+        tx.update(customer.reference, {
+          'pendingReturnAmount': FieldValue.increment(pending!),
+          'updatedAt': Timestamp.now(),
+        });
+      }
+    });
+    _returns.put(uid, returnModel.id, returnModel);
     AppLogger.firebase('createReturn', 'success', returnModel.id);
   }
 
@@ -412,55 +592,49 @@ class FirestoreService {
 
   Future<List<ReturnModel>> getReturns() async {
     final uid = _requireUid();
-    final q = await _returnsCol(uid).orderBy('returnDate', descending: true).get();
-    return q.docs
-        .map((d) => _returnFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+    return _returns.all(uid);
   }
 
   Future<List<ReturnModel>> getReturnsByType(String returnType) async {
     final uid = _requireUid();
-    final q = await _returnsCol(uid)
-        .where('returnType', isEqualTo: returnType)
-        .orderBy('returnDate', descending: true)
-        .get();
-    return q.docs
-        .map((d) => _returnFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+    return (await _returns.all(uid)).where((r) => r.returnType == returnType).toList();
   }
 
   Future<List<ReturnModel>> getReturnsByCustomerId(String customerId) async {
     final uid = _requireUid();
-    final q = await _returnsCol(uid)
-        .where('customerId', isEqualTo: customerId)
-        .orderBy('returnDate', descending: true)
-        .get();
-    return q.docs
-        .map((d) => _returnFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+    return (await _returns.all(uid)).where((r) => r.customerId == customerId).toList();
   }
 
   Future<List<ReturnModel>> getReturnsByInvoiceId(String invoiceId) async {
     final uid = _requireUid();
-    final q = await _returnsCol(uid)
-        .where('invoiceId', isEqualTo: invoiceId)
-        .orderBy('returnDate', descending: true)
-        .get();
-    return q.docs
-        .map((d) => _returnFromFirestore(d.data()..['id'] = d.id))
-        .toList();
+    return (await _returns.all(uid)).where((r) => r.invoiceId == invoiceId).toList();
   }
 
   Future<void> updateReturn(ReturnModel returnModel) async {
     final uid = _requireUid();
     final doc = _returnsCol(uid).doc(returnModel.id);
     await doc.set(_returnToFirestore(returnModel), SetOptions(merge: true));
+    _returns.put(uid, returnModel.id, returnModel);
     AppLogger.firebase('updateReturn', 'success', returnModel.id);
   }
 
   Future<void> deleteReturn(String returnId) async {
     final uid = _requireUid();
-    await _returnsCol(uid).doc(returnId).delete();
+    final doc = _returnsCol(uid).doc(returnId);
+    await _fs.runTransaction<void>((tx) async {
+      final snap = await tx.get(doc);
+      final returnModel = snap.exists ? _returnFromFirestore(snap.data()!..['id'] = snap.id) : null;
+      final pending = returnModel == null ? null : _pendingReturnShare(returnModel);
+      final customer = pending == null ? null : await tx.get(_customersCol(uid).doc(returnModel!.customerId!));
+      tx.delete(doc);
+      if (customer != null && customer.exists) {
+        tx.update(customer.reference, {
+          'pendingReturnAmount': FieldValue.increment(-pending!),
+          'updatedAt': Timestamp.now(),
+        });
+      }
+    });
+    _returns.remove(uid, returnId);
   }
 
   // ----------------------
@@ -475,25 +649,331 @@ class FirestoreService {
       'rate': item.rate,
       'updatedAt': Timestamp.now(),
     });
+    _catalogRates.put(uid, item.id.toString(), item);
     AppLogger.firebase('updateCatalogItemRate', 'success', item.id.toString());
   }
 
   Future<List<CatalogItem>> getAllCatalogRates() async {
     final uid = _requireUid();
-    final q = await _catalogRatesCol(uid).get();
-    return q.docs.map((d) {
-      final data = d.data();
-      return CatalogItem(
-        id: data['id'] as int,
-        name: data['name'] as String? ?? '',
-        rate: (data['rate'] as num?)?.toDouble() ?? 0.0,
-      );
-    }).toList();
+    return _catalogRates.all(uid);
   }
 
   Future<void> deleteCatalogItemRate(int itemId) async {
     final uid = _requireUid();
     await _catalogRatesCol(uid).doc(itemId.toString()).delete();
+    _catalogRates.remove(uid, itemId.toString());
+  }
+
+  // ----------------------
+  // Customer aggregates
+  // ----------------------
+  //
+  // Each customer document carries outstandingBalance, totalSpent, totalPaid,
+  // invoiceCount and lastPurchaseDate over its non-cancelled sales invoices.
+  // Every invoice write moves them from the invoice's old share to its new
+  // one with FieldValue.increment, in the same transaction, and bumps
+  // statsSeq. reconcileCustomerStats recomputes them from the invoices;
+  // statsReconciledAt marks customers that have been checked at least once.
+  // lastPurchaseDate only moves forward on write, so a cancelled latest
+  // purchase is corrected by the next reconciliation.
+
+  /// Half a paisa: aggregates closer than this to the invoices match.
+  static const double _statsTolerance = 0.005;
+
+  /// The customer an invoice document counts towards, and how much.
+  MapEntry<String, _CustomerStats>? _statsShare(Map<String, dynamic>? invoice) {
+    if (invoice == null) return null;
+    final customerId = invoice['customerId'] as String?;
+    final status = (invoice['status'] as String?)?.toLowerCase() ?? 'pending';
+    if (customerId == null || customerId.isEmpty) return null;
+    if (invoice['invoiceType'] != 'sales' || status == 'cancelled') return null;
+    final total = (invoice['revenue'] as num?)?.toDouble() ?? 0.0;
+    final refundAdjustment = (invoice['refundAdjustment'] as num?)?.toDouble() ?? 0.0;
+    final paid = (invoice['amountPaid'] as num?)?.toDouble() ?? 0.0;
+    final adjustedTotal = total - refundAdjustment;
+    final remaining = adjustedTotal - paid;
+    return MapEntry(
+      customerId,
+      _CustomerStats(
+        outstanding: remaining > 0 ? remaining : 0.0,
+        spent: adjustedTotal,
+        paid: paid,
+        count: 1,
+        lastPurchase: invoice['date'] != null ? _asDate(invoice['date']) : null,
+      ),
+    );
+  }
+
+  /// Reads, inside [tx], the customers any of [invoices] count towards.
+  Future<Map<String, DocumentSnapshot<Map<String, dynamic>>>> _readStatsCustomers(
+    Transaction tx,
+    String uid,
+    Iterable<Map<String, dynamic>?> invoices,
+  ) async {
+    final ids = {
+      for (final invoice in invoices)
+        if (_statsShare(invoice) case final share?) share.key,
+    };
+    final snaps = await Future.wait(ids.map((id) => tx.get(_customersCol(uid).doc(id))));
+    return {for (final snap in snaps) snap.id: snap};
+  }
+
+  /// Applies invoice (before, after) [changes] to the customer aggregates.
+  /// Customers missing from [customers] or deleted are skipped.
+  void _writeStatsChanges(
+    Transaction tx,
+    Map<String, DocumentSnapshot<Map<String, dynamic>>> customers,
+    Iterable<(Map<String, dynamic>?, Map<String, dynamic>?)> changes,
+  ) {
+    final deltas = <String, _CustomerStats>{};
+    for (final (before, after) in changes) {
+      if (_statsShare(before) case final old?) {
+        deltas[old.key] = (deltas[old.key] ?? _CustomerStats.zero) - old.value;
+      }
+      if (_statsShare(after) case final now?) {
+        deltas[now.key] = (deltas[now.key] ?? _CustomerStats.zero) + now.value;
+      }
+    }
+    deltas.forEach((customerId, delta) {
+      final customer = customers[customerId];
+      if (customer == null || !customer.exists) return;
+      final stored = customer.data()!['lastPurchaseDate'];
+      final last = delta.lastPurchase;
+      final newerPurchase = last != null && (stored is! Timestamp || stored.toDate().isBefore(last));
+      if (delta.isZero && !newerPurchase) return;
+      tx.update(customer.reference, {
+        'outstandingBalance': FieldValue.increment(delta.outstanding),
+        'totalSpent': FieldValue.increment(delta.spent),
+        'totalPaid': FieldValue.increment(delta.paid),
+        'invoiceCount': FieldValue.increment(delta.count),
+        if (newerPurchase) 'lastPurchaseDate': Timestamp.fromDate(last),
+        'statsSeq': FieldValue.increment(1),
+        'updatedAt': Timestamp.now(),
+      });
+    });
+  }
+
+  /// What an unapplied sales return adds to its customer's pending return amount.
+  double? _pendingReturnShare(ReturnModel ret) {
+    if (ret.returnType != 'sales' || ret.isApplied) return null;
+    if (ret.customerId == null || ret.customerId!.isEmpty) return null;
+    return ret.refundAmount;
+  }
+
+  /// Recomputes customer aggregates from the sales invoices and rewrites the
+  /// ones that drifted or were never reconciled. Returns the ids of customers
+  /// whose stored aggregates were wrong.
+  ///
+  /// A customer whose statsSeq moves while this runs was written by an
+  /// invoice change in the meantime; it is left for the next run.
+  Future<List<String>> reconcileCustomerStats({Iterable<String>? customerIds}) async {
+    final uid = _requireUid();
+    final stopwatch = Stopwatch()..start();
+    // Customers first: an invoice written after this read moves statsSeq.
+    final List<DocumentSnapshot<Map<String, dynamic>>> customers = customerIds == null
+        ? (await _customersCol(uid).get()).docs
+        : (await Future.wait(customerIds.toSet().map((id) => _customersCol(uid).doc(id).get())))
+            .where((snap) => snap.exists)
+            .toList();
+    if (customers.isEmpty) return [];
+
+    final ids = customers.map((c) => c.id).toList();
+    final invoices = ids.length <= 10 && customerIds != null
+        ? await _invoicesCol(uid).where('customerId', whereIn: ids).get()
+        : await _invoicesCol(uid).where('invoiceType', isEqualTo: 'sales').get();
+    final expected = <String, _CustomerStats>{};
+    for (final d in invoices.docs) {
+      if (_statsShare(d.data()) case final share?) {
+        expected[share.key] = (expected[share.key] ?? _CustomerStats.zero) + share.value;
+      }
+    }
+
+    final corrected = <String>[];
+    Future<void> reconcile(DocumentSnapshot<Map<String, dynamic>> customer) async {
+      final data = customer.data()!;
+      final want = expected[customer.id] ?? _CustomerStats.zero;
+      final drifted = !want.matches(data);
+      if (!drifted && data['statsReconciledAt'] != null) return;
+      final seq = data['statsSeq'];
+      final values = {
+        'outstandingBalance': want.outstanding,
+        'totalSpent': want.spent,
+        'totalPaid': want.paid,
+        'invoiceCount': want.count,
+        'lastPurchaseDate': want.lastPurchase != null ? Timestamp.fromDate(want.lastPurchase!) : null,
+        'statsReconciledAt': Timestamp.now(),
+        'updatedAt': Timestamp.now(),
+      };
+      final written = await _fs.runTransaction<bool>((tx) async {
+        final fresh = await tx.get(customer.reference);
+        if (!fresh.exists || fresh.data()!['statsSeq'] != seq) return false;
+        tx.update(customer.reference, values);
+        return true;
+      });
+      if (!written) return;
+      _customers.put(uid, customer.id, _customerFromFirestore({...data, ...values, 'id': customer.id}));
+      if (drifted) corrected.add(customer.id);
+    }
+
+    const concurrency = 20;
+    for (var start = 0; start < customers.length; start += concurrency) {
+      await Future.wait(customers.skip(start).take(concurrency).map(reconcile));
+    }
+    AppLogger.performance('Customer stats reconciliation', stopwatch.elapsed,
+        '${customers.length} customers, ${corrected.length} corrected');
+    if (corrected.isNotEmpty) {
+      AppLogger.warning('Customer stats drifted for ${corrected.join(', ')}', 'Firestore');
+    }
+    return corrected;
+  }
+
+  // ----------------------
+  // Analytics rollups
+  // ----------------------
+  //
+  // Each invoice write moves its share (AnalyticsRollup.share) out of its
+  // old day document and into its new one with FieldValue.increment, in the
+  // same transaction, and marks the invoice rolledUp. Invoices written
+  // before rollups existed are added by backfillAnalyticsRollups; until it
+  // has finished, getAnalyticsRollup returns null and analytics scan the
+  // invoices instead. Days are local calendar days, keyed yyyy-MM-dd.
+
+  /// Rollup document recording that every invoice has been rolled up.
+  static const String _rollupCoverageId = '_coverage';
+
+  static const int _rollupBackfillPageSize = 500;
+
+  /// User whose rollups are known to cover every invoice.
+  String? _rollupsCompleteFor;
+  Future<void>? _rollupBackfill;
+
+  InvoiceModel? _rollupInvoice(Map<String, dynamic>? data) {
+    if (data == null) return null;
+    return _invoiceFromFirestore({...data, 'id': data['id'] ?? ''});
+  }
+
+  /// Applies invoice (before, after) [changes] to the daily rollups. The old
+  /// share only comes off if it was rolled up; callers mark the new state
+  /// rolledUp in the same write.
+  void _writeRollupChanges(
+    Transaction tx,
+    String uid,
+    Iterable<(Map<String, dynamic>?, Map<String, dynamic>?)> changes,
+  ) {
+    _rollupWrites(uid, changes).forEach((doc, data) => tx.set(doc, data, SetOptions(merge: true)));
+  }
+
+  /// The rollup day documents [changes] touch and the merge each needs.
+  Map<DocumentReference<Map<String, dynamic>>, Map<String, dynamic>> _rollupWrites(
+    String uid,
+    Iterable<(Map<String, dynamic>?, Map<String, dynamic>?)> changes,
+  ) {
+    final deltas = AnalyticsRollup.deltas([
+      for (final (before, after) in changes)
+        (before?['rolledUp'] == true ? _rollupInvoice(before) : null, _rollupInvoice(after)),
+    ]);
+    return {
+      for (final MapEntry(key: day, value: delta) in deltas.entries)
+        _analyticsRollupsCol(uid).doc(day): {'day': day, ..._rollupIncrements(delta)},
+    };
+  }
+
+  /// A pruned rollup delta (see AnalyticsRollup.deltas) as nested
+  /// FieldValue.increment values.
+  Map<String, dynamic> _rollupIncrements(Map<String, dynamic> delta) => {
+        for (final MapEntry(:key, :value) in delta.entries)
+          key: switch (value) {
+            num n => FieldValue.increment(n),
+            Map nested => _rollupIncrements(Map<String, dynamic>.from(nested)),
+            _ => value,
+          },
+      };
+
+  /// Invoice totals for the days from [start] through [end] (both local
+  /// days, inclusive; [end] defaults to the latest day). Returns null while
+  /// older invoices are still being rolled up, starting that backfill if
+  /// it is not already running.
+  Future<AnalyticsRollup?> getAnalyticsRollup({required DateTime start, DateTime? end}) async {
+    final uid = _requireUid();
+    final col = _analyticsRollupsCol(uid);
+    if (_rollupsCompleteFor != uid) {
+      final coverage = await col.doc(_rollupCoverageId).get();
+      if (coverage.data()?['complete'] != true) {
+        unawaited(backfillAnalyticsRollups().catchError((Object e, StackTrace stackTrace) {
+          AppLogger.error('Analytics rollup backfill failed', 'Firestore', e, stackTrace);
+        }));
+        return null;
+      }
+      _rollupsCompleteFor = uid;
+    }
+    var query = col.where('day', isGreaterThanOrEqualTo: AnalyticsRollup.dayKey(start));
+    if (end != null) {
+      query = query.where('day', isLessThanOrEqualTo: AnalyticsRollup.dayKey(end));
+    }
+    final days = await query.get();
+    return AnalyticsRollup.fromDays(days.docs.map((d) => d.data()));
+  }
+
+  /// Rolls up every invoice not yet counted, then marks the rollups
+  /// complete. Concurrent calls share one run.
+  Future<void> backfillAnalyticsRollups() {
+    final uid = _requireUid();
+    return _rollupBackfill ??= _backfillAnalyticsRollups(uid).whenComplete(() => _rollupBackfill = null);
+  }
+
+  Future<void> _backfillAnalyticsRollups(String uid) async {
+    final stopwatch = Stopwatch()..start();
+    var rolledUp = 0;
+    QueryDocumentSnapshot<Map<String, dynamic>>? last;
+    while (true) {
+      var query = _invoicesCol(uid).orderBy(FieldPath.documentId).limit(_rollupBackfillPageSize);
+      if (last != null) query = query.startAfterDocument(last);
+      final page = await query.get();
+      if (page.docs.isEmpty) break;
+      last = page.docs.last;
+
+      final pending = [
+        for (final d in page.docs)
+          if (d.data()['rolledUp'] != true) d.reference,
+      ];
+      // 100 invoices plus at most 100 day documents per transaction.
+      for (var start = 0; start < pending.length; start += 100) {
+        final chunk = pending.skip(start).take(100);
+        rolledUp += await _fs.runTransaction<int>((tx) async {
+          final snaps = await Future.wait(chunk.map((ref) => tx.get(ref)));
+          final fresh = [
+            for (final snap in snaps)
+              if (snap.exists && snap.data()!['rolledUp'] != true) snap,
+          ];
+          _writeRollupChanges(tx, uid, [for (final snap in fresh) (null, snap.data())]);
+          for (final snap in fresh) {
+            tx.update(snap.reference, {'rolledUp': true});
+          }
+          return fresh.length;
+        });
+      }
+      if (page.docs.length < _rollupBackfillPageSize) break;
+    }
+    await _analyticsRollupsCol(uid).doc(_rollupCoverageId).set({
+      'complete': true,
+      'completedAt': Timestamp.now(),
+    });
+    _rollupsCompleteFor = uid;
+    // Results computed from the invoices meanwhile counted cancelled ones.
+    await AnalyticsCache.instance.invalidate(const [AnalyticsDependency.invoices]);
+    AppLogger.performance('Analytics rollup backfill', stopwatch.elapsed, '$rolledUp invoices rolled up');
+  }
+
+  /// Deletes every day document, keeping the coverage marker.
+  Future<void> _clearAnalyticsRollups(String uid) async {
+    final days = await _analyticsRollupsCol(uid).get();
+    for (var start = 0; start < days.docs.length; start += 450) {
+      final batch = _fs.batch();
+      for (final d in days.docs.skip(start).take(450)) {
+        if (d.id != _rollupCoverageId) batch.delete(d.reference);
+      }
+      await batch.commit();
+    }
   }
 
   // ----------------------
@@ -518,6 +998,12 @@ class FirestoreService {
       pendingReturnAmount: (data['pendingReturnAmount'] as num?)?.toDouble() ?? 0.0,
       createdAt: _asDate(data['createdAt']),
       updatedAt: _asDate(data['updatedAt']),
+      totalSpent: (data['totalSpent'] as num?)?.toDouble() ?? 0.0,
+      totalPaid: (data['totalPaid'] as num?)?.toDouble() ?? 0.0,
+      invoiceCount: (data['invoiceCount'] as num?)?.toInt() ?? 0,
+      lastPurchaseDate: data['lastPurchaseDate'] != null ? _asDate(data['lastPurchaseDate']) : null,
+      outstandingBalance: (data['outstandingBalance'] as num?)?.toDouble() ?? 0.0,
+      statsReconciledAt: data['statsReconciledAt'] != null ? _asDate(data['statsReconciledAt']) : null,
     );
   }
 
@@ -692,3 +1178,61 @@ class _BatchOp {
   final Map<String, dynamic> data;
   _BatchOp({required this.ref, required this.data});
 }
+
+/// A customer's invoice aggregates, or one invoice's share of them.
+class _CustomerStats {
+  const _CustomerStats({
+    this.outstanding = 0.0,
+    this.spent = 0.0,
+    this.paid = 0.0,
+    this.count = 0,
+    this.lastPurchase,
+  });
+
+  static const zero = _CustomerStats();
+
+  final double outstanding;
+  final double spent;
+  final double paid;
+  final int count;
+  final DateTime? lastPurchase;
+
+  bool get isZero =>
+      count == 0 &&
+      outstanding.abs() < FirestoreService._statsTolerance &&
+      spent.abs() < FirestoreService._statsTolerance &&
+      paid.abs() < FirestoreService._statsTolerance;
+
+  /// The later purchase of both is kept: a removed share cannot move it back.
+  _CustomerStats operator +(_CustomerStats other) => _CustomerStats(
+        outstanding: outstanding + other.outstanding,
+        spent: spent + other.spent,
+        paid: paid + other.paid,
+        count: count + other.count,
+        lastPurchase: lastPurchase == null ||
+                (other.lastPurchase != null && other.lastPurchase!.isAfter(lastPurchase!))
+            ? other.lastPurchase
+            : lastPurchase,
+      );
+
+  _CustomerStats operator -(_CustomerStats other) => _CustomerStats(
+        outstanding: outstanding - other.outstanding,
+        spent: spent - other.spent,
+        paid: paid - other.paid,
+        count: count - other.count,
+        lastPurchase: lastPurchase,
+      );
+
+  /// Whether a customer document's stored aggregates equal these.
+  bool matches(Map<String, dynamic> customer) {
+    bool close(String field, double value) =>
+        (((customer[field] as num?)?.toDouble() ?? 0.0) - value).abs() < FirestoreService._statsTolerance;
+    final stored = customer['lastPurchaseDate'];
+    final storedMs = stored is Timestamp ? stored.millisecondsSinceEpoch : null;
+    return close('outstandingBalance', outstanding) &&
+        close('totalSpent', spent) &&
+        close('totalPaid', paid) &&
+        ((customer['invoiceCount'] as num?)?.toInt() ?? 0) == count &&
+        storedMs == lastPurchase?.millisecondsSinceEpoch;
+  }
+}
@@ -3,6 +3,8 @@ import 'package:firebase_auth/firebase_auth.dart';
 
 import '../models/inventory_item_model.dart';
 import '../models/stock_movement_model.dart';
+import '../utils/app_logger.dart';
+import 'synced_collection.dart';
 
 class InventoryFirestoreService {
   static final InventoryFirestoreService instance = InventoryFirestoreService._internal();
@@ -25,11 +27,29 @@ class InventoryFirestoreService {
   CollectionReference<Map<String, dynamic>> _movementsCol(String uid) =>
       _fs.collection('users').doc(uid).collection('stock_movements');
 
+  CollectionReference<Map<String, dynamic>> _ledgerCol(String uid) =>
+      _fs.collection('users').doc(uid).collection('stock_ledger');
+
+  CollectionReference<Map<String, dynamic>> _rollupsCol(String uid) =>
+      _fs.collection('users').doc(uid).collection('sales_rollups');
+
+  late final SyncedCollection<InventoryItem> _items = SyncedCollection(
+    name: 'inventory_items',
+    collection: _itemsCol,
+    decode: (id, data) => _itemFromFirestore(data..['id'] = id),
+    watermarkField: 'last_updated',
+  );
+
+  /// Stops the offline item mirror, e.g. on sign-out.
+  void stopSync() => _items.stop();
+
+  /// Items changed since the mirror started, in batches.
+  Stream<SyncedChanges<InventoryItem>> get itemChanges => _items.changes;
+
   // Inventory Items
   Future<List<InventoryItem>> getAllItems() async {
     final uid = _requireUid();
-    final q = await _itemsCol(uid).get();
-    return q.docs.map((d) => _itemFromFirestore(d.data()..['id'] = d.id)).toList();
+    return _items.all(uid);
   }
 
   Future<List<Map<String, dynamic>>> getSellableItems() async {
@@ -79,23 +99,33 @@ class InventoryFirestoreService {
     final uid = _requireUid();
     final data = _itemToFirestore(item);
     await _itemsCol(uid).doc(item.id).set(data);
+    _items.put(uid, item.id, item);
   }
 
   Future<void> updateItem(InventoryItem item) async {
     final uid = _requireUid();
-    final data = _itemToFirestore(item);
-    await _itemsCol(uid).doc(item.id).update(data);
+    // last_updated is the sync watermark, so every edit has to move it.
+    final updated = item.copyWith(lastUpdated: DateTime.now());
+    await _itemsCol(uid).doc(item.id).update(_itemToFirestore(updated));
+    _items.put(uid, item.id, updated);
   }
 
   Future<void> deleteItem(String itemId) async {
     final uid = _requireUid();
-    await _itemsCol(uid).doc(itemId).delete();
+    final batch = _fs.batch();
+    batch.delete(_itemsCol(uid).doc(itemId));
+    batch.delete(_ledgerCol(uid).doc(itemId));
+    await batch.commit();
+    _items.remove(uid, itemId);
   }
 
   // Stock Movements
   Future<void> insertMovement(StockMovement movement) async {
     final uid = _requireUid();
-    await _movementsCol(uid).doc(movement.id).set(_movementToFirestore(movement));
+    final batch = _fs.batch();
+    batch.set(_movementsCol(uid).doc(movement.id), _movementToFirestore(movement));
+    _applyToLedger(batch, uid, [movement]);
+    await batch.commit();
   }
 
   Future<List<StockMovement>> getMovementsBySource(String sourceType, String sourceId) async {
@@ -127,7 +157,9 @@ class InventoryFirestoreService {
     return q.docs.map((d) => _movementFromFirestore(d.data())).toList();
   }
 
-  Future<void> reverseMovementsAtomically(String sourceType, String sourceId) async {
+  /// Writes a reversal for every movement of the source; returns the ids of
+  /// the items they touched.
+  Future<List<String>> reverseMovementsAtomically(String sourceType, String sourceId) async {
     final uid = _requireUid();
     final batch = _fs.batch();
     final q = await _movementsCol(uid)
@@ -135,6 +167,7 @@ class InventoryFirestoreService {
         .where('sourceRefId', isEqualTo: sourceId)
         .get();
 
+    final reversals = <StockMovement>[];
     for (final d in q.docs) {
       final data = d.data();
       final movement = _movementFromFirestore(data);
@@ -147,31 +180,382 @@ class InventoryFirestoreService {
         createdAt: DateTime.now(),
       );
       batch.set(_movementsCol(uid).doc(reversal.id), _movementToFirestore(reversal));
+      reversals.add(reversal);
     }
+    _applyToLedger(batch, uid, reversals);
 
     await batch.commit();
+    return reversals.map((m) => m.itemId).toSet().toList();
   }
 
+  // Bulk Posting
+
+  /// Lines per transaction in [postMovements]. A line writes at most a
+  /// movement, a ledger, an item and a new item, which keeps each commit
+  /// within the 450-operation headroom FirestoreService._writeInBatches uses.
+  static const int _linesPerCommit = 100;
+
+  /// Writes [movements] together with their ledger, `current_stock` and
+  /// rollup updates, creating any [newItems] they reference, in one
+  /// transaction per 100 lines. Returns the items with their new stock.
+  ///
+  /// Outflows are checked against the ledger inside the transaction, summed
+  /// per item. A shortage therefore throws before anything in the chunk is
+  /// written, and concurrent postings cannot both take the last unit.
+  Future<List<InventoryItem>> postMovements(
+    List<StockMovement> movements, {
+    List<InventoryItem> newItems = const [],
+  }) async {
+    final uid = _requireUid();
+    final created = {for (final item in newItems) item.id: item};
+    final updated = <InventoryItem>[];
+    for (var start = 0; start < movements.length; start += _linesPerCommit) {
+      final end = start + _linesPerCommit < movements.length ? start + _linesPerCommit : movements.length;
+      updated.addAll(await _postChunk(uid, movements.sublist(start, end), created));
+    }
+    // Transactions are not latency-compensated, so listeners see them late.
+    for (final item in updated) {
+      _items.put(uid, item.id, item);
+    }
+    return updated;
+  }
+
+  Future<List<InventoryItem>> _postChunk(
+    String uid,
+    List<StockMovement> chunk,
+    Map<String, InventoryItem> newItems,
+  ) async {
+    final itemIds = chunk.map((m) => m.itemId).toSet().toList();
+    final deltas = <String, double>{};
+    final counts = <String, int>{};
+    final needed = <String, double>{};
+    for (final m in chunk) {
+      deltas[m.itemId] = (deltas[m.itemId] ?? 0.0) + _stockDelta(m);
+      counts[m.itemId] = (counts[m.itemId] ?? 0) + 1;
+      if (_isOutflow(m.type)) needed[m.itemId] = (needed[m.itemId] ?? 0.0) + m.quantity;
+    }
+
+    while (true) {
+      final unseeded = <String>[];
+      final updated = await _fs.runTransaction<List<InventoryItem>>((tx) async {
+        unseeded.clear();
+        final snaps = await Future.wait(itemIds.map((id) => Future.wait([
+              tx.get(_itemsCol(uid).doc(id)),
+              tx.get(_ledgerCol(uid).doc(id)),
+            ])));
+
+        final items = <String, InventoryItem>{};
+        final existing = <String>{};
+        final ledgers = <String, Map<String, dynamic>>{};
+        for (var i = 0; i < itemIds.length; i++) {
+          final id = itemIds[i];
+          final itemData = snaps[i][0].data();
+          final ledger = snaps[i][1].data() ?? <String, dynamic>{};
+          if (itemData != null) {
+            items[id] = _itemFromFirestore(itemData..['id'] = id);
+            existing.add(id);
+            // Movements from before the ledger must be folded in by a query,
+            // which a transaction cannot run.
+            if (!ledger.containsKey('checkpointCount')) unseeded.add(id);
+          } else if (newItems.containsKey(id)) {
+            items[id] = newItems[id]!;
+          } else {
+            throw StateError('Inventory item $id does not exist');
+          }
+          ledgers[id] = ledger;
+        }
+        if (unseeded.isNotEmpty) return const <InventoryItem>[];
+
+        for (final entry in needed.entries) {
+          final available = (ledgers[entry.key]!['balance'] as num?)?.toDouble() ?? 0.0;
+          if (available < entry.value) {
+            throw Exception(
+                'Insufficient stock for ${items[entry.key]!.name}. Available: $available, Required: ${entry.value}');
+          }
+        }
+
+        final now = DateTime.now();
+        final updated = <InventoryItem>[];
+        for (final m in chunk) {
+          tx.set(_movementsCol(uid).doc(m.id), _movementToFirestore(m));
+        }
+        for (final id in itemIds) {
+          final ledger = ledgers[id]!;
+          final balance = ((ledger['balance'] as num?)?.toDouble() ?? 0.0) + deltas[id]!;
+          tx.set(
+            _ledgerCol(uid).doc(id),
+            {
+              'balance': balance,
+              'movementCount': ((ledger['movementCount'] as num?)?.toInt() ?? 0) + counts[id]!,
+              'updatedAt': FieldValue.serverTimestamp(),
+              // A new item has no earlier movements to fold in.
+              if (!ledger.containsKey('checkpointCount')) ...{
+                'checkpointBalance': 0.0,
+                'checkpointCount': 0,
+                'checkpointAt': null,
+              },
+            },
+            SetOptions(merge: true),
+          );
+          final item = items[id]!.copyWith(currentStock: balance, lastUpdated: now);
+          if (existing.contains(id)) {
+            tx.update(_itemsCol(uid).doc(id), {
+              'current_stock': balance,
+              'last_updated': Timestamp.fromDate(now),
+            });
+          } else {
+            tx.set(_itemsCol(uid).doc(id), _itemToFirestore(item));
+          }
+          updated.add(item);
+        }
+        _rollupWrites(uid, chunk).forEach((ref, data) => tx.set(ref, data, SetOptions(merge: true)));
+        return updated;
+      });
+      if (unseeded.isEmpty) return updated;
+      await Future.wait(unseeded.map((id) => _seedLedger(uid, id)));
+    }
+  }
+
+  // Stock Ledger
+  //
+  // stock_ledger/{itemId} holds a running `balance` that every movement write
+  // increments in the same batch, so current stock is a single document read.
+  // `checkpointBalance`, `checkpointCount` and `checkpointAt` record the last
+  // balance verified against the movements themselves: an audit only replays
+  // the movements written after it. Movements written before the ledger
+  // existed carry no `ledgered` flag and are folded in when the item's ledger
+  // is first read.
+
   Future<double> computeCurrentStock(String itemId) async {
-    final movements = await getMovementsByItem(itemId);
-    double total = 0.0;
+    final uid = _requireUid();
+    final d = await _ledgerCol(uid).doc(itemId).get();
+    final data = d.data();
+    if (data != null && data.containsKey('checkpointCount')) {
+      return (data['balance'] as num).toDouble();
+    }
+    return _seedLedger(uid, itemId);
+  }
+
+  /// Ledger balances of every item, in one query. Items whose ledger has not
+  /// been seeded yet are missing; [computeCurrentStock] seeds them.
+  Future<Map<String, double>> getLedgerBalances() async {
+    final uid = _requireUid();
+    final q = await _ledgerCol(uid).get();
+    return {
+      for (final d in q.docs)
+        if (d.data().containsKey('checkpointCount')) d.id: (d.data()['balance'] as num).toDouble(),
+    };
+  }
+
+  /// Checks the ledger of [itemId] against its movements, repairs it and
+  /// moves its checkpoint forward. Returns the correction applied.
+  ///
+  /// Only movements after the checkpoint are replayed, unless [full] is set
+  /// or the movement count no longer adds up (client clock skew, a movement
+  /// id written twice). The audit is skipped, returning 0, when a movement is
+  /// written for the item while it runs.
+  Future<double> auditStock(String itemId, {bool full = false}) async {
+    final uid = _requireUid();
+    final ref = _ledgerCol(uid).doc(itemId);
+    final before = (await ref.get()).data();
+    if (before == null || !before.containsKey('checkpointCount')) {
+      await _seedLedger(uid, itemId);
+      return 0.0;
+    }
+
+    final checkpointAt = (before['checkpointAt'] as Timestamp?)?.toDate();
+    final incremental = !full && checkpointAt != null;
+    final replay = await _replay(uid, itemId, after: incremental ? checkpointAt : null);
+    final expected = replay.total + (incremental ? (before['checkpointBalance'] as num).toDouble() : 0.0);
+    final expectedCount = replay.count + (incremental ? (before['checkpointCount'] as num).toInt() : 0);
+    if (incremental && expectedCount != (before['movementCount'] as num).toInt()) {
+      return auditStock(itemId, full: true);
+    }
+
+    final correction = await _fs.runTransaction<double?>((tx) async {
+      final data = (await tx.get(ref)).data();
+      if (data == null || data['movementCount'] != before['movementCount']) return null;
+      tx.update(ref, {
+        'balance': expected,
+        'movementCount': expectedCount,
+        'checkpointBalance': expected,
+        'checkpointCount': expectedCount,
+        'checkpointAt': replay.lastAt != null ? Timestamp.fromDate(replay.lastAt!) : before['checkpointAt'],
+        'updatedAt': FieldValue.serverTimestamp(),
+      });
+      return expected - (data['balance'] as num).toDouble();
+    });
+    if (correction == null) {
+      AppLogger.info('Skipped ledger audit of $itemId: movements written during the audit', 'Inventory');
+      return 0.0;
+    }
+    if (correction.abs() <= _ledgerTolerance) return 0.0;
+    AppLogger.warning('Ledger of $itemId was off by $correction; corrected to $expected', 'Inventory');
+    return correction;
+  }
+
+  static const double _ledgerTolerance = 1e-6;
+
+  double _stockDelta(StockMovement m) {
+    switch (m.type) {
+      case StockMovementType.IN:
+      case StockMovementType.RETURN_IN:
+      case StockMovementType.ADJUSTMENT:
+        return m.quantity;
+      case StockMovementType.OUT:
+      case StockMovementType.RETURN_OUT:
+      case StockMovementType.REVERSAL_OUT:
+        return -m.quantity;
+    }
+  }
+
+  void _applyToLedger(WriteBatch batch, String uid, Iterable<StockMovement> movements) {
+    final deltas = <String, double>{};
+    final counts = <String, int>{};
+    for (final m in movements) {
+      deltas[m.itemId] = (deltas[m.itemId] ?? 0.0) + _stockDelta(m);
+      counts[m.itemId] = (counts[m.itemId] ?? 0) + 1;
+    }
+    for (final itemId in deltas.keys) {
+      batch.set(
+        _ledgerCol(uid).doc(itemId),
+        {
+          'balance': FieldValue.increment(deltas[itemId]!),
+          'movementCount': FieldValue.increment(counts[itemId]!),
+          'updatedAt': FieldValue.serverTimestamp(),
+        },
+        SetOptions(merge: true),
+      );
+    }
+    _rollupWrites(uid, movements).forEach((ref, data) => batch.set(ref, data, SetOptions(merge: true)));
+  }
+
+  /// Per-day `sales_rollups` increments for the outflows among [movements],
+  /// to be written with merge.
+  Map<DocumentReference<Map<String, dynamic>>, Map<String, dynamic>> _rollupWrites(
+      String uid, Iterable<StockMovement> movements) {
+    final sold = <String, Map<String, double>>{};
     for (final m in movements) {
-      switch (m.type) {
-        case StockMovementType.IN:
-        case StockMovementType.RETURN_IN:
-          total += m.quantity;
-          break;
-        case StockMovementType.OUT:
-        case StockMovementType.RETURN_OUT:
-        case StockMovementType.REVERSAL_OUT:
-          total -= m.quantity;
-          break;
-        case StockMovementType.ADJUSTMENT:
-          total += m.quantity;
-          break;
+      if (_isOutflow(m.type)) {
+        final day = sold.putIfAbsent(_dayKey(m.createdAt), () => <String, double>{});
+        day[m.itemId] = (day[m.itemId] ?? 0.0) + m.quantity;
       }
     }
-    return total;
+    return {
+      for (final entry in sold.entries)
+        _rollupsCol(uid).doc(entry.key): {
+          'day': entry.key,
+          'items': {for (final e in entry.value.entries) e.key: FieldValue.increment(e.value)},
+        },
+    };
+  }
+
+  // Sales Rollups
+  //
+  // sales_rollups/{yyyy-MM-dd} (UTC day) maps item id to the quantity that
+  // left stock through OUT / RETURN_OUT movements that day, incremented with
+  // the movements themselves. The `_coverage` document records the first day
+  // every movement was rolled up; windows reaching further back are summed
+  // from the movements instead.
+
+  static bool _isOutflow(StockMovementType type) =>
+      type == StockMovementType.OUT || type == StockMovementType.RETURN_OUT;
+
+  static String _dayKey(DateTime t) {
+    final u = t.toUtc();
+    String two(int n) => n.toString().padLeft(2, '0');
+    return '${u.year}-${two(u.month)}-${two(u.day)}';
+  }
+
+  /// Quantity sold per item since [since], from at most one query.
+  ///
+  /// Rollups cover whole UTC days, so the day containing [since] counts in
+  /// full.
+  Future<Map<String, double>> getOutflowsSince(DateTime since) async {
+    final uid = _requireUid();
+    final totals = <String, double>{};
+    final coveredFrom = await _rollupCoverageStart(uid);
+    if (!since.isBefore(coveredFrom)) {
+      final q = await _rollupsCol(uid).where('day', isGreaterThanOrEqualTo: _dayKey(since)).get();
+      for (final d in q.docs) {
+        final items = (d.data()['items'] as Map<String, dynamic>?) ?? const {};
+        items.forEach((itemId, qty) => totals[itemId] = (totals[itemId] ?? 0.0) + (qty as num).toDouble());
+      }
+      return totals;
+    }
+
+    final q = await _movementsCol(uid)
+        .where('type', whereIn: [StockMovementType.OUT.name, StockMovementType.RETURN_OUT.name])
+        .where('createdAt', isGreaterThanOrEqualTo: Timestamp.fromDate(since))
+        .get();
+    for (final d in q.docs) {
+      final itemId = d.data()['itemId'] as String;
+      totals[itemId] = (totals[itemId] ?? 0.0) + (d.data()['quantity'] as num).toDouble();
+    }
+    return totals;
+  }
+
+  /// Start of the first UTC day whose sales are fully rolled up. Recorded on
+  /// first use as the next midnight, since today's earlier sales may predate
+  /// the rollups.
+  Future<DateTime> _rollupCoverageStart(String uid) async {
+    final ref = _rollupsCol(uid).doc('_coverage');
+    final d = await ref.get();
+    final since = d.data()?['since'] as Timestamp?;
+    if (since != null) return since.toDate();
+
+    final now = DateTime.now().toUtc();
+    final tomorrow = DateTime.utc(now.year, now.month, now.day + 1);
+    return _fs.runTransaction<DateTime>((tx) async {
+      final existing = (await tx.get(ref)).data()?['since'] as Timestamp?;
+      if (existing != null) return existing.toDate();
+      tx.set(ref, {'since': Timestamp.fromDate(tomorrow)});
+      return tomorrow;
+    });
+  }
+
+  Future<_Replay> _replay(String uid, String itemId, {DateTime? after}) async {
+    Query<Map<String, dynamic>> q = _movementsCol(uid).where('itemId', isEqualTo: itemId);
+    if (after != null) {
+      q = q.where('createdAt', isGreaterThan: Timestamp.fromDate(after));
+    }
+    final docs = (await q.orderBy('createdAt').get()).docs;
+    final replay = _Replay();
+    for (final d in docs) {
+      final m = _movementFromFirestore(d.data());
+      final delta = _stockDelta(m);
+      replay.total += delta;
+      replay.count++;
+      if (d.data()['ledgered'] != true) {
+        replay.legacyTotal += delta;
+        replay.legacyCount++;
+      }
+      replay.lastAt = m.createdAt;
+    }
+    return replay;
+  }
+
+  /// Folds the movements written before the ledger existed into it and sets
+  /// the first checkpoint. Safe to race: only the first seeding applies.
+  Future<double> _seedLedger(String uid, String itemId) async {
+    final replay = await _replay(uid, itemId);
+    final ref = _ledgerCol(uid).doc(itemId);
+    return _fs.runTransaction<double>((tx) async {
+      final data = (await tx.get(ref)).data() ?? const <String, dynamic>{};
+      if (data.containsKey('checkpointCount')) {
+        return (data['balance'] as num).toDouble();
+      }
+      final balance = ((data['balance'] as num?)?.toDouble() ?? 0.0) + replay.legacyTotal;
+      tx.set(ref, {
+        'balance': balance,
+        'movementCount': ((data['movementCount'] as num?)?.toInt() ?? 0) + replay.legacyCount,
+        'checkpointBalance': replay.total,
+        'checkpointCount': replay.count,
+        'checkpointAt': replay.lastAt != null ? Timestamp.fromDate(replay.lastAt!) : null,
+        'updatedAt': FieldValue.serverTimestamp(),
+      });
+      return balance;
+    });
   }
 
   // Converters
@@ -213,6 +597,7 @@ class InventoryFirestoreService {
         'createdAt': Timestamp.fromDate(m.createdAt),
         'reversalOfMovementId': m.reversalOfMovementId,
         'reversalFlag': m.reversalFlag,
+        'ledgered': true,
       };
 
   StockMovement _movementFromFirestore(Map<String, dynamic> data) => StockMovement(
@@ -228,3 +613,11 @@ class InventoryFirestoreService {
         reversalFlag: (data['reversalFlag'] as bool?) ?? false,
       );
 }
+
+class _Replay {
+  double total = 0.0;
+  int count = 0;
+  double legacyTotal = 0.0;
+  int legacyCount = 0;
+  DateTime? lastAt;
+}
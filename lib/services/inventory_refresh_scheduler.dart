@@ -0,0 +1,146 @@
+import 'dart:async';
+
+import '../utils/app_logger.dart';
+import '../utils/perf_marks.dart';
+
+/// One coalesced refresh, as published on [InventoryRefreshScheduler.stats].
+class InventoryRefreshStats {
+  const InventoryRefreshStats({
+    required this.itemCount,
+    required this.fullRefresh,
+    required this.requests,
+    required this.lag,
+    required this.duration,
+  });
+
+  /// Distinct items refreshed (the batch size); 0 for a full refresh.
+  final int itemCount;
+  final bool fullRefresh;
+
+  /// Refresh requests coalesced into this run.
+  final int requests;
+
+  /// Time from the first request in the batch until the refresh finished.
+  final Duration lag;
+
+  /// Time the refresh itself took.
+  final Duration duration;
+
+  @override
+  String toString() => fullRefresh
+      ? 'full refresh, $requests requests, lag ${lag.inMilliseconds}ms'
+      : '$itemCount items, $requests requests, lag ${lag.inMilliseconds}ms';
+}
+
+typedef InventoryRefresh = Future<void> Function(Set<String> itemIds, bool fullRefresh);
+
+/// Collects dirty item ids from stock mutations and runs one refresh per
+/// [window] for all of them.
+///
+/// Each request restarts the window, but a batch never waits longer than
+/// [maxDelay] after its first request, so a long import still refreshes
+/// regularly. Refreshes never overlap: a batch that closes while another
+/// refresh runs starts when it finishes. Failures are logged, not rethrown,
+/// because mutations do not wait for the refresh.
+class InventoryRefreshScheduler {
+  InventoryRefreshScheduler(
+    this._refresh, {
+    this.window = const Duration(milliseconds: 250),
+    this.maxDelay = const Duration(seconds: 2),
+  });
+
+  final InventoryRefresh _refresh;
+  Duration window;
+  Duration maxDelay;
+
+  final Set<String> _dirty = <String>{};
+  bool _fullRefresh = false;
+  int _requests = 0;
+  Stopwatch? _sinceFirstRequest;
+  Completer<void>? _batchDone;
+  Timer? _timer;
+  Future<void> _running = Future.value();
+
+  final StreamController<InventoryRefreshStats> _statsController =
+      StreamController<InventoryRefreshStats>.broadcast();
+
+  Stream<InventoryRefreshStats> get stats => _statsController.stream;
+
+  bool get hasPending => _batchDone != null;
+
+  /// Marks [itemIds] dirty. The future completes once a refresh covering
+  /// them has run.
+  Future<void> schedule(Iterable<String> itemIds) => _enqueue(itemIds, false);
+
+  /// Asks for a refresh of every item in the next batch.
+  Future<void> scheduleFull() => _enqueue(const <String>[], true);
+
+  /// Runs the pending batch now. Completes when it and any refresh already
+  /// running have finished.
+  Future<void> flush() {
+    final done = _batchDone;
+    if (done == null) return _running;
+    _timer?.cancel();
+    _startBatch();
+    return done.future;
+  }
+
+  Future<void> _enqueue(Iterable<String> itemIds, bool fullRefresh) {
+    _dirty.addAll(itemIds);
+    _fullRefresh = _fullRefresh || fullRefresh;
+    _requests++;
+    final sinceFirst = _sinceFirstRequest ??= Stopwatch()..start();
+    final done = _batchDone ??= Completer<void>();
+
+    final untilDeadline = maxDelay - sinceFirst.elapsed;
+    final delay = untilDeadline < window ? untilDeadline : window;
+    _timer?.cancel();
+    _timer = Timer(delay.isNegative ? Duration.zero : delay, _startBatch);
+    return done.future;
+  }
+
+  void _startBatch() {
+    final itemIds = Set<String>.of(_dirty);
+    final fullRefresh = _fullRefresh;
+    final requests = _requests;
+    final sinceFirst = _sinceFirstRequest!;
+    final done = _batchDone!;
+    _timer = null;
+    _dirty.clear();
+    _fullRefresh = false;
+    _requests = 0;
+    _sinceFirstRequest = null;
+    _batchDone = null;
+    _running = _running.then((_) => _run(itemIds, fullRefresh, requests, sinceFirst, done));
+  }
+
+  Future<void> _run(
+    Set<String> itemIds,
+    bool fullRefresh,
+    int requests,
+    Stopwatch sinceFirst,
+    Completer<void> done,
+  ) async {
+    final stopwatch = Stopwatch()..start();
+    try {
+      await PerfMarks.measure('inventoryRefresh', () => _refresh(itemIds, fullRefresh));
+    } catch (e, stackTrace) {
+      AppLogger.error('Scheduled inventory refresh failed', 'Inventory', e, stackTrace);
+    }
+    final stats = InventoryRefreshStats(
+      itemCount: fullRefresh ? 0 : itemIds.length,
+      fullRefresh: fullRefresh,
+      requests: requests,
+      lag: sinceFirst.elapsed,
+      duration: stopwatch.elapsed,
+    );
+    AppLogger.performance('Inventory refresh', stats.duration, stats.toString());
+    _statsController.add(stats);
+    done.complete();
+  }
+
+  void dispose() {
+    _timer?.cancel();
+    _statsController.close();
+  }
+}
@@ -3,7 +3,9 @@ import '../models/stock_movement_model.dart';
 import '../models/reorder_item_model.dart';
 import 'inventory_firestore_service.dart';
 import './inventory_notification_service.dart';
+import './inventory_refresh_scheduler.dart';
 import './stock_map_service.dart';
+import 'event_service.dart';
 import '../utils/app_logger.dart';
 import 'dart:async';
 
@@ -17,6 +19,29 @@ class InventoryService {
   
   Stream<void> get inventoryUpdates => _inventoryUpdatesController.stream;
 
+  late final InventoryRefreshScheduler refreshScheduler = InventoryRefreshScheduler(_runScheduledRefresh);
+
+  /// Refresh-lag and batch-size metrics, one event per coalesced refresh.
+  Stream<InventoryRefreshStats> get refreshStats => refreshScheduler.stats;
+
+  /// Queues a metrics refresh for [itemIds]. Requests within the scheduler's
+  /// window are coalesced into one [refreshMetricsForItems] run; the returned
+  /// future completes when it has run, and mutations do not wait for it.
+  Future<void> scheduleRefresh(Iterable<String> itemIds) => refreshScheduler.schedule(itemIds);
+
+  /// Queues a [refreshMetricsAndNotify] run, coalesced like [scheduleRefresh].
+  Future<void> scheduleFullRefresh() => refreshScheduler.scheduleFull();
+
+  Future<void> _runScheduledRefresh(Set<String> itemIds, bool fullRefresh) async {
+    if (fullRefresh) {
+      await refreshMetricsAndNotify();
+      _inventoryUpdatesController.add(null);
+      StockMapService().notifyInventoryUpdated();
+    } else {
+      await refreshMetricsForItems(itemIds.toList());
+    }
+  }
+
   Future<List<InventoryItem>> getAllItems() async {
     return await _db.getAllItems();
   }
@@ -91,9 +116,7 @@ class InventoryService {
 
     await addMovement(movement);
     await _updateItemCurrentStock(itemId);
-    await refreshMetricsAndNotify();
-    _inventoryUpdatesController.add(null);
-    StockMapService().notifyInventoryUpdated();
+    scheduleRefresh([itemId]);
   }
 
   /// OPTIMIZATION: Receive stock without triggering full metrics refresh
@@ -138,9 +161,7 @@ class InventoryService {
 
     await addMovement(movement);
     await _updateItemCurrentStock(itemId);
-    await refreshMetricsAndNotify();
-    _inventoryUpdatesController.add(null);
-    StockMapService().notifyInventoryUpdated();
+    scheduleRefresh([itemId]);
     return true;
   }
 
@@ -195,9 +216,7 @@ class InventoryService {
     
     await addMovement(movement);
     await _updateItemCurrentStock(itemId);
-    await refreshMetricsAndNotify();
-    _inventoryUpdatesController.add(null);
-    StockMapService().notifyInventoryUpdated();
+    scheduleRefresh([itemId]);
   }
 
   Future<double> computeCurrentStock(String itemId) async {
@@ -247,17 +266,11 @@ class InventoryService {
     final cutoffDate = DateTime.now().subtract(Duration(days: days));
 
     // Calculate fast-moving items based on actual OUT movements
+    final sold = await _db.getOutflowsSince(cutoffDate);
     final fastMovingData = <Map<String, dynamic>>[];
 
     for (final item in items) {
-      // Get all OUT movements for this item
-      final movements = await getMovementsByItem(item.id);
-      final outMovements = movements.where((m) =>
-        (m.type == StockMovementType.OUT || m.type == StockMovementType.RETURN_OUT) &&
-        m.createdAt.isAfter(cutoffDate)
-      );
-
-      final totalSold = outMovements.fold<double>(0, (sum, m) => sum + m.quantity);
+      final totalSold = sold[item.id] ?? 0.0;
 
       // Only include items that have been sold
       if (totalSold > 0) {
@@ -286,23 +299,10 @@ class InventoryService {
   Future<List<InventoryItem>> getSlowMovingItems({int daysSinceLastMovement = 30}) async {
     final items = await getAllItems();
     final cutoffDate = DateTime.now().subtract(Duration(days: daysSinceLastMovement));
-    final slowMoving = <InventoryItem>[];
-
-    for (final item in items) {
-      // Get all OUT movements for this item in the period
-      final movements = await getMovementsByItem(item.id);
-      final recentOutMovements = movements.where((m) =>
-        (m.type == StockMovementType.OUT || m.type == StockMovementType.RETURN_OUT) &&
-        m.createdAt.isAfter(cutoffDate)
-      );
-
-      // Item is slow-moving if it has no OUT movements in the period and has stock
-      if (recentOutMovements.isEmpty && item.currentStock > 0) {
-        slowMoving.add(item);
-      }
-    }
+    final sold = await _db.getOutflowsSince(cutoffDate);
 
-    return slowMoving;
+    // Item is slow-moving if it has no OUT movements in the period and has stock
+    return items.where((item) => (sold[item.id] ?? 0.0) <= 0 && item.currentStock > 0).toList();
   }
 
   Future<Map<String, dynamic>> getInventoryAnalytics() async {
@@ -350,6 +350,43 @@ class InventoryService {
     }
   }
 
+  /// Posts all lines of an invoice in one transaction per 100 lines: stock
+  /// is validated for every line, then the movements, ledgers, new
+  /// `current_stock` values and [newItems] are written together. Each line
+  /// needs `itemId`, `quantity` and, for purchases, `unitCost`.
+  Future<void> postInvoiceStock(
+    String invoiceId,
+    String invoiceType,
+    List<Map<String, dynamic>> lines, {
+    List<InventoryItem> newItems = const [],
+  }) async {
+    if (invoiceType != 'purchase' && invoiceType != 'sales') return;
+    final now = DateTime.now();
+    final movements = <StockMovement>[];
+    for (var i = 0; i < lines.length; i++) {
+      final itemId = lines[i]['itemId'] as String;
+      final qty = (lines[i]['quantity'] as num).toDouble();
+      if (qty <= 0) throw Exception('Quantity must be positive');
+      final purchase = invoiceType == 'purchase';
+      movements.add(StockMovement(
+        id: '${now.millisecondsSinceEpoch}_${itemId}_${i}_${purchase ? 'in' : 'out'}',
+        itemId: itemId,
+        type: purchase ? StockMovementType.IN : StockMovementType.OUT,
+        quantity: qty,
+        unitCost: purchase ? (lines[i]['unitCost'] as num?)?.toDouble() ?? 0.0 : 0.0,
+        sourceRefType: 'invoice',
+        sourceRefId: invoiceId,
+        createdAt: now,
+      ));
+    }
+
+    final updatedItems = await _db.postMovements(movements, newItems: newItems);
+    for (final item in updatedItems) {
+      InventoryNotificationService().notifyItemUpdated(item);
+    }
+    scheduleRefresh(updatedItems.map((item) => item.id));
+  }
+
   Future<void> processReturnStock(String returnId, String returnType, List<Map<String, dynamic>> items) async {
     for (final itemData in items) {
       final itemId = itemData['itemId'] as String;
@@ -382,7 +419,7 @@ class InventoryService {
 
   Future<void> deleteItem(String itemId) async {
     await _db.deleteItem(itemId);
-    await refreshMetricsAndNotify();
+    scheduleRefresh([itemId]);
   }
 
   Future<void> addMovement(StockMovement movement) async {
@@ -402,8 +439,14 @@ class InventoryService {
   }
 
   Future<void> reverseInvoiceMovements(String sourceType, String sourceId) async {
-    await _db.reverseMovementsAtomically(sourceType, sourceId);
-    await refreshMetricsAndNotify();
+    final itemIds = await _db.reverseMovementsAtomically(sourceType, sourceId);
+    _refreshAndAnnounce(itemIds);
+  }
+
+  /// Schedules a refresh of [itemIds] and names them in an InventoryUpdated
+  /// event once it has run.
+  void _refreshAndAnnounce(List<String> itemIds) {
+    unawaited(scheduleRefresh(itemIds).then((_) => EventService().triggerInventoryUpdated(itemIds)));
   }
 
   Future<List<StockMovement>> getMovementsBySource(String sourceType, String sourceId) async {
@@ -420,8 +463,9 @@ class InventoryService {
     final previousLowStock = await getLowStockItems();
 
     // Recompute all items to ensure current stock is accurate
+    final balances = await _db.getLedgerBalances();
     for (final item in allItems) {
-      final actualStock = await _db.computeCurrentStock(item.id);
+      final actualStock = balances[item.id] ?? await _db.computeCurrentStock(item.id);
       if (actualStock != item.currentStock) {
         final updatedItem = item.copyWith(currentStock: actualStock, lastUpdated: DateTime.now());
         await updateItem(updatedItem);
@@ -449,6 +493,20 @@ class InventoryService {
     InventoryNotificationService().notifyMetricsUpdated(metrics);
   }
 
+  /// Replays stock movements to verify every item's ledger balance, fixing any
+  /// drift. Returns the corrections applied, by item id. Slow: run it rarely.
+  Future<Map<String, double>> auditStockLedger({bool full = false}) async {
+    final corrections = <String, double>{};
+    for (final item in await getAllItems()) {
+      final correction = await _db.auditStock(item.id, full: full);
+      if (correction != 0) corrections[item.id] = correction;
+    }
+    if (corrections.isNotEmpty) {
+      await scheduleFullRefresh();
+    }
+    return corrections;
+  }
+
   /// OPTIMIZATION: Refresh metrics for only specific items (much faster than full refresh)
   Future<void> refreshMetricsForItems(List<String> itemIds) async {
     if (itemIds.isEmpty) return;
@@ -553,7 +611,7 @@ class InventoryService {
     final movements = await getMovementsBySource(sourceType, sourceId);
     
     // First reverse the movements atomically
-    await _db.reverseMovementsAtomically(sourceType, sourceId);
+    final itemIds = await _db.reverseMovementsAtomically(sourceType, sourceId);
     
     // Then create adjustment movements for items that went negative
     for (final movement in movements) {
@@ -575,6 +633,7 @@ class InventoryService {
         }
       }
     }
+    _refreshAndAnnounce(itemIds);
   }
 
   /// Adds an item directly to inventory without creating a purchase invoice
@@ -621,9 +680,7 @@ class InventoryService {
 
     await addMovement(movement);
     await _updateItemCurrentStock(itemId);
-    await refreshMetricsAndNotify();
-    _inventoryUpdatesController.add(null);
-    StockMapService().notifyInventoryUpdated();
+    scheduleRefresh([itemId]);
   }
 
   /// OPTIMIZATION: Batch add multiple items to inventory at once (much faster)
@@ -701,9 +758,6 @@ class InventoryService {
     await Future.wait(affectedItemIds.map((id) => _updateItemCurrentStock(id)));
 
     // OPTIMIZATION: Single metrics refresh at the end for all items
-    await refreshMetricsForItems(affectedItemIds);
-
-    _inventoryUpdatesController.add(null);
-    StockMapService().notifyInventoryUpdated();
+    scheduleRefresh(affectedItemIds);
   }
 }
\ No newline at end of file
@@ -0,0 +1,231 @@
+import 'dart:async';
+import 'dart:collection';
+
+import 'package:firebase_auth/firebase_auth.dart';
+
+import '../models/invoice_model.dart';
+import '../models/invoice_page_model.dart';
+import '../utils/app_logger.dart';
+import 'event_service.dart';
+import 'firestore_service.dart';
+
+/// What a paged invoice list shows: a window of loaded invoices inside the
+/// whole, newest-first result.
+class InvoiceListSnapshot {
+  const InvoiceListSnapshot({
+    required this.offset,
+    required this.invoices,
+    required this.hasMore,
+    this.loading = false,
+    this.error,
+  });
+
+  /// Invoices before the window, scrolled past and dropped from memory.
+  final int offset;
+
+  /// The loaded window.
+  final List<InvoiceModel> invoices;
+
+  /// Whether there are invoices after the window.
+  final bool hasMore;
+
+  final bool loading;
+  final Object? error;
+
+  /// Rows a list should lay out. Dropped invoices keep their rows so the
+  /// scroll position does not jump.
+  int get itemCount => offset + invoices.length;
+
+  /// The invoice in list row [index], or null while its page is not loaded.
+  InvoiceModel? operator [](int index) {
+    final i = index - offset;
+    return i >= 0 && i < invoices.length ? invoices[i] : null;
+  }
+}
+
+/// Pages through the invoices matching a [filter], newest first, and
+/// publishes the loaded window on [snapshots].
+///
+/// A list reports the rows it builds through [didShow]. The repository
+/// prefetches the next page when the user is half a page from the end of
+/// the window and appends it near the end. At most [maxWindowPages] pages
+/// stay loaded. Pages scrolled far past are dropped and fetched again from
+/// their cursor if the user scrolls back. Opening a list costs at most one
+/// page of reads, and memory does not grow with the number of invoices.
+///
+/// Fetched pages are also kept in a small cache shared by all repositories,
+/// so reopening a list reads nothing. Pages are cached per user. Any
+/// invoice change announced on [EventService] empties the cache. An open
+/// list only shows such changes after [refresh].
+class InvoicePageRepository {
+  InvoicePageRepository({
+    this.filter = const InvoiceFilter(),
+    this.pageSize = 50,
+    this.maxWindowPages = 6,
+  }) {
+    _events ??= EventService().eventStream.listen((event) {
+      if (event == 'InvoicesUpdated') _pageCache.clear();
+    });
+  }
+
+  final InvoiceFilter filter;
+  final int pageSize;
+  final int maxWindowPages;
+
+  static const int _maxCachedPages = 20;
+  static final LinkedHashMap<_PageKey, InvoicePage> _pageCache = LinkedHashMap<_PageKey, InvoicePage>();
+  static StreamSubscription<String>? _events;
+
+  final FirestoreService _fs = FirestoreService.instance;
+  final FirebaseAuth _auth = FirebaseAuth.instance;
+  final StreamController<InvoiceListSnapshot> _controller = StreamController<InvoiceListSnapshot>.broadcast();
+
+  /// Where each page starts; page 0 starts at the beginning.
+  final List<InvoiceCursor?> _cursors = [null];
+  final List<InvoicePage> _window = [];
+  final Map<int, Future<InvoicePage>> _fetching = {};
+  int _firstPage = 0;
+  bool _hasMore = true;
+  bool _busy = false;
+  bool _refreshQueued = false;
+  Object? _error;
+  InvoiceListSnapshot _current = const InvoiceListSnapshot(offset: 0, invoices: [], hasMore: true, loading: true);
+
+  Stream<InvoiceListSnapshot> get snapshots => _controller.stream;
+  InvoiceListSnapshot get current => _current;
+
+  /// Loads the first page.
+  Future<void> start() => _run(() async {
+        final page = await _page(0);
+        _window
+          ..clear()
+          ..add(page);
+        _firstPage = 0;
+        _hasMore = page.next != null;
+      });
+
+  /// Drops this filter's cached pages and loads the first page again.
+  Future<void> refresh() {
+    _pageCache.removeWhere((key, _) => key.$2 == filter);
+    if (_busy) {
+      _refreshQueued = true;
+      return Future.value();
+    }
+    _cursors.length = 1;
+    return start();
+  }
+
+  /// Tells the repository that list row [index] is being built.
+  void didShow(int index) {
+    final start = _firstPage * pageSize;
+    final end = start + _loaded;
+    if (_firstPage > 0 && index < start + pageSize ~/ 2) {
+      unawaited(_loadPrevious());
+      return;
+    }
+    if (!_hasMore) return;
+    if (index >= end - pageSize ~/ 2) _prefetch(_firstPage + _window.length);
+    if (index >= end - pageSize ~/ 5) unawaited(loadMore());
+  }
+
+  /// Appends the next page to the window.
+  Future<void> loadMore() {
+    if (!_hasMore) return Future.value();
+    return _run(() async {
+      final page = await _page(_firstPage + _window.length);
+      _window.add(page);
+      _hasMore = page.next != null;
+      if (_window.length > maxWindowPages) {
+        _window.removeAt(0);
+        _firstPage++;
+      }
+    });
+  }
+
+  Future<void> _loadPrevious() {
+    if (_firstPage == 0) return Future.value();
+    return _run(() async {
+      final page = await _page(_firstPage - 1);
+      _window.insert(0, page);
+      _firstPage--;
+      if (_window.length > maxWindowPages) {
+        _window.removeLast();
+        _hasMore = true;
+      }
+    });
+  }
+
+  int get _loaded => _window.fold(0, (sum, page) => sum + page.invoices.length);
+
+  /// Runs one window change at a time; calls made meanwhile are dropped,
+  /// the list asks again on its next build.
+  Future<void> _run(Future<void> Function() change) async {
+    if (_busy || _controller.isClosed) return;
+    _busy = true;
+    _publish(loading: true);
+    try {
+      await change();
+      _error = null;
+    } catch (e, stackTrace) {
+      _error = e;
+      AppLogger.error('Invoice page load failed', 'Invoices', e, stackTrace);
+    } finally {
+      _busy = false;
+      _publish();
+    }
+    if (_refreshQueued) {
+      _refreshQueued = false;
+      await refresh();
+    }
+  }
+
+  void _prefetch(int index) {
+    if (index < _cursors.length && !_pageCache.containsKey(_key(index))) {
+      unawaited(_page(index).then((_) {}, onError: (Object _) {}));
+    }
+  }
+
+  _PageKey _key(int index) => (_auth.currentUser?.uid, filter, pageSize, index);
+
+  Future<InvoicePage> _page(int index) {
+    final key = _key(index);
+    final cached = _pageCache.remove(key);
+    if (cached != null) {
+      _pageCache[key] = cached; // most recently used
+      _recordCursor(index, cached);
+      return Future.value(cached);
+    }
+    return _fetching[index] ??= _fetch(index).whenComplete(() => _fetching.remove(index));
+  }
+
+  Future<InvoicePage> _fetch(int index) async {
+    final key = _key(index);
+    final page = await _fs.getInvoicePage(filter, after: _cursors[index], limit: pageSize);
+    _pageCache[key] = page;
+    while (_pageCache.length > _maxCachedPages) {
+      _pageCache.remove(_pageCache.keys.first);
+    }
+    _recordCursor(index, page);
+    return page;
+  }
+
+  void _recordCursor(int index, InvoicePage page) {
+    if (page.next != null && _cursors.length == index + 1) _cursors.add(page.next);
+  }
+
+  void _publish({bool loading = false}) {
+    _current = InvoiceListSnapshot(
+      offset: _firstPage * pageSize,
+      invoices: [for (final page in _window) ...page.invoices],
+      hasMore: _hasMore,
+      loading: loading,
+      error: _error,
+    );
+    if (!_controller.isClosed) _controller.add(_current);
+  }
+
+  void dispose() => _controller.close();
+}
+
+/// User, filter, page size and page index.
+typedef _PageKey = (String?, InvoiceFilter, int, int);
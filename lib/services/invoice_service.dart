@@ -1,11 +1,12 @@
 import 'package:shared_preferences/shared_preferences.dart';
 import '../models/invoice_model.dart';
 import '../models/inventory_item_model.dart';
+import './csv_import_service.dart';
 import './csv_invoice_service.dart';
+import './event_service.dart';
 import './inventory_service.dart';
 import './firestore_service.dart';
-import './analytics_service.dart';
-import './customer_service.dart';
+import './pdf_cache.dart';
 import '../utils/app_logger.dart';
 
 class InvoiceService {
@@ -23,37 +24,25 @@ class InvoiceService {
     return _instance!;
   }
 
-  // A one-time setup method to be called from main().
+  // A one-time setup method to be called from main(). Only creates the
+  // instance; the CSV migration runs separately, see migrateCsvIfNeeded().
   static Future<void> initialize({required String csvPath}) async {
     if (_instance != null) return; // Already initialized
     // Create the single instance.
     _instance = InvoiceService._internal(csvPath: csvPath);
-    // Perform the one-time migration here, once, when the app starts.
+  }
+
+  // Perform the one-time migration. main() starts it after the first frame,
+  // so it no longer holds up the first screen.
+  Future<void> migrateCsvIfNeeded() async {
     try {
-      await _instance!._migrateCsvToDbIfNeeded();
+      await _migrateCsvToDbIfNeeded();
     } catch (e) {
       AppLogger.warning('CSV migration failed but continuing', 'InvoiceService');
       // Continue even if migration fails - this allows web version to work
     }
   }
 
-  String _sanitizeFirestoreId(String id) {
-    // Replace characters not allowed or problematic in document IDs
-    // Firestore allows most characters, but slashes create path segments.
-    var safe = id.trim();
-    if (safe.isEmpty) {
-      return 'INV_${DateTime.now().millisecondsSinceEpoch}';
-    }
-    // Replace forward/back slashes and control whitespace with underscore
-    safe = safe.replaceAll(RegExp(r"[\\/\n\r\t]"), '_');
-    // Collapse multiple underscores
-    safe = safe.replaceAll(RegExp(r'_+'), '_');
-    // Limit length to a reasonable size
-    if (safe.length > 150) {
-      safe = safe.substring(0, 150);
-    }
-    return safe;
-  }
   // --- End of Singleton Implementation ---
 
   final FirestoreService _fsService = FirestoreService.instance;
@@ -74,34 +63,27 @@ class InvoiceService {
     // If the flag is not set, perform the one-time migration.
     AppLogger.info('Starting one-time CSV migration...', 'Migration');
     try {
-      final csvInvoices = await _csvInvoiceService.loadInvoicesFromCsv();
-      AppLogger.info('Migrating ${csvInvoices.length} invoices from CSV...', 'Migration');
-
-      int success = 0;
-      int failed = 0;
-      for (final original in csvInvoices) {
-        try {
-          // Sanitize ID to be Firestore-safe
-          final safeId = _sanitizeFirestoreId(original.id);
-          final safeNumber = original.invoiceNumber.isEmpty ? safeId : original.invoiceNumber;
-          final inv = original.copyWith(id: safeId, invoiceNumber: safeNumber);
-          await _fsService.upsertInvoice(inv);
-          success++;
-        } catch (e) {
-          failed++;
-          AppLogger.error('CSV migrate failed for invoice', 'Migration', e);
-          // continue with next invoice
-        }
+      // Streamed and written in batches; an interrupted run resumes after
+      // the last committed batch on the next launch.
+      final path = await _csvInvoiceService.ensureFile();
+      final result = await CsvImportService.instance.importFile(path, CsvImportKind.invoices);
+      AppLogger.info(
+        'Migrated ${result.imported} invoices from CSV (${result.duplicates} already present)',
+        'Migration',
+      );
+
+      if (result.imported > 0) {
+        // The dashboard may already be showing the data from before.
+        EventService().triggerDashboardUpdated();
       }
 
-      if (failed == 0) {
-        // Set the flag to true ONLY after successful migration of all records.
-        await prefs.setBool('csv_migrated', true);
-        AppLogger.info('CSV migration completed successfully', 'Migration');
-      } else {
-        AppLogger.warning('CSV migration partially completed', 'Migration');
-        // Leave flag false to retry or handle later
+      if (result.invalid > 0) {
+        // Unreadable rows stay unreadable; retrying would not help.
+        AppLogger.warning('CSV migration skipped ${result.invalid} unreadable rows', 'Migration');
       }
+      // Set the flag to true ONLY after every batch was written.
+      await prefs.setBool('csv_migrated', true);
+      AppLogger.info('CSV migration completed successfully', 'Migration');
     } catch (e) {
       AppLogger.error('CSV migration failed', 'Migration', e);
       // Do NOT set the flag if it fails, so it can try again on the next launch.
@@ -118,18 +100,8 @@ class InvoiceService {
     return await _fsService.getAllInvoices();
   }
 
-  /// Fetch invoices with pagination for better performance
-  /// Returns a map with 'invoices', 'lastDocument', and 'hasMore' keys
-  Future<Map<String, dynamic>> fetchInvoicesPaginated({
-    int limit = 50,
-    dynamic lastDocument,
-    String? invoiceType,
-  }) async {
-    return await _fsService.getInvoicesPaginated(
-      limit: limit,
-      startAfter: lastDocument,
-      invoiceType: invoiceType,
-    );
+  Future<List<InvoiceModel>> searchInvoices(String query, {int? limit}) async {
+    return await _fsService.searchInvoices(query, limit: limit);
   }
 
   Future<void> addInvoice(InvoiceModel invoice) async {
@@ -140,18 +112,6 @@ class InvoiceService {
     if (invoice.status != 'cancelled' && invoice.status != 'draft') {
       await _processInvoiceInventory(invoice);
     }
-
-    // Invalidate analytics cache when invoices change
-    await AnalyticsService().invalidateCache();
-
-    // Update denormalized customer stats for fast queries
-    if (invoice.customerId != null && invoice.customerId!.isNotEmpty) {
-      try {
-        await CustomerService.instance.updateCustomerStats(invoice.customerId!);
-      } catch (e) {
-        AppLogger.warning('Failed to update customer stats', 'InvoiceService');
-      }
-    }
   }
 
   Future<void> updateInvoice(InvoiceModel invoice) async {
@@ -171,17 +131,6 @@ class InvoiceService {
         await _reverseInvoiceInventory(invoice);
       }
     }
-    // Invalidate analytics cache when invoices change
-    await AnalyticsService().invalidateCache();
-
-    // Update denormalized customer stats
-    if (invoice.customerId != null && invoice.customerId!.isNotEmpty) {
-      try {
-        await CustomerService.instance.updateCustomerStats(invoice.customerId!);
-      } catch (e) {
-        AppLogger.warning('Failed to update customer stats', 'InvoiceService');
-      }
-    }
   }
 
   Future<void> deleteInvoice(String invoiceId) async {
@@ -205,8 +154,6 @@ class InvoiceService {
     } else {
       await _fsService.deleteInvoice(invoiceId);
     }
-    // Invalidate analytics cache when invoices change
-    await AnalyticsService().invalidateCache();
   }
 
   /// Gets invoice by ID
@@ -371,45 +318,23 @@ class InvoiceService {
       }
     }
 
-    // OPTIMIZATION: Batch create all new items
-    if (newItemsToCreate.isNotEmpty) {
-      await inventoryService.batchAddItems(newItemsToCreate);
-    }
-
-    // OPTIMIZATION: Process stock movements without triggering metric refresh each time
+    // OPTIMIZATION: New items, stock checks, movements and current_stock for
+    // every line are written in one transaction (one per 100 lines)
     try {
-      final List<Future<void>> stockOperations = [];
-
-      for (final item in invoice.items) {
-        final finalItemId = itemNameToFinalId[item.name]!;
-
-        if (invoice.invoiceType == 'purchase') {
-          stockOperations.add(
-            inventoryService.receiveStockWithoutRefresh(
-              finalItemId,
-              item.quantity.toDouble(),
-              item.price,
-              'invoice:${invoice.id}'
-            )
-          );
-        } else if (invoice.invoiceType == 'sales') {
-          stockOperations.add(
-            inventoryService.issueStockWithoutRefresh(
-              finalItemId,
-              item.quantity.toDouble(),
-              'invoice:${invoice.id}'
-            )
-          );
-        }
-      }
-
-      // OPTIMIZATION: Execute all stock operations in parallel
-      await Future.wait(stockOperations);
-
-      // OPTIMIZATION: Single metric refresh at the end for all affected items
-      final affectedItemIds = itemNameToFinalId.values.toSet().toList();
-      await inventoryService.refreshMetricsForItems(affectedItemIds);
-
+      final lines = [
+        for (final item in invoice.items)
+          {
+            'itemId': itemNameToFinalId[item.name]!,
+            'quantity': item.quantity.toDouble(),
+            'unitCost': item.price,
+          }
+      ];
+      await inventoryService.postInvoiceStock(
+        invoice.id,
+        invoice.invoiceType,
+        lines,
+        newItems: newItemsToCreate,
+      );
     } catch (e) {
       AppLogger.error('Inventory processing error', 'Invoice', e);
       rethrow;
@@ -502,6 +427,7 @@ class InvoiceService {
     );
     
     await _fsService.upsertInvoice(modifiedInvoice);
+    await PdfCache.instance.invalidate(invoiceId);
   }
 
   Future<void> markLastThreeInvoicesUnpaid() async {
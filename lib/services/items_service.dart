@@ -1,6 +1,8 @@
 import 'package:cloud_firestore/cloud_firestore.dart';
 import 'package:firebase_auth/firebase_auth.dart';
 import '../models/catalog_item.dart';
+import 'search_index.dart';
+import 'synced_collection.dart';
 
 /// ItemsService manages the product catalog (items that can be sold)
 /// This is separate from inventory which tracks stock levels
@@ -12,6 +14,22 @@ class ItemsService {
   final FirebaseFirestore _fs = FirebaseFirestore.instance;
   final FirebaseAuth _auth = FirebaseAuth.instance;
 
+  // Offline-first mirror of the catalogue (see SyncedCollection). Its search
+  // index is built once per user and kept in step by the writes below and
+  // by the listener, which brings in edits made on other devices.
+  late final SyncedCollection<ProductCatalogItem> _items = SyncedCollection(
+    name: 'items_catalog',
+    collection: _itemsCol,
+    decode: (id, data) => _itemFromFirestore(data..['id'] = id),
+    index: SearchIndex(
+      idOf: (item) => item.id,
+      fields: [(item) => item.name, (item) => item.sku, (item) => item.barcode, (item) => item.category],
+    ),
+  );
+
+  /// Stops the offline catalogue mirror, e.g. on sign-out.
+  void stopSync() => _items.stop();
+
   String _requireUid() {
     final uid = _auth.currentUser?.uid;
     if (uid == null) {
@@ -26,8 +44,7 @@ class ItemsService {
   // Get all items in the catalog
   Future<List<ProductCatalogItem>> getAllItems() async {
     final uid = _requireUid();
-    final q = await _itemsCol(uid).get();
-    return q.docs.map((d) => _itemFromFirestore(d.data()..['id'] = d.id)).toList();
+    return _items.all(uid);
   }
 
   // Get item by ID
@@ -59,6 +76,7 @@ class ItemsService {
     final uid = _requireUid();
     final data = _itemToFirestore(item);
     await _itemsCol(uid).doc(item.id).set(data);
+    _items.put(uid, item.id, item);
   }
 
   // Update an existing item
@@ -66,25 +84,33 @@ class ItemsService {
     final uid = _requireUid();
     final data = _itemToFirestore(item);
     await _itemsCol(uid).doc(item.id).update(data);
+    _items.put(uid, item.id, item);
   }
 
   // Delete an item from the catalog
   Future<void> deleteItem(String itemId) async {
     final uid = _requireUid();
     await _itemsCol(uid).doc(itemId).delete();
+    _items.remove(uid, itemId);
   }
 
-  // Batch add multiple items (useful for demo data import)
+  // Batch add multiple items (demo data and CSV imports)
   Future<void> addMultipleItems(List<ProductCatalogItem> items) async {
     final uid = _requireUid();
-    final batch = _fs.batch();
+    await _writeInBatches(uid, [for (final item in items) (item.id, _itemToFirestore(item))]);
+    _items.putAll(uid, {for (final item in items) item.id: item});
+  }
 
-    for (final item in items) {
-      final data = _itemToFirestore(item);
-      batch.set(_itemsCol(uid).doc(item.id), data);
+  // Firestore allows 500 writes per batch
+  Future<void> _writeInBatches(String uid, List<(String, Map<String, dynamic>)> docs) async {
+    const maxOps = 450; // leave headroom for safety
+    for (var start = 0; start < docs.length; start += maxOps) {
+      final batch = _fs.batch();
+      for (final (id, data) in docs.skip(start).take(maxOps)) {
+        batch.set(_itemsCol(uid).doc(id), data);
+      }
+      await batch.commit();
     }
-
-    await batch.commit();
   }
 
   // Batch add multiple items from maps (for template imports)
@@ -106,8 +132,7 @@ class ItemsService {
       }
     }
 
-    final batch = _fs.batch();
-
+    final docs = <(String, Map<String, dynamic>)>[];
     for (final itemMap in itemMaps) {
       final map = itemMap as Map<String, dynamic>;
       final id = map['id'] as String;
@@ -122,24 +147,19 @@ class ItemsService {
         'createdAt': Timestamp.fromDate(DateTime.parse(map['createdAt'])),
         'updatedAt': Timestamp.fromDate(DateTime.parse(map['updatedAt'])),
       };
-      batch.set(_itemsCol(uid).doc(id), data);
+      docs.add((id, data));
     }
 
-    await batch.commit();
+    await _writeInBatches(uid, docs);
+    _items.putAll(uid, {for (final (id, data) in docs) id: _itemFromFirestore({...data, 'id': id})});
   }
 
-  // Search items by name
+  // Search items by name, SKU, barcode or category, best match first
   Future<List<ProductCatalogItem>> searchItems(String query) async {
     final uid = _requireUid();
-    // Note: Firestore doesn't have full-text search, so we'll get all items
-    // and filter in-memory for now. For production, consider using Algolia.
-    final items = await getAllItems();
-    final lowerQuery = query.toLowerCase();
-    return items.where((item) => 
-      item.name.toLowerCase().contains(lowerQuery) ||
-      item.sku.toLowerCase().contains(lowerQuery) ||
-      item.category.toLowerCase().contains(lowerQuery)
-    ).toList();
+    if (query.trim().isEmpty) return getAllItems();
+    // Firestore has no full-text search: the catalogue is indexed in memory.
+    return _items.search(uid, query);
   }
 
   // Get unique categories
@@ -0,0 +1,354 @@
+import 'dart:async';
+import 'dart:collection';
+import 'dart:io';
+import 'dart:isolate';
+import 'dart:typed_data';
+
+import 'package:flutter/foundation.dart';
+import 'package:path_provider/path_provider.dart';
+import 'package:pdf/widgets.dart' as pw;
+
+import '../models/invoice_model.dart';
+import '../utils/app_logger.dart';
+import 'pdf_service.dart';
+
+/// One PDF to render: an invoice or a customer's outstanding statement.
+sealed class PdfJob {
+  const PdfJob();
+
+  const factory PdfJob.invoice(InvoiceModel invoice) = InvoicePdfJob;
+
+  const factory PdfJob.statement({
+    required String customerName,
+    required String? customerPhone,
+    required List<InvoiceModel> unpaidInvoices,
+  }) = StatementPdfJob;
+
+  /// File name used when the PDF is written to disk.
+  String get fileName;
+
+  pw.Document build(pw.ThemeData theme);
+}
+
+class InvoicePdfJob extends PdfJob {
+  const InvoicePdfJob(this.invoice);
+
+  final InvoiceModel invoice;
+
+  @override
+  String get fileName => 'Invoice_${_safeFileName(invoice.invoiceNumber)}.pdf';
+
+  @override
+  pw.Document build(pw.ThemeData theme) => PdfService.buildInvoiceDocument(invoice, theme: theme);
+}
+
+class StatementPdfJob extends PdfJob {
+  const StatementPdfJob({
+    required this.customerName,
+    required this.customerPhone,
+    required this.unpaidInvoices,
+  });
+
+  final String customerName;
+  final String? customerPhone;
+  final List<InvoiceModel> unpaidInvoices;
+
+  @override
+  String get fileName => 'Outstanding_Statement_${_safeFileName(customerName)}.pdf';
+
+  @override
+  pw.Document build(pw.ThemeData theme) => PdfService.buildStatementDocument(
+        customerName: customerName,
+        customerPhone: customerPhone,
+        unpaidInvoices: unpaidInvoices,
+        theme: theme,
+      );
+}
+
+String _safeFileName(String name) {
+  final safe = name.trim().replaceAll(RegExp(r'[^A-Za-z0-9._-]+'), '_');
+  return safe.isEmpty ? 'untitled' : safe;
+}
+
+/// Progress of a batch after one more job finished.
+class PdfBatchProgress {
+  const PdfBatchProgress({
+    required this.job,
+    required this.completed,
+    required this.total,
+    required this.elapsed,
+    this.path,
+    this.error,
+  });
+
+  final PdfJob job;
+
+  /// Where the PDF was written; null when the job failed.
+  final String? path;
+  final Object? error;
+
+  /// Jobs finished so far, failed ones included.
+  final int completed;
+  final int total;
+  final Duration elapsed;
+
+  bool get failed => error != null;
+
+  /// PDFs per second since the batch started.
+  double get perSecond => elapsed.inMicroseconds == 0 ? 0 : completed * 1000000 / elapsed.inMicroseconds;
+}
+
+/// Renders PDFs on a pool of long-lived worker isolates.
+///
+/// Each worker builds the fonts and page theme once and reuses them for
+/// every document, instead of paying for an isolate spawn and a fresh theme
+/// per PDF. The pool grows on demand up to [poolSize] workers, one core is
+/// left for the UI, and a worker with nothing to do exits after
+/// [idleTimeout].
+///
+/// [render] returns a single PDF's bytes. [generate] streams a batch to
+/// disk: workers write the files themselves, so the bytes never cross back
+/// to the UI isolate, and every finished file is reported with the
+/// throughput so far.
+class PdfBatchService {
+  static final PdfBatchService instance = PdfBatchService._internal();
+  PdfBatchService._internal();
+
+  late final int poolSize = kIsWeb ? 1 : (Platform.numberOfProcessors - 1).clamp(1, 4);
+  static const Duration idleTimeout = Duration(seconds: 30);
+
+  final List<_PdfWorker> _workers = [];
+  Future<_PdfWorker>? _spawning;
+
+  /// Renders one PDF.
+  Future<Uint8List> render(PdfJob job) async {
+    // No isolates on the web: build in place.
+    if (kIsWeb) return job.build(_pdfTheme).save();
+    final worker = await _acquire();
+    final reply = await worker.run(job, null);
+    return reply.bytes!.materialize().asUint8List();
+  }
+
+  /// Renders [jobs] into [outputDir], a fresh temporary directory by
+  /// default, emitting one event per finished file in job order. A failed
+  /// job is reported and the batch carries on.
+  Stream<PdfBatchProgress> generate(List<PdfJob> jobs, {Directory? outputDir}) async* {
+    if (kIsWeb) throw UnsupportedError('Batch PDF export needs a file system');
+    if (jobs.isEmpty) return;
+
+    final dir = outputDir ??
+        Directory('${(await getTemporaryDirectory()).path}/pdf_batch_${DateTime.now().millisecondsSinceEpoch}');
+    await dir.create(recursive: true);
+
+    final paths = _uniquePaths(dir, jobs);
+    final stopwatch = Stopwatch()..start();
+    // Keep every worker fed with a second job while the first one renders.
+    final maxInFlight = poolSize * 2;
+    final inFlight = Queue<Future<(String?, Object?)>>();
+    var next = 0;
+    var completed = 0;
+    var failed = 0;
+
+    void fill() {
+      while (next < jobs.length && inFlight.length < maxInFlight) {
+        final job = jobs[next];
+        final path = paths[next];
+        next++;
+        inFlight.add(_acquire().then((worker) => worker.run(job, path)).then<(String?, Object?)>(
+              (_) => (path, null),
+              onError: (Object e, StackTrace stackTrace) {
+                AppLogger.error('Failed to render ${job.fileName}', 'PdfBatch', e, stackTrace);
+                return (null, e);
+              },
+            ));
+      }
+    }
+
+    fill();
+    while (inFlight.isNotEmpty) {
+      final (path, error) = await inFlight.removeFirst();
+      completed++;
+      if (error != null) failed++;
+      fill();
+      yield PdfBatchProgress(
+        job: jobs[completed - 1],
+        path: path,
+        error: error,
+        completed: completed,
+        total: jobs.length,
+        elapsed: stopwatch.elapsed,
+      );
+    }
+
+    stopwatch.stop();
+    AppLogger.performance(
+      'PDF batch of ${jobs.length}',
+      stopwatch.elapsed,
+      '${(completed * 1000 / (stopwatch.elapsedMilliseconds + 1)).toStringAsFixed(1)}/s, '
+      '$failed failed, ${_workers.length} workers',
+    );
+  }
+
+  List<String> _uniquePaths(Directory dir, List<PdfJob> jobs) {
+    final used = <String, int>{};
+    final paths = <String>[];
+    for (final job in jobs) {
+      final name = job.fileName;
+      final count = used.update(name, (n) => n + 1, ifAbsent: () => 1);
+      paths.add('${dir.path}/${count == 1 ? name : name.replaceFirst(RegExp(r'\.pdf$'), '_$count.pdf')}');
+    }
+    return paths;
+  }
+
+  /// The least busy worker, spawning another while all are busy and the
+  /// pool is not full.
+  Future<_PdfWorker> _acquire() async {
+    _PdfWorker? idlest;
+    for (final worker in _workers) {
+      if (idlest == null || worker.pending < idlest.pending) idlest = worker;
+    }
+    if (idlest != null && (idlest.pending == 0 || _workers.length >= poolSize)) return idlest;
+
+    final spawning = _spawning ??= _PdfWorker.spawn(_retire).whenComplete(() => _spawning = null);
+    try {
+      final worker = await spawning;
+      if (!_workers.contains(worker)) _workers.add(worker);
+      return worker;
+    } catch (e, stackTrace) {
+      AppLogger.error('Failed to start PDF worker', 'PdfBatch', e, stackTrace);
+      if (idlest != null) return idlest;
+      rethrow;
+    }
+  }
+
+  void _retire(_PdfWorker worker) => _workers.remove(worker);
+}
+
+/// Main-isolate handle on one worker isolate.
+class _PdfWorker {
+  _PdfWorker._(this._isolate, this._replies, this._onRetired) {
+    _replies.listen(_onReply);
+  }
+
+  final Isolate _isolate;
+  final ReceivePort _replies;
+  final void Function(_PdfWorker) _onRetired;
+  final Completer<void> _ready = Completer<void>();
+  late final SendPort _requests;
+  final Map<int, Completer<_PdfReply>> _pending = {};
+  int _nextId = 0;
+  Timer? _idleTimer;
+  bool _closed = false;
+
+  int get pending => _pending.length;
+
+  static Future<_PdfWorker> spawn(void Function(_PdfWorker) onRetired) async {
+    final replies = ReceivePort();
+    final isolate = await Isolate.spawn(
+      _pdfWorkerMain,
+      replies.sendPort,
+      onError: replies.sendPort,
+      onExit: replies.sendPort,
+      debugName: 'pdf-worker',
+    );
+    final worker = _PdfWorker._(isolate, replies, onRetired);
+    await worker._ready.future;
+    return worker;
+  }
+
+  /// Renders [job] on this worker. With an [outputPath] the worker writes
+  /// the file; without one the reply carries the bytes.
+  Future<_PdfReply> run(PdfJob job, String? outputPath) {
+    if (_closed) return Future.error(StateError('PDF worker has exited'));
+    _idleTimer?.cancel();
+    final id = _nextId++;
+    final completer = Completer<_PdfReply>();
+    _pending[id] = completer;
+    _requests.send(_PdfRequest(id, job, outputPath));
+    return completer.future;
+  }
+
+  void _onReply(Object? message) {
+    if (message is SendPort) {
+      _requests = message;
+      _ready.complete();
+      return;
+    }
+    if (message is _PdfReply) {
+      final completer = _pending.remove(message.id);
+      if (message.error != null) {
+        completer?.completeError(message.error!, StackTrace.fromString(message.stackTrace ?? ''));
+      } else {
+        completer?.complete(message);
+      }
+      if (_pending.isEmpty) _idleTimer = Timer(PdfBatchService.idleTimeout, _close);
+      return;
+    }
+    // An uncaught error (a [message, stack] list) or the exit notice (null).
+    final error = message is List ? StateError('PDF worker crashed: ${message.first}') : StateError('PDF worker exited');
+    AppLogger.warning(error.message, 'PdfBatch');
+    _close(error);
+  }
+
+  void _close([Object? error]) {
+    if (_closed) return;
+    _closed = true;
+    _idleTimer?.cancel();
+    _onRetired(this);
+    _replies.close();
+    _isolate.kill(priority: Isolate.immediate);
+    for (final completer in _pending.values) {
+      completer.completeError(error ?? StateError('PDF worker has exited'));
+    }
+    _pending.clear();
+    if (!_ready.isCompleted) _ready.completeError(error ?? StateError('PDF worker did not start'));
+  }
+}
+
+class _PdfRequest {
+  const _PdfRequest(this.id, this.job, this.outputPath);
+
+  final int id;
+  final PdfJob job;
+  final String? outputPath;
+}
+
+class _PdfReply {
+  const _PdfReply(this.id, {this.bytes, this.error, this.stackTrace});
+
+  final int id;
+  final TransferableTypedData? bytes;
+  final String? error;
+  final String? stackTrace;
+}
+
+/// Page theme shared by every document an isolate renders. Top-level, so
+/// each worker builds it once, on first use.
+final pw.ThemeData _pdfTheme = pw.ThemeData.withFont(
+  base: pw.Font.helvetica(),
+  bold: pw.Font.helveticaBold(),
+  italic: pw.Font.helveticaOblique(),
+  boldItalic: pw.Font.helveticaBoldOblique(),
+);
+
+/// Runs in a worker isolate: sends its request port, then renders requests
+/// one at a time until killed.
+Future<void> _pdfWorkerMain(SendPort replies) async {
+  final requests = ReceivePort();
+  replies.send(requests.sendPort);
+  await for (final message in requests) {
+    final request = message as _PdfRequest;
+    try {
+      final bytes = await request.job.build(_pdfTheme).save();
+      final path = request.outputPath;
+      if (path != null) {
+        await File(path).writeAsBytes(bytes, flush: true);
+        replies.send(_PdfReply(request.id));
+      } else {
+        replies.send(_PdfReply(request.id, bytes: TransferableTypedData.fromList([bytes])));
+      }
+    } catch (e, stackTrace) {
+      replies.send(_PdfReply(request.id, error: e.toString(), stackTrace: stackTrace.toString()));
+    }
+  }
+}
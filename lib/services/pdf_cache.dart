@@ -0,0 +1,218 @@
+import 'dart:async';
+import 'dart:collection';
+import 'dart:convert';
+import 'dart:io';
+import 'dart:typed_data';
+
+import 'package:flutter/foundation.dart';
+import 'package:path_provider/path_provider.dart';
+
+import '../models/invoice_model.dart';
+import '../utils/app_logger.dart';
+import 'pdf_batch_service.dart';
+
+/// On-disk cache of rendered invoice PDFs.
+///
+/// An entry is keyed by the invoice id plus a hash of everything the PDF
+/// shows ([revisionOf]), so an invoice that changed is never served from a
+/// stale file and an unchanged one is rendered once. The footer prints the
+/// day the document was generated, so the day is part of the hash too.
+///
+/// Files live under the app cache directory, one directory per entry, so
+/// they can be shared under their usual `Invoice_<number>.pdf` name. The
+/// total size is bounded by [maxBytes]; the least recently used entries are
+/// deleted first. Rendering a new revision deletes the older ones, and
+/// edits call [invalidate] to free an invoice's files straight away.
+class PdfCache {
+  static final PdfCache instance = PdfCache._internal();
+  PdfCache._internal();
+
+  int maxBytes = 50 * 1024 * 1024;
+
+  int _hits = 0;
+  int _misses = 0;
+
+  /// Entry directory name -> entry, least recently used first. Loaded from
+  /// disk on first use.
+  LinkedHashMap<String, _PdfCacheEntry>? _entries;
+  Future<LinkedHashMap<String, _PdfCacheEntry>>? _loading;
+  Directory? _root;
+  int _bytes = 0;
+  final Map<String, Future<File>> _rendering = {};
+
+  int get hits => _hits;
+  int get misses => _misses;
+  int get sizeBytes => _bytes;
+
+  /// Share of lookups served without rendering since the app started.
+  double get hitRate => _hits + _misses == 0 ? 0 : _hits / (_hits + _misses);
+
+  /// The invoice's PDF file, rendered on a miss.
+  Future<File> invoicePdf(InvoiceModel invoice) async {
+    final entries = await _load();
+    final key = '${_safeId(invoice.id)}_${revisionOf(invoice)}';
+    final cached = entries.remove(key);
+    if (cached != null && await cached.file.exists()) {
+      entries[key] = cached; // most recently used
+      _hits++;
+      unawaited(cached.file.setLastModified(DateTime.now()).catchError((_) {}));
+      AppLogger.debug('PDF cache hit ${invoice.invoiceNumber} (hit rate ${_formatRate()})', 'PdfCache');
+      return cached.file;
+    }
+    if (cached != null) _bytes -= cached.size;
+
+    return _rendering[key] ??= _render(key, invoice).whenComplete(() => _rendering.remove(key));
+  }
+
+  /// The invoice's PDF bytes, read from the cache when possible.
+  Future<Uint8List> invoicePdfBytes(InvoiceModel invoice) async {
+    // No file system on the web.
+    if (kIsWeb) return PdfBatchService.instance.render(PdfJob.invoice(invoice));
+    return (await invoicePdf(invoice)).readAsBytes();
+  }
+
+  Future<File> _render(String key, InvoiceModel invoice) async {
+    _misses++;
+    final stopwatch = Stopwatch()..start();
+    final bytes = await PdfBatchService.instance.render(PdfJob.invoice(invoice));
+    final dir = Directory('${_root!.path}/$key');
+    await dir.create(recursive: true);
+    final file = File('${dir.path}/${PdfJob.invoice(invoice).fileName}');
+    await file.writeAsBytes(bytes, flush: true);
+
+    final entries = _entries!;
+    // Older revisions of this invoice are never asked for again.
+    final prefix = '${_safeId(invoice.id)}_';
+    for (final stale in [for (final k in entries.keys) if (k.startsWith(prefix) && k != key) k]) {
+      await _delete(stale);
+    }
+    entries[key] = _PdfCacheEntry(file, bytes.length);
+    _bytes += bytes.length;
+    await _evict();
+    AppLogger.performance(
+      'PDF cache miss ${invoice.invoiceNumber}',
+      stopwatch.elapsed,
+      'hit rate ${_formatRate()}, ${entries.length} entries, ${_bytes ~/ 1024} KB',
+    );
+    return file;
+  }
+
+  /// Deletes every cached PDF of the invoice [invoiceId].
+  Future<void> invalidate(String invoiceId) async {
+    if (kIsWeb) return;
+    try {
+      final entries = await _load();
+      final prefix = '${_safeId(invoiceId)}_';
+      final stale = [for (final key in entries.keys) if (key.startsWith(prefix)) key];
+      for (final key in stale) {
+        await _delete(key);
+      }
+    } catch (e) {
+      AppLogger.debug('PDF cache not invalidated for $invoiceId: $e', 'PdfCache');
+    }
+  }
+
+  /// Deletes every cached PDF (e.g. on sign-out).
+  Future<void> clear() async {
+    if (kIsWeb) return;
+    try {
+      final entries = await _load();
+      for (final key in entries.keys.toList()) {
+        await _delete(key);
+      }
+    } catch (e) {
+      AppLogger.warning('PDF cache not cleared: $e', 'PdfCache');
+    }
+    _hits = 0;
+    _misses = 0;
+  }
+
+  Future<void> _evict() async {
+    final entries = _entries!;
+    // Never evict the entry just written.
+    while (_bytes > maxBytes && entries.length > 1) {
+      await _delete(entries.keys.first);
+    }
+  }
+
+  Future<void> _delete(String key) async {
+    final entry = _entries!.remove(key);
+    if (entry == null) return;
+    _bytes -= entry.size;
+    try {
+      await entry.file.parent.delete(recursive: true);
+    } catch (e) {
+      AppLogger.debug('PDF cache entry $key not deleted: $e', 'PdfCache');
+    }
+  }
+
+  Future<LinkedHashMap<String, _PdfCacheEntry>> _load() {
+    final loaded = _entries;
+    if (loaded != null) return Future.value(loaded);
+    return _loading ??= _scan().whenComplete(() => _loading = null);
+  }
+
+  /// Indexes the files left by earlier runs, oldest first.
+  Future<LinkedHashMap<String, _PdfCacheEntry>> _scan() async {
+    final root = Directory('${(await getApplicationCacheDirectory()).path}/invoice_pdfs');
+    await root.create(recursive: true);
+    final found = <(String, _PdfCacheEntry, DateTime)>[];
+    await for (final dir in root.list()) {
+      if (dir is! Directory) continue;
+      final files = await dir.list().where((f) => f is File && f.path.endsWith('.pdf')).cast<File>().toList();
+      if (files.isEmpty) {
+        await dir.delete(recursive: true);
+        continue;
+      }
+      final stat = await files.first.stat();
+      final key = dir.uri.pathSegments.lastWhere((s) => s.isNotEmpty);
+      found.add((key, _PdfCacheEntry(files.first, stat.size), stat.modified));
+    }
+    found.sort((a, b) => a.$3.compareTo(b.$3));
+
+    _root = root;
+    _bytes = found.fold(0, (sum, e) => sum + e.$2.size);
+    return _entries = LinkedHashMap.fromEntries([for (final (key, entry, _) in found) MapEntry(key, entry)]);
+  }
+
+  String _formatRate() => '${(hitRate * 100).toStringAsFixed(0)}%';
+
+  static String _safeId(String id) => id.replaceAll(RegExp(r'[^A-Za-z0-9-]'), '-');
+
+  /// Hash of the invoice fields the PDF shows, plus the generation day.
+  static String revisionOf(InvoiceModel invoice, {DateTime? today}) {
+    final day = today ?? DateTime.now();
+    final rendered = jsonEncode([
+      invoice.invoiceNumber,
+      invoice.clientName,
+      invoice.customerPhone,
+      invoice.date.toIso8601String(),
+      invoice.invoiceType,
+      invoice.status,
+      invoice.amountPaid,
+      invoice.paymentMethod,
+      invoice.notes,
+      invoice.modifiedFlag,
+      invoice.refundAdjustment,
+      [for (final item in invoice.items) [item.name, item.quantity, item.price]],
+      '${day.year}-${day.month}-${day.day}',
+    ]);
+    return _fnv1a(rendered, 0x811c9dc5) + _fnv1a(rendered, 0x050c5d1f);
+  }
+
+  /// 32-bit FNV-1a of [text]'s UTF-8 bytes, as 8 hex digits.
+  static String _fnv1a(String text, int seed) {
+    var hash = seed;
+    for (final byte in utf8.encode(text)) {
+      hash = ((hash ^ byte) * 0x01000193) & 0xffffffff;
+    }
+    return hash.toRadixString(16).padLeft(8, '0');
+  }
+}
+
+class _PdfCacheEntry {
+  const _PdfCacheEntry(this.file, this.size);
+
+  final File file;
+  final int size;
+}
@@ -1,6 +1,5 @@
 import 'dart:io';
 import 'dart:typed_data';
-import 'package:flutter/foundation.dart';
 import 'package:pdf/pdf.dart';
 import 'package:pdf/widgets.dart' as pw;
 import 'package:printing/printing.dart';
@@ -8,6 +7,8 @@ import 'package:path_provider/path_provider.dart';
 import 'package:share_plus/share_plus.dart';
 import '../models/invoice_model.dart';
 import '../utils/app_logger.dart';
+import 'pdf_batch_service.dart';
+import 'pdf_cache.dart';
 
 /// Service to handle PDF generation, download, and sharing for invoices
 class PdfService {
@@ -19,17 +20,17 @@ class PdfService {
     return _instance!;
   }
 
-  /// Generate PDF document for an invoice (optimized with isolate)
+  /// Generate PDF document for an invoice
   Future<Uint8List> generateInvoicePdf(InvoiceModel invoice) async {
-    // Use compute to run PDF generation in a separate isolate
-    // This prevents UI freezing during PDF creation
-    return await compute(_generatePdfInIsolate, invoice);
+    // Rendered by a long-lived worker isolate, so the UI does not freeze
+    // and no isolate is spawned per invoice
+    return PdfBatchService.instance.render(PdfJob.invoice(invoice));
   }
 
-  /// Static method to generate PDF in an isolate
-  /// This is called by compute() and runs in a background thread
-  static Future<Uint8List> _generatePdfInIsolate(InvoiceModel invoice) async {
-    final pdf = pw.Document();
+  /// Lays out an invoice. Runs in a PdfBatchService worker, which passes
+  /// the [theme] it built once.
+  static pw.Document buildInvoiceDocument(InvoiceModel invoice, {pw.ThemeData? theme}) {
+    final pdf = pw.Document(theme: theme);
 
     pdf.addPage(
       pw.Page(
@@ -85,7 +86,7 @@ class PdfService {
       ),
     );
 
-    return pdf.save();
+    return pdf;
   }
 
   /// Build header section
@@ -587,7 +588,22 @@ class PdfService {
     required String? customerPhone,
     required List<InvoiceModel> unpaidInvoices,
   }) async {
-    final pdf = pw.Document();
+    return PdfBatchService.instance.render(PdfJob.statement(
+      customerName: customerName,
+      customerPhone: customerPhone,
+      unpaidInvoices: unpaidInvoices,
+    ));
+  }
+
+  /// Lays out an outstanding invoices statement. The invoice table flows
+  /// over as many pages as it needs, repeating its header row.
+  static pw.Document buildStatementDocument({
+    required String customerName,
+    required String? customerPhone,
+    required List<InvoiceModel> unpaidInvoices,
+    pw.ThemeData? theme,
+  }) {
+    final pdf = pw.Document(theme: theme);
 
     // Calculate totals
     final totalAmount = unpaidInvoices.fold<double>(0, (sum, inv) => sum + inv.adjustedTotal);
@@ -595,308 +611,309 @@ class PdfService {
     final totalDue = totalAmount - totalPaid;
 
     pdf.addPage(
-      pw.Page(
+      pw.MultiPage(
         pageFormat: PdfPageFormat.a4,
         margin: const pw.EdgeInsets.all(40),
-        build: (context) {
-          return pw.Column(
+        crossAxisAlignment: pw.CrossAxisAlignment.start,
+        // Customers with thousands of unpaid invoices run to many pages.
+        maxPages: 1000,
+        footer: (context) => pw.Column(
+          children: [
+            pw.SizedBox(height: 15),
+            _buildFooter(),
+            if (context.pagesCount > 1)
+              pw.Align(
+                alignment: pw.Alignment.centerRight,
+                child: pw.Text(
+                  'Page ${context.pageNumber} of ${context.pagesCount}',
+                  style: const pw.TextStyle(fontSize: 8, color: PdfColors.grey600),
+                ),
+              ),
+          ],
+        ),
+        build: (context) => [
+          // Header
+          pw.Row(
+            mainAxisAlignment: pw.MainAxisAlignment.spaceBetween,
             crossAxisAlignment: pw.CrossAxisAlignment.start,
             children: [
-              // Header
-              pw.Row(
-                mainAxisAlignment: pw.MainAxisAlignment.spaceBetween,
+              pw.Column(
                 crossAxisAlignment: pw.CrossAxisAlignment.start,
                 children: [
-                  pw.Column(
-                    crossAxisAlignment: pw.CrossAxisAlignment.start,
-                    children: [
-                      pw.Text(
-                        'INVOICEFLOW',
-                        style: pw.TextStyle(
-                          fontSize: 24,
-                          fontWeight: pw.FontWeight.bold,
-                          color: PdfColors.blue800,
-                        ),
-                      ),
-                      pw.SizedBox(height: 4),
-                      pw.Text(
-                        'Outstanding Invoices Statement',
-                        style: pw.TextStyle(
-                          fontSize: 10,
-                          color: PdfColors.grey700,
-                        ),
-                      ),
-                    ],
-                  ),
-                  pw.Container(
-                    padding: const pw.EdgeInsets.symmetric(horizontal: 12, vertical: 6),
-                    decoration: pw.BoxDecoration(
-                      color: PdfColors.red100,
-                      borderRadius: pw.BorderRadius.circular(6),
-                      border: pw.Border.all(color: PdfColors.red600, width: 1.5),
+                  pw.Text(
+                    'INVOICEFLOW',
+                    style: pw.TextStyle(
+                      fontSize: 24,
+                      fontWeight: pw.FontWeight.bold,
+                      color: PdfColors.blue800,
                     ),
-                    child: pw.Text(
-                      'PAYMENT DUE',
-                      style: pw.TextStyle(
-                        fontSize: 11,
-                        fontWeight: pw.FontWeight.bold,
-                        color: PdfColors.red900,
-                      ),
+                  ),
+                  pw.SizedBox(height: 4),
+                  pw.Text(
+                    'Outstanding Invoices Statement',
+                    style: pw.TextStyle(
+                      fontSize: 10,
+                      color: PdfColors.grey700,
                     ),
                   ),
                 ],
               ),
-              pw.SizedBox(height: 30),
-              pw.Divider(thickness: 2, color: PdfColors.red800),
-              pw.SizedBox(height: 20),
-
-              // Customer Details
               pw.Container(
-                padding: const pw.EdgeInsets.all(16),
+                padding: const pw.EdgeInsets.symmetric(horizontal: 12, vertical: 6),
                 decoration: pw.BoxDecoration(
-                  color: PdfColors.grey100,
-                  borderRadius: pw.BorderRadius.circular(8),
-                  border: pw.Border.all(color: PdfColors.grey400, width: 1),
+                  color: PdfColors.red100,
+                  borderRadius: pw.BorderRadius.circular(6),
+                  border: pw.Border.all(color: PdfColors.red600, width: 1.5),
                 ),
-                child: pw.Column(
-                  crossAxisAlignment: pw.CrossAxisAlignment.start,
+                child: pw.Text(
+                  'PAYMENT DUE',
+                  style: pw.TextStyle(
+                    fontSize: 11,
+                    fontWeight: pw.FontWeight.bold,
+                    color: PdfColors.red900,
+                  ),
+                ),
+              ),
+            ],
+          ),
+          pw.SizedBox(height: 30),
+          pw.Divider(thickness: 2, color: PdfColors.red800),
+          pw.SizedBox(height: 20),
+
+          // Customer Details
+          pw.Container(
+            padding: const pw.EdgeInsets.all(16),
+            decoration: pw.BoxDecoration(
+              color: PdfColors.grey100,
+              borderRadius: pw.BorderRadius.circular(8),
+              border: pw.Border.all(color: PdfColors.grey400, width: 1),
+            ),
+            child: pw.Column(
+              crossAxisAlignment: pw.CrossAxisAlignment.start,
+              children: [
+                pw.Row(
                   children: [
-                    pw.Row(
-                      children: [
-                        pw.Container(
-                          padding: const pw.EdgeInsets.all(6),
-                          decoration: pw.BoxDecoration(
-                            color: PdfColors.red800,
-                            borderRadius: pw.BorderRadius.circular(4),
-                          ),
-                          child: pw.Icon(
-                            pw.IconData(0xe7fd),
-                            size: 14,
-                            color: PdfColors.white,
-                          ),
-                        ),
-                        pw.SizedBox(width: 8),
-                        pw.Text(
-                          'Customer',
-                          style: pw.TextStyle(
-                            fontSize: 13,
-                            fontWeight: pw.FontWeight.bold,
-                            color: PdfColors.grey900,
-                          ),
-                        ),
-                      ],
+                    pw.Container(
+                      padding: const pw.EdgeInsets.all(6),
+                      decoration: pw.BoxDecoration(
+                        color: PdfColors.red800,
+                        borderRadius: pw.BorderRadius.circular(4),
+                      ),
+                      child: pw.Icon(
+                        pw.IconData(0xe7fd),
+                        size: 14,
+                        color: PdfColors.white,
+                      ),
                     ),
-                    pw.SizedBox(height: 10),
+                    pw.SizedBox(width: 8),
                     pw.Text(
-                      customerName,
+                      'Customer',
                       style: pw.TextStyle(
-                        fontSize: 12,
+                        fontSize: 13,
                         fontWeight: pw.FontWeight.bold,
-                      ),
-                    ),
-                    if (customerPhone != null) ...[
-                      pw.SizedBox(height: 4),
-                      pw.Text(
-                        customerPhone,
-                        style: const pw.TextStyle(
-                          fontSize: 11,
-                          color: PdfColors.grey700,
-                        ),
-                      ),
-                    ],
-                    pw.SizedBox(height: 8),
-                    pw.Text(
-                      'Statement Date: ${_formatDate(DateTime.now())}',
-                      style: const pw.TextStyle(
-                        fontSize: 10,
-                        color: PdfColors.grey600,
+                        color: PdfColors.grey900,
                       ),
                     ),
                   ],
                 ),
-              ),
-              pw.SizedBox(height: 25),
-
-              // Outstanding Invoices Table
-              pw.Text(
-                'Outstanding Invoices (${unpaidInvoices.length})',
-                style: pw.TextStyle(
-                  fontSize: 14,
-                  fontWeight: pw.FontWeight.bold,
-                  color: PdfColors.grey900,
-                ),
-              ),
-              pw.SizedBox(height: 12),
-
-              pw.Table(
-                border: pw.TableBorder.symmetric(
-                  outside: pw.BorderSide(color: PdfColors.grey400, width: 1.5),
-                  inside: pw.BorderSide(color: PdfColors.grey300, width: 0.5),
+                pw.SizedBox(height: 10),
+                pw.Text(
+                  customerName,
+                  style: pw.TextStyle(
+                    fontSize: 12,
+                    fontWeight: pw.FontWeight.bold,
+                  ),
                 ),
-                columnWidths: {
-                  0: const pw.FlexColumnWidth(2),
-                  1: const pw.FlexColumnWidth(2),
-                  2: const pw.FlexColumnWidth(1.5),
-                  3: const pw.FlexColumnWidth(1.5),
-                  4: const pw.FlexColumnWidth(1.5),
-                },
-                children: [
-                  // Header
-                  pw.TableRow(
-                    decoration: const pw.BoxDecoration(color: PdfColors.red800),
-                    children: [
-                      _buildTableCell('Invoice #', isHeader: true, color: PdfColors.white),
-                      _buildTableCell('Date', isHeader: true, color: PdfColors.white),
-                      _buildTableCell('Total', isHeader: true, align: pw.TextAlign.right, color: PdfColors.white),
-                      _buildTableCell('Paid', isHeader: true, align: pw.TextAlign.right, color: PdfColors.white),
-                      _buildTableCell('Due', isHeader: true, align: pw.TextAlign.right, color: PdfColors.white),
-                    ],
+                if (customerPhone != null) ...[
+                  pw.SizedBox(height: 4),
+                  pw.Text(
+                    customerPhone,
+                    style: const pw.TextStyle(
+                      fontSize: 11,
+                      color: PdfColors.grey700,
+                    ),
                   ),
-                  // Invoice rows
-                  ...unpaidInvoices.asMap().entries.map((entry) {
-                    final index = entry.key;
-                    final invoice = entry.value;
-                    final isEven = index % 2 == 0;
-                    final due = invoice.adjustedTotal - invoice.amountPaid;
-
-                    return pw.TableRow(
-                      decoration: pw.BoxDecoration(
-                        color: isEven ? PdfColors.grey50 : PdfColors.white,
-                      ),
-                      children: [
-                        _buildTableCell(invoice.invoiceNumber, fontSize: 10),
-                        _buildTableCell(_formatDate(invoice.date), fontSize: 10),
-                        _buildTableCell('₹${invoice.adjustedTotal.toStringAsFixed(2)}', align: pw.TextAlign.right, fontSize: 10),
-                        _buildTableCell('₹${invoice.amountPaid.toStringAsFixed(2)}', align: pw.TextAlign.right, fontSize: 10),
-                        _buildTableCell(
-                          '₹${due.toStringAsFixed(2)}',
-                          align: pw.TextAlign.right,
-                          fontSize: 10,
-                          isBold: true,
-                        ),
-                      ],
-                    );
-                  }).toList(),
                 ],
-              ),
-              pw.SizedBox(height: 25),
+                pw.SizedBox(height: 8),
+                pw.Text(
+                  'Statement Date: ${_formatDate(DateTime.now())}',
+                  style: const pw.TextStyle(
+                    fontSize: 10,
+                    color: PdfColors.grey600,
+                  ),
+                ),
+              ],
+            ),
+          ),
+          pw.SizedBox(height: 25),
 
-              // Summary Totals
-              pw.Row(
-                mainAxisAlignment: pw.MainAxisAlignment.end,
+          // Outstanding Invoices Table
+          pw.Text(
+            'Outstanding Invoices (${unpaidInvoices.length})',
+            style: pw.TextStyle(
+              fontSize: 14,
+              fontWeight: pw.FontWeight.bold,
+              color: PdfColors.grey900,
+            ),
+          ),
+          pw.SizedBox(height: 12),
+
+          pw.Table(
+            border: pw.TableBorder.symmetric(
+              outside: pw.BorderSide(color: PdfColors.grey400, width: 1.5),
+              inside: pw.BorderSide(color: PdfColors.grey300, width: 0.5),
+            ),
+            columnWidths: {
+              0: const pw.FlexColumnWidth(2),
+              1: const pw.FlexColumnWidth(2),
+              2: const pw.FlexColumnWidth(1.5),
+              3: const pw.FlexColumnWidth(1.5),
+              4: const pw.FlexColumnWidth(1.5),
+            },
+            children: [
+              // Header
+              pw.TableRow(
+                repeat: true,
+                decoration: const pw.BoxDecoration(color: PdfColors.red800),
                 children: [
-                  pw.Container(
-                    width: 280,
-                    decoration: pw.BoxDecoration(
-                      border: pw.Border.all(color: PdfColors.red300, width: 1.5),
-                      borderRadius: pw.BorderRadius.circular(8),
-                    ),
-                    child: pw.Column(
-                      children: [
-                        pw.Container(
-                          padding: const pw.EdgeInsets.all(12),
-                          decoration: const pw.BoxDecoration(
-                            color: PdfColors.grey100,
-                            borderRadius: pw.BorderRadius.only(
-                              topLeft: pw.Radius.circular(7),
-                              topRight: pw.Radius.circular(7),
-                            ),
-                          ),
-                          child: pw.Column(
-                            children: [
-                              _buildTotalRow('Total Amount:', '₹${totalAmount.toStringAsFixed(2)}'),
-                              pw.SizedBox(height: 6),
-                              _buildTotalRow('Amount Paid:', '₹${totalPaid.toStringAsFixed(2)}', color: PdfColors.green700),
-                            ],
-                          ),
-                        ),
-                        pw.Container(
-                          padding: const pw.EdgeInsets.all(14),
-                          decoration: const pw.BoxDecoration(
-                            color: PdfColors.red800,
-                            borderRadius: pw.BorderRadius.only(
-                              bottomLeft: pw.Radius.circular(7),
-                              bottomRight: pw.Radius.circular(7),
-                            ),
-                          ),
-                          child: _buildTotalRow(
-                            'TOTAL DUE:',
-                            '₹${totalDue.toStringAsFixed(2)}',
-                            isBold: true,
-                            fontSize: 16,
-                            color: PdfColors.white,
-                          ),
-                        ),
-                      ],
-                    ),
-                  ),
+                  _buildTableCell('Invoice #', isHeader: true, color: PdfColors.white),
+                  _buildTableCell('Date', isHeader: true, color: PdfColors.white),
+                  _buildTableCell('Total', isHeader: true, align: pw.TextAlign.right, color: PdfColors.white),
+                  _buildTableCell('Paid', isHeader: true, align: pw.TextAlign.right, color: PdfColors.white),
+                  _buildTableCell('Due', isHeader: true, align: pw.TextAlign.right, color: PdfColors.white),
                 ],
               ),
+              // Invoice rows
+              ...unpaidInvoices.asMap().entries.map((entry) {
+                final index = entry.key;
+                final invoice = entry.value;
+                final isEven = index % 2 == 0;
+                final due = invoice.adjustedTotal - invoice.amountPaid;
+
+                return pw.TableRow(
+                  decoration: pw.BoxDecoration(
+                    color: isEven ? PdfColors.grey50 : PdfColors.white,
+                  ),
+                  children: [
+                    _buildTableCell(invoice.invoiceNumber, fontSize: 10),
+                    _buildTableCell(_formatDate(invoice.date), fontSize: 10),
+                    _buildTableCell('₹${invoice.adjustedTotal.toStringAsFixed(2)}', align: pw.TextAlign.right, fontSize: 10),
+                    _buildTableCell('₹${invoice.amountPaid.toStringAsFixed(2)}', align: pw.TextAlign.right, fontSize: 10),
+                    _buildTableCell(
+                      '₹${due.toStringAsFixed(2)}',
+                      align: pw.TextAlign.right,
+                      fontSize: 10,
+                      isBold: true,
+                    ),
+                  ],
+                );
+              }).toList(),
+            ],
+          ),
+          pw.SizedBox(height: 25),
 
-              pw.Spacer(),
-
-              // Payment Request Message
+          // Summary Totals
+          pw.Row(
+            mainAxisAlignment: pw.MainAxisAlignment.end,
+            children: [
               pw.Container(
-                padding: const pw.EdgeInsets.all(16),
+                width: 280,
                 decoration: pw.BoxDecoration(
-                  color: PdfColors.yellow50,
+                  border: pw.Border.all(color: PdfColors.red300, width: 1.5),
                   borderRadius: pw.BorderRadius.circular(8),
-                  border: pw.Border.all(color: PdfColors.orange400, width: 1),
                 ),
                 child: pw.Column(
-                  crossAxisAlignment: pw.CrossAxisAlignment.start,
                   children: [
-                    pw.Text(
-                      'Payment Request',
-                      style: pw.TextStyle(
-                        fontSize: 12,
-                        fontWeight: pw.FontWeight.bold,
-                        color: PdfColors.orange900,
+                    pw.Container(
+                      padding: const pw.EdgeInsets.all(12),
+                      decoration: const pw.BoxDecoration(
+                        color: PdfColors.grey100,
+                        borderRadius: pw.BorderRadius.only(
+                          topLeft: pw.Radius.circular(7),
+                          topRight: pw.Radius.circular(7),
+                        ),
+                      ),
+                      child: pw.Column(
+                        children: [
+                          _buildTotalRow('Total Amount:', '₹${totalAmount.toStringAsFixed(2)}'),
+                          pw.SizedBox(height: 6),
+                          _buildTotalRow('Amount Paid:', '₹${totalPaid.toStringAsFixed(2)}', color: PdfColors.green700),
+                        ],
                       ),
                     ),
-                    pw.SizedBox(height: 8),
-                    pw.Text(
-                      'This statement shows your outstanding invoices. Please arrange for payment of ₹${totalDue.toStringAsFixed(2)} at your earliest convenience.',
-                      style: const pw.TextStyle(
-                        fontSize: 10,
-                        color: PdfColors.grey800,
+                    pw.Container(
+                      padding: const pw.EdgeInsets.all(14),
+                      decoration: const pw.BoxDecoration(
+                        color: PdfColors.red800,
+                        borderRadius: pw.BorderRadius.only(
+                          bottomLeft: pw.Radius.circular(7),
+                          bottomRight: pw.Radius.circular(7),
+                        ),
+                      ),
+                      child: _buildTotalRow(
+                        'TOTAL DUE:',
+                        '₹${totalDue.toStringAsFixed(2)}',
+                        isBold: true,
+                        fontSize: 16,
+                        color: PdfColors.white,
                       ),
                     ),
                   ],
                 ),
               ),
-
-              pw.SizedBox(height: 15),
-              _buildFooter(),
             ],
-          );
-        },
+          ),
+
+          pw.SizedBox(height: 25),
+
+          // Payment Request Message
+          pw.Container(
+            padding: const pw.EdgeInsets.all(16),
+            decoration: pw.BoxDecoration(
+              color: PdfColors.yellow50,
+              borderRadius: pw.BorderRadius.circular(8),
+              border: pw.Border.all(color: PdfColors.orange400, width: 1),
+            ),
+            child: pw.Column(
+              crossAxisAlignment: pw.CrossAxisAlignment.start,
+              children: [
+                pw.Text(
+                  'Payment Request',
+                  style: pw.TextStyle(
+                    fontSize: 12,
+                    fontWeight: pw.FontWeight.bold,
+                    color: PdfColors.orange900,
+                  ),
+                ),
+                pw.SizedBox(height: 8),
+                pw.Text(
+                  'This statement shows your outstanding invoices. Please arrange for payment of ₹${totalDue.toStringAsFixed(2)} at your earliest convenience.',
+                  style: const pw.TextStyle(
+                    fontSize: 10,
+                    color: PdfColors.grey800,
+                  ),
+                ),
+              ],
+            ),
+          ),
+        ],
       ),
     );
 
-    return pdf.save();
+    return pdf;
   }
 
   /// Get temporary file path for invoice PDF (for WhatsApp sharing)
   Future<String> getInvoicePdfPath(InvoiceModel invoice) async {
     try {
-      AppLogger.info('Generating PDF file: ${invoice.invoiceNumber}', 'PdfService');
-
-      // Generate PDF
-      final pdfBytes = await generateInvoicePdf(invoice);
-
-      // Get temporary directory
-      final tempDir = await getTemporaryDirectory();
-      final fileName = 'Invoice_${invoice.invoiceNumber}_${DateTime.now().millisecondsSinceEpoch}.pdf';
-      final filePath = '${tempDir.path}/$fileName';
+      AppLogger.info('Getting PDF file: ${invoice.invoiceNumber}', 'PdfService');
 
-      // Save PDF to temporary file
-      final file = File(filePath);
-      await file.writeAsBytes(pdfBytes);
+      // Rendered only if this revision of the invoice is not cached
+      final file = await PdfCache.instance.invoicePdf(invoice);
 
-      AppLogger.info('PDF saved to: $filePath', 'PdfService');
+      AppLogger.info('PDF available at: ${file.path}', 'PdfService');
 
-      return filePath;
+      return file.path;
     } catch (e, stackTrace) {
       AppLogger.error('Failed to generate PDF file', 'PdfService', e, stackTrace);
       rethrow;
@@ -940,25 +957,14 @@ class PdfService {
   /// Share invoice PDF via platform share sheet
   Future<void> shareInvoicePdf(InvoiceModel invoice) async {
     try {
-      AppLogger.info('Generating PDF for sharing: ${invoice.invoiceNumber}', 'PdfService');
+      AppLogger.info('Getting PDF for sharing: ${invoice.invoiceNumber}', 'PdfService');
 
-      // Generate PDF
-      final pdfBytes = await generateInvoicePdf(invoice);
-
-      // Get temporary directory
-      final tempDir = await getTemporaryDirectory();
-      final fileName = 'Invoice_${invoice.invoiceNumber}_${DateTime.now().millisecondsSinceEpoch}.pdf';
-      final filePath = '${tempDir.path}/$fileName';
-
-      // Save PDF to temporary file
-      final file = File(filePath);
-      await file.writeAsBytes(pdfBytes);
-
-      AppLogger.info('PDF saved to: $filePath', 'PdfService');
+      // Rendered only if this revision of the invoice is not cached
+      final file = await PdfCache.instance.invoicePdf(invoice);
 
       // Share file using share_plus
       await Share.shareXFiles(
-        [XFile(filePath)],
+        [XFile(file.path)],
         subject: 'Invoice ${invoice.invoiceNumber}',
         text: 'Invoice for ${invoice.clientName} - Total: ₹${invoice.adjustedTotal.toStringAsFixed(2)}',
       );
@@ -970,13 +976,41 @@ class PdfService {
     }
   }
 
+  /// Render many PDFs, e.g. month-end invoices or customer statements,
+  /// and share them together via the platform share sheet
+  Future<void> sharePdfBatch(
+    List<PdfJob> jobs, {
+    required String subject,
+    void Function(PdfBatchProgress progress)? onProgress,
+  }) async {
+    try {
+      AppLogger.info('Generating ${jobs.length} PDFs for sharing', 'PdfService');
+
+      final files = <XFile>[];
+      await for (final progress in PdfBatchService.instance.generate(jobs)) {
+        if (progress.path != null) files.add(XFile(progress.path!));
+        onProgress?.call(progress);
+      }
+      if (files.isEmpty) {
+        throw Exception('No PDFs could be generated');
+      }
+
+      await Share.shareXFiles(files, subject: subject);
+
+      AppLogger.info('${files.length} PDFs shared successfully', 'PdfService');
+    } catch (e, stackTrace) {
+      AppLogger.error('Failed to share PDFs', 'PdfService', e, stackTrace);
+      rethrow;
+    }
+  }
+
   /// Download invoice PDF to device storage
   Future<String> downloadInvoicePdf(InvoiceModel invoice) async {
     try {
-      AppLogger.info('Generating PDF for download: ${invoice.invoiceNumber}', 'PdfService');
+      AppLogger.info('Getting PDF for download: ${invoice.invoiceNumber}', 'PdfService');
 
-      // Generate PDF
-      final pdfBytes = await generateInvoicePdf(invoice);
+      // Rendered only if this revision of the invoice is not cached
+      final pdfBytes = await PdfCache.instance.invoicePdfBytes(invoice);
 
       // Get downloads directory (or documents for iOS)
       Directory? directory;
@@ -1017,8 +1051,8 @@ class PdfService {
     try {
       AppLogger.info('Preparing invoice for printing: ${invoice.invoiceNumber}', 'PdfService');
 
-      // Generate PDF
-      final pdfBytes = await generateInvoicePdf(invoice);
+      // Rendered only if this revision of the invoice is not cached
+      final pdfBytes = await PdfCache.instance.invoicePdfBytes(invoice);
 
       // Open print dialog
       await Printing.layoutPdf(
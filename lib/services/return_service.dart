@@ -2,7 +2,6 @@ import '../models/return_model.dart';
 import './firestore_service.dart';
 import './customer_service.dart';
 import './inventory_service.dart';
-import './analytics_service.dart';
 import '../utils/app_logger.dart';
 
 class ReturnService {
@@ -30,22 +29,12 @@ class ReturnService {
   // Create a new return
   Future<void> createReturn(ReturnModel returnModel) async {
     try {
+      // Also adds a sales return to the customer's pending return amount
       await _fsService.createReturn(returnModel);
 
-      // If it's a sales return, update customer's pending return amount
-      if (returnModel.returnType == 'sales' && returnModel.customerId != null) {
-        await _customerService.addPendingReturn(
-          returnModel.customerId!,
-          returnModel.refundAmount,
-        );
-      }
-
       // Update inventory for returned items
       await _processReturnInventory(returnModel);
 
-      // Invalidate analytics cache when returns are created
-      await AnalyticsService().invalidateCache();
-
       AppLogger.info('Return created successfully: ${returnModel.returnNumber}', 'ReturnService');
     } catch (e) {
       AppLogger.error('Failed to create return', 'ReturnService', e);
@@ -179,22 +168,9 @@ class ReturnService {
   // Delete return
   Future<void> deleteReturn(String id) async {
     try {
-      // Get the return to check if we need to update customer balance
-      final returnModel = await getReturnById(id);
-
+      // Also removes an unapplied sales return from the customer's pending return amount
       await _fsService.deleteReturn(id);
 
-      // If it's an unapplied sales return, remove from customer's pending return amount
-      if (returnModel != null &&
-          returnModel.returnType == 'sales' &&
-          returnModel.customerId != null &&
-          !returnModel.isApplied) {
-        await _customerService.removePendingReturn(
-          returnModel.customerId!,
-          returnModel.refundAmount,
-        );
-      }
-
       AppLogger.info('Return deleted successfully: $id', 'ReturnService');
     } catch (e) {
       AppLogger.error('Failed to delete return', 'ReturnService', e);
@@ -0,0 +1,233 @@
+/// In-memory word-prefix index over a few text fields of each record.
+///
+/// Fields are lowercased and split into words on anything that is not a
+/// letter or digit. Every distinct word is kept once in a sorted list with
+/// the set of records using it. A query word matches the records that have
+/// a word starting with it, which is a binary search plus a walk over the
+/// neighbouring words. All-digit words (phone and invoice numbers) are also
+/// indexed by their suffixes, so typing the last digits finds them too. A
+/// query of several words returns the records matching all of them.
+///
+/// Results are ranked by the best match of each query word: a whole field
+/// beats the start of a field, which beats the start of a later word, which
+/// beats a digit suffix. Earlier [fields] break ties before later ones,
+/// then the first field's text.
+///
+/// [put] and [remove] update the index in place, so callers keep it in step
+/// with their data instead of rebuilding it. [putAll] and [replaceAll] sort
+/// the new words once instead of inserting them one by one.
+class SearchIndex<T> {
+  SearchIndex({required this.idOf, required this.fields});
+
+  final String Function(T record) idOf;
+  final List<String? Function(T record)> fields;
+
+  final Map<String, int> _slots = {};
+  final List<T?> _records = [];
+  final List<List<String>?> _texts = [];
+  final List<int> _freeSlots = [];
+  final Map<String, Set<int>> _postings = {};
+  final List<String> _words = [];
+
+  /// Words added by the [putAll] in progress, not yet in [_words].
+  Set<String>? _newWords;
+
+  static final RegExp _separators = RegExp(r'[^\p{L}\p{N}]+', unicode: true);
+  static final RegExp _digits = RegExp(r'^\d+$');
+
+  int get length => _slots.length;
+
+  /// Lowercases [text] and collapses everything between words to a space.
+  static String normalize(String text) => text.toLowerCase().replaceAll(_separators, ' ').trim();
+
+  /// Adds [record], or replaces the record with the same id.
+  void put(T record) {
+    final id = idOf(record);
+    final texts = [for (final field in fields) normalize(field(record) ?? '')];
+    var slot = _slots[id];
+    if (slot != null) {
+      final old = _texts[slot]!;
+      _records[slot] = record;
+      if (_sameTexts(old, texts)) return;
+      _unindex(slot, old);
+    } else {
+      slot = _freeSlots.isNotEmpty ? _freeSlots.removeLast() : _records.length;
+      if (slot == _records.length) {
+        _records.add(null);
+        _texts.add(null);
+      }
+      _slots[id] = slot;
+      _records[slot] = record;
+    }
+    _texts[slot] = texts;
+    for (final key in _keys(texts)) {
+      final records = _postings[key];
+      if (records != null) {
+        records.add(slot);
+      } else {
+        _postings[key] = {slot};
+        final newWords = _newWords;
+        if (newWords != null) {
+          newWords.add(key);
+        } else {
+          _words.insert(_lowerBound(key), key);
+        }
+      }
+    }
+  }
+
+  void putAll(Iterable<T> records) {
+    final newWords = _newWords = <String>{};
+    try {
+      records.forEach(put);
+    } finally {
+      _newWords = null;
+      if (newWords.isNotEmpty) {
+        _words
+          ..addAll(newWords)
+          ..sort();
+      }
+    }
+  }
+
+  void remove(String id) {
+    final slot = _slots.remove(id);
+    if (slot == null) return;
+    _unindex(slot, _texts[slot]!);
+    _records[slot] = null;
+    _texts[slot] = null;
+    _freeSlots.add(slot);
+  }
+
+  void clear() {
+    _slots.clear();
+    _records.clear();
+    _texts.clear();
+    _freeSlots.clear();
+    _postings.clear();
+    _words.clear();
+  }
+
+  /// Replaces the whole contents with [records].
+  void replaceAll(Iterable<T> records) {
+    clear();
+    putAll(records);
+  }
+
+  /// Records with a field equal to [value] after normalizing, e.g. a phone
+  /// number lookup.
+  List<T> exact(String value) {
+    final wanted = normalize(value);
+    if (wanted.isEmpty) return [];
+    final first = wanted.split(' ').first;
+    return [
+      for (final slot in _postings[first] ?? const <int>{})
+        if (_texts[slot]!.contains(wanted)) _records[slot] as T,
+    ];
+  }
+
+  /// Records matching every word of [query], best first. An empty query
+  /// matches nothing.
+  List<T> search(String query, {int? limit}) {
+    final terms = normalize(query).split(' ').where((t) => t.isNotEmpty).toSet().toList();
+    if (terms.isEmpty) return [];
+    // Start from the rarest word; the others only filter.
+    final candidates = [for (final term in terms) _matching(term)]..sort((a, b) => a.length.compareTo(b.length));
+    if (candidates.first.isEmpty) return [];
+
+    final scored = <(int, int)>[];
+    for (final slot in candidates.first) {
+      if (!candidates.skip(1).every((set) => set.contains(slot))) continue;
+      final texts = _texts[slot]!;
+      var score = 0;
+      for (final term in terms) {
+        score += _score(texts, term);
+      }
+      scored.add((slot, score));
+    }
+    scored.sort((a, b) {
+      final byScore = b.$2.compareTo(a.$2);
+      return byScore != 0 ? byScore : _texts[a.$1]![0].compareTo(_texts[b.$1]![0]);
+    });
+    final ranked = limit != null && scored.length > limit ? scored.sublist(0, limit) : scored;
+    return [for (final (slot, _) in ranked) _records[slot] as T];
+  }
+
+  /// Slots with an indexed key starting with [term].
+  Set<int> _matching(String term) {
+    final matches = <int>{};
+    for (var i = _lowerBound(term); i < _words.length && _words[i].startsWith(term); i++) {
+      matches.addAll(_postings[_words[i]]!);
+    }
+    return matches;
+  }
+
+  int _score(List<String> texts, String term) {
+    var best = 0;
+    for (var i = 0; i < texts.length; i++) {
+      final text = texts[i];
+      final quality = text == term
+          ? 4
+          : text.startsWith(term)
+              ? 3
+              : text.contains(' $term')
+                  ? 2
+                  : text.contains(term)
+                      ? 1
+                      : 0;
+      if (quality == 0) continue;
+      final score = quality * fields.length + (fields.length - i);
+      if (score > best) best = score;
+    }
+    return best;
+  }
+
+  Set<String> _keys(List<String> texts) {
+    final keys = <String>{};
+    for (final text in texts) {
+      if (text.isEmpty) continue;
+      for (final word in text.split(' ')) {
+        keys.add(word);
+        if (_digits.hasMatch(word)) {
+          for (var i = 1; i < word.length; i++) {
+            keys.add(word.substring(i));
+          }
+        }
+      }
+    }
+    return keys;
+  }
+
+  void _unindex(int slot, List<String> texts) {
+    for (final key in _keys(texts)) {
+      final records = _postings[key];
+      if (records == null) continue;
+      records.remove(slot);
+      if (records.isEmpty) {
+        _postings.remove(key);
+        if (!(_newWords?.remove(key) ?? false)) _words.removeAt(_lowerBound(key));
+      }
+    }
+  }
+
+  int _lowerBound(String key) {
+    var low = 0;
+    var high = _words.length;
+    while (low < high) {
+      final mid = (low + high) >> 1;
+      if (_words[mid].compareTo(key) < 0) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    return low;
+  }
+
+  static bool _sameTexts(List<String> a, List<String> b) {
+    for (var i = 0; i < a.length; i++) {
+      if (a[i] != b[i]) return false;
+    }
+    return true;
+  }
+}
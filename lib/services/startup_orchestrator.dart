@@ -0,0 +1,186 @@
+import 'dart:async';
+
+import 'package:flutter/widgets.dart';
+
+import '../utils/app_logger.dart';
+import '../utils/perf_marks.dart';
+
+/// When a [StartupTask] runs.
+enum StartupPhase {
+  /// Before `runApp`: only what the first screen cannot do without.
+  beforeFirstFrame,
+
+  /// Once the first frame has been drawn.
+  afterFirstFrame,
+}
+
+/// One initializer, run once all of [dependsOn] have succeeded.
+class StartupTask {
+  const StartupTask(
+    this.name,
+    this.run, {
+    this.dependsOn = const [],
+    this.phase = StartupPhase.beforeFirstFrame,
+  });
+
+  final String name;
+  final Future<void> Function() run;
+  final List<String> dependsOn;
+  final StartupPhase phase;
+}
+
+/// A finished task on the startup timeline.
+class StartupTimelineEntry {
+  const StartupTimelineEntry({
+    required this.name,
+    required this.phase,
+    required this.start,
+    required this.duration,
+    this.error,
+    this.skipped = false,
+  });
+
+  final String name;
+  final StartupPhase phase;
+
+  /// Since launch.
+  final Duration start;
+  final Duration duration;
+  final Object? error;
+
+  /// Not run because a dependency failed.
+  final bool skipped;
+
+  Duration get end => start + duration;
+
+  @override
+  String toString() {
+    final outcome = skipped ? ' skipped' : error != null ? ' failed' : '';
+    return '$name ${start.inMilliseconds}+${duration.inMilliseconds}ms$outcome';
+  }
+}
+
+/// Runs app initializers concurrently, each as soon as its dependencies
+/// are done, and records when each one ran.
+///
+/// [runBeforeFirstFrame] runs the [StartupPhase.beforeFirstFrame] tasks
+/// and returns when they have all finished; `main` calls `runApp` after it.
+/// [runAfterFirstFrame] waits for the first frame and then starts the
+/// deferred tasks in the background. A failed task is logged and its
+/// dependents are skipped; startup itself carries on, as it always has.
+///
+/// Times are measured from the first use of [instance], which `main` does
+/// first thing. Each task is also a `startup:<name>` [PerfMarks] measure,
+/// and [markInteractive] closes the `coldStartToInteractive` one, so the
+/// E2E harness benchmarks startup on web.
+class StartupOrchestrator {
+  static final StartupOrchestrator instance = StartupOrchestrator._internal();
+  StartupOrchestrator._internal() {
+    unawaited(PerfMarks.measure('coldStartToInteractive', () => _interactive.future));
+  }
+
+  final Stopwatch _clock = Stopwatch()..start();
+  final Map<String, StartupTask> _tasks = {};
+  final Map<String, Future<bool>> _results = {};
+  final List<StartupTimelineEntry> _timeline = [];
+  final Completer<Duration> _interactive = Completer<Duration>();
+
+  /// Finished tasks, in the order they finished.
+  List<StartupTimelineEntry> get timeline => List.unmodifiable(_timeline);
+
+  /// Time from launch to the first usable screen; see [markInteractive].
+  Future<Duration> get interactive => _interactive.future;
+
+  /// Declares [tasks]. Names must be unique and dependencies must exist,
+  /// must not form a cycle, and must not run in a later phase than the
+  /// task needing them.
+  void register(List<StartupTask> tasks) {
+    for (final task in tasks) {
+      if (_tasks.containsKey(task.name)) throw StateError('Duplicate startup task ${task.name}');
+      _tasks[task.name] = task;
+    }
+    final checked = <String>{};
+    void check(StartupTask task, List<String> path) {
+      if (path.contains(task.name)) throw StateError('Startup dependency cycle: ${[...path, task.name].join(' -> ')}');
+      if (!checked.add(task.name)) return;
+      for (final name in task.dependsOn) {
+        final dependency = _tasks[name];
+        if (dependency == null) throw StateError('Startup task ${task.name} depends on unknown $name');
+        if (dependency.phase.index > task.phase.index) {
+          throw StateError('Startup task ${task.name} cannot wait for deferred $name');
+        }
+        check(dependency, [...path, task.name]);
+      }
+    }
+
+    for (final task in _tasks.values) {
+      check(task, const []);
+    }
+  }
+
+  Future<void> runBeforeFirstFrame() => _runPhase(StartupPhase.beforeFirstFrame);
+
+  /// Starts the deferred tasks once the first frame is on screen. Call
+  /// right after `runApp`; does not wait for the tasks.
+  void runAfterFirstFrame() {
+    unawaited(WidgetsBinding.instance.waitUntilFirstFrameRasterized.then((_) {
+      AppLogger.performance('Startup: first frame', _clock.elapsed);
+      return _runPhase(StartupPhase.afterFirstFrame);
+    }));
+  }
+
+  /// Records that the first screen has its data, e.g. the dashboard's
+  /// first load. Only the first call counts.
+  void markInteractive() {
+    if (_interactive.isCompleted) return;
+    final elapsed = _clock.elapsed;
+    _interactive.complete(elapsed);
+    AppLogger.performance('Startup: cold start to interactive', elapsed, _timeline.join(', '));
+  }
+
+  Future<void> _runPhase(StartupPhase phase) async {
+    final started = _clock.elapsed;
+    await Future.wait([
+      for (final task in _tasks.values)
+        if (task.phase == phase) _run(task),
+    ]);
+    AppLogger.performance(
+      'Startup phase ${phase.name}',
+      _clock.elapsed - started,
+      [for (final entry in _timeline) if (entry.phase == phase) entry].join(', '),
+    );
+  }
+
+  /// Whether [task] succeeded; runs it on the first call.
+  Future<bool> _run(StartupTask task) => _results[task.name] ??= _start(task);
+
+  Future<bool> _start(StartupTask task) async {
+    final dependencies = await Future.wait([for (final name in task.dependsOn) _run(_tasks[name]!)]);
+    final start = _clock.elapsed;
+    if (dependencies.contains(false)) {
+      AppLogger.warning('Startup task ${task.name} skipped: a dependency failed', 'Startup');
+      _record(task, start, skipped: true);
+      return false;
+    }
+    try {
+      await PerfMarks.measure('startup:${task.name}', task.run);
+      _record(task, start);
+      return true;
+    } catch (e, stackTrace) {
+      AppLogger.error('Startup task ${task.name} failed', 'Startup', e, stackTrace);
+      _record(task, start, error: e);
+      return false;
+    }
+  }
+
+  void _record(StartupTask task, Duration start, {Object? error, bool skipped = false}) {
+    _timeline.add(StartupTimelineEntry(
+      name: task.name,
+      phase: task.phase,
+      start: start,
+      duration: _clock.elapsed - start,
+      error: error,
+      skipped: skipped,
+    ));
+  }
+}
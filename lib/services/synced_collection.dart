@@ -0,0 +1,301 @@
+import 'dart:async';
+import 'dart:collection';
+
+import 'package:cloud_firestore/cloud_firestore.dart';
+import 'package:shared_preferences/shared_preferences.dart';
+
+import '../utils/app_logger.dart';
+import 'search_index.dart';
+
+/// Offline-first, in-memory mirror of one per-user Firestore collection.
+///
+/// The first sync for a user listens to the whole collection. Later syncs
+/// start from Firestore's persistent cache (IndexedDB on web, SQLite on
+/// mobile). The listener then only asks for documents whose [watermarkField]
+/// is newer than the last one seen. It reaches back by [overlap] to allow
+/// for clock skew between devices. A delta query never reports deletes made
+/// elsewhere, so the whole collection is listened to again once
+/// [fullSyncEvery] has passed.
+///
+/// Reads wait up to [readyTimeout] for the first snapshot. If the mirror is
+/// not ready by then, or the listener failed, they query Firestore directly.
+///
+/// [onChanged] runs after a write through [put] or [remove], and when the
+/// listener brings in a document that is new since the last session or was
+/// deleted. Re-reading unchanged documents on start-up does not count.
+///
+/// An [index], if given, is kept in step with the mirror and answers
+/// [search] and [lookup] without scanning the documents.
+///
+/// [changes] reports the documents behind every change, for callers that
+/// keep their own state derived from the mirror up to date.
+class SyncedCollection<T> {
+  SyncedCollection({
+    required this.name,
+    required this.collection,
+    required this.decode,
+    this.order,
+    this.watermarkField = 'updatedAt',
+    this.overlap = const Duration(minutes: 10),
+    this.fullSyncEvery = const Duration(days: 1),
+    this.readyTimeout = const Duration(seconds: 10),
+    this.onChanged,
+    this.index,
+  });
+
+  final String name;
+  final CollectionReference<Map<String, dynamic>> Function(String uid) collection;
+  final T Function(String id, Map<String, dynamic> data) decode;
+  final Comparator<T>? order;
+  final String watermarkField;
+  final Duration overlap;
+  final Duration fullSyncEvery;
+  final Duration readyTimeout;
+  final void Function()? onChanged;
+  final SearchIndex<T>? index;
+
+  final Map<String, T> _docs = <String, T>{};
+  List<T>? _ordered;
+  String? _uid;
+  bool _synced = false;
+  Completer<void>? _ready;
+  StreamSubscription<QuerySnapshot<Map<String, dynamic>>>? _subscription;
+  DateTime? _watermark;
+  DateTime? _savedWatermark;
+  bool _fullSyncPending = false;
+  bool _timedOut = false;
+  final StreamController<SyncedChanges<T>> _changes = StreamController<SyncedChanges<T>>.broadcast();
+
+  /// Documents written or deleted by this client or brought in by the
+  /// listener, in batches. Emitted even while the mirror is not synced.
+  Stream<SyncedChanges<T>> get changes => _changes.stream;
+
+  /// Every document, sorted by [order] if one is given.
+  Future<List<T>> all(String uid) async {
+    await _sync(uid);
+    if (!_synced || _uid != uid) return _fetch(uid);
+    return List<T>.of(_ordered ??= _sorted(_docs.values));
+  }
+
+  /// Every document, sorted like [all], if the mirror for [uid] is synced;
+  /// null otherwise. Nothing is copied or read from Firestore, so callers
+  /// with a narrower query of their own use it before falling back to one.
+  Future<List<T>?> mirrored(String uid) async {
+    await _sync(uid);
+    if (!_synced || _uid != uid) return null;
+    return UnmodifiableListView(_ordered ??= _sorted(_docs.values));
+  }
+
+  /// Documents matching [query] in [index], best first.
+  Future<List<T>> search(String uid, String query, {int? limit}) async {
+    return (await _indexFor(uid)).search(query, limit: limit);
+  }
+
+  /// Documents with an indexed field equal to [value].
+  Future<List<T>> lookup(String uid, String value) async {
+    return (await _indexFor(uid)).exact(value);
+  }
+
+  Future<SearchIndex<T>> _indexFor(String uid) async {
+    final index = this.index!;
+    await _sync(uid);
+    if (_synced && _uid == uid) return index;
+    // Not mirrored (yet): index a one-off read.
+    return SearchIndex<T>(idOf: index.idOf, fields: index.fields)..putAll(await _fetch(uid));
+  }
+
+  /// Applies a write made by this client without waiting for the listener.
+  void put(String uid, String id, T value) {
+    onChanged?.call();
+    _changes.add(SyncedChanges(uid, updated: {id: value}));
+    if (_uid != uid || !_synced) return;
+    _docs[id] = value;
+    _ordered = null;
+    index?.put(value);
+  }
+
+  /// Applies a batch of writes made by this client, announcing them once.
+  void putAll(String uid, Map<String, T> values) {
+    onChanged?.call();
+    _changes.add(SyncedChanges(uid, updated: values));
+    if (_uid != uid || !_synced) return;
+    _docs.addAll(values);
+    _ordered = null;
+    index?.putAll(values.values);
+  }
+
+  /// Applies a delete made by this client. Deletes of documents older than
+  /// the watermark never reach a delta listener.
+  void remove(String uid, String id) {
+    onChanged?.call();
+    _changes.add(SyncedChanges(uid, removed: {id}));
+    if (_uid != uid || !_synced) return;
+    if (_docs.remove(id) != null) _ordered = null;
+    index?.remove(id);
+  }
+
+  /// Stops listening and forgets the mirror; the next read syncs again.
+  void stop() {
+    final uid = _uid;
+    if (uid != null) _changes.add(SyncedChanges(uid, reset: true));
+    _subscription?.cancel();
+    _subscription = null;
+    _docs.clear();
+    index?.clear();
+    _ordered = null;
+    _uid = null;
+    _synced = false;
+    _watermark = null;
+    _savedWatermark = null;
+    _fullSyncPending = false;
+    _timedOut = false;
+    final ready = _ready;
+    _ready = null;
+    if (ready != null && !ready.isCompleted) ready.complete();
+  }
+
+  Future<void> _sync(String uid) {
+    if (_uid != uid) {
+      stop();
+      _uid = uid;
+      _ready = Completer<void>();
+      unawaited(_start(uid));
+    }
+    // Only the first read waits out a slow sync; later ones go to Firestore.
+    if (_timedOut) return Future.value();
+    return _ready!.future.timeout(readyTimeout, onTimeout: () {
+      _timedOut = true;
+      AppLogger.warning('$name not synced after ${readyTimeout.inSeconds}s; reading from Firestore', 'Sync');
+    });
+  }
+
+  String _prefsKey(String uid, String field) => 'sync.$uid.$name.$field';
+
+  Future<void> _start(String uid) async {
+    final prefs = await SharedPreferences.getInstance();
+    final watermarkMs = prefs.getInt(_prefsKey(uid, 'watermark'));
+    final fullSyncMs = prefs.getInt(_prefsKey(uid, 'fullSyncAt')) ?? 0;
+    final fullSyncDue = DateTime.now().millisecondsSinceEpoch - fullSyncMs >= fullSyncEvery.inMilliseconds;
+
+    Query<Map<String, dynamic>> query = collection(uid);
+    var delta = false;
+    if (watermarkMs != null && !fullSyncDue) {
+      try {
+        final cached = await collection(uid).get(const GetOptions(source: Source.cache));
+        if (_uid != uid) return;
+        for (final d in cached.docs) {
+          final value = _docs[d.id] = decode(d.id, d.data());
+          index?.put(value);
+        }
+      } catch (e) {
+        AppLogger.debug('$name cache read failed: $e', 'Sync');
+      }
+      // An empty cache (cleared site data, new device) needs a full sync.
+      if (_docs.isNotEmpty) {
+        _watermark = _savedWatermark = DateTime.fromMillisecondsSinceEpoch(watermarkMs);
+        query = query.where(watermarkField, isGreaterThan: Timestamp.fromDate(_watermark!.subtract(overlap)));
+        delta = true;
+        _markReady();
+      }
+    }
+    if (_uid != uid) return;
+    _fullSyncPending = !delta;
+
+    AppLogger.debug(
+        delta ? '$name: ${_docs.length} cached, listening after $_watermark' : '$name: full sync', 'Sync');
+    _subscription = query.snapshots(includeMetadataChanges: true).listen(
+      (snapshot) => _apply(uid, snapshot, prefs),
+      onError: (Object e, StackTrace stackTrace) {
+        AppLogger.error('$name sync listener failed', 'Sync', e, stackTrace);
+        if (_uid == uid) stop();
+      },
+    );
+  }
+
+  void _apply(
+    String uid,
+    QuerySnapshot<Map<String, dynamic>> snapshot,
+    SharedPreferences prefs,
+  ) {
+    if (_uid != uid) return;
+    var changed = false;
+    final updated = <String, T>{};
+    final removed = <String>{};
+    for (final change in snapshot.docChanges) {
+      final doc = change.doc;
+      if (change.type == DocumentChangeType.removed) {
+        changed |= _docs.remove(doc.id) != null;
+        index?.remove(doc.id);
+        removed.add(doc.id);
+        updated.remove(doc.id);
+        continue;
+      }
+      final data = doc.data();
+      if (data == null) continue;
+      final value = _docs[doc.id] = decode(doc.id, data);
+      index?.put(value);
+      updated[doc.id] = value;
+      removed.remove(doc.id);
+      final stamp = data[watermarkField];
+      // Anything at or before the saved watermark was seen in an earlier run.
+      changed |= stamp is! Timestamp || _savedWatermark == null || stamp.toDate().isAfter(_savedWatermark!);
+      if (stamp is Timestamp && (_watermark == null || stamp.toDate().isAfter(_watermark!))) {
+        _watermark = stamp.toDate();
+      }
+    }
+    if (snapshot.docChanges.isNotEmpty) _ordered = null;
+    if (changed) onChanged?.call();
+    if (updated.isNotEmpty || removed.isNotEmpty) {
+      _changes.add(SyncedChanges(uid, updated: updated, removed: removed));
+    }
+
+    if (snapshot.metadata.isFromCache) {
+      // A cached snapshot is good enough to serve unless it is empty: that
+      // may just mean nothing was downloaded yet.
+      if (_docs.isNotEmpty) _markReady();
+      return;
+    }
+    _markReady();
+    final watermark = _watermark;
+    if (watermark != null && watermark != _savedWatermark) {
+      _savedWatermark = watermark;
+      prefs.setInt(_prefsKey(uid, 'watermark'), watermark.millisecondsSinceEpoch);
+    }
+    if (_fullSyncPending) {
+      _fullSyncPending = false;
+      prefs.setInt(_prefsKey(uid, 'fullSyncAt'), DateTime.now().millisecondsSinceEpoch);
+    }
+  }
+
+  void _markReady() {
+    _synced = true;
+    final ready = _ready;
+    if (ready != null && !ready.isCompleted) ready.complete();
+  }
+
+  List<T> _sorted(Iterable<T> values) {
+    final list = List<T>.of(values);
+    if (order != null) list.sort(order);
+    return list;
+  }
+
+  Future<List<T>> _fetch(String uid) async {
+    final q = await collection(uid).get();
+    return _sorted(q.docs.map((d) => decode(d.id, d.data())));
+  }
+}
+
+/// Documents that changed in a [SyncedCollection] for the user [uid].
+class SyncedChanges<T> {
+  const SyncedChanges(this.uid, {this.updated = const {}, this.removed = const {}, this.reset = false});
+
+  final String uid;
+
+  /// Written or brought in, by id.
+  final Map<String, T> updated;
+  final Set<String> removed;
+
+  /// The mirror was dropped (sign-out or a failed listener); anything
+  /// derived from it should be rebuilt from [SyncedCollection.all].
+  final bool reset;
+}
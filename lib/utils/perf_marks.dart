@@ -0,0 +1,19 @@
+import 'perf_marks_stub.dart' if (dart.library.html) 'perf_marks_web.dart' as impl;
+
+/// Named timings for the E2E performance harness.
+///
+/// On web each [measure] call adds a `performance.measure` entry that the
+/// harness reads back from the browser; on other platforms it only runs
+/// [body].
+class PerfMarks {
+  PerfMarks._();
+
+  static Future<T> measure<T>(String name, Future<T> Function() body) async {
+    final startMark = impl.markStart(name);
+    try {
+      return await body();
+    } finally {
+      impl.markEnd(name, startMark);
+    }
+  }
+}
@@ -0,0 +1,24 @@
+import 'dart:js_interop';
+
+import 'package:web/web.dart' as web;
+
+int _sequence = 0;
+
+String markStart(String name) {
+  final startMark = '$name:start:${_sequence++}';
+  try {
+    web.window.performance.mark(startMark);
+  } catch (_) {
+    // Timing is best effort and must never break the caller.
+  }
+  return startMark;
+}
+
+void markEnd(String name, String startMark) {
+  try {
+    web.window.performance.measure(name, startMark.toJS);
+    web.window.performance.clearMarks(startMark);
+  } catch (_) {
+    // Timing is best effort and must never break the caller.
+  }
+}
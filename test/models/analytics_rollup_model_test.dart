@@ -0,0 +1,109 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:invoiceflow/models/analytics_rollup_model.dart';
+import 'package:invoiceflow/models/invoice_model.dart';
+
+InvoiceModel _invoice({
+  DateTime? date,
+  String status = 'paid',
+  String invoiceType = 'sales',
+  double amountPaid = 0,
+  double refundAdjustment = 0,
+  String? notes,
+}) {
+  final day = date ?? DateTime(2026, 3, 1, 10);
+  return InvoiceModel(
+    id: 'inv-1',
+    invoiceNumber: 'INV-1',
+    clientName: 'Ravi Traders',
+    customerId: 'c1',
+    date: day,
+    revenue: 250,
+    status: status,
+    items: [InvoiceItem(name: 'Rice', quantity: 5, price: 50)],
+    notes: notes,
+    createdAt: day,
+    updatedAt: day,
+    invoiceType: invoiceType,
+    amountPaid: amountPaid,
+    refundAdjustment: refundAdjustment,
+  );
+}
+
+void main() {
+  group('AnalyticsRollup', () {
+    test('moving an invoice to another day takes it off the old day and nets to zero', () {
+      final before = _invoice(date: DateTime(2026, 3, 1, 10));
+      final after = _invoice(date: DateTime(2026, 3, 2, 9));
+
+      final deltas = AnalyticsRollup.deltas([(before, after)]);
+      expect(deltas.keys, unorderedEquals(['2026-03-01', '2026-03-02']));
+      expect(deltas['2026-03-01']!['sales']['invoiceCount'], -1);
+      expect(deltas['2026-03-01']!['sales']['revenue'], -250.0);
+      expect(deltas['2026-03-02']!['sales']['invoiceCount'], 1);
+      expect(deltas['2026-03-02']!['sales']['items']['Rice'], {'quantity': 5, 'revenue': 250.0});
+
+      final net = <String, dynamic>{};
+      for (final delta in deltas.values) {
+        AnalyticsRollup.addInto(net, delta);
+      }
+      expect(AnalyticsRollup.pruned(net), isEmpty);
+    });
+
+    test('changes that leave the totals alone are pruned', () {
+      final invoice = _invoice();
+      expect(AnalyticsRollup.deltas([(invoice, invoice)]), isEmpty);
+      expect(AnalyticsRollup.deltas([(invoice, _invoice(notes: 'Delivered'))]), isEmpty);
+
+      final paid = AnalyticsRollup.deltas([(invoice, _invoice(amountPaid: 100))]);
+      expect(paid['2026-03-01']!['sales'].keys, unorderedEquals(['paid', 'remaining', 'customers']));
+      expect(paid['2026-03-01']!['sales']['customers']['c1'], {
+        'name': 'Ravi Traders',
+        'phone': '',
+        'paid': 100.0,
+        'outstanding': -100.0,
+      });
+    });
+
+    test('pruned drops zero numbers and maps left with only labels', () {
+      expect(
+        AnalyticsRollup.pruned({
+          'sales': {
+            'revenue': 0.0,
+            'customers': {
+              'c1': {'name': 'Ravi Traders', 'phone': '', 'revenue': 0.0},
+            },
+          },
+        }),
+        isEmpty,
+      );
+      expect(
+        AnalyticsRollup.pruned({
+          'sales': {'revenue': 1e-12, 'quantity': 2},
+        }),
+        {
+          'sales': {'quantity': 2},
+        },
+      );
+    });
+
+    test('cancelled invoices are not counted', () {
+      final cancelled = _invoice(status: 'Cancelled');
+      expect(AnalyticsRollup.share(cancelled), isNull);
+      expect(AnalyticsRollup.deltas([(null, cancelled)]), isEmpty);
+
+      final cancelling = AnalyticsRollup.deltas([(_invoice(), cancelled)]);
+      expect(cancelling['2026-03-01']!['sales']['invoiceCount'], -1);
+      expect(cancelling['2026-03-01']!['sales']['revenue'], -250.0);
+    });
+
+    test('purchases are valued from their items, sales after refunds', () {
+      final purchase = AnalyticsRollup.share(_invoice(invoiceType: 'purchase', refundAdjustment: 50))!;
+      expect(purchase.key, '2026-03-01');
+      expect(purchase.value['purchase']['revenue'], 250.0);
+
+      final sale = AnalyticsRollup.share(_invoice(refundAdjustment: 50))!;
+      expect(sale.value['sales']['revenue'], 200.0);
+      expect(sale.value['sales']['remaining'], 200.0);
+    });
+  });
+}
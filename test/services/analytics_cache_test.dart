@@ -0,0 +1,80 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:invoiceflow/services/analytics_cache.dart';
+import 'package:invoiceflow/services/event_service.dart';
+import 'package:shared_preferences/shared_preferences.dart';
+
+void main() {
+  group('AnalyticsCache', () {
+    final cache = AnalyticsCache.instance;
+    late int computes;
+
+    Future<int> compute() async => ++computes;
+
+    setUp(() async {
+      SharedPreferences.setMockInitialValues({});
+      computes = 0;
+      await cache.clear();
+    });
+
+    test('serves repeated reads from memory', () async {
+      expect(await cache.get('a', const {AnalyticsDependency.invoices}, compute), 1);
+      expect(await cache.get('a', const {AnalyticsDependency.invoices}, compute), 1);
+      expect(computes, 1);
+    });
+
+    test('an event drops only the entries depending on it', () async {
+      await cache.get('sales', const {AnalyticsDependency.invoices}, compute);
+      await cache.get('clients', const {AnalyticsDependency.customers}, compute);
+
+      EventService().triggerInvoicesUpdated();
+      await Future<void>.delayed(Duration.zero);
+
+      expect(await cache.get('sales', const {AnalyticsDependency.invoices}, compute), 3);
+      expect(await cache.get('clients', const {AnalyticsDependency.customers}, compute), 2);
+    });
+
+    test('a result computed across a change is not kept', () async {
+      final first = cache.get('a', const {AnalyticsDependency.returns}, () async {
+        await cache.invalidate(const [AnalyticsDependency.returns]);
+        return compute();
+      });
+      expect(await first, 1);
+      expect(await cache.get('a', const {AnalyticsDependency.returns}, compute), 2);
+    });
+
+    test('evicts the least recently used entry', () async {
+      cache.maxEntries = 2;
+      addTearDown(() => cache.maxEntries = 32);
+      await cache.get('a', const {AnalyticsDependency.invoices}, compute);
+      await cache.get('b', const {AnalyticsDependency.invoices}, compute);
+      await cache.get('a', const {AnalyticsDependency.invoices}, compute);
+      await cache.get('c', const {AnalyticsDependency.invoices}, compute);
+
+      expect(await cache.get('a', const {AnalyticsDependency.invoices}, compute), 1);
+      expect(await cache.get('b', const {AnalyticsDependency.invoices}, compute), 4);
+    });
+
+    test('drops everything when the day changes', () async {
+      await cache.get('a', const {AnalyticsDependency.invoices}, compute);
+      final tomorrow = DateTime.now().add(const Duration(days: 1));
+      cache.clock = () => tomorrow;
+      addTearDown(() => cache.clock = DateTime.now);
+
+      expect(await cache.get('a', const {AnalyticsDependency.invoices}, compute), 2);
+      expect(await cache.get('a', const {AnalyticsDependency.invoices}, compute), 2);
+    });
+
+    test('reloads from disk after a memory miss', () async {
+      await cache.get<List<int>>('rows', const {AnalyticsDependency.invoices}, () async => [1, 2],
+          fromJson: (json) => List<int>.from(json as List));
+      cache.maxEntries = 0;
+      addTearDown(() => cache.maxEntries = 32);
+      await cache.get('other', const {AnalyticsDependency.invoices}, compute);
+      await Future<void>.delayed(Duration.zero);
+
+      final rows = await cache.get<List<int>>('rows', const {AnalyticsDependency.invoices}, () async => [9],
+          fromJson: (json) => List<int>.from(json as List));
+      expect(rows, [1, 2]);
+    });
+  });
+}
@@ -0,0 +1,68 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:invoiceflow/services/inventory_refresh_scheduler.dart';
+
+void main() {
+  group('InventoryRefreshScheduler', () {
+    late List<Set<String>> batches;
+    late InventoryRefreshScheduler scheduler;
+
+    setUp(() {
+      batches = [];
+      scheduler = InventoryRefreshScheduler(
+        (itemIds, fullRefresh) async => batches.add(fullRefresh ? {'*'} : itemIds),
+        window: const Duration(milliseconds: 20),
+      );
+    });
+
+    tearDown(() => scheduler.dispose());
+
+    test('coalesces requests within the window into one refresh', () async {
+      final stats = scheduler.stats.first;
+      scheduler.schedule(['a']);
+      scheduler.schedule(['b', 'a']);
+      await scheduler.schedule(['c']);
+
+      expect(batches, [
+        {'a', 'b', 'c'}
+      ]);
+      final published = await stats;
+      expect(published.itemCount, 3);
+      expect(published.requests, 3);
+      expect(published.fullRefresh, isFalse);
+    });
+
+    test('a full request turns the batch into a full refresh', () async {
+      scheduler.schedule(['a']);
+      await scheduler.scheduleFull();
+
+      expect(batches, [
+        {'*'}
+      ]);
+    });
+
+    test('maxDelay bounds how long a busy batch waits', () async {
+      scheduler.maxDelay = const Duration(milliseconds: 50);
+      final done = scheduler.schedule(['a']);
+      for (var i = 0; i < 10; i++) {
+        await Future<void>.delayed(const Duration(milliseconds: 10));
+        scheduler.schedule(['b$i']);
+      }
+      await done;
+      await scheduler.flush();
+
+      expect(batches.length, greaterThan(1));
+      expect(batches.first, contains('a'));
+    });
+
+    test('flush runs the pending batch immediately', () async {
+      scheduler.window = const Duration(seconds: 10);
+      scheduler.schedule(['a']);
+      await scheduler.flush();
+
+      expect(batches, [
+        {'a'}
+      ]);
+      expect(scheduler.hasPending, isFalse);
+    });
+  });
+}
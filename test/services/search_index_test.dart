@@ -0,0 +1,60 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:invoiceflow/services/search_index.dart';
+
+typedef _Entry = ({String id, String name, String? phone});
+
+void main() {
+  group('SearchIndex', () {
+    late SearchIndex<_Entry> index;
+
+    List<String> names(List<_Entry> entries) => [for (final e in entries) e.name];
+
+    setUp(() {
+      index = SearchIndex<_Entry>(idOf: (e) => e.id, fields: [(e) => e.name, (e) => e.phone])
+        ..putAll([
+          (id: '1', name: 'Garbage bag big', phone: null),
+          (id: '2', name: 'Paper bag', phone: null),
+          (id: '3', name: 'Bag clip', phone: null),
+          (id: '4', name: 'Ravi Traders', phone: '98765 43210'),
+        ]);
+    });
+
+    test('matches word prefixes, best match first', () {
+      expect(names(index.search('bag')), ['Bag clip', 'Garbage bag big', 'Paper bag']);
+      expect(names(index.search('BA')), ['Bag clip', 'Garbage bag big', 'Paper bag']);
+      expect(index.search(''), isEmpty);
+    });
+
+    test('every query word must match', () {
+      expect(names(index.search('paper bag')), ['Paper bag']);
+      expect(index.search('paper clip'), isEmpty);
+    });
+
+    test('finds numbers by their last digits', () {
+      expect(names(index.search('3210')), ['Ravi Traders']);
+      expect(names(index.exact('98765 43210')), ['Ravi Traders']);
+    });
+
+    test('put and remove update the index in place', () {
+      index.put((id: '2', name: 'Paper cup', phone: null));
+      expect(names(index.search('bag')), ['Bag clip', 'Garbage bag big']);
+      expect(names(index.search('cup')), ['Paper cup']);
+
+      index.remove('3');
+      expect(names(index.search('bag')), ['Garbage bag big']);
+      expect(index.length, 3);
+    });
+
+    test('putAll keeps words of records replaced within the batch consistent', () {
+      index.putAll([
+        (id: '5', name: 'Steel tumbler', phone: '91234 56789'),
+        (id: '5', name: 'Steel plate', phone: null),
+        (id: '6', name: 'Tumbler set', phone: null),
+      ]);
+      expect(names(index.search('steel')), ['Steel plate']);
+      expect(names(index.search('tumbler')), ['Tumbler set']);
+      expect(index.search('6789'), isEmpty);
+      expect(names(index.search('bag')), ['Bag clip', 'Garbage bag big', 'Paper bag']);
+    });
+  });
+}
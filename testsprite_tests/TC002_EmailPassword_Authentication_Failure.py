@@ -1,90 +1,58 @@
 import asyncio
 from playwright import async_api
+from harness import Readiness, run_standalone
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
+async def run_test(context):
+    # The browser context is provided by the harness (see harness/browser_pool.py)
+    # Open a new page in the browser context
+    page = await context.new_page()
+    ready = await Readiness.attach(page)
     
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:5173", wait_until="commit", timeout=10000)
+    
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:5173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
         try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
         except async_api.Error:
             pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # Look for any navigation or links to the login screen or try to reload or scroll to find login elements.
-        await page.mouse.wheel(0, window.innerHeight)
-        
-
-        # Try to reload the page or check if the login screen is accessible via any other means.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flt-semantics-placeholder').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+    
+    # Interact with the page elements to simulate user flow
+    # Look for any navigation or links to the login screen or try to reload or scroll to find login elements.
+    await page.mouse.wheel(0, await page.evaluate("window.innerHeight"))
+    
 
-        # Enter an invalid email in the email field and an incorrect password in the password field, then click the Sign In button.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('invalid@example.com')
-        
+    # Try to reload the page or check if the login screen is accessible via any other means.
+    elem = await ready.find(label="Enable accessibility", role="button")
+    await elem.click(timeout=5000)
+    
 
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[4]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('wrongpassword')
-        
+    # Enter an invalid email in the email field and an incorrect password in the password field, then click the Sign In button.
+    elem = await ready.find(label="Email", role="textbox")
+    await elem.fill('invalid@example.com')
+    
 
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+    elem = await ready.find(label="Password", role="textbox")
+    await elem.fill('wrongpassword')
+    
 
-        # Look visually on the page for any error message elements or try to extract text from the page that might indicate an error message.
-        await page.mouse.wheel(0, window.innerHeight)
-        
+    elem = await ready.find(label="Login", role="button")
+    await elem.click(timeout=5000)
+    
 
-        assert False, 'Test plan execution failed: login failure error message verification not implemented.'
-        await asyncio.sleep(5)
+    # Look visually on the page for any error message elements or try to extract text from the page that might indicate an error message.
+    await page.mouse.wheel(0, await page.evaluate("window.innerHeight"))
     
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+    assert False, 'Test plan execution failed: login failure error message verification not implemented.'
+    await asyncio.sleep(5)
+
+if __name__ == "__main__":
+    asyncio.run(run_standalone(run_test))
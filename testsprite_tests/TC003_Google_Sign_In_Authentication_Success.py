@@ -1,80 +1,50 @@
 import asyncio
 from playwright import async_api
+from harness import Readiness, run_standalone
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
+async def run_test(context):
+    # The browser context is provided by the harness (see harness/browser_pool.py)
+    # Open a new page in the browser context
+    page = await context.new_page()
+    ready = await Readiness.attach(page)
     
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:5173", wait_until="commit", timeout=10000)
+    
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:5173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
         try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
         except async_api.Error:
             pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # Try to scroll or interact with the page to reveal the Google Sign-In button as an interactive element or reload the page to fix element detection.
-        await page.mouse.wheel(0, window.innerHeight)
-        
-
-        # Try to reload the page to see if the interactive elements load correctly or try to interact with the placeholder button as a last resort.
-        await page.goto('http://localhost:5173/', timeout=10000)
-        
+    
+    # Interact with the page elements to simulate user flow
+    # Try to scroll or interact with the page to reveal the Google Sign-In button as an interactive element or reload the page to fix element detection.
+    await page.mouse.wheel(0, await page.evaluate("window.innerHeight"))
+    
 
-        # Try to interact with the placeholder button (index 0) as a last resort to trigger the Google Sign-In flow.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flt-semantics-placeholder').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+    # Try to reload the page to see if the interactive elements load correctly or try to interact with the placeholder button as a last resort.
+    await page.goto('http://localhost:5173/', timeout=10000)
+    
 
-        # Click on the 'Continue with Google' button (index 5) to initiate the Google Sign-In process.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[7]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+    # Try to interact with the placeholder button (index 0) as a last resort to trigger the Google Sign-In flow.
+    elem = await ready.find(label="Enable accessibility", role="button")
+    await elem.click(timeout=5000)
+    
 
-        assert False, 'Test plan execution failed: Unable to verify successful Google Sign-In and routing.'
-        await asyncio.sleep(5)
+    # Click on the 'Continue with Google' button (index 5) to initiate the Google Sign-In process.
+    elem = await ready.find(label="Sign in with Google", role="button")
+    await elem.click(timeout=5000)
     
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+    assert False, 'Test plan execution failed: Unable to verify successful Google Sign-In and routing.'
+    await asyncio.sleep(5)
+
+if __name__ == "__main__":
+    asyncio.run(run_standalone(run_test))
@@ -1,112 +1,77 @@
 import asyncio
 from playwright import async_api
+from harness import Readiness, run_standalone
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
+async def run_test(context):
+    # The browser context is provided by the harness (see harness/browser_pool.py)
+    # Open a new page in the browser context
+    page = await context.new_page()
+    ready = await Readiness.attach(page)
     
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:5173", wait_until="commit", timeout=10000)
+    
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:5173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
         try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
         except async_api.Error:
             pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # Try to reload the page or check for alternative navigation to login screen
-        await page.goto('http://localhost:5173/', timeout=10000)
-        
-
-        # Scroll down or interact with the page to reveal or activate the login form and 'Forgot Password?' link as interactive elements.
-        await page.mouse.wheel(0, window.innerHeight)
-        
+    
+    # Interact with the page elements to simulate user flow
+    # Try to reload the page or check for alternative navigation to login screen
+    await page.goto('http://localhost:5173/', timeout=10000)
+    
 
-        # Try clicking the 'Enable accessibility' button to see if it removes an overlay or reveals the login form elements as interactive.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flt-semantics-placeholder').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+    # Scroll down or interact with the page to reveal or activate the login form and 'Forgot Password?' link as interactive elements.
+    await page.mouse.wheel(0, await page.evaluate("window.innerHeight"))
+    
 
-        # Click the 'Forgot Password?' button to navigate to the password recovery screen.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[5]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+    # Try clicking the 'Enable accessibility' button to see if it removes an overlay or reveals the login form elements as interactive.
+    elem = await ready.find(label="Enable accessibility", role="button")
+    await elem.click(timeout=5000)
+    
 
-        # Enter the registered email 'Test' into the email input field and click 'Send Reset Link' button.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[2]/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Test')
-        
+    # Click the 'Forgot Password?' button to navigate to the password recovery screen.
+    elem = await ready.find(label="Forgot Password?", role="button")
+    await elem.click(timeout=5000)
+    
 
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[2]/flt-semantics[4]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+    # Enter the registered email 'Test' into the email input field and click 'Send Reset Link' button.
+    elem = await ready.find(label="Email", role="textbox")
+    await elem.fill('Test')
+    
 
-        # Clear the current invalid email input and enter a valid registered email address in proper email format (e.g., test@example.com). Then click 'Send Reset Link' to submit the password recovery request.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[2]/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('')
-        
+    elem = await ready.find(label="Send Reset Link", role="button")
+    await elem.click(timeout=5000)
+    
 
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[2]/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test@example.com')
-        
+    # Clear the current invalid email input and enter a valid registered email address in proper email format (e.g., test@example.com). Then click 'Send Reset Link' to submit the password recovery request.
+    elem = await ready.find(label="Email", role="textbox")
+    await elem.fill('')
+    
 
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[2]/flt-semantics[4]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+    elem = await ready.find(label="Email", role="textbox")
+    await elem.fill('test@example.com')
+    
 
-        # Assert that the confirmation message for password reset email is displayed
-        frame = context.pages[-1]
-        confirmation_message = await frame.locator('text=Forgot Password Email Sent').text_content()
-        assert confirmation_message == 'Forgot Password Email Sent', f"Expected confirmation message to be 'Forgot Password Email Sent' but got '{confirmation_message}'"
-        details_message = await frame.locator('text=We\'ve sent a password reset link to test@example.com. Please check your email and follow the instructions to reset your password.').text_content()
-        assert details_message == "We've sent a password reset link to test@example.com. Please check your email and follow the instructions to reset your password.", f"Expected details message to be correct but got '{details_message}'"
-        await asyncio.sleep(5)
+    elem = await ready.find(label="Send Reset Link", role="button")
+    await elem.click(timeout=5000)
     
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+    # Assert that the confirmation message for password reset email is displayed
+    frame = context.pages[-1]
+    confirmation_message = await frame.locator('text=Forgot Password Email Sent').text_content()
+    assert confirmation_message == 'Forgot Password Email Sent', f"Expected confirmation message to be 'Forgot Password Email Sent' but got '{confirmation_message}'"
+    details_message = await frame.locator('text=We\'ve sent a password reset link to test@example.com. Please check your email and follow the instructions to reset your password.').text_content()
+    assert details_message == "We've sent a password reset link to test@example.com. Please check your email and follow the instructions to reset your password.", f"Expected details message to be correct but got '{details_message}'"
+    await asyncio.sleep(5)
+
+if __name__ == "__main__":
+    asyncio.run(run_standalone(run_test))
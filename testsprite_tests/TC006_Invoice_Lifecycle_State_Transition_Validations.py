@@ -1,159 +1,35 @@
 import asyncio
 from playwright import async_api
+from harness import Readiness, run_standalone
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
+AUTHENTICATED = True
+
+async def run_test(context):
+    # The browser context is provided by the harness (see harness/browser_pool.py)
+    # Open a new page in the browser context
+    page = await context.new_page()
+    ready = await Readiness.attach(page)
+    
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:5173", wait_until="commit", timeout=10000)
     
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:5173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
         try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
         except async_api.Error:
             pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # Try to reload the page to see if the interface loads properly.
-        await page.goto('http://localhost:5173/', timeout=10000)
-        
-
-        # Try to find any hidden or off-screen elements by scrolling or try to open developer console or report issue.
-        await page.mouse.wheel(0, window.innerHeight)
-        
-
-        # Try to interact with the placeholder button or scroll to reveal more elements or try to find input fields by alternative means.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flt-semantics-placeholder').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Input username 'Test' in Email field (index 1), password 'test' in Password field (index 2), then click Sign In button (index 4).
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Test')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[4]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Input a valid email format and a password with at least 6 characters, then attempt to sign in again.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test@example.com')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[4]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test1234')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Input a valid email 'test@example.com' into the Email field (index 1), input a valid password 'test1234' into the Password field (index 2), then click the Sign In button (index 4).
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test@example.com')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[4]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test1234')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Clear the Email and Password fields, input a valid email 'test@example.com' into the Email field (index 1), input a valid password 'test1234' into the Password field (index 2), then click the Sign In button (index 4).
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[4]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test@example.com')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[4]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test1234')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Input password 'test1234' into the Password field (index 2) and click the Sign In button (index 4).
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[4]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('test1234')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/flutter-view/flt-semantics-host/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics/flt-semantics[6]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        assert False, 'Test plan execution failed: generic failure assertion.'
-        await asyncio.sleep(5)
     
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+    # Interact with the page elements to simulate user flow
+    # The harness starts this test signed in (AUTHENTICATED), so the recorded login steps are gone.
+    assert False, 'Test plan execution failed: generic failure assertion.'
+    await asyncio.sleep(5)
+
+if __name__ == "__main__":
+    asyncio.run(run_standalone(run_test))
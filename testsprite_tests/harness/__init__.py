@@ -0,0 +1,26 @@
+"""Shared execution harness for the TestSprite TC scripts.
+
+The TC scripts expose ``run_test(context)`` and receive an isolated
+``BrowserContext`` from the harness instead of starting Playwright
+themselves. ``run_standalone`` keeps ``python TC0xx_*.py`` working, and
+``python -m harness.runner`` runs the whole suite on a shared browser pool.
+"""
+
+from harness.browser_pool import BrowserPool, DEFAULT_BROWSER_ARGS
+from harness.perf import PerfCapture
+from harness.readiness import LatencyHistogram, Readiness, StepRecorder
+from harness.semantics_index import SemanticsIndex
+from harness.stubs import NetworkStubs
+from harness.standalone import run_standalone
+
+__all__ = [
+    "BrowserPool",
+    "DEFAULT_BROWSER_ARGS",
+    "LatencyHistogram",
+    "NetworkStubs",
+    "PerfCapture",
+    "Readiness",
+    "SemanticsIndex",
+    "StepRecorder",
+    "run_standalone",
+]
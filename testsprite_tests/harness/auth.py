@@ -0,0 +1,107 @@
+"""Sign in once per run and hand every test an authenticated context.
+
+The app has to be built with ``--dart-define=USE_FIREBASE_EMULATOR=true`` so
+it talks to the local Auth/Firestore emulators (see ``firebase.json``).
+``sign_in_once`` makes sure the test user exists in the Auth emulator, logs
+in through the real login screen a single time and saves Playwright
+``storage_state`` including IndexedDB, where the Firebase JS SDK keeps its
+session. Scripts that set ``AUTHENTICATED = True`` start from that state.
+"""
+
+import asyncio
+import json
+import os
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+from harness.browser_pool import BrowserPool
+from harness.readiness import Readiness
+
+SUITE_DIR = Path(__file__).resolve().parent.parent
+AUTH_STATE_PATH = SUITE_DIR / "tmp" / "auth_state.json"
+
+BASE_URL = os.environ.get("TS_BASE_URL", "http://localhost:5173")
+AUTH_EMULATOR_HOST = os.environ.get("FIREBASE_AUTH_EMULATOR_HOST", "localhost:9099")
+TEST_EMAIL = os.environ.get("TS_LOGIN_EMAIL", "test@example.com")
+TEST_PASSWORD = os.environ.get("TS_LOGIN_PASSWORD", "test1234")
+
+# Resolves once the Firebase JS SDK has persisted a signed-in user.
+_AUTH_PERSISTED = """
+() => new Promise((resolve) => {
+  const open = indexedDB.open('firebaseLocalStorageDb');
+  open.onerror = () => resolve(false);
+  open.onsuccess = () => {
+    const db = open.result;
+    if (!db.objectStoreNames.contains('firebaseLocalStorage')) { db.close(); resolve(false); return; }
+    const req = db.transaction('firebaseLocalStorage', 'readonly')
+      .objectStore('firebaseLocalStorage').getAllKeys();
+    req.onsuccess = () => { db.close(); resolve(req.result.some((k) => String(k).startsWith('firebase:authUser:'))); };
+    req.onerror = () => { db.close(); resolve(false); };
+  };
+})
+"""
+
+
+def _identity_toolkit(method: str, body: dict, emulator_host: str) -> dict:
+    url = f"http://{emulator_host}/identitytoolkit.googleapis.com/v1/accounts:{method}?key=fake-api-key"
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def ensure_emulator_user(
+    email: str = TEST_EMAIL,
+    password: str = TEST_PASSWORD,
+    emulator_host: str = AUTH_EMULATOR_HOST,
+) -> str:
+    """Create ``email`` in the Auth emulator if needed and return its uid."""
+    body = {"email": email, "password": password, "returnSecureToken": True}
+    try:
+        return _identity_toolkit("signUp", body, emulator_host)["localId"]
+    except urllib.error.HTTPError as exc:
+        if b"EMAIL_EXISTS" not in exc.read():
+            raise
+    return _identity_toolkit("signInWithPassword", body, emulator_host)["localId"]
+
+
+async def sign_in_once(
+    pool: BrowserPool,
+    state_path: Path = AUTH_STATE_PATH,
+    base_url: str = BASE_URL,
+    email: str = TEST_EMAIL,
+    password: str = TEST_PASSWORD,
+) -> Path:
+    """Log in through the UI once and save the session to ``state_path``."""
+    await asyncio.to_thread(ensure_emulator_user, email, password)
+    async with pool.context() as context:
+        page = await context.new_page()
+        ready = await Readiness.attach(page)
+        await page.goto(base_url, wait_until="domcontentloaded")
+
+        placeholder = page.locator("flt-semantics-placeholder")
+        if await placeholder.count():
+            await placeholder.first.click()
+
+        await (await ready.find(label="Email", role="textbox")).fill(email)
+        await (await ready.find(label="Password", role="textbox")).fill(password)
+        await (await ready.find(label="Login", role="button")).click()
+
+        await page.wait_for_function(_AUTH_PERSISTED, polling=100, timeout=15000)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        await context.storage_state(path=str(state_path), indexed_db=True)
+    return state_path
+
+
+def is_authenticated(module) -> bool:
+    return bool(getattr(module, "AUTHENTICATED", False))
+
+
+def context_options(module, state_path: Optional[Path]) -> dict:
+    """``new_context`` kwargs for a TC module given the saved session."""
+    if state_path and is_authenticated(module):
+        return {"storage_state": str(state_path)}
+    return {}
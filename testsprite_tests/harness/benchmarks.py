@@ -0,0 +1,314 @@
+"""Benchmark store and performance regression gate.
+
+Every run of the runner can be recorded as one line in
+``tmp/benchmarks.jsonl``. Each line holds flat, lower-is-better metrics
+taken from ``tmp/harness_results.json``:
+
+* ``TC011 duration``: test wall time, for passed tests only;
+* ``TC011 screen /dashboard p95``: readiness latency per screen;
+* ``TC011 step 3 /dashboard``: readiness latency per recorded step;
+* ``TC011 firstFrameMs``, ``longTaskMs``, ``jsHeapUsedBytes`` and
+  ``firestoreRequests``: taken from ``--perf``;
+* ``TC011 measure loadDashboardData``: ``PerfMarks`` timings from the app.
+
+Each metric is compared with a rolling baseline: the median and MAD of
+its last ``--window`` values that were not flagged. A metric regresses
+when it meets all three of these:
+
+* it is at least ``--threshold`` (20% by default) above the median;
+* it is at least ``--mad-k`` scaled MADs above the median, so noisy
+  metrics need a larger jump;
+* it is above the median by at least a tiny absolute floor (1 ms, one
+  request, 256 KB), so near-zero metrics do not flag on rounding.
+
+A flagged value stays out of the baseline. A slowdown that was shipped
+becomes the new baseline once ``SHIFT_RUNS`` runs in a row have flagged
+the metric; ``--rebaseline`` accepts the current run for every metric
+straight away.
+
+Findings go to ``performance-regression-report.md``, next to
+``testsprite-mcp-test-report.md``.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.runner --perf && python -m harness.benchmarks
+    python -m harness.benchmarks --no-record --window 5
+    python -m harness.benchmarks --rebaseline
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from harness.auth import SUITE_DIR
+
+RESULTS_PATH = SUITE_DIR / "tmp" / "harness_results.json"
+HISTORY_PATH = SUITE_DIR / "tmp" / "benchmarks.jsonl"
+REPORT_PATH = SUITE_DIR / "performance-regression-report.md"
+
+DEFAULT_WINDOW = 10
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_MAD_K = 3.0
+MIN_SAMPLES = 3
+
+# Consecutive flagged runs after which their level becomes the baseline.
+SHIFT_RUNS = 3
+
+# Scales MAD to a standard deviation for normally distributed samples.
+_MAD_SCALE = 1.4826
+
+# Changes smaller than this never count, whatever the ratio.
+_MIN_DELTA_BY_SUFFIX = (("Bytes", 1 << 18), ("Requests", 1))
+_MIN_DELTA_MS = 1.0
+
+# Absorbs float error at the threshold boundary.
+_EPSILON = 1e-9
+
+
+@dataclass
+class Finding:
+    metric: str
+    current: float
+    median: float
+    mad: float
+    samples: int
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.median) / self.median if self.median else 0.0
+
+
+def metrics_from_results(payload: dict) -> Dict[str, float]:
+    """Flatten one ``harness_results.json`` payload into named metrics."""
+    metrics: Dict[str, float] = {}
+    for result in payload.get("results", []):
+        tc = result["testId"]
+        if result["testStatus"] == "PASSED":
+            metrics[f"{tc} duration"] = result["durationMs"]
+        readiness = result.get("readiness", {})
+        for screen, stats in readiness.get("screens", {}).items():
+            metrics[f"{tc} screen {screen} p95"] = stats["p95"]
+        for step in readiness.get("steps", []):
+            metrics[f"{tc} step {step['step']} {step['screen']}"] = step["ms"]
+        perf = result.get("perf") or {}
+        for key in ("firstFrameMs", "firstMeaningfulPaintMs", "longTaskMs", "jsHeapUsedBytes", "firestoreRequests"):
+            if perf.get(key) is not None:
+                metrics[f"{tc} {key}"] = perf[key]
+        for name, ms in (perf.get("measures") or {}).items():
+            metrics[f"{tc} measure {name}"] = ms
+    return metrics
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SUITE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def load_history(path: Path = HISTORY_PATH) -> List[dict]:
+    if not path.exists():
+        return []
+    with path.open(encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def append_run(record: dict, path: Path = HISTORY_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def _min_delta(metric: str) -> float:
+    for suffix, delta in _MIN_DELTA_BY_SUFFIX:
+        if metric.endswith(suffix):
+            return delta
+    return _MIN_DELTA_MS
+
+
+def _flagged(run: dict, metric: str) -> bool:
+    names = run.get("regressions")
+    # Runs recorded before per-metric flags were flagged as a whole.
+    return bool(run.get("regressed")) if names is None else metric in names
+
+
+def baseline_samples(metric: str, history: Sequence[dict], window: int = DEFAULT_WINDOW) -> List[float]:
+    """Values of ``metric`` the next run is compared with, oldest first.
+
+    The baseline starts at the latest ``rebaseline`` run, or at the first
+    of the latest ``SHIFT_RUNS`` consecutive runs that flagged the metric,
+    whichever is later; those runs count even though they were flagged.
+    Other flagged values are left out, so one slow run does not drag the
+    median up for the runs after it.
+    """
+    runs = [run for run in history if metric in run["metrics"] or run.get("rebaseline")]
+    start, accepted, streak = 0, set(), 0
+    for i, run in enumerate(runs):
+        if run.get("rebaseline"):
+            start, accepted, streak = i, {i}, 0
+        elif _flagged(run, metric):
+            streak += 1
+            if streak == SHIFT_RUNS:
+                start = i - SHIFT_RUNS + 1
+                accepted = set(range(start, i + 1))
+        else:
+            streak = 0
+    samples = [
+        runs[i]["metrics"][metric]
+        for i in range(start, len(runs))
+        if metric in runs[i]["metrics"] and (i in accepted or not _flagged(runs[i], metric))
+    ]
+    return samples[-window:]
+
+
+def compare(
+    current: Dict[str, float],
+    history: Sequence[dict],
+    window: int = DEFAULT_WINDOW,
+    threshold: float = DEFAULT_THRESHOLD,
+    mad_k: float = DEFAULT_MAD_K,
+) -> tuple:
+    """Return ``(regressions, improvements, unbaselined)`` for ``current``."""
+    regressions: List[Finding] = []
+    improvements: List[Finding] = []
+    unbaselined: List[str] = []
+    for metric, value in sorted(current.items()):
+        samples = baseline_samples(metric, history, window)
+        if len(samples) < MIN_SAMPLES:
+            unbaselined.append(metric)
+            continue
+        median = statistics.median(samples)
+        mad = statistics.median(abs(s - median) for s in samples)
+        finding = Finding(metric, value, median, mad, len(samples))
+        spread = max(mad_k * _MAD_SCALE * mad, _min_delta(metric)) - _EPSILON
+        bound = threshold * median - _EPSILON
+        if value - median >= bound and value - median >= spread:
+            regressions.append(finding)
+        elif median - value >= bound and median - value >= spread:
+            improvements.append(finding)
+    return regressions, improvements, unbaselined
+
+
+def _format(metric: str, value: float) -> str:
+    if metric.endswith("Bytes"):
+        return f"{value / 2**20:.1f} MB"
+    if metric.endswith("Requests"):
+        return f"{value:.0f}"
+    return f"{value:.0f} ms"
+
+
+def _table(findings: Sequence[Finding]) -> List[str]:
+    lines = ["| Metric | Baseline median | MAD | This run | Change |", "|---|---|---|---|---|"]
+    for f in sorted(findings, key=lambda f: abs(f.change), reverse=True):
+        lines.append(f"| {f.metric} | {_format(f.metric, f.median)} | {_format(f.metric, f.mad)}"
+                     f" | {_format(f.metric, f.current)} | {f.change:+.0%} |")
+    return lines
+
+
+def render_report(record: dict, regressions: Sequence[Finding], improvements: Sequence[Finding],
+                  unbaselined: Sequence[str], window: int, threshold: float) -> str:
+    lines = [
+        "# Performance Regression Report",
+        "",
+        "---",
+        "",
+        "## 1️⃣ Document Metadata",
+        "- **Project Name:** invoiceflow",
+        f"- **Run:** {record['runId']}",
+        f"- **Commit:** {record['commit'] or 'N/A'}",
+        f"- **Baseline:** median and MAD of up to {window} earlier unflagged values per metric",
+        f"- **Threshold:** +{threshold:.0%} over the median and outside the MAD band",
+        *(["- **Rebaseline:** this run is the new baseline"] if record.get("rebaseline") else []),
+        "",
+        "---",
+        "",
+        f"## 2️⃣ Regressions ({len(regressions)})",
+        "",
+    ]
+    lines += _table(regressions) if regressions else ["No metric regressed."]
+    lines += ["", "---", "", f"## 3️⃣ Improvements ({len(improvements)})", ""]
+    lines += _table(improvements) if improvements else ["No metric improved beyond the threshold."]
+    lines += [
+        "",
+        "---",
+        "",
+        "## 4️⃣ Coverage",
+        f"- **Metrics recorded:** {len(record['metrics'])}",
+        f"- **Metrics without enough history (< {MIN_SAMPLES} runs):** {len(unbaselined)}",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def check(
+    results_path: Path = RESULTS_PATH,
+    history_path: Path = HISTORY_PATH,
+    report_path: Path = REPORT_PATH,
+    window: int = DEFAULT_WINDOW,
+    threshold: float = DEFAULT_THRESHOLD,
+    mad_k: float = DEFAULT_MAD_K,
+    record: bool = True,
+    rebaseline: bool = False,
+) -> List[Finding]:
+    """Compare the latest results with the baseline, write the report and record the run.
+
+    With ``rebaseline`` the run is recorded as the new baseline and nothing
+    is reported as a regression.
+    """
+    payload = json.loads(results_path.read_text(encoding="utf-8"))
+    history = load_history(history_path)
+    run = {
+        "runId": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "metrics": metrics_from_results(payload),
+    }
+    regressions, improvements, unbaselined = compare(run["metrics"], history, window, threshold, mad_k)
+    if rebaseline:
+        run["rebaseline"] = True
+        regressions = []
+    report_path.write_text(
+        render_report(run, regressions, improvements, unbaselined, window, threshold), encoding="utf-8"
+    )
+    if record:
+        run["regressed"] = bool(regressions)
+        run["regressions"] = [f.metric for f in regressions]
+        append_run(run, history_path)
+    return regressions
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=Path, default=RESULTS_PATH, help="runner output to check")
+    parser.add_argument("--history", type=Path, default=HISTORY_PATH, help="benchmark store (JSON lines)")
+    parser.add_argument("--report", type=Path, default=REPORT_PATH, help="where to write the markdown report")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="baseline runs to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative slowdown that fails")
+    parser.add_argument("--mad-k", type=float, default=DEFAULT_MAD_K, help="scaled MADs a slowdown must exceed")
+    parser.add_argument("--no-record", dest="record", action="store_false",
+                        help="compare only; do not add this run to the store")
+    parser.add_argument("--rebaseline", action="store_true",
+                        help="accept this run as the new baseline for every metric, e.g. after a known slowdown")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    regressions = check(args.results, args.history, args.report, args.window, args.threshold, args.mad_k,
+                        args.record, args.rebaseline)
+    for f in regressions:
+        print(f"REGRESSION {f.metric}: {_format(f.metric, f.current)}"
+              f" vs median {_format(f.metric, f.median)} ({f.change:+.0%})")
+    print(f"Report written to {args.report}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
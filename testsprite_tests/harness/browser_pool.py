@@ -0,0 +1,87 @@
+"""One Playwright instance, N Chromium browsers, one context per test."""
+
+import asyncio
+import contextlib
+from typing import AsyncIterator, List, Optional
+
+from playwright import async_api
+
+# Same flags the generated scripts used, minus ``--single-process``: several
+# contexts share each browser here, and single-process Chromium crashes as
+# soon as more than one renderer is alive.
+DEFAULT_BROWSER_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+]
+
+DEFAULT_TIMEOUT_MS = 5000
+
+
+class BrowserPool:
+    """Keeps browsers warm across tests and hands out fresh contexts.
+
+    Contexts are handed out round-robin so the load spreads evenly over the
+    launched browsers. Every context is closed when the test that acquired it
+    finishes, so cookies, storage and pages never leak between tests.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        headless: bool = True,
+        args: Optional[List[str]] = None,
+        default_timeout_ms: int = DEFAULT_TIMEOUT_MS,
+    ):
+        if size < 1:
+            raise ValueError("BrowserPool size must be at least 1")
+        self.size = size
+        self.headless = headless
+        self.args = list(args if args is not None else DEFAULT_BROWSER_ARGS)
+        self.default_timeout_ms = default_timeout_ms
+        self._playwright: Optional[async_api.Playwright] = None
+        self._browsers: List[async_api.Browser] = []
+        self._next = 0
+
+    async def start(self) -> "BrowserPool":
+        self._playwright = await async_api.async_playwright().start()
+        self._browsers = await asyncio.gather(
+            *(
+                self._playwright.chromium.launch(headless=self.headless, args=self.args)
+                for _ in range(self.size)
+            )
+        )
+        return self
+
+    async def stop(self) -> None:
+        for browser in self._browsers:
+            with contextlib.suppress(async_api.Error):
+                await browser.close()
+        self._browsers = []
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    def _pick_browser(self) -> async_api.Browser:
+        if not self._browsers:
+            raise RuntimeError("BrowserPool.start() has not been called")
+        browser = self._browsers[self._next % len(self._browsers)]
+        self._next += 1
+        return browser
+
+    @contextlib.asynccontextmanager
+    async def context(self, **context_options) -> AsyncIterator[async_api.BrowserContext]:
+        """Yield a new isolated ``BrowserContext`` and close it afterwards."""
+        context = await self._pick_browser().new_context(**context_options)
+        context.set_default_timeout(self.default_timeout_ms)
+        try:
+            yield context
+        finally:
+            with contextlib.suppress(async_api.Error):
+                await context.close()
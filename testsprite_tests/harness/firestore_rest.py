@@ -0,0 +1,191 @@
+"""Minimal Firestore emulator REST client (stdlib only).
+
+Requests carry ``Authorization: Bearer owner``, which the emulator treats as
+an admin credential, so seeding and load tests bypass ``firestore.rules``
+while writing to the same ``users/{uid}/...`` paths as the app.
+"""
+
+import json
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+FIRESTORE_EMULATOR_HOST = os.environ.get("FIRESTORE_EMULATOR_HOST", "localhost:8080")
+# Must match DefaultFirebaseOptions.projectId, the emulator namespaces by project.
+PROJECT_ID = os.environ.get("FIREBASE_PROJECT_ID", "invoiceflow-deafa")
+
+# batchWrite accepts at most 500 writes per request.
+MAX_BATCH_WRITES = 500
+
+Document = Tuple[str, Dict[str, Any]]  # (path relative to /documents, fields)
+
+
+class FirestoreRestError(RuntimeError):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"Firestore emulator returned HTTP {status}: {body[:300]}")
+        self.status = status
+        self.body = body
+
+    @property
+    def code(self) -> str:
+        """gRPC status name (``ABORTED``, ``NOT_FOUND``...) if the body has one."""
+        try:
+            return json.loads(self.body)["error"]["status"]
+        except (ValueError, KeyError, TypeError):
+            return ""
+
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    """Python value -> Firestore REST ``Value``."""
+    if value is None:
+        return {"nullValue": None}
+    if isinstance(value, bool):
+        return {"booleanValue": value}
+    if isinstance(value, int):
+        return {"integerValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return {"timestampValue": value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [encode_value(v) for v in value]}}
+    if isinstance(value, dict):
+        return {"mapValue": {"fields": encode_fields(value)}}
+    raise TypeError(f"Cannot encode {type(value).__name__} for Firestore")
+
+
+def encode_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: encode_value(value) for key, value in data.items()}
+
+
+def decode_value(value: Dict[str, Any]) -> Any:
+    """Firestore REST ``Value`` -> Python value (timestamps stay ISO strings)."""
+    (kind, raw), = value.items()
+    if kind == "integerValue":
+        return int(raw)
+    if kind == "arrayValue":
+        return [decode_value(v) for v in raw.get("values", [])]
+    if kind == "mapValue":
+        return decode_fields(raw.get("fields", {}))
+    return raw
+
+
+def decode_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: decode_value(value) for key, value in fields.items()}
+
+
+class FirestoreEmulator:
+    """Thin wrapper over the emulator's REST endpoints for one project."""
+
+    def __init__(self, host: str = FIRESTORE_EMULATOR_HOST, project_id: str = PROJECT_ID):
+        self.host = host
+        self.project_id = project_id
+        self.database = f"projects/{project_id}/databases/(default)"
+        self.base_url = f"http://{host}/v1/{self.database}/documents"
+
+    def _request(self, method: str, url: str, body: Optional[dict] = None, timeout: float = 60) -> Any:
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            url,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json", "Authorization": "Bearer owner"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                payload = response.read()
+        except urllib.error.HTTPError as exc:
+            raise FirestoreRestError(exc.code, exc.read().decode(errors="replace")) from None
+        return json.loads(payload) if payload else {}
+
+    def doc_name(self, path: str) -> str:
+        return f"{self.database}/documents/{path}"
+
+    def batch_write(self, docs: Iterable[Document]) -> int:
+        """Write up to 500 documents in one non-atomic ``batchWrite`` call."""
+        writes = [
+            {"update": {"name": self.doc_name(path), "fields": encode_fields(fields)}}
+            for path, fields in docs
+        ]
+        if not writes:
+            return 0
+        if len(writes) > MAX_BATCH_WRITES:
+            raise ValueError(f"batch_write takes at most {MAX_BATCH_WRITES} documents")
+        result = self._request("POST", f"{self.base_url}:batchWrite", {"writes": writes})
+        failed = [s for s in result.get("status", []) if s.get("code")]
+        if failed:
+            raise FirestoreRestError(200, json.dumps(failed[:3]))
+        return len(writes)
+
+    def commit(self, writes: List[dict], transaction: Optional[str] = None) -> dict:
+        """Atomic ``commit`` of raw REST ``Write`` objects, optionally ending ``transaction``."""
+        body: Dict[str, Any] = {"writes": writes}
+        if transaction:
+            body["transaction"] = transaction
+        return self._request("POST", f"{self.base_url}:commit", body)
+
+    def begin_transaction(self) -> str:
+        """Start a read-write transaction; pass its id to ``get`` and ``commit``."""
+        return self._request("POST", f"{self.base_url}:beginTransaction", {})["transaction"]
+
+    def rollback(self, transaction: str) -> None:
+        self._request("POST", f"{self.base_url}:rollback", {"transaction": transaction})
+
+    def set(self, path: str, fields: Dict[str, Any]) -> None:
+        """``DocumentReference.set``: create or overwrite ``path``."""
+        self.commit([{"update": {"name": self.doc_name(path), "fields": encode_fields(fields)}}])
+
+    def update(self, path: str, fields: Dict[str, Any]) -> None:
+        """``DocumentReference.update``: fails with NOT_FOUND if ``path`` is missing."""
+        self.commit([{
+            "update": {"name": self.doc_name(path), "fields": encode_fields(fields)},
+            "updateMask": {"fieldPaths": [f"`{key}`" if not key.isidentifier() else key for key in fields]},
+            "currentDocument": {"exists": True},
+        }])
+
+    def run_query(self, parent: str, collection: str, where: Optional[Dict[str, Any]] = None,
+                  order_by: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Equality-filtered query on ``parent/collection``; returns ``(path, fields)``."""
+        query: Dict[str, Any] = {"from": [{"collectionId": collection}]}
+        filters = [
+            {"fieldFilter": {"field": {"fieldPath": key}, "op": "EQUAL", "value": encode_value(value)}}
+            for key, value in (where or {}).items()
+        ]
+        if len(filters) == 1:
+            query["where"] = filters[0]
+        elif filters:
+            query["where"] = {"compositeFilter": {"op": "AND", "filters": filters}}
+        if order_by:
+            query["orderBy"] = [{"field": {"fieldPath": order_by}, "direction": "ASCENDING"}]
+        rows = self._request("POST", f"{self.base_url}/{parent}:runQuery", {"structuredQuery": query})
+        prefix = f"{self.database}/documents/"
+        return [
+            (row["document"]["name"][len(prefix):], decode_fields(row["document"].get("fields", {})))
+            for row in rows if "document" in row
+        ]
+
+    def get(self, path: str, transaction: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        url = f"{self.base_url}/{path}"
+        if transaction:
+            url += "?" + urllib.parse.urlencode({"transaction": transaction})
+        try:
+            doc = self._request("GET", url)
+        except FirestoreRestError as exc:
+            if exc.status == 404:
+                return None
+            raise
+        return decode_fields(doc.get("fields", {}))
+
+    def clear(self) -> None:
+        """Drop every document in the project (emulator-only endpoint)."""
+        self._request(
+            "DELETE",
+            f"http://{self.host}/emulator/v1/projects/{self.project_id}/databases/(default)/documents",
+        )
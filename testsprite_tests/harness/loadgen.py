@@ -0,0 +1,880 @@
+"""Replay invoice posting against the Firestore emulator under load.
+
+Each operation issues the same reads and writes, in the same order and with
+the same document shapes, as the Dart call it stands for:
+
+* ``create``: ``InvoiceService.addInvoice``. Write the invoice, its
+  customer's aggregate increments and its day's ``analytics_rollups``
+  increments in one transaction, load all items, then ``postMovements``:
+  one transaction reads every line's item and ledger, checks stock and
+  commits all movements, ledgers, ``current_stock`` values and rollups
+  together. Then ``scheduleRefresh`` for the invoice's items.
+* ``cancel``: ``InvoiceService.cancelInvoice`` for a sales invoice posted
+  earlier in the run. Run ``reverseMovementsAtomically``, then
+  ``scheduleRefresh`` for the reversed items, then mark the invoice
+  cancelled (again with the customer's aggregates, in one transaction).
+* ``return``: ``ReturnService.createReturn`` for a sales return. Write the
+  return and increment the customer's pending return in one transaction,
+  then ``receiveStock`` each line.
+* ``adjust``: ``InventoryService.adjustStock``.
+
+As in ``InventoryRefreshScheduler``, scheduled refreshes are coalesced:
+the items named within ``--refresh-window`` seconds of each other (at most
+two seconds after the first) get one ``refreshMetricsForItems`` run, and
+operations do not wait for it. Pending refreshes are flushed before the
+stock checks at the end of the run.
+
+With ``--rate`` > 0 arrivals are open-loop: a Poisson process at that many
+operations per second, with at most ``--concurrency`` operations in flight.
+Latency is measured from arrival, so time spent queued counts. With
+``--rate 0`` the loop is closed: ``--concurrency`` workers each start the
+next operation as soon as the last one finishes.
+
+Contention on ``inventory_items``, ``stock_movements``, ``stock_ledger``,
+the per-day ``sales_rollups`` and ``analytics_rollups`` documents and
+``customers`` is counted in three ways:
+
+* ABORTED / FAILED_PRECONDITION responses from the emulator;
+* movement ids reused within the run. The app builds ids from
+  ``millisecondsSinceEpoch`` and writes them with ``set``, so a reused id
+  silently overwrites another movement;
+* after the run, items whose ``current_stock`` differs from their ledger
+  balance (lost read-recompute-update races) or is negative, ledgers
+  whose balance differs from the sum of their movements, and customers
+  whose aggregates differ from their invoices.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.loadgen --clear --items 50 --rate 20 --duration 60
+    python -m harness.loadgen --rate 0 --concurrency 32 --mix create=1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from harness.auth import SUITE_DIR, TEST_EMAIL, TEST_PASSWORD, ensure_emulator_user
+from harness.firestore_rest import FirestoreEmulator, FirestoreRestError, encode_fields
+from harness.readiness import LatencyHistogram
+from harness.seed import (
+    STOCK_SIGN, SeedSpec, generate, invoice_doc, movement_doc, return_doc, seed, user_path,
+)
+
+RESULTS_PATH = SUITE_DIR / "tmp" / "loadgen_results.json"
+
+OPERATIONS = ("create", "cancel", "return", "adjust")
+DEFAULT_MIX = {"create": 70.0, "cancel": 10.0, "return": 10.0, "adjust": 10.0}
+
+WATCHED_COLLECTIONS = ("inventory_items", "stock_movements", "stock_ledger", "sales_rollups", "analytics_rollups",
+                       "customers")
+CONTENTION_CODES = ("ABORTED", "FAILED_PRECONDITION")
+
+
+class StockRejected(Exception):
+    """The app would have thrown before writing (insufficient or negative stock)."""
+
+    def __init__(self, reason: str, item_id: str):
+        super().__init__(f"{reason}: {item_id}")
+        self.reason = reason
+
+
+@dataclass
+class LoadSpec:
+    concurrency: int = 16
+    rate: float = 10.0
+    duration: float = 60.0
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    max_lines: int = 5
+    purchase_ratio: float = 0.2
+    # Zipf exponent for picking items; higher values concentrate load on a few hot items.
+    skew: float = 1.0
+    # InventoryRefreshScheduler.window, in seconds; 0 refreshes after every operation.
+    refresh_window: float = 0.25
+    seed: int = 7
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _millis() -> int:
+    return int(time.time() * 1000)
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """A ``datetime`` or a REST timestamp string, as an aware ``datetime``."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+
+def _collection_of(path: str) -> str:
+    parts = path.split("/")
+    return parts[2] if len(parts) > 2 else ""
+
+
+def _error_reason(exc: BaseException) -> str:
+    if isinstance(exc, StockRejected):
+        return exc.reason
+    if isinstance(exc, FirestoreRestError):
+        return exc.code or f"HTTP {exc.status}"
+    return type(exc).__name__
+
+
+class RefreshScheduler:
+    """``InventoryRefreshScheduler``: one ``refreshMetricsForItems`` run per window.
+
+    Each request restarts the window, but a batch never waits longer than
+    ``max_delay`` after its first request. Batches run one at a time, and the
+    operations that scheduled them do not wait for them.
+    """
+
+    def __init__(self, refresh: Callable[[Sequence[str]], Any], window: float = 0.25, max_delay: float = 2.0):
+        self._refresh = refresh
+        self.window = window
+        self.max_delay = max_delay
+        self.lag = LatencyHistogram()
+        self.batch_sizes: List[int] = []
+        self.failures: Counter = Counter()
+        self._dirty: set = set()
+        self._first: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Optional[asyncio.Future] = None
+
+    def schedule(self, item_ids: Sequence[str]) -> None:
+        loop = asyncio.get_running_loop()
+        self._dirty.update(item_ids)
+        if self._first is None:
+            self._first = time.perf_counter()
+        delay = min(self.window, self.max_delay - (time.perf_counter() - self._first))
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(max(0.0, delay), self._start_batch)
+
+    async def flush(self) -> None:
+        """Runs the pending batch now and waits for every batch to finish."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._start_batch()
+        if self._running is not None:
+            await self._running
+
+    def _start_batch(self) -> None:
+        item_ids, first = sorted(self._dirty), self._first
+        self._dirty, self._first, self._timer = set(), None, None
+        self._running = asyncio.ensure_future(self._run(self._running, item_ids, first))
+
+    async def _run(self, previous: Optional[asyncio.Future], item_ids: List[str], first: float) -> None:
+        if previous is not None:
+            await previous
+        try:
+            await self._refresh(item_ids)
+        except Exception as exc:
+            self.failures[_error_reason(exc)] += 1
+        self.batch_sizes.append(len(item_ids))
+        self.lag.observe((time.perf_counter() - first) * 1000)
+
+
+class LoadGenerator:
+    """Runs one load test for ``uid`` against items and customers already in the emulator."""
+
+    def __init__(self, emulator: FirestoreEmulator, uid: str, items: List[dict],
+                 customers: List[dict], spec: LoadSpec):
+        if not items:
+            raise ValueError("load generation needs at least one inventory item")
+        self.db = emulator
+        self.uid = uid
+        self.items = items
+        self.customers = customers
+        self.spec = spec
+        self.latency = {op: LatencyHistogram() for op in OPERATIONS}
+        self.ok: Counter = Counter()
+        self.errors: Counter = Counter()  # (op, reason)
+        self.contention: Counter = Counter()  # (collection, reason)
+        self.elapsed_s = 0.0
+        self._item_weights = [1 / (rank + 1) ** spec.skew for rank in range(len(items))]
+        self._movement_ids: set = set()
+        self._posted_sales: List[dict] = []
+        self._touched: set = set()
+        self._touched_customers: set = set()
+        self._run_invoices: set = set()
+        self._baseline: Dict[str, list] = {}
+        self._invoice_seq = 0
+        self.refresh = RefreshScheduler(self._refresh_items, spec.refresh_window)
+
+    # -- REST calls -------------------------------------------------------
+
+    async def _call(self, path: str, fn: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except FirestoreRestError as exc:
+            collection = _collection_of(path)
+            if collection in WATCHED_COLLECTIONS and exc.code in CONTENTION_CODES:
+                self.contention[(collection, exc.code)] += 1
+            raise
+
+    def _col(self, collection: str) -> str:
+        return f"users/{self.uid}/{collection}"
+
+    async def _query(self, collection: str, where: Optional[dict] = None,
+                     order_by: Optional[str] = None) -> List[tuple]:
+        return await self._call(self._col(collection), self.db.run_query,
+                                f"users/{self.uid}", collection, where, order_by)
+
+    async def _set(self, path: str, fields: dict) -> None:
+        await self._call(path, self.db.set, path, fields)
+
+    # -- FirestoreService customer aggregates -----------------------------
+
+    @staticmethod
+    def _stats_share(invoice: Optional[dict]) -> Optional[tuple]:
+        """``_statsShare``: (customer id, [outstanding, spent, paid, count], date)."""
+        if not invoice or not invoice.get("customerId"):
+            return None
+        if invoice.get("invoiceType") != "sales" or str(invoice.get("status", "pending")).lower() == "cancelled":
+            return None
+        adjusted = invoice.get("revenue", 0.0) - invoice.get("refundAdjustment", 0.0)
+        paid = invoice.get("amountPaid", 0.0)
+        return invoice["customerId"], [max(adjusted - paid, 0.0), adjusted, paid, 1], _as_datetime(invoice.get("date"))
+
+    @staticmethod
+    def _field_path(*parts: str) -> str:
+        return ".".join(p if p.isidentifier() else "`" + p.replace("`", "\\`") + "`" for p in parts)
+
+    @classmethod
+    def _analytics_share(cls, invoice: Optional[dict]) -> Optional[tuple]:
+        """``AnalyticsRollup.share``: (local day, {field path: amount}, customer labels)."""
+        if not invoice or str(invoice.get("status", "pending")).lower() == "cancelled":
+            return None
+        kind = invoice.get("invoiceType", "sales")
+        lines = [line for line in invoice.get("items", []) if line.get("quantity", 0) > 0]
+        quantity = sum(line["quantity"] for line in lines)
+        revenue = invoice.get("revenue", 0.0) - invoice.get("refundAdjustment", 0.0)
+        paid = invoice.get("amountPaid", 0.0)
+        customer = invoice.get("customerId") or "unknown"
+        path = cls._field_path
+        amounts = {
+            path(kind, "invoiceCount"): 1,
+            path(kind, "revenue"): revenue if kind == "sales" else sum(line["quantity"] * line["price"] for line in lines),
+            path(kind, "paid"): paid,
+            path(kind, "remaining"): revenue - paid,
+            path(kind, "quantity"): quantity,
+            path(kind, "customers", customer, "invoiceCount"): 1,
+            path(kind, "customers", customer, "quantity"): quantity,
+            path(kind, "customers", customer, "revenue"): revenue,
+            path(kind, "customers", customer, "paid"): paid,
+            path(kind, "customers", customer, "outstanding"): revenue - paid,
+        }
+        for line in lines:
+            name = line["name"].strip()
+            if name:
+                for key, value in (("quantity", line["quantity"]), ("revenue", line["quantity"] * line["price"])):
+                    amounts[path(kind, "items", name, key)] = amounts.get(path(kind, "items", name, key), 0) + value
+        labels = {kind: {"customers": {customer: {"name": invoice.get("clientName", "").strip() or "Unknown Customer",
+                                                  "phone": invoice.get("customerPhone") or ""}}}}
+        day = (_as_datetime(invoice.get("date")) or _now()).astimezone().strftime("%Y-%m-%d")
+        return day, amounts, labels
+
+    def _analytics_writes(self, before: Optional[dict], after: dict) -> List[dict]:
+        """``_writeRollupChanges``: move an invoice's share between day documents."""
+        deltas: Dict[str, Dict[str, float]] = {}
+        labels: Dict[str, dict] = {}
+        old = before if before and before.get("rolledUp") else None
+        for sign, invoice in ((-1, old), (1, after)):
+            share = self._analytics_share(invoice)
+            if share is None:
+                continue
+            day, amounts, names = share
+            totals = deltas.setdefault(day, {})
+            for key, value in amounts.items():
+                totals[key] = totals.get(key, 0) + sign * value
+            if sign > 0:
+                labels[day] = names
+        writes = []
+        for day, totals in deltas.items():
+            transforms = [
+                {"fieldPath": key, "increment": {"integerValue": str(value)} if isinstance(value, int)
+                 else {"doubleValue": value}}
+                for key, value in totals.items() if abs(value) >= 1e-9
+            ]
+            if not transforms:
+                continue
+            names = labels.get(day, {})
+            mask = [self._field_path(kind, "customers", cid, label)
+                    for kind, entry in names.items() for cid, fields in entry["customers"].items() for label in fields]
+            writes.append({
+                "update": {"name": self.db.doc_name(user_path(self.uid, "analytics_rollups", day)),
+                           "fields": encode_fields({"day": day, **names})},
+                "updateMask": {"fieldPaths": ["day", *mask]},
+                "updateTransforms": transforms,
+            })
+        return writes
+
+    async def _write_invoice(self, path: str, fields: dict) -> None:
+        """``upsertInvoice``: merge ``fields`` and move the customer's aggregates and the
+        day's analytics rollups in one transaction."""
+        fields = {**fields, "rolledUp": True}
+        tx = await self._call(path, self.db.begin_transaction)
+        before = await self._call(path, self.db.get, path, tx)
+        deltas: Dict[str, list] = {}
+        latest: Dict[str, datetime] = {}
+        after = {**(before or {}), **fields}
+        for sign, invoice in ((-1, before), (1, after)):
+            share = self._stats_share(invoice)
+            if share is None:
+                continue
+            customer_id, values, date = share
+            totals = deltas.setdefault(customer_id, [0.0, 0.0, 0.0, 0])
+            for n, value in enumerate(values):
+                totals[n] += sign * value
+            if sign > 0 and date is not None:
+                latest[customer_id] = date
+        paths = {cid: user_path(self.uid, "customers", cid) for cid in deltas}
+        customers = dict(zip(paths, await asyncio.gather(*(self._call(p, self.db.get, p, tx) for p in paths.values()))))
+
+        writes = [{"update": {"name": self.db.doc_name(path), "fields": encode_fields(fields)},
+                   "updateMask": {"fieldPaths": list(fields)}}]
+        for cid, (outstanding, spent, paid, count) in deltas.items():
+            customer = customers[cid]
+            if customer is None:
+                continue
+            stored = _as_datetime(customer.get("lastPurchaseDate"))
+            newer = cid in latest and (stored is None or stored < latest[cid])
+            if count == 0 and max(abs(outstanding), abs(spent), abs(paid)) < 0.005 and not newer:
+                continue
+            plain = {"updatedAt": _now(), **({"lastPurchaseDate": latest[cid]} if newer else {})}
+            writes.append({
+                "update": {"name": self.db.doc_name(paths[cid]), "fields": encode_fields(plain)},
+                "updateMask": {"fieldPaths": list(plain)},
+                "currentDocument": {"exists": True},
+                "updateTransforms": [
+                    {"fieldPath": "outstandingBalance", "increment": {"doubleValue": outstanding}},
+                    {"fieldPath": "totalSpent", "increment": {"doubleValue": spent}},
+                    {"fieldPath": "totalPaid", "increment": {"doubleValue": paid}},
+                    {"fieldPath": "invoiceCount", "increment": {"integerValue": str(count)}},
+                    {"fieldPath": "statsSeq", "increment": {"integerValue": "1"}},
+                ],
+            })
+            self._touched_customers.add(cid)
+        rollup_writes = self._analytics_writes(before, after)
+        # A conflict is blamed on the hottest document in the commit: the day's rollup.
+        blamed = (self._col("analytics_rollups") if rollup_writes
+                  else self._col("customers") if len(writes) > 1 else path)
+        await self._call(blamed, self.db.commit, writes + rollup_writes, tx)
+
+    @staticmethod
+    def _stored_stats(customer: Optional[dict]) -> list:
+        customer = customer or {}
+        return [customer.get(f, 0) for f in ("outstandingBalance", "totalSpent", "totalPaid", "invoiceCount")]
+
+    async def _load_baseline(self) -> None:
+        """Customer aggregates before the run; seeded customers may have none."""
+        paths = [user_path(self.uid, "customers", c["id"]) for c in self.customers]
+        stored = await asyncio.gather(*(asyncio.to_thread(self.db.get, p) for p in paths))
+        self._baseline = {c["id"]: self._stored_stats(doc) for c, doc in zip(self.customers, stored)}
+
+    async def _customer_drift(self, customer_id: str) -> bool:
+        """Whether the run's increments on a customer differ from the run's invoices."""
+        path = user_path(self.uid, "customers", customer_id)
+        stored = self._stored_stats(await asyncio.to_thread(self.db.get, path))
+        expected = [0.0, 0.0, 0.0, 0]
+        for doc_path, invoice in await asyncio.to_thread(self.db.run_query, f"users/{self.uid}", "invoices",
+                                                         {"customerId": customer_id}):
+            share = self._stats_share(invoice)
+            if share is not None and doc_path.rsplit("/", 1)[1] in self._run_invoices:
+                expected = [a + b for a, b in zip(expected, share[1])]
+        baseline = self._baseline.get(customer_id, [0.0, 0.0, 0.0, 0])
+        return any(abs(s - b - e) > 0.005 for s, b, e in zip(stored, baseline, expected))
+
+    # -- InventoryService / InventoryFirestoreService ---------------------
+
+    async def _all_items(self) -> List[tuple]:
+        return await self._query("inventory_items")
+
+    async def _replay_stock(self, item_id: str) -> tuple:
+        """``_replay``: the item's movements as ``(total, count, legacy deltas, last createdAt)``."""
+        rows = await self._query("stock_movements", {"itemId": item_id}, "createdAt")
+        deltas = [STOCK_SIGN.get(f.get("type"), 0) * f.get("quantity", 0) for _, f in rows]
+        legacy = [d for d, (_, f) in zip(deltas, rows) if f.get("ledgered") is not True]
+        return sum(deltas), len(deltas), legacy, rows[-1][1]["createdAt"] if rows else None
+
+    async def _compute_stock(self, item_id: str) -> float:
+        """``computeCurrentStock``: the ledger balance, seeding the ledger on first use."""
+        path = user_path(self.uid, "stock_ledger", item_id)
+        ledger = await self._call(path, self.db.get, path)
+        if ledger is not None and "checkpointCount" in ledger:
+            return ledger["balance"]
+        return await self._seed_ledger(item_id, ledger)
+
+    async def _seed_ledger(self, item_id: str, ledger: Optional[dict]) -> float:
+        """``_seedLedger``. The app runs this in a transaction; here a lost race
+        fails its precondition and the seeded ledger is read instead."""
+        path = user_path(self.uid, "stock_ledger", item_id)
+        total, count, legacy, last_at = await self._replay_stock(item_id)
+        ledger = ledger or {}
+        balance = ledger.get("balance", 0.0) + sum(legacy)
+        fields = {
+            "balance": balance,
+            "movementCount": ledger.get("movementCount", 0) + len(legacy),
+            "checkpointBalance": total,
+            "checkpointCount": count,
+            "checkpointAt": last_at,
+        }
+        write = {
+            "update": {"name": self.db.doc_name(path), "fields": encode_fields(fields)},
+            "updateTransforms": [{"fieldPath": "updatedAt", "setToServerValue": "REQUEST_TIME"}],
+            "currentDocument": {"exists": bool(ledger)},
+        }
+        try:
+            await self._call(path, self.db.commit, [write])
+        except FirestoreRestError as exc:
+            if exc.code != "FAILED_PRECONDITION":
+                raise
+            return await self._compute_stock(item_id)
+        return balance
+
+    def _ledger_write(self, item_id: str, delta: float, count: int) -> dict:
+        """``_applyToLedger``: merge-increment the item's running balance."""
+        return {
+            "update": {"name": self.db.doc_name(user_path(self.uid, "stock_ledger", item_id)), "fields": {}},
+            "updateMask": {"fieldPaths": []},
+            "updateTransforms": [
+                {"fieldPath": "balance", "increment": {"doubleValue": delta}},
+                {"fieldPath": "movementCount", "increment": {"integerValue": str(count)}},
+                {"fieldPath": "updatedAt", "setToServerValue": "REQUEST_TIME"},
+            ],
+        }
+
+    def _rollup_write(self, item_id: str, qty: float, at: datetime) -> dict:
+        """``_applyToLedger``: add an outflow to the day's ``sales_rollups`` document."""
+        day = at.strftime("%Y-%m-%d")
+        field_path = f"items.{item_id}" if item_id.isidentifier() else f"items.`{item_id}`"
+        return {
+            "update": {"name": self.db.doc_name(user_path(self.uid, "sales_rollups", day)),
+                       "fields": encode_fields({"day": day})},
+            "updateMask": {"fieldPaths": ["day"]},
+            "updateTransforms": [{"fieldPath": field_path, "increment": {"doubleValue": qty}}],
+        }
+
+    async def _add_movement(self, movement_id: str, item_id: str, kind: str, qty: float,
+                            unit_cost: float, ref_type: str, ref_id: str) -> None:
+        """``insertMovement``: the movement and its ledger increment in one commit."""
+        if movement_id in self._movement_ids:
+            self.contention[("stock_movements", "id_reuse")] += 1
+        self._movement_ids.add(movement_id)
+        self._touched.add(item_id)
+        at = _now()
+        doc_path, fields = movement_doc(self.uid, movement_id, item_id, kind, qty, unit_cost,
+                                        ref_type, ref_id, at)
+        writes = [{"update": {"name": self.db.doc_name(doc_path), "fields": encode_fields(fields)}},
+                  self._ledger_write(item_id, STOCK_SIGN[kind] * qty, 1)]
+        if kind in ("OUT", "RETURN_OUT"):
+            writes.append(self._rollup_write(item_id, qty, at))
+        await self._call(doc_path, self.db.commit, writes)
+
+    async def _update_item_stock(self, item_id: str, item: Optional[dict] = None) -> None:
+        """``_updateItemCurrentStock``: read, recompute, update only if different."""
+        path = user_path(self.uid, "inventory_items", item_id)
+        if item is None:
+            item = await self._call(path, self.db.get, path)
+            if item is None:
+                return
+        actual = await self._compute_stock(item_id)
+        if actual != item.get("current_stock"):
+            await self._call(path, self.db.update, path,
+                             {**item, "current_stock": actual, "last_updated": _now()})
+
+    async def _receive(self, item_id: str, qty: float, unit_cost: float, ref_type: str, ref_id: str,
+                       movement_id: str) -> None:
+        kind = "RETURN_IN" if "return" in ref_type else "IN"
+        await self._add_movement(movement_id, item_id, kind, qty, unit_cost, ref_type, ref_id)
+        await self._update_item_stock(item_id)
+
+    async def _post_movements(self, lines: Sequence[dict], kind: str, ref_id: str) -> None:
+        """``postMovements`` for one invoice (at most 100 lines, so one transaction)."""
+        stamp, at = _millis(), _now()
+        item_ids = list(dict.fromkeys(line["_id"] for line in lines))
+        col = self._col("stock_movements")
+        while True:
+            tx = await self._call(col, self.db.begin_transaction)
+            paths = [(user_path(self.uid, "inventory_items", i), user_path(self.uid, "stock_ledger", i))
+                     for i in item_ids]
+            reads = await asyncio.gather(*(
+                asyncio.gather(self._call(item, self.db.get, item, tx), self._call(ledger, self.db.get, ledger, tx))
+                for item, ledger in paths
+            ))
+            unseeded = [i for i, (_, ledger) in zip(item_ids, reads) if "checkpointCount" not in (ledger or {})]
+            if unseeded:
+                await self._call(col, self.db.rollback, tx)
+                await asyncio.gather(*(self._compute_stock(i) for i in unseeded))
+                continue
+
+            ledgers = {i: ledger for i, (_, ledger) in zip(item_ids, reads)}
+            deltas: Dict[str, List[float]] = {i: [] for i in item_ids}
+            writes = []
+            for n, line in enumerate(lines):
+                movement_id = f"{stamp}_{line['_id']}_{n}_{kind.lower()}"
+                if movement_id in self._movement_ids:
+                    self.contention[("stock_movements", "id_reuse")] += 1
+                self._movement_ids.add(movement_id)
+                qty = float(line["quantity"])
+                unit_cost = line["price"] if kind == "IN" else 0.0
+                doc_path, fields = movement_doc(self.uid, movement_id, line["_id"], kind, qty, unit_cost,
+                                                "invoice", ref_id, at)
+                writes.append({"update": {"name": self.db.doc_name(doc_path), "fields": encode_fields(fields)}})
+                deltas[line["_id"]].append(STOCK_SIGN[kind] * qty)
+                if kind == "OUT":
+                    writes.append(self._rollup_write(line["_id"], qty, at))
+            for item_id, (item_path, ledger_path) in zip(item_ids, paths):
+                balance = ledgers[item_id]["balance"] + sum(deltas[item_id])
+                if kind == "OUT" and balance < 0:
+                    await self._call(col, self.db.rollback, tx)
+                    raise StockRejected("insufficient_stock", item_id)
+                ledger = {"balance": balance,
+                          "movementCount": ledgers[item_id]["movementCount"] + len(deltas[item_id])}
+                writes.append({"update": {"name": self.db.doc_name(ledger_path), "fields": encode_fields(ledger)},
+                               "updateMask": {"fieldPaths": list(ledger)}})
+                item = {"current_stock": balance, "last_updated": at}
+                writes.append({"update": {"name": self.db.doc_name(item_path), "fields": encode_fields(item)},
+                               "updateMask": {"fieldPaths": list(item)}, "currentDocument": {"exists": True}})
+                self._touched.add(item_id)
+            await self._call(col, self.db.commit, writes, tx)
+            return
+
+    async def _refresh_items(self, item_ids: Sequence[str]) -> None:
+        """``refreshMetricsForItems``."""
+        await self._all_items()
+        await asyncio.gather(*(self._update_item_stock(item_id) for item_id in item_ids))
+        await self._all_items()
+
+    async def _schedule_refresh(self, item_ids: Sequence[str]) -> None:
+        """``scheduleRefresh``; with no window, refresh before the operation returns."""
+        if self.spec.refresh_window > 0:
+            self.refresh.schedule(item_ids)
+        else:
+            await self._refresh_items(item_ids)
+
+    # -- Workloads --------------------------------------------------------
+
+    def _pick_items(self, rng: random.Random, count: int) -> List[dict]:
+        picked: Dict[str, dict] = {}
+        for item in rng.choices(self.items, weights=self._item_weights, k=count):
+            picked[item["id"]] = item
+        return list(picked.values())
+
+    def _next_invoice_number(self) -> str:
+        self._invoice_seq += 1
+        return f"INV-{_now():%Y%m}{self._invoice_seq:03d}"
+
+    async def create(self, rng: random.Random) -> None:
+        is_purchase = rng.random() < self.spec.purchase_ratio
+        lines = [
+            {"name": item["name"], "quantity": rng.randint(10, 50) if is_purchase else rng.randint(1, 5),
+             "price": item["price"], "_id": item["id"]}
+            for item in self._pick_items(rng, rng.randint(1, self.spec.max_lines))
+        ]
+        invoice_id = str(uuid.uuid4())
+        number = self._next_invoice_number()
+        customer = None if is_purchase or not self.customers else rng.choice(self.customers)
+        clean_lines = [{k: v for k, v in line.items() if k != "_id"} for line in lines]
+        total = round(sum(line["quantity"] * line["price"] for line in lines), 2)
+        await self._write_invoice(*invoice_doc(self.uid, invoice_id, number,
+                                               "purchase" if is_purchase else "sales", "paid",
+                                               clean_lines, _now(), total, customer))
+        self._run_invoices.add(invoice_id)
+
+        await self._all_items()
+        await self._post_movements(lines, "IN" if is_purchase else "OUT", invoice_id)
+        await self._schedule_refresh([line["_id"] for line in lines])
+
+        if customer:
+            self._posted_sales.append({"id": invoice_id, "number": number, "customer": customer,
+                                       "lines": lines, "date": _now()})
+
+    async def cancel(self, rng: random.Random) -> None:
+        invoice = self._posted_sales.pop(rng.randrange(len(self._posted_sales)))
+        path = user_path(self.uid, "invoices", invoice["id"])
+        current = await self._call(path, self.db.get, path)
+        if current is None or current.get("status") == "cancelled":
+            return
+
+        movements = await self._query("stock_movements",
+                                      {"sourceRefType": "invoice", "sourceRefId": invoice["id"]})
+        writes = []
+        deltas: Dict[str, List[float]] = {}
+        for _, movement in movements:
+            reversal_id = f"{movement['id']}_rev"
+            self._touched.add(movement["itemId"])
+            doc_path, fields = movement_doc(self.uid, reversal_id, movement["itemId"], "REVERSAL_OUT",
+                                            -movement["quantity"], movement.get("unitCost", 0.0),
+                                            "invoice", invoice["id"], _now())
+            fields.update(reversalOfMovementId=movement["id"], reversalFlag=True)
+            writes.append({"update": {"name": self.db.doc_name(doc_path),
+                                      "fields": encode_fields(fields)}})
+            deltas.setdefault(movement["itemId"], []).append(movement["quantity"])
+        writes += [self._ledger_write(item_id, sum(d), len(d)) for item_id, d in deltas.items()]
+        if writes:
+            await self._call(self._col("stock_movements"), self.db.commit, writes)
+        await self._schedule_refresh(list(deltas))
+
+        now = _now()
+        await self._write_invoice(path, {"status": "cancelled", "updatedAt": now,
+                                         "cancelledAt": now, "cancelReason": "Standard cancellation"})
+
+    async def return_(self, rng: random.Random) -> None:
+        invoice = rng.choice(self._posted_sales)
+        line = rng.choice(invoice["lines"])
+        qty = rng.randint(1, line["quantity"])
+        number = f"SR-{_millis()}"
+        return_lines = [{"name": line["name"], "quantity": qty, "price": line["price"],
+                         "totalValue": round(qty * line["price"], 2)}]
+        return_path, fields = return_doc(self.uid, str(uuid.uuid4()), number,
+                                         {"id": invoice["id"], "number": invoice["number"],
+                                          "customer": invoice["customer"], "date": invoice["date"]},
+                                         return_lines, _now())
+        # FirestoreService.createReturn: the return and the pending increment in one transaction.
+        customer_path = user_path(self.uid, "customers", invoice["customer"]["id"])
+        tx = await self._call(customer_path, self.db.begin_transaction)
+        customer = await self._call(customer_path, self.db.get, customer_path, tx)
+        writes = [{"update": {"name": self.db.doc_name(return_path), "fields": encode_fields(fields)}}]
+        if customer is not None:
+            writes.append({
+                "update": {"name": self.db.doc_name(customer_path), "fields": encode_fields({"updatedAt": _now()})},
+                "updateMask": {"fieldPaths": ["updatedAt"]},
+                "updateTransforms": [{"fieldPath": "pendingReturnAmount",
+                                      "increment": {"doubleValue": fields["refundAmount"]}}],
+            })
+        await self._call(customer_path, self.db.commit, writes, tx)
+
+        # ReturnService looks the item up by name, then receiveStock (millisecond movement id).
+        matches = await self._query("inventory_items", {"name": line["name"]})
+        if matches:
+            item_id = matches[0][0].rsplit("/", 1)[1]
+            await self._receive(item_id, float(qty), line["price"], "return", number, str(_millis()))
+            await self._schedule_refresh([item_id])
+
+    async def adjust(self, rng: random.Random) -> None:
+        item = self._pick_items(rng, 1)[0]
+        delta = float(rng.choice((-1, 1)) * rng.randint(1, 5))
+        if await self._compute_stock(item["id"]) + delta < 0:
+            raise StockRejected("negative_stock", item["id"])
+        await self._add_movement(str(_millis()), item["id"], "ADJUSTMENT", delta, 0.0,
+                                 "adjustment", "Load test adjustment")
+        await self._update_item_stock(item["id"])
+        await self._schedule_refresh([item["id"]])
+
+    # -- Driver -----------------------------------------------------------
+
+    def _choose(self, rng: random.Random) -> str:
+        weights = [self.spec.mix.get(op, 0.0) for op in OPERATIONS]
+        op = rng.choices(OPERATIONS, weights=weights)[0]
+        if op in ("cancel", "return") and not self._posted_sales:
+            return "create"
+        return op
+
+    async def _execute(self, op: str, rng: random.Random, arrived: float) -> None:
+        handler = {"create": self.create, "cancel": self.cancel,
+                   "return": self.return_, "adjust": self.adjust}[op]
+        try:
+            await handler(rng)
+            self.ok[op] += 1
+        except Exception as exc:
+            self.errors[(op, _error_reason(exc))] += 1
+        finally:
+            self.latency[op].observe((time.perf_counter() - arrived) * 1000)
+
+    async def run(self) -> None:
+        spec = self.spec
+        rng = random.Random(spec.seed)
+        loop = asyncio.get_running_loop()
+        # Each operation fans out one blocking REST call per invoice line.
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=spec.concurrency * (spec.max_lines + 1)))
+        await self._load_baseline()
+        started = time.perf_counter()
+        deadline = started + spec.duration
+
+        if spec.rate > 0:
+            slots = asyncio.Semaphore(spec.concurrency)
+
+            async def arrival(op: str, op_rng: random.Random, arrived: float) -> None:
+                async with slots:
+                    await self._execute(op, op_rng, arrived)
+
+            tasks = set()
+            next_at = started
+            while True:
+                next_at += rng.expovariate(spec.rate)
+                if next_at >= deadline:
+                    break
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+                task = asyncio.create_task(
+                    arrival(self._choose(rng), random.Random(rng.getrandbits(64)), time.perf_counter()))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        else:
+            async def worker(worker_rng: random.Random) -> None:
+                while time.perf_counter() < deadline:
+                    await self._execute(self._choose(worker_rng), worker_rng, time.perf_counter())
+
+            await asyncio.gather(*(worker(random.Random(rng.getrandbits(64)))
+                                   for _ in range(spec.concurrency)))
+        self.elapsed_s = time.perf_counter() - started
+        # Scheduled refreshes still pending at the deadline must land before verify().
+        await self.refresh.flush()
+
+    async def verify(self) -> None:
+        """Compare every touched item's ``current_stock`` with its ledger and movements."""
+        for item_id in sorted(self._touched):
+            path = user_path(self.uid, "inventory_items", item_id)
+            item = await asyncio.to_thread(self.db.get, path)
+            stock = await self._compute_stock(item_id)
+            if item is not None and item.get("current_stock") != stock:
+                self.contention[("inventory_items", "stock_drift")] += 1
+            replayed = (await self._replay_stock(item_id))[0]
+            if abs(replayed - stock) > 1e-6:
+                self.contention[("stock_ledger", "ledger_drift")] += 1
+            if stock < 0:
+                self.contention[("inventory_items", "negative_stock")] += 1
+        for customer_id in sorted(self._touched_customers):
+            if await self._customer_drift(customer_id):
+                self.contention[("customers", "stats_drift")] += 1
+
+    def report(self) -> dict:
+        elapsed = self.elapsed_s or 1.0
+        operations = {}
+        for op in OPERATIONS:
+            hist = self.latency[op]
+            if not hist.samples:
+                continue
+            operations[op] = {
+                "ok": self.ok[op],
+                "failed": sum(n for (o, _), n in self.errors.items() if o == op),
+                "opsPerSec": round(self.ok[op] / elapsed, 2),
+                "p50": round(hist.percentile(0.50), 1),
+                "p95": round(hist.percentile(0.95), 1),
+                "p99": round(hist.percentile(0.99), 1),
+                "max": round(max(hist.samples), 1),
+            }
+        contention: Dict[str, Dict[str, int]] = {c: {} for c in WATCHED_COLLECTIONS}
+        for (collection, reason), n in sorted(self.contention.items()):
+            contention[collection][reason] = n
+        return {
+            "spec": asdict(self.spec),
+            "elapsedS": round(self.elapsed_s, 2),
+            "throughput": round(sum(self.ok.values()) / elapsed, 2),
+            "operations": operations,
+            "errors": {f"{op}:{reason}": n for (op, reason), n in sorted(self.errors.items())},
+            "contention": contention,
+            "refresh": {
+                "batches": len(self.refresh.batch_sizes),
+                "meanBatchSize": round(sum(self.refresh.batch_sizes) / max(len(self.refresh.batch_sizes), 1), 1),
+                "lag": self.refresh.lag.to_dict(),
+                "failed": dict(self.refresh.failures),
+            },
+        }
+
+
+def load_catalog(emulator: FirestoreEmulator, uid: str) -> tuple:
+    """Items and customers already seeded for ``uid``."""
+    items = [
+        {"id": path.rsplit("/", 1)[1], "name": fields["name"], "price": fields.get("avg_cost", 0.0)}
+        for path, fields in emulator.run_query(f"users/{uid}", "inventory_items")
+    ]
+    customers = [
+        {"id": path.rsplit("/", 1)[1], "name": fields["name"], "phone": fields.get("phoneNumber")}
+        for path, fields in emulator.run_query(f"users/{uid}", "customers")
+    ]
+    return items, customers
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{report['throughput']:.2f} ops/s over {report['elapsedS']:.1f}s")
+    print(f"{'operation':<10}{'ok':>8}{'failed':>8}{'ops/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for op, row in report["operations"].items():
+        print(f"{op:<10}{row['ok']:>8}{row['failed']:>8}{row['opsPerSec']:>9.2f}"
+              f"{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}{row['max']:>9.1f}")
+    if report["errors"]:
+        print("errors: " + ", ".join(f"{k}={v}" for k, v in report["errors"].items()))
+    for collection, reasons in report["contention"].items():
+        summary = ", ".join(f"{k}={v}" for k, v in reasons.items()) or "none"
+        print(f"contention on {collection}: {summary}")
+    refresh = report["refresh"]
+    if refresh["batches"]:
+        print(f"refresh: {refresh['batches']} batches of {refresh['meanBatchSize']} items, "
+              f"lag p95 {refresh['lag']['p95']}ms")
+
+
+def _parse_mix(text: str) -> Dict[str, float]:
+    mix = {op: 0.0 for op in OPERATIONS}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        if op.strip() not in mix:
+            raise argparse.ArgumentTypeError(f"unknown operation {op!r}; expected one of {OPERATIONS}")
+        mix[op.strip()] = float(weight or 1)
+    return mix
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", default=TEST_EMAIL)
+    parser.add_argument("--password", default=TEST_PASSWORD)
+    parser.add_argument("-c", "--concurrency", type=int, default=LoadSpec.concurrency)
+    parser.add_argument("-r", "--rate", type=float, default=LoadSpec.rate,
+                        help="arrivals per second; 0 runs closed-loop")
+    parser.add_argument("-d", "--duration", type=float, default=LoadSpec.duration, help="seconds")
+    parser.add_argument("--mix", type=_parse_mix, default=dict(DEFAULT_MIX),
+                        help="operation weights, e.g. create=70,cancel=10,return=10,adjust=10")
+    parser.add_argument("--max-lines", type=int, default=LoadSpec.max_lines)
+    parser.add_argument("--skew", type=float, default=LoadSpec.skew)
+    parser.add_argument("--refresh-window", type=float, default=LoadSpec.refresh_window,
+                        help="seconds scheduled refreshes are coalesced for; 0 refreshes inline")
+    parser.add_argument("--seed", type=int, default=LoadSpec.seed)
+    parser.add_argument("--items", type=int, default=50, help="items to seed first; 0 uses existing data")
+    parser.add_argument("--customers", type=int, default=20)
+    parser.add_argument("--clear", action="store_true", help="wipe the emulator project first")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH, help="where to write the JSON report")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    emulator = FirestoreEmulator()
+    if args.clear:
+        emulator.clear()
+    uid = ensure_emulator_user(args.email, args.password)
+    if args.items:
+        seed(generate(uid, SeedSpec(customers=args.customers, items=args.items, invoices=0,
+                                    returns=0, seed=args.seed)), emulator)
+    items, customers = load_catalog(emulator, uid)
+
+    spec = LoadSpec(concurrency=args.concurrency, rate=args.rate, duration=args.duration, mix=args.mix,
+                    max_lines=args.max_lines, skew=args.skew, refresh_window=args.refresh_window,
+                    seed=args.seed)
+    generator = LoadGenerator(emulator, uid, items, customers, spec)
+
+    async def run() -> None:
+        await generator.run()
+        await generator.verify()
+
+    asyncio.run(run())
+    report = generator.report()
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print_report(report)
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
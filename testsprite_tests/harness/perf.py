@@ -0,0 +1,258 @@
+"""Optional per-test performance capture.
+
+``PerfCapture`` is attached to a test's ``BrowserContext`` before the test
+opens any page. It records for every page
+
+* Flutter's first frame, first contentful / largest contentful paint and
+  Chrome's first meaningful paint (CDP ``Performance.getMetrics``), all in
+  ms since navigation start,
+* Long Task entries, tagged with the Flutter route they happened on,
+* JS heap usage at the end of the test,
+* ``performance.measure`` entries the app adds through ``PerfMarks``
+  (``lib/utils/perf_marks.dart``), e.g. ``loadDashboardData``, the
+  ``startup:<task>`` initializers and ``coldStartToInteractive``,
+
+plus Firestore channel request counts for the whole context. With
+``trace=True`` a Chrome DevTools trace is written as well; open it in the
+DevTools Performance panel.
+
+Results go to ``tmp/perf/<TC id>.json``, next to ``tmp/test_results.json``.
+DevTools tracing is browser-wide, so only one test per browser records a
+trace at a time; run with ``--browsers`` equal to ``--workers`` to trace
+every test.
+"""
+
+import asyncio
+import contextlib
+import json
+import statistics
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from playwright import async_api
+
+from harness.auth import SUITE_DIR
+from harness.readiness import FIRESTORE_MARKERS
+
+PERF_DIR = SUITE_DIR / "tmp" / "perf"
+
+TRACE_CATEGORIES = [
+    "devtools.timeline",
+    "disabled-by-default-devtools.timeline",
+    "disabled-by-default-devtools.timeline.frame",
+    "blink.user_timing",
+    "loading",
+    "v8.execute",
+]
+
+# Longest entries kept per page; counts and totals cover all of them.
+MAX_LONG_TASK_ENTRIES = 20
+
+PERF_SCRIPT = """
+(() => {
+  if (window.__tsPerf) return;
+  const perf = window.__tsPerf = { firstFrame: null, fcp: null, lcp: null, longTasks: [] };
+  const route = () => (location.hash || '#/').slice(1).split('?')[0] || '/';
+  window.addEventListener('flutter-first-frame', () => {
+    if (perf.firstFrame === null) perf.firstFrame = performance.now();
+  });
+  const observe = (type, onEntry) => {
+    try {
+      new PerformanceObserver((list) => list.getEntries().forEach(onEntry)).observe({ type, buffered: true });
+    } catch (e) { /* entry type not supported by this browser */ }
+  };
+  observe('paint', (e) => { if (e.name === 'first-contentful-paint') perf.fcp = e.startTime; });
+  observe('largest-contentful-paint', (e) => { perf.lcp = e.startTime; });
+  observe('longtask', (e) => { perf.longTasks.push({ start: e.startTime, duration: e.duration, screen: route() }); });
+})();
+"""
+
+# One DevTools trace per browser at a time.
+_trace_locks: Dict[int, asyncio.Lock] = {}
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def _firestore_kind(url: str) -> Optional[str]:
+    if not any(marker in url for marker in FIRESTORE_MARKERS):
+        return None
+    if "/Write/channel" in url:
+        return "write"
+    if "/Listen/channel" in url:
+        return "listen"
+    return "other"
+
+
+def _measure_summary(entries: List[dict]) -> dict:
+    durations: Dict[str, List[float]] = {}
+    for entry in entries:
+        durations.setdefault(entry["name"], []).append(entry["duration"])
+    return {
+        name: {"count": len(values), "medianMs": _ms(statistics.median(values)), "maxMs": _ms(max(values))}
+        for name, values in durations.items()
+    }
+
+
+def _long_task_summary(entries: List[dict]) -> dict:
+    by_screen: Dict[str, dict] = {}
+    for entry in entries:
+        screen = by_screen.setdefault(entry["screen"], {"count": 0, "totalMs": 0.0})
+        screen["count"] += 1
+        screen["totalMs"] += entry["duration"]
+    longest = sorted(entries, key=lambda e: e["duration"], reverse=True)[:MAX_LONG_TASK_ENTRIES]
+    return {
+        "count": len(entries),
+        "totalMs": _ms(sum(e["duration"] for e in entries)),
+        "maxMs": _ms(max((e["duration"] for e in entries), default=0.0)),
+        "byScreen": {k: {"count": v["count"], "totalMs": _ms(v["totalMs"])} for k, v in by_screen.items()},
+        "longest": [
+            {"startMs": _ms(e["start"]), "durationMs": _ms(e["duration"]), "screen": e["screen"]}
+            for e in longest
+        ],
+    }
+
+
+class PerfCapture:
+    """Performance data for one test. Create with ``await PerfCapture.attach(context)``."""
+
+    def __init__(self, context: async_api.BrowserContext, trace_path: Optional[Path] = None):
+        self.context = context
+        self.trace_path = trace_path
+        self.trace_note = ""
+        self.requests: Counter = Counter()
+        self.failed_requests = 0
+        self._tracing_browser: Optional[async_api.Browser] = None
+
+    @classmethod
+    async def attach(
+        cls, context: async_api.BrowserContext, trace_path: Optional[Path] = None
+    ) -> "PerfCapture":
+        capture = cls(context, trace_path)
+        await context.add_init_script(PERF_SCRIPT)
+        context.on("request", capture._on_request)
+        context.on("requestfailed", capture._on_request_failed)
+        if trace_path:
+            await capture._start_trace()
+        return capture
+
+    def _on_request(self, request: async_api.Request) -> None:
+        kind = _firestore_kind(request.url)
+        if kind:
+            self.requests[kind] += 1
+
+    def _on_request_failed(self, request: async_api.Request) -> None:
+        if _firestore_kind(request.url):
+            self.failed_requests += 1
+
+    async def _start_trace(self) -> None:
+        browser = self.context.browser
+        if browser is None:
+            self.trace_note = "no browser to trace"
+            return
+        lock = _trace_locks.setdefault(id(browser), asyncio.Lock())
+        if lock.locked():
+            self.trace_note = "browser was already tracing another test"
+            return
+        await lock.acquire()
+        try:
+            self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+            await browser.start_tracing(path=str(self.trace_path), categories=TRACE_CATEGORIES)
+        except async_api.Error as exc:
+            lock.release()
+            self.trace_note = f"could not start tracing: {exc.message}"
+            return
+        self._tracing_browser = browser
+
+    async def _stop_trace(self) -> Optional[str]:
+        browser, self._tracing_browser = self._tracing_browser, None
+        if browser is None:
+            return None
+        try:
+            await browser.stop_tracing()
+        except async_api.Error as exc:
+            self.trace_note = f"could not stop tracing: {exc.message}"
+            return None
+        finally:
+            _trace_locks[id(browser)].release()
+        return self.trace_path.name
+
+    async def _page_metrics(self, page: async_api.Page) -> dict:
+        perf: dict = {}
+        measures: List[dict] = []
+        metrics: Dict[str, float] = {}
+        with contextlib.suppress(async_api.Error):
+            perf = await page.evaluate("window.__tsPerf || {}") or {}
+            measures = await page.evaluate(
+                "performance.getEntriesByType('measure').map((m) => ({ name: m.name, duration: m.duration }))"
+            )
+        with contextlib.suppress(async_api.Error):
+            cdp = await self.context.new_cdp_session(page)
+            await cdp.send("Performance.enable")
+            metrics = {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+            await cdp.detach()
+
+        fmp = None
+        if metrics.get("FirstMeaningfulPaint") and metrics.get("NavigationStart"):
+            fmp = (metrics["FirstMeaningfulPaint"] - metrics["NavigationStart"]) * 1000
+        return {
+            "url": page.url,
+            "firstFrameMs": _ms(perf.get("firstFrame")),
+            "firstContentfulPaintMs": _ms(perf.get("fcp")),
+            "largestContentfulPaintMs": _ms(perf.get("lcp")),
+            "firstMeaningfulPaintMs": _ms(fmp),
+            "jsHeapUsedBytes": int(metrics["JSHeapUsedSize"]) if "JSHeapUsedSize" in metrics else None,
+            "jsHeapTotalBytes": int(metrics["JSHeapTotalSize"]) if "JSHeapTotalSize" in metrics else None,
+            "longTasks": _long_task_summary(perf.get("longTasks", [])),
+            "measures": _measure_summary(measures),
+        }
+
+    async def finish(self) -> dict:
+        """Collect page metrics and stop the trace; call before the context closes."""
+        pages = [await self._page_metrics(page) for page in self.context.pages if not page.is_closed()]
+        trace = await self._stop_trace()
+        return {
+            "pages": pages,
+            "firestore": {
+                "requests": sum(self.requests.values()),
+                "writes": self.requests["write"],
+                "listens": self.requests["listen"],
+                "other": self.requests["other"],
+                "failed": self.failed_requests,
+            },
+            "trace": trace,
+            "traceNote": self.trace_note,
+        }
+
+
+def summarize(capture: dict) -> dict:
+    """The few numbers worth keeping in the runner's per-test results."""
+    pages = capture["pages"]
+    first = next((p for p in pages if p["firstFrameMs"] is not None), pages[0] if pages else {})
+    heaps = [p["jsHeapUsedBytes"] for p in pages if p["jsHeapUsedBytes"] is not None]
+    measures: Dict[str, float] = {}
+    for page in pages:
+        for name, stats in page["measures"].items():
+            measures[name] = max(measures.get(name, 0.0), stats["medianMs"])
+    return {
+        "firstFrameMs": first.get("firstFrameMs"),
+        "firstMeaningfulPaintMs": first.get("firstMeaningfulPaintMs"),
+        "longTasks": sum(p["longTasks"]["count"] for p in pages),
+        "longTaskMs": _ms(sum(p["longTasks"]["totalMs"] for p in pages)),
+        "jsHeapUsedBytes": max(heaps) if heaps else None,
+        "firestoreRequests": capture["firestore"]["requests"],
+        "measures": measures,
+    }
+
+
+def write_capture(test_id: str, title: str, capture: dict, directory: Path = PERF_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{test_id}.json"
+    path.write_text(json.dumps({"testId": test_id, "title": title, **capture}, indent=2), encoding="utf-8")
+    return path
+
+
+def trace_path_for(test_id: str, directory: Path = PERF_DIR) -> Path:
+    return directory / f"{test_id}.trace.json"
@@ -0,0 +1,259 @@
+"""Readiness waits for the Flutter web build.
+
+Replaces the fixed ``page.wait_for_timeout(3000)`` before each step. A step
+is ready once
+
+* Flutter has rendered its first frame (``flutter-first-frame`` event),
+* the ``flt-semantics-host`` subtree has stopped mutating for ``quiet_ms``,
+* no Firestore write/commit request is in flight, and
+* the step's own target is attached to the DOM.
+
+``find`` resolves the target through the ``SemanticsIndex`` instead of
+letting Playwright evaluate the recorded absolute XPath.
+
+Whichever comes last decides the wait, so a step never sleeps longer than
+the app needs. Every wait is recorded in the active ``StepRecorder``, keyed
+by the Flutter route, so slow screens show up in the runner summary.
+"""
+
+import asyncio
+import contextvars
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from playwright import async_api
+
+from harness.semantics_index import SemanticsIndex
+
+DEFAULT_QUIET_MS = 150
+DEFAULT_SETTLE_TIMEOUT_MS = 5000
+
+READINESS_SCRIPT = """
+(() => {
+  if (window.__tsReady) return;
+  const state = window.__tsReady = { firstFrame: false, lastMutation: performance.now(), version: 0 };
+  const touch = () => { state.lastMutation = performance.now(); state.version++; };
+  window.addEventListener('flutter-first-frame', () => { state.firstFrame = true; touch(); });
+  const watchHost = () => {
+    const host = document.querySelector('flt-semantics-host');
+    if (!host) return false;
+    touch();
+    // data-ts-id is written by the semantics index itself and is not app activity.
+    new MutationObserver((records) => {
+      if (records.some((r) => r.attributeName !== 'data-ts-id')) touch();
+    }).observe(host, {
+      subtree: true, childList: true, attributes: true, characterData: true,
+    });
+    return true;
+  };
+  const bootstrap = new MutationObserver(() => {
+    if (document.querySelector('flutter-view, flt-glass-pane')) state.firstFrame = true;
+    if (watchHost()) bootstrap.disconnect();
+  });
+  bootstrap.observe(document, { childList: true, subtree: true });
+})();
+"""
+
+TREE_CHANGED_PREDICATE = """
+(knownVersion) => ((window.__tsReady || {}).version || 0) !== knownVersion
+"""
+
+SETTLED_PREDICATE = """
+(quietMs) => {
+  const s = window.__tsReady;
+  return !!s && s.firstFrame && performance.now() - s.lastMutation >= quietMs;
+}
+"""
+
+# Firestore's WebChannel keeps one hanging GET open for the listen stream;
+# it never completes, so only the other channel requests count as traffic.
+FIRESTORE_MARKERS = ("firestore.googleapis.com", "google.firestore.v1.Firestore")
+
+
+def _is_firestore_request(request: async_api.Request) -> bool:
+    url = request.url
+    if not any(marker in url for marker in FIRESTORE_MARKERS):
+        return False
+    return not (request.method == "GET" and "TYPE=xmlhttp" in url)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds."""
+
+    BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.samples: List[float] = []
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.samples.append(ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> dict:
+        labels = [f"<={b}" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}"]
+        return {
+            "count": len(self.samples),
+            "p50": round(self.percentile(0.50), 1),
+            "p95": round(self.percentile(0.95), 1),
+            "max": round(max(self.samples, default=0.0), 1),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class StepRecorder:
+    """Collects per-step readiness latency for one test."""
+
+    def __init__(self):
+        self.steps: List[dict] = []
+        self.by_screen: Dict[str, LatencyHistogram] = {}
+
+    def record(self, screen: str, ms: float) -> None:
+        self.steps.append({"step": len(self.steps) + 1, "screen": screen, "ms": round(ms, 1)})
+        self.by_screen.setdefault(screen, LatencyHistogram()).observe(ms)
+
+    def to_dict(self) -> dict:
+        return {
+            "steps": self.steps,
+            "screens": {screen: hist.to_dict() for screen, hist in self.by_screen.items()},
+        }
+
+
+# Set by the runner for each test task; standalone runs get a fresh recorder.
+current_recorder: contextvars.ContextVar[Optional[StepRecorder]] = contextvars.ContextVar(
+    "current_recorder", default=None
+)
+
+
+def screen_of(url: str) -> str:
+    """Flutter web route of ``url``: the hash route if any, else the path."""
+    parts = urlsplit(url)
+    route = parts.fragment.split("?", 1)[0] if parts.fragment else parts.path
+    return route or "/"
+
+
+class Readiness:
+    """Readiness waits for one page. Create with ``await Readiness.attach(page)``."""
+
+    def __init__(self, page: async_api.Page, recorder: StepRecorder):
+        self.page = page
+        self.recorder = recorder
+        self.index = SemanticsIndex(page)
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @classmethod
+    async def attach(cls, page: async_api.Page) -> "Readiness":
+        recorder = current_recorder.get()
+        if recorder is None:
+            recorder = StepRecorder()
+            current_recorder.set(recorder)
+        ready = cls(page, recorder)
+        await page.add_init_script(READINESS_SCRIPT)
+        page.on("request", ready._on_request)
+        page.on("requestfinished", ready._on_request_done)
+        page.on("requestfailed", ready._on_request_done)
+        return ready
+
+    def _on_request(self, request: async_api.Request) -> None:
+        if _is_firestore_request(request):
+            self._pending += 1
+            self._idle.clear()
+
+    def _on_request_done(self, request: async_api.Request) -> None:
+        if _is_firestore_request(request) and self._pending:
+            self._pending -= 1
+            if not self._pending:
+                self._idle.set()
+
+    async def settle(
+        self,
+        quiet_ms: int = DEFAULT_QUIET_MS,
+        timeout_ms: int = DEFAULT_SETTLE_TIMEOUT_MS,
+    ) -> None:
+        """Wait for first frame, a quiet semantics tree and Firestore idle.
+
+        Never raises on timeout: an app that keeps animating must not fail
+        the step, it only stops waiting for it.
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await self.page.wait_for_function(
+                SETTLED_PREDICATE, arg=quiet_ms, polling=50, timeout=timeout_ms
+            )
+        except async_api.Error:
+            pass
+
+    async def wait_for(
+        self,
+        locator: async_api.Locator,
+        state: str = "attached",
+        timeout_ms: int = DEFAULT_SETTLE_TIMEOUT_MS,
+    ) -> async_api.Locator:
+        """Settle the app, then wait for ``locator``; records the latency."""
+        started = time.perf_counter()
+        try:
+            await self.settle(timeout_ms=timeout_ms)
+            await locator.wait_for(state=state, timeout=timeout_ms)
+        finally:
+            self.recorder.record(screen_of(self.page.url), (time.perf_counter() - started) * 1000)
+        return locator
+
+    async def find(
+        self,
+        selector: Optional[str] = None,
+        *,
+        label: Optional[str] = None,
+        role: Optional[str] = None,
+        identifier: Optional[str] = None,
+        timeout_ms: int = DEFAULT_SETTLE_TIMEOUT_MS,
+    ) -> async_api.Locator:
+        """Settle the app and resolve a target through the semantics index.
+
+        ``selector`` is a recorded ``xpath=html/body/...`` path; ``label``,
+        ``role`` and ``identifier`` match aria-label, role and Flutter's
+        ``Semantics.identifier``. The index is only re-snapshotted when the
+        tree changed. If nothing matches before the timeout, ``selector`` is
+        handed to Playwright as-is so the step fails with its usual error.
+        """
+        if selector is not None and not selector.startswith("xpath="):
+            return await self.wait_for(self.page.locator(selector).nth(0), timeout_ms=timeout_ms)
+        started = time.perf_counter()
+        deadline = started + timeout_ms / 1000
+        try:
+            await self.settle(timeout_ms=timeout_ms)
+            while True:
+                await self.index.refresh()
+                node_id = self.index.lookup(selector, label=label, role=role, identifier=identifier)
+                if node_id is not None:
+                    return self.index.locator(node_id)
+                remaining_ms = (deadline - time.perf_counter()) * 1000
+                if remaining_ms <= 0:
+                    break
+                try:
+                    await self.page.wait_for_function(
+                        TREE_CHANGED_PREDICATE, arg=self.index.version, polling="raf", timeout=remaining_ms
+                    )
+                except async_api.Error:
+                    break
+            if selector is None:
+                raise async_api.TimeoutError(
+                    f"No semantics node with label={label!r} role={role!r} identifier={identifier!r}"
+                )
+            locator = self.page.locator(selector).nth(0)
+            await locator.wait_for(state="attached", timeout=max(1.0, (deadline - time.perf_counter()) * 1000))
+            return locator
+        finally:
+            self.recorder.record(screen_of(self.page.url), (time.perf_counter() - started) * 1000)
@@ -0,0 +1,251 @@
+"""Write harness results in the suite's existing report formats.
+
+``merge_test_results`` updates ``tmp/test_results.json`` in place, keyed
+by TC id, so TestSprite's ids, descriptions and timestamps survive and only
+status, error and ``modified`` change. ``render_html`` produces the same
+layout as ``testsprite-mcp-test-report.html``. Requirement grouping,
+severity and analysis come from ``testsprite-mcp-test-report.md``, and
+status and errors come from the harness run.
+"""
+
+import html
+import json
+import re
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from harness.auth import SUITE_DIR
+
+TEST_RESULTS_PATH = SUITE_DIR / "tmp" / "test_results.json"
+TEST_PLAN_PATH = SUITE_DIR / "testsprite_frontend_test_plan.json"
+MARKDOWN_REPORT_PATH = SUITE_DIR / "testsprite-mcp-test-report.md"
+HTML_REPORT_PATH = SUITE_DIR / "testsprite-mcp-test-report.html"
+
+UNMAPPED_REQUIREMENT = "Unmapped"
+
+_HTML_HEAD = """
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+      <meta charset="UTF-8" />
+      <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+      <title>Markdown Preview</title>
+      <style>
+        body {
+          font-family: sans-serif;
+          padding: 40px;
+          line-height: 1.6;
+          background: #fdfdfd;
+          color: #333;
+        }
+        pre {
+          background: #f4f4f4;
+          padding: 10px;
+          border-radius: 5px;
+          overflow-x: auto;
+        }
+        code {
+          font-family: monospace;
+          background: #eee;
+          padding: 2px 4px;
+        }
+        table {
+          border-collapse: collapse;
+          width: 100%;
+          margin-top: 20px;
+        }
+        th, td {
+          border: 1px solid #ccc;
+          padding: 8px 12px;
+          text-align: left;
+        }
+        th {
+          background-color: #f2f2f2;
+          font-weight: bold;
+        }
+      </style>
+    </head>
+    <body>
+      """
+
+_HTML_TAIL = """
+    </body>
+    </html>"""
+
+_FIELD = re.compile(r"^- \*\*(.+?):\*\*\s*(.*)$")
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _tc(title_or_id: str) -> str:
+    return title_or_id.split("-", 1)[0].split("_", 1)[0]
+
+
+def merge_test_results(results: Sequence[dict], path: Path = TEST_RESULTS_PATH,
+                       plan_path: Path = TEST_PLAN_PATH) -> List[dict]:
+    """Fold harness results into ``test_results.json`` and return the entries."""
+    entries: List[dict] = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+    by_tc = {_tc(entry["title"]): entry for entry in entries}
+    plan = {}
+    if plan_path.exists():
+        plan = {case["id"]: case for case in json.loads(plan_path.read_text(encoding="utf-8"))}
+    template = entries[0] if entries else {}
+    now = _timestamp()
+    for result in results:
+        tc = result["testId"]
+        entry = by_tc.get(tc)
+        if entry is None:
+            entry = {
+                "projectId": template.get("projectId", ""),
+                "testId": str(uuid.uuid4()),
+                "userId": template.get("userId", ""),
+                "title": result["title"],
+                "description": plan.get(tc, {}).get("description", ""),
+                "testType": "FRONTEND",
+                "createFrom": "harness",
+                "testVisualization": "",
+                "created": now,
+            }
+            entries.append(entry)
+            by_tc[tc] = entry
+        entry.update(testStatus=result["testStatus"], testError=result["testError"], modified=now)
+    entries.sort(key=lambda e: _tc(e["title"]))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(entries, indent=2, ensure_ascii=False), encoding="utf-8")
+    return entries
+
+
+def parse_markdown_report(path: Path = MARKDOWN_REPORT_PATH) -> Dict[str, dict]:
+    """``{requirement: {"description": str, "tests": {tc: {field: value}}}}`` in report order."""
+    requirements: Dict[str, dict] = {}
+    current: Optional[dict] = None
+    test: Optional[dict] = None
+    if not path.exists():
+        return requirements
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("### Requirement:"):
+            current = requirements.setdefault(line.split(":", 1)[1].strip(), {"description": "", "tests": {}})
+            test = None
+            continue
+        if line.startswith("## ") and current is not None:
+            break  # Coverage section: no more tests.
+        match = _FIELD.match(line)
+        if not match or current is None:
+            continue
+        key, value = match.groups()
+        if key == "Description" and test is None:
+            current["description"] = value
+        elif key == "Test ID":
+            test = current["tests"].setdefault(value.strip(), {})
+        elif test is not None:
+            test[key] = value
+    return requirements
+
+
+def _li(key: str, value: str) -> str:
+    return f"<li><strong>{html.escape(key)}:</strong> {value}</li>"
+
+
+def render_html(results: Sequence[dict], code_files: Dict[str, str],
+                markdown_path: Path = MARKDOWN_REPORT_PATH) -> str:
+    """Render ``results`` (harness ``TestResult`` dicts) as the suite's HTML report."""
+    requirements = parse_markdown_report(markdown_path)
+    by_tc = {r["testId"]: r for r in results}
+    mapped = {tc for req in requirements.values() for tc in req["tests"]}
+    unmapped = [tc for tc in sorted(by_tc) if tc not in mapped]
+    if unmapped:
+        requirements[UNMAPPED_REQUIREMENT] = {
+            "description": "Tests not listed in testsprite-mcp-test-report.md.",
+            "tests": {tc: {} for tc in unmapped},
+        }
+
+    body = [
+        "<h1>TestSprite AI Testing Report (MCP)</h1>",
+        "<hr>",
+        "<h2>1️⃣ Document Metadata</h2>",
+        "<ul>",
+        _li("Project Name", "invoiceflow"),
+        _li("Version", "N/A"),
+        _li("Date", datetime.now().strftime("%Y-%m-%d")),
+        _li("Prepared by", "TestSprite harness runner"),
+        "</ul>",
+        "<hr>",
+        "<h2>2️⃣ Requirement Validation Summary</h2>",
+    ]
+    coverage = []
+    for name, requirement in requirements.items():
+        tests = [(tc, meta) for tc, meta in requirement["tests"].items() if tc in by_tc]
+        if not tests:
+            continue
+        body += [f"<h3>Requirement: {html.escape(name)}</h3>", "<ul>",
+                 _li("Description", html.escape(requirement["description"])), "</ul>"]
+        passed = 0
+        for number, (tc, meta) in enumerate(tests, start=1):
+            result = by_tc[tc]
+            ok = result["testStatus"] == "PASSED"
+            passed += ok
+            code = code_files.get(tc)
+            code_html = f'<a href="./{html.escape(code)}">{html.escape(code)}</a>' if code else "N/A"
+            body += [
+                f"<h4>Test {number}</h4>",
+                "<ul>",
+                _li("Test ID", tc),
+                _li("Test Name", html.escape(result["title"].split("-", 1)[-1])),
+                _li("Test Code", code_html),
+                _li("Test Error", html.escape(result["testError"]) if result["testError"] else "N/A"),
+                _li("Duration", f"{result['durationMs'] / 1000:.1f}s"),
+            ]
+            if meta.get("Test Visualization and Result"):
+                body.append(_li("Test Visualization and Result", html.escape(meta["Test Visualization and Result"])))
+            body.append(_li("Status", "✅ Passed" if ok else "❌ Failed"))
+            for key in ("Severity", "Analysis / Findings"):
+                if meta.get(key):
+                    body.append(_li(key, html.escape(meta[key])))
+            body += ["</ul>", "<hr>"]
+        coverage.append((name, len(tests), passed))
+
+    total = sum(n for _, n, _ in coverage)
+    passed_total = sum(p for _, _, p in coverage)
+    body += [
+        "<h2>3️⃣ Coverage &amp; Matching Metrics</h2>",
+        "<ul>",
+        f"<li>\n<p><strong>Requirements covered:</strong> {len(coverage)}</p>\n</li>",
+        f"<li>\n<p><strong>Total Tests:</strong> {total}</p>\n</li>",
+        f"<li>\n<p><strong>✅ Passed:</strong> {passed_total}</p>\n</li>",
+        "<li>\n<p><strong>⚠️ Partial:</strong> 0</p>\n</li>",
+        f"<li>\n<p><strong>❌ Failed:</strong> {total - passed_total}</p>\n</li>",
+        "</ul>",
+        "<table>",
+        "<thead>",
+        "<tr>",
+        "<th>Requirement</th>",
+        "<th>Total Tests</th>",
+        '<th style="text-align:right">✅ Passed</th>',
+        '<th style="text-align:right">⚠️ Partial</th>',
+        '<th style="text-align:right">❌ Failed</th>',
+        "</tr>",
+        "</thead>",
+        "<tbody>",
+    ]
+    for name, count, passed in coverage:
+        body += [
+            "<tr>",
+            f"<td>{html.escape(name)}</td>",
+            f"<td>{count}</td>",
+            f'<td style="text-align:right">{passed}</td>',
+            '<td style="text-align:right">0</td>',
+            f'<td style="text-align:right">{count - passed}</td>',
+            "</tr>",
+        ]
+    body += ["</tbody>", "</table>"]
+    return _HTML_HEAD + "\n".join(body) + "\n" + _HTML_TAIL
+
+
+def write_html_report(results: Sequence[dict], code_files: Dict[str, str],
+                      path: Path = HTML_REPORT_PATH, markdown_path: Path = MARKDOWN_REPORT_PATH) -> Path:
+    path.write_text(render_html(results, code_files, markdown_path), encoding="utf-8")
+    return path
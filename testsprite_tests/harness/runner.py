@@ -0,0 +1,271 @@
+"""Parallel runner for the TC scripts.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.runner --workers 4 --browsers 2
+    python -m harness.runner -k TC005 -k TC010
+    python -m harness.runner -k TC011 --perf --trace
+
+One Playwright instance and ``--browsers`` Chromium processes are started
+once; ``--workers`` tests run concurrently, each in its own context.
+``--perf`` writes per-test timings to ``tmp/perf/`` (see ``harness.perf``)
+and ``--benchmark`` checks the run against the stored baseline (see
+``harness.benchmarks``). ``--shard`` and ``--checkpoint`` split and
+resume runs (see ``harness.shards``).
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import sys
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from harness import benchmarks
+from harness.auth import context_options, is_authenticated, sign_in_once
+from harness.browser_pool import BrowserPool
+from harness.perf import PerfCapture, summarize, trace_path_for, write_capture
+from harness.readiness import StepRecorder, current_recorder
+from harness.stubs import MODES, NetworkStubs, fixture_path_for, resolve_mode
+
+SUITE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_PATH = SUITE_DIR / "tmp" / "harness_results.json"
+DEFAULT_TEST_TIMEOUT_S = 15 * 60
+
+
+@dataclass
+class TestResult:
+    testId: str
+    title: str
+    testStatus: str
+    testError: str
+    durationMs: float
+    readiness: dict = field(default_factory=dict)
+    perf: dict = field(default_factory=dict)
+    network: dict = field(default_factory=dict)
+
+
+def discover_tests(patterns: Sequence[str] = ()) -> List[Path]:
+    """Return the TC scripts in the suite, optionally filtered by substring."""
+    paths = sorted(SUITE_DIR.glob("TC[0-9][0-9][0-9]_*.py"))
+    if patterns:
+        paths = [p for p in paths if any(pat in p.stem for pat in patterns)]
+    return paths
+
+
+def test_id(path: Path) -> str:
+    return path.stem.split("_", 1)[0]
+
+
+def test_title(path: Path) -> str:
+    """``TC005_Create_New_Invoice`` -> ``TC005-Create New Invoice``, as in test_results.json."""
+    tc, _, rest = path.stem.partition("_")
+    return f"{tc}-{rest.replace('_', ' ')}"
+
+
+def load_module(path: Path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def run_one(
+    pool: BrowserPool,
+    path: Path,
+    timeout_s: float,
+    auth_state: Optional[Path] = None,
+    perf: bool = False,
+    trace: bool = False,
+    network: Optional[str] = None,
+) -> TestResult:
+    recorder = StepRecorder()
+    current_recorder.set(recorder)
+    started = time.perf_counter()
+    status, error = "PASSED", ""
+    perf_summary: dict = {}
+    network_summary: dict = {}
+    try:
+        module = load_module(path)
+        async with pool.context(**context_options(module, auth_state)) as context:
+            fixture = fixture_path_for(test_id(path))
+            stubs = await NetworkStubs.attach(context, resolve_mode(module, network, fixture), fixture)
+            capture = None
+            if perf or trace:
+                capture = await PerfCapture.attach(context, trace_path_for(test_id(path)) if trace else None)
+            try:
+                await asyncio.wait_for(module.run_test(context), timeout=timeout_s)
+            finally:
+                if capture:
+                    data = await capture.finish()
+                    write_capture(test_id(path), test_title(path), data)
+                    perf_summary = summarize(data)
+                network_summary = await stubs.close()
+    except asyncio.TimeoutError:
+        status, error = "FAILED", f"Test execution timed out after {timeout_s:g} seconds"
+    except AssertionError as exc:
+        status, error = "FAILED", str(exc) or "Assertion failed"
+    except Exception:
+        status, error = "FAILED", traceback.format_exc(limit=3)
+    duration_ms = (time.perf_counter() - started) * 1000
+    return TestResult(
+        test_id(path), test_title(path), status, error, round(duration_ms, 1), recorder.to_dict(), perf_summary,
+        network_summary,
+    )
+
+
+async def run_suite(
+    paths: Sequence[Path],
+    workers: int = 4,
+    browsers: int = 1,
+    timeout_s: float = DEFAULT_TEST_TIMEOUT_S,
+    auth: bool = True,
+    perf: bool = False,
+    trace: bool = False,
+    network: Optional[str] = None,
+    on_result: Optional[Callable[[TestResult], None]] = None,
+) -> List[TestResult]:
+    """Run ``paths`` across ``workers`` concurrent slots on a shared pool.
+
+    When ``auth`` is set and any selected script is ``AUTHENTICATED``, the
+    pool signs in once up front and those scripts start from that session.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, path in enumerate(paths):
+        queue.put_nowait((index, path))
+    results: List[Optional[TestResult]] = [None] * len(paths)
+
+    async def worker(pool: BrowserPool) -> None:
+        while True:
+            try:
+                index, path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            result = await run_one(pool, path, timeout_s, auth_state, perf, trace, network)
+            print(f"[{result.testStatus}] {result.title} ({result.durationMs / 1000:.1f}s)", flush=True)
+            results[index] = result
+            if on_result:
+                on_result(result)
+
+    async with BrowserPool(size=browsers) as pool:
+        auth_state = None
+        if auth and any(is_authenticated(load_module(path)) for path in paths):
+            started = time.perf_counter()
+            auth_state = await sign_in_once(pool)
+            print(f"Signed in once in {time.perf_counter() - started:.1f}s -> {auth_state}", flush=True)
+        await asyncio.gather(*(worker(pool) for _ in range(max(1, workers))))
+
+    return [r for r in results if r is not None]
+
+
+def write_results(results: Sequence[TestResult], wall_ms: float, path: Path = RESULTS_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "wallClockMs": round(wall_ms, 1),
+        "summedTestMs": round(sum(r.durationMs for r in results), 1),
+        "results": [asdict(r) for r in results],
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def print_summary(results: Sequence[TestResult], wall_ms: float) -> None:
+    summed_ms = sum(r.durationMs for r in results)
+    passed = sum(r.testStatus == "PASSED" for r in results)
+    print()
+    for r in results:
+        print(f"  {r.testId:<6} {r.testStatus:<7} {r.durationMs / 1000:8.1f}s")
+    print(f"\n{passed}/{len(results)} passed")
+    slowest = sorted(
+        ((screen, stats) for r in results for screen, stats in r.readiness.get("screens", {}).items()),
+        key=lambda item: item[1]["p95"],
+        reverse=True,
+    )[:5]
+    if slowest:
+        print("Slowest screens (readiness p95):")
+        for screen, stats in slowest:
+            print(f"  {screen:<30} p95 {stats['p95']:8.1f}ms  n={stats['count']}")
+    profiled = [r for r in results if r.perf]
+    if profiled:
+        print("Performance (first frame / long tasks / JS heap / Firestore requests):")
+        for r in profiled:
+            heap = r.perf["jsHeapUsedBytes"]
+            print(f"  {r.testId:<6} {r.perf['firstFrameMs'] or 0:8.1f}ms"
+                  f"  {r.perf['longTasks']:4d} tasks {r.perf['longTaskMs'] or 0:8.1f}ms"
+                  f"  {heap / 2**20 if heap else 0:7.1f}MB  {r.perf['firestoreRequests']:5d} req")
+    print(f"Wall clock: {wall_ms / 1000:.1f}s  (sequential sum {summed_ms / 1000:.1f}s,"
+          f" speedup x{summed_ms / wall_ms if wall_ms else 0:.2f})")
+
+
+def _parse_shard(text: str) -> tuple:
+    index, _, count = text.partition("/")
+    try:
+        return int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, got {text!r}") from None
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-w", "--workers", type=int, default=4, help="tests run concurrently")
+    parser.add_argument("-b", "--browsers", type=int, default=1, help="Chromium processes in the pool")
+    parser.add_argument("-k", dest="patterns", action="append", default=[], help="only run TC files containing this")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TEST_TIMEOUT_S, help="per-test timeout in seconds")
+    parser.add_argument("--no-auth", dest="auth", action="store_false",
+                        help="do not sign in up front; AUTHENTICATED scripts start logged out")
+    parser.add_argument("--perf", action="store_true",
+                        help="record paint timings, long tasks, JS heap and Firestore requests to tmp/perf/")
+    parser.add_argument("--trace", action="store_true",
+                        help="also write a Chrome DevTools trace per test (implies --perf)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="record the run and fail on regressions against the rolling baseline")
+    parser.add_argument("--network", choices=MODES,
+                        help="force every test's network mode instead of its NETWORK flag (see harness.stubs)")
+    parser.add_argument("--shard", type=_parse_shard, metavar="I/N",
+                        help="run only the I-th of N shards balanced by historical duration")
+    parser.add_argument("--checkpoint", type=Path,
+                        help="record each finished test here; tests that already passed in it are skipped")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    paths = discover_tests(args.patterns)
+    if not paths:
+        print("No TC scripts matched", file=sys.stderr)
+        return 2
+    # harness.shards imports this module, so it is loaded lazily here.
+    from harness.shards import Checkpoint, select_shard
+
+    if args.shard:
+        paths = select_shard(paths, *args.shard)
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    if checkpoint:
+        done = checkpoint.passed()
+        if done:
+            print(f"Skipping {len(done)} test(s) that already passed in {args.checkpoint}")
+        paths = [p for p in paths if test_id(p) not in done]
+        if not paths:
+            return 0
+    started = time.perf_counter()
+    results = asyncio.run(run_suite(
+        paths, args.workers, args.browsers, args.timeout, args.auth, args.perf, args.trace,
+        args.network, checkpoint.record if checkpoint else None,
+    ))
+    wall_ms = (time.perf_counter() - started) * 1000
+    write_results(results, wall_ms, args.output)
+    print_summary(results, wall_ms)
+    regressions = benchmarks.check(args.output) if args.benchmark else []
+    for finding in regressions:
+        print(f"Performance regression: {finding.metric} {finding.change:+.0%} over baseline")
+    if regressions:
+        print(f"See {benchmarks.REPORT_PATH}")
+    return 0 if all(r.testStatus == "PASSED" for r in results) and not regressions else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,518 @@
+"""Seed the Firestore emulator with app-shaped fixtures.
+
+Documents use the same ``users/{uid}/...`` layout and field names as
+``FirestoreService`` and ``InventoryFirestoreService``, so the app reads
+them exactly like data it wrote itself. Datasets are produced by a
+generator and written through ``batchWrite`` in 500-document chunks on a
+thread pool, so memory stays bounded and 10k-1M document datasets load in
+seconds.
+
+What the app keeps alongside invoices and movements is seeded with them:
+stock ledgers, ``sales_rollups`` and ``analytics_rollups`` day documents
+with their coverage markers, and reconciled customer aggregates. Without
+them the first test to open a screen would time the one-time migrations
+(``_seedLedger``, ``backfillAnalyticsRollups``, ``reconcileCustomerStats``)
+instead of the screen.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.seed --fixture e2e --clear
+    python -m harness.seed --invoices 200000 --customers 5000 --items 2000
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from harness.auth import TEST_EMAIL, TEST_PASSWORD, ensure_emulator_user
+from harness.firestore_rest import MAX_BATCH_WRITES, Document, FirestoreEmulator
+
+CATEGORIES = ("General", "Grocery", "Beverages", "Personal Care", "Household", "Stationery")
+FIRST_NAMES = ("Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Meera", "Kabir", "Isha", "Arjun", "Sara")
+LAST_NAMES = ("Sharma", "Patel", "Singh", "Iyer", "Khan", "Reddy", "Das", "Mehta", "Nair", "Gupta")
+
+# Sign applied by InventoryFirestoreService._stockDelta.
+STOCK_SIGN = {"IN": 1, "RETURN_IN": 1, "ADJUSTMENT": 1, "OUT": -1, "RETURN_OUT": -1, "REVERSAL_OUT": -1}
+_OUTFLOWS = ("OUT", "RETURN_OUT")
+
+
+@dataclass
+class SeedSpec:
+    customers: int = 50
+    items: int = 100
+    invoices: int = 500
+    returns: int = 20
+    purchase_ratio: float = 0.2
+    cancelled_ratio: float = 0.05
+    max_lines: int = 5
+    days: int = 365
+    seed: int = 42
+
+
+@dataclass
+class SeedStats:
+    documents: int
+    seconds: float
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.seconds if self.seconds else 0.0
+
+
+def item_id_for(name: str) -> str:
+    """Same id ``InvoiceService._generateItemId`` derives from an item name."""
+    clean = re.sub(r"[^a-z0-9]", "_", name.lower().strip())
+    return re.sub(r"_+", "_", clean).strip("_")
+
+
+def user_path(uid: str, collection: str, doc_id: str) -> str:
+    return f"users/{uid}/{collection}/{doc_id}"
+
+
+def customer_doc(uid: str, customer_id: str, name: str, phone: str, at: datetime,
+                 stats: Optional[dict] = None) -> Document:
+    return user_path(uid, "customers", customer_id), {
+        "name": name,
+        "phoneNumber": phone,
+        "pendingReturnAmount": 0.0,
+        "createdAt": at,
+        "updatedAt": at,
+        **(stats or {}),
+    }
+
+
+def item_doc(uid: str, item_id: str, name: str, opening: float, current: float,
+             reorder: float, cost: float, category: str, at: datetime) -> Document:
+    return user_path(uid, "inventory_items", item_id), {
+        "sku": item_id.upper(),
+        "name": name,
+        "unit": "pcs",
+        "opening_stock": opening,
+        "current_stock": current,
+        "reorder_point": reorder,
+        "avg_cost": cost,
+        "category": category,
+        "last_updated": at,
+        "barcode": None,
+    }
+
+
+def movement_doc(uid: str, movement_id: str, item_id: str, kind: str, qty: float,
+                 unit_cost: float, ref_type: str, ref_id: str, at: datetime) -> Document:
+    return user_path(uid, "stock_movements", movement_id), {
+        "id": movement_id,
+        "itemId": item_id,
+        "type": kind,
+        "quantity": qty,
+        "unitCost": unit_cost,
+        "sourceRefType": ref_type,
+        "sourceRefId": ref_id,
+        "createdAt": at,
+        "reversalOfMovementId": None,
+        "reversalFlag": False,
+        "ledgered": True,
+    }
+
+
+def invoice_doc(uid: str, invoice_id: str, number: str, invoice_type: str, status: str,
+                lines: Sequence[dict], at: datetime, paid: float,
+                customer: Optional[dict] = None) -> Document:
+    revenue = round(sum(line["quantity"] * line["price"] for line in lines), 2)
+    fields = {
+        "invoiceNumber": number,
+        "clientName": customer["name"] if customer else "Walk-in Supplier",
+        "customerPhone": customer["phone"] if customer else None,
+        "customerId": customer["id"] if customer else None,
+        "date": at,
+        "revenue": revenue,
+        "status": status,
+        "createdAt": at,
+        "updatedAt": at,
+        "invoiceType": invoice_type,
+        "amountPaid": paid,
+        "paymentMethod": "Cash",
+        "isDeleted": False,
+        "modifiedFlag": False,
+        "refundAdjustment": 0.0,
+        "items": list(lines),
+        "rolledUp": True,
+    }
+    if status == "cancelled":
+        fields["cancelledAt"] = at
+        fields["cancelReason"] = "Seeded cancellation"
+    # FirestoreService._invoiceToFirestore drops null fields.
+    return user_path(uid, "invoices", invoice_id), {k: v for k, v in fields.items() if v is not None}
+
+
+def return_doc(uid: str, return_id: str, number: str, invoice: dict, lines: Sequence[dict],
+               at: datetime) -> Document:
+    total = round(sum(line["totalValue"] for line in lines), 2)
+    fields = {
+        "returnNumber": number,
+        "invoiceId": invoice["id"],
+        "invoiceNumber": invoice["number"],
+        "customerName": invoice["customer"]["name"],
+        "customerId": invoice["customer"]["id"],
+        "customerPhone": invoice["customer"]["phone"],
+        "invoiceDate": invoice["date"],
+        "returnDate": at,
+        "returnType": "sales",
+        "returnReason": "Damaged",
+        "totalReturnValue": total,
+        "refundAmount": total,
+        "isApplied": False,
+        "createdAt": at,
+        "updatedAt": at,
+        "items": list(lines),
+    }
+    return user_path(uid, "returns", return_id), fields
+
+
+def analytics_share(invoice: dict) -> Optional[tuple]:
+    """``AnalyticsRollup.share``: (local day, what the invoice adds to it)."""
+    if str(invoice.get("status", "pending")).lower() == "cancelled":
+        return None
+    kind = invoice.get("invoiceType", "sales")
+    items: Dict[str, dict] = {}
+    quantity, items_total = 0, 0.0
+    for line in invoice.get("items", []):
+        if line["quantity"] <= 0:
+            continue
+        line_total = line["price"] * line["quantity"]
+        quantity += line["quantity"]
+        items_total += line_total
+        name = line["name"].strip()
+        if name:
+            totals = items.setdefault(name, {"quantity": 0, "revenue": 0.0})
+            totals["quantity"] += line["quantity"]
+            totals["revenue"] += line_total
+    revenue = invoice.get("revenue", 0.0) - invoice.get("refundAdjustment", 0.0)
+    paid = invoice.get("amountPaid", 0.0)
+    customer_id = invoice.get("customerId") or "unknown"
+    return invoice["date"].astimezone().strftime("%Y-%m-%d"), {kind: {
+        "invoiceCount": 1,
+        "revenue": revenue if kind == "sales" else items_total,
+        "paid": paid,
+        "remaining": revenue - paid,
+        "quantity": quantity,
+        "items": items,
+        "customers": {customer_id: {
+            "name": invoice.get("clientName", "").strip() or "Unknown Customer",
+            "phone": invoice.get("customerPhone") or "",
+            "invoiceCount": 1,
+            "quantity": quantity,
+            "revenue": revenue,
+            "paid": paid,
+            "outstanding": revenue - paid,
+        }},
+    }}
+
+
+def add_into(target: dict, delta: dict) -> None:
+    """``AnalyticsRollup.addInto``: sums numbers, keeps the latest labels."""
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            add_into(target.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)):
+            target[key] = target.get(key, 0) + value
+        else:
+            target[key] = value
+
+
+class DerivedDocs:
+    """Ledgers, rollups and customer aggregates for the movements and
+    invoices passed through it, as the app would have written them.
+
+    Only per-item, per-day and per-customer totals are kept in memory.
+    """
+
+    def __init__(self):
+        self._ledgers: Dict[str, list] = {}  # item id -> [balance, count, last createdAt]
+        self._sold: Dict[str, Dict[str, float]] = {}  # UTC day -> item id -> quantity
+        self._days: Dict[str, dict] = {}  # local day -> analytics rollup
+        self._stats: Dict[str, list] = {}  # customer id -> [outstanding, spent, paid, count, last]
+        self._pending_returns: Dict[str, float] = {}
+        self._first_movement: Optional[datetime] = None
+
+    def movement(self, doc: Document) -> Document:
+        fields = doc[1]
+        at, item_id, qty = fields["createdAt"], fields["itemId"], fields["quantity"]
+        ledger = self._ledgers.setdefault(item_id, [0.0, 0, at])
+        ledger[0] += STOCK_SIGN[fields["type"]] * qty
+        ledger[1] += 1
+        ledger[2] = max(ledger[2], at)
+        if fields["type"] in _OUTFLOWS:
+            day = self._sold.setdefault(at.astimezone(timezone.utc).strftime("%Y-%m-%d"), {})
+            day[item_id] = day.get(item_id, 0.0) + qty
+        if self._first_movement is None or at < self._first_movement:
+            self._first_movement = at
+        return doc
+
+    def invoice(self, doc: Document) -> Document:
+        """Rolls up one invoice (``_writeRollupChanges``, ``_writeStatsChanges``)."""
+        fields = doc[1]
+        share = analytics_share(fields)
+        if share is not None:
+            day, amounts = share
+            add_into(self._days.setdefault(day, {"day": day}), amounts)
+        customer_id = fields.get("customerId")
+        if share is not None and customer_id and fields["invoiceType"] == "sales":
+            adjusted = fields["revenue"] - fields.get("refundAdjustment", 0.0)
+            paid = fields.get("amountPaid", 0.0)
+            stats = self._stats.setdefault(customer_id, [0.0, 0.0, 0.0, 0, None])
+            stats[0] += max(adjusted - paid, 0.0)
+            stats[1] += adjusted
+            stats[2] += paid
+            stats[3] += 1
+            stats[4] = max(stats[4] or fields["date"], fields["date"])
+        return doc
+
+    def sales_return(self, doc: Document) -> Document:
+        fields = doc[1]
+        if fields["returnType"] == "sales" and not fields["isApplied"] and fields.get("customerId"):
+            cid = fields["customerId"]
+            self._pending_returns[cid] = self._pending_returns.get(cid, 0.0) + fields["refundAmount"]
+        return doc
+
+    def customer_stats(self, customer_id: str, now: datetime) -> dict:
+        """The aggregates ``reconcileCustomerStats`` would write."""
+        outstanding, spent, paid, count, last = self._stats.get(customer_id, [0.0, 0.0, 0.0, 0, None])
+        return {
+            "outstandingBalance": outstanding,
+            "totalSpent": spent,
+            "totalPaid": paid,
+            "invoiceCount": count,
+            "lastPurchaseDate": last,
+            "pendingReturnAmount": self._pending_returns.get(customer_id, 0.0),
+            "statsReconciledAt": now,
+        }
+
+    def documents(self, uid: str, now: datetime) -> Iterator[Document]:
+        """Ledgers, day rollups and coverage markers; customers are written by the caller."""
+        for item_id, (balance, count, last) in self._ledgers.items():
+            yield user_path(uid, "stock_ledger", item_id), {
+                "balance": balance, "movementCount": count,
+                "checkpointBalance": balance, "checkpointCount": count, "checkpointAt": last,
+                "updatedAt": now,
+            }
+        for day, items in self._sold.items():
+            yield user_path(uid, "sales_rollups", day), {"day": day, "items": items}
+        # Every movement is rolled up, so coverage starts on the first one's UTC day.
+        first = (self._first_movement or now).astimezone(timezone.utc)
+        yield user_path(uid, "sales_rollups", "_coverage"), {
+            "since": datetime(first.year, first.month, first.day, tzinfo=timezone.utc),
+        }
+        for day, rollup in self._days.items():
+            yield user_path(uid, "analytics_rollups", day), rollup
+        yield user_path(uid, "analytics_rollups", "_coverage"), {"complete": True, "completedAt": now}
+
+
+def generate(uid: str, spec: SeedSpec, now: Optional[datetime] = None) -> Iterator[Document]:
+    """Yield a consistent synthetic dataset for ``uid``.
+
+    Sales never drive stock negative, cancelled invoices write no movements
+    and ``current_stock`` equals the sum of each item's movements, so the
+    data passes the app's own stock validation. Customers and items are
+    written last, with the totals their invoices and movements add up to.
+    Only customers, per-item stock, the totals in ``DerivedDocs`` and a
+    small sample of sales invoices (for returns) are kept in memory.
+    """
+    rng = random.Random(spec.seed)
+    now = now or datetime.now(timezone.utc)
+    start = now - timedelta(days=spec.days)
+    derived = DerivedDocs()
+
+    customers = []
+    for i in range(spec.customers):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i + 1}"
+        customers.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": name,
+                          "phone": f"9{rng.randrange(10**9):09d}"})
+
+    items = []
+    stock: Dict[str, float] = {}
+    for i in range(spec.items):
+        name = f"{rng.choice(CATEGORIES)} Item {i + 1:05d}"
+        item = {"id": item_id_for(name), "name": name, "price": round(rng.uniform(5, 500), 2),
+                "category": rng.choice(CATEGORIES), "reorder": float(rng.choice((5, 10, 20))),
+                "opening": float(rng.randint(50, 500))}
+        items.append(item)
+        stock[item["id"]] = item["opening"]
+        yield user_path(uid, "catalog_rates", str(i + 1)), {
+            "id": i + 1, "name": name, "rate": item["price"], "updatedAt": start,
+        }
+        yield derived.movement(movement_doc(uid, f"opening_{item['id']}", item["id"], "IN", item["opening"],
+                                            item["price"], "direct_add", item["id"], start))
+
+    sales_sample: List[dict] = []
+    month_seq: Dict[str, int] = {}
+    for n in range(spec.invoices):
+        at = start + timedelta(seconds=(spec.days * 86400) * (n + rng.random()) / max(spec.invoices, 1))
+        invoice_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        month = at.strftime("%Y%m")
+        month_seq[month] = month_seq.get(month, 0) + 1
+        number = f"INV-{month}{month_seq[month]:03d}"
+        is_purchase = rng.random() < spec.purchase_ratio
+        cancelled = rng.random() < spec.cancelled_ratio
+
+        lines = []
+        for item in rng.sample(items, min(len(items), rng.randint(1, spec.max_lines))):
+            qty = rng.randint(1, 10) if not is_purchase else rng.randint(10, 100)
+            if not is_purchase and not cancelled:
+                qty = min(qty, int(stock[item["id"]]))
+                if qty <= 0:
+                    continue
+            lines.append({"name": item["name"], "quantity": qty, "price": item["price"], "_id": item["id"]})
+        if not lines:
+            continue
+
+        stamp = int(at.timestamp() * 1000)
+        if not cancelled:
+            for line in lines:
+                kind, sign = ("IN", 1) if is_purchase else ("OUT", -1)
+                stock[line["_id"]] += sign * line["quantity"]
+                yield derived.movement(movement_doc(
+                    uid, f"{stamp}_{line['_id']}_{kind.lower()}_{n}", line["_id"], kind,
+                    float(line["quantity"]), line["price"] if is_purchase else 0.0, "invoice", invoice_id, at))
+
+        clean_lines = [{k: v for k, v in line.items() if k != "_id"} for line in lines]
+        total = sum(line["quantity"] * line["price"] for line in lines)
+        status = "cancelled" if cancelled else rng.choice(("paid", "paid", "pending"))
+        paid = round(total if status == "paid" else total * rng.choice((0.0, 0.5)), 2)
+        customer = None if is_purchase else rng.choice(customers) if customers else None
+        yield derived.invoice(invoice_doc(uid, invoice_id, number, "purchase" if is_purchase else "sales",
+                                          status, clean_lines, at, paid, customer))
+
+        if customer and not cancelled and len(sales_sample) < max(spec.returns * 4, 1):
+            sales_sample.append({"id": invoice_id, "number": number, "date": at,
+                                 "customer": customer, "lines": lines})
+
+    for n, invoice in enumerate(rng.sample(sales_sample, min(spec.returns, len(sales_sample)))):
+        at = invoice["date"] + timedelta(days=1)
+        number = f"SR-{int(at.timestamp() * 1000)}{n:03d}"
+        line = invoice["lines"][0]
+        qty = max(1, line["quantity"] // 2)
+        return_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        yield derived.sales_return(return_doc(uid, return_id, number, invoice,
+                                              [{"name": line["name"], "quantity": qty, "price": line["price"],
+                                                "totalValue": round(qty * line["price"], 2)}], at))
+        stock[line["_id"]] += qty
+        yield derived.movement(movement_doc(uid, f"{return_id}_{line['_id']}_return_in", line["_id"],
+                                            "RETURN_IN", float(qty), line["price"], "return", number, at))
+
+    for item in items:
+        yield item_doc(uid, item["id"], item["name"], item["opening"], stock[item["id"]],
+                       item["reorder"], item["price"], item["category"], now)
+    for customer in customers:
+        yield customer_doc(uid, customer["id"], customer["name"], customer["phone"], start,
+                           derived.customer_stats(customer["id"], now))
+    yield from derived.documents(uid, now)
+
+
+def e2e_fixture(uid: str, now: Optional[datetime] = None) -> Iterator[Document]:
+    """Small named dataset for the inventory scenarios.
+
+    * ``Rice 5kg`` is well stocked (TC008 posts a sale and checks the drop),
+    * ``Sugar 1kg`` sits just above its reorder point (TC009 low-stock alert),
+    * ``Tea 250g`` has a single unit left (TC007 insufficient inventory),
+    * ``Test Customer`` has one pending sales invoice with a due amount.
+    """
+    now = now or datetime.now(timezone.utc)
+    opened = now - timedelta(days=30)
+    derived = DerivedDocs()
+    for index, (name, price, opening, current, reorder) in enumerate((
+        ("Rice 5kg", 320.0, 100.0, 98.0, 10.0),
+        ("Sugar 1kg", 48.0, 12.0, 12.0, 10.0),
+        ("Tea 250g", 140.0, 1.0, 1.0, 5.0),
+    ), start=1):
+        item_id = item_id_for(name)
+        yield item_doc(uid, item_id, name, opening, current, reorder, price, "Grocery", now)
+        yield derived.movement(movement_doc(uid, f"opening_{item_id}", item_id, "IN", opening, price,
+                                            "direct_add", item_id, opened))
+        yield user_path(uid, "catalog_rates", str(index)), {
+            "id": index, "name": name, "rate": price, "updatedAt": opened,
+        }
+
+    customer = {"id": "e2e-customer-1", "name": "Test Customer", "phone": "9876543210"}
+    yield derived.invoice(invoice_doc(uid, "e2e-invoice-1", f"INV-{opened:%Y%m}001", "sales", "pending",
+                                      [{"name": "Rice 5kg", "quantity": 2, "price": 320.0}], opened, 0.0,
+                                      customer))
+    yield derived.movement(movement_doc(uid, "e2e-invoice-1_rice_5kg_out", item_id_for("Rice 5kg"), "OUT",
+                                        2.0, 0.0, "invoice", "e2e-invoice-1", opened))
+    yield customer_doc(uid, customer["id"], customer["name"], customer["phone"], opened,
+                       derived.customer_stats(customer["id"], now))
+    yield from derived.documents(uid, now)
+
+
+FIXTURES = {"e2e": e2e_fixture}
+
+
+def _chunks(docs: Iterable[Document], size: int) -> Iterator[List[Document]]:
+    it = iter(docs)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def seed(docs: Iterable[Document], emulator: Optional[FirestoreEmulator] = None,
+         workers: int = 8) -> SeedStats:
+    """Write ``docs`` with up to ``workers`` concurrent ``batchWrite`` calls."""
+    emulator = emulator or FirestoreEmulator()
+    started = time.perf_counter()
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for chunk in _chunks(docs, MAX_BATCH_WRITES):
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                written += sum(f.result() for f in done)
+            in_flight.add(pool.submit(emulator.batch_write, chunk))
+        written += sum(f.result() for f in wait(in_flight).done)
+    return SeedStats(written, time.perf_counter() - started)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", default=TEST_EMAIL)
+    parser.add_argument("--password", default=TEST_PASSWORD)
+    parser.add_argument("--fixture", choices=sorted(FIXTURES), help="write a named fixture instead of bulk data")
+    parser.add_argument("--customers", type=int, default=SeedSpec.customers)
+    parser.add_argument("--items", type=int, default=SeedSpec.items)
+    parser.add_argument("--invoices", type=int, default=SeedSpec.invoices)
+    parser.add_argument("--returns", type=int, default=SeedSpec.returns)
+    parser.add_argument("--days", type=int, default=SeedSpec.days)
+    parser.add_argument("--seed", type=int, default=SeedSpec.seed)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--clear", action="store_true", help="wipe the emulator project first")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    emulator = FirestoreEmulator()
+    if args.clear:
+        emulator.clear()
+    uid = ensure_emulator_user(args.email, args.password)
+    if args.fixture:
+        docs = FIXTURES[args.fixture](uid)
+    else:
+        spec = SeedSpec(customers=args.customers, items=args.items, invoices=args.invoices,
+                        returns=args.returns, days=args.days, seed=args.seed)
+        docs = generate(uid, spec)
+    stats = seed(docs, emulator, workers=args.workers)
+    print(f"Seeded {stats.documents} documents for {args.email} ({uid}) in {stats.seconds:.1f}s"
+          f" ({stats.docs_per_second:,.0f} docs/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Indexed lookups over Flutter's semantics tree.
+
+Resolving the recorded absolute XPaths makes Playwright walk the whole
+``flt-semantics`` tree for every step. ``SemanticsIndex`` instead takes one
+snapshot of the tree per semantics change (the readiness script bumps
+``window.__tsReady.version`` on every mutation), tags each node with a
+stable ``data-ts-id`` and indexes it by positional path, aria-label, role
+and ``Semantics.identifier``. A lookup is then a dict hit plus a single
+attribute selector.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from playwright import async_api
+
+# Returns null when the tree has not changed since ``knownVersion``.
+SNAPSHOT_SCRIPT = """
+(knownVersion) => {
+  const state = window.__tsReady || { version: 0 };
+  if (state.version === knownVersion) return null;
+  const nodes = [];
+  const TAGS = new Set(['flutter-view', 'flt-semantics-host', 'flt-semantics',
+                        'flt-semantics-placeholder', 'input', 'textarea']);
+  window.__tsNextId = window.__tsNextId || 1;
+  const visit = (el, path) => {
+    const seen = {};
+    for (const child of el.children) {
+      const tag = child.localName;
+      seen[tag] = (seen[tag] || 0) + 1;
+      if (!TAGS.has(tag)) continue;
+      const childPath = `${path}/${tag}[${seen[tag]}]`;
+      if (tag !== 'flutter-view' && tag !== 'flt-semantics-host') {
+        let id = child.getAttribute('data-ts-id');
+        if (!id) { id = String(window.__tsNextId++); child.setAttribute('data-ts-id', id); }
+        const isInput = tag === 'input' || tag === 'textarea';
+        nodes.push({
+          id,
+          path: childPath,
+          label: (child.getAttribute('aria-label') || (isInput ? child.placeholder : '') || '').trim(),
+          role: child.getAttribute('role') || (isInput ? 'textbox' : ''),
+          identifier: child.getAttribute('flt-semantics-identifier') || child.id || '',
+        });
+      }
+      visit(child, childPath);
+    }
+  };
+  if (document.body) visit(document.body, 'html/body[1]');
+  return { version: state.version, nodes };
+}
+"""
+
+
+def normalize_xpath(selector: str) -> str:
+    """Canonical positional form of a recorded absolute XPath.
+
+    ``xpath=html/body/flutter-view/flt-semantics[3]/input`` becomes
+    ``html/body[1]/flutter-view[1]/flt-semantics[3]/input[1]``, which is the
+    form the snapshot stores.
+    """
+    path = selector[len("xpath="):] if selector.startswith("xpath=") else selector
+    steps = [step for step in path.strip("/").split("/") if step]
+    if not steps or steps[0] != "html":
+        return ""
+    return "/".join(["html"] + [step if step.endswith("]") else f"{step}[1]" for step in steps[1:]])
+
+
+def _key(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+class SemanticsIndex:
+    """Snapshot-backed index of the semantics nodes on one page."""
+
+    def __init__(self, page: async_api.Page):
+        self.page = page
+        self.version: Optional[int] = None
+        self.snapshots = 0
+        self._by_path: Dict[str, str] = {}
+        self._by_label: Dict[str, List[str]] = defaultdict(list)
+        self._by_role: Dict[str, List[str]] = defaultdict(list)
+        self._by_identifier: Dict[str, List[str]] = defaultdict(list)
+
+    async def refresh(self) -> bool:
+        """Re-snapshot if the tree changed; returns whether it did."""
+        snapshot = await self.page.evaluate(SNAPSHOT_SCRIPT, self.version)
+        if snapshot is None:
+            return False
+        self.version = snapshot["version"]
+        self.snapshots += 1
+        self._by_path = {}
+        self._by_label = defaultdict(list)
+        self._by_role = defaultdict(list)
+        self._by_identifier = defaultdict(list)
+        for node in snapshot["nodes"]:
+            self._by_path[node["path"]] = node["id"]
+            if node["label"]:
+                self._by_label[_key(node["label"])].append(node["id"])
+            if node["role"]:
+                self._by_role[node["role"]].append(node["id"])
+            if node["identifier"]:
+                self._by_identifier[node["identifier"]].append(node["id"])
+        return True
+
+    def lookup(
+        self,
+        selector: Optional[str] = None,
+        *,
+        label: Optional[str] = None,
+        role: Optional[str] = None,
+        identifier: Optional[str] = None,
+    ) -> Optional[str]:
+        """``data-ts-id`` of the first node matching every given criterion."""
+        candidates: Optional[List[str]] = None
+
+        def narrow(ids: List[str]) -> None:
+            nonlocal candidates
+            wanted = set(ids)
+            candidates = ids if candidates is None else [i for i in candidates if i in wanted]
+
+        if selector is not None:
+            node_id = self._by_path.get(normalize_xpath(selector))
+            narrow([node_id] if node_id else [])
+        if identifier is not None:
+            narrow(self._by_identifier.get(identifier, []))
+        if label is not None:
+            narrow(self._by_label.get(_key(label), []))
+        if role is not None:
+            narrow(self._by_role.get(role, []))
+        return candidates[0] if candidates else None
+
+    def locator(self, node_id: str) -> async_api.Locator:
+        return self.page.locator(f'[data-ts-id="{node_id}"]')
@@ -0,0 +1,194 @@
+"""Sharded, resumable suite runs.
+
+Tests are split into shards balanced by historical duration, using
+longest-first greedy assignment. Durations come from the last runner
+results and the benchmark store; a timed-out test counts at its full
+timeout. Each shard is a separate ``harness.runner`` process, so a hung
+test only holds up its own shard.
+
+Every shard checkpoints each finished test to ``tmp/shards/shard-<n>.json``.
+Running again resumes: tests that already passed in any checkpoint are
+skipped, and only failed or unfinished ones are rerun. When all shards
+finish, the checkpoints are merged into ``tmp/test_results.json`` and
+``testsprite-mcp-test-report.html``.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.shards --shards 3 --workers 2
+    python -m harness.shards --shards 3            # resume after failures
+    python -m harness.shards --fresh --shards 4 -- --perf
+    python -m harness.shards --merge-only
+
+To shard across CI machines instead, run ``python -m harness.runner
+--shard 2/4 --checkpoint tmp/shards/shard-2.json`` on each machine. Then
+collect the checkpoint files into one directory and run ``--merge-only``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from harness import benchmarks, report
+from harness.auth import SUITE_DIR
+from harness.runner import discover_tests, test_id
+
+CHECKPOINT_DIR = SUITE_DIR / "tmp" / "shards"
+DEFAULT_DURATION_MS = 60_000.0
+
+
+class Checkpoint:
+    """Finished tests of one shard, rewritten atomically after every test."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.results: Dict[str, dict] = {}
+        if path.exists():
+            self.results = json.loads(path.read_text(encoding="utf-8"))
+
+    def passed(self) -> set:
+        return {tc for tc, result in self.results.items() if result["testStatus"] == "PASSED"}
+
+    def record(self, result) -> None:
+        entry = asdict(result)
+        entry["finishedAt"] = datetime.now(timezone.utc).isoformat()
+        self.results[entry["testId"]] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        scratch = self.path.with_suffix(".tmp")
+        scratch.write_text(json.dumps(self.results, indent=2), encoding="utf-8")
+        os.replace(scratch, self.path)
+
+
+def load_checkpoints(directory: Path = CHECKPOINT_DIR) -> Dict[str, dict]:
+    """Latest result per TC id across every checkpoint in ``directory``."""
+    merged: Dict[str, dict] = {}
+    for path in sorted(directory.glob("shard-*.json")):
+        for tc, result in Checkpoint(path).results.items():
+            if tc not in merged or result["finishedAt"] > merged[tc]["finishedAt"]:
+                merged[tc] = result
+    return merged
+
+
+def historical_durations(test_ids: Sequence[str],
+                         checkpoint_dir: Optional[Path] = CHECKPOINT_DIR) -> Dict[str, float]:
+    """Expected duration per TC id; unknown tests get the median of the known ones."""
+    passed_runs: Dict[str, List[float]] = {}
+    for run in benchmarks.load_history():
+        for tc in test_ids:
+            if f"{tc} duration" in run["metrics"]:
+                passed_runs.setdefault(tc, []).append(run["metrics"][f"{tc} duration"])
+    known = {tc: statistics.median(values) for tc, values in passed_runs.items()}
+    # Last observed durations include failures and timeouts, which cost the same wall time.
+    sources = []
+    if benchmarks.RESULTS_PATH.exists():
+        sources += json.loads(benchmarks.RESULTS_PATH.read_text(encoding="utf-8")).get("results", [])
+    if checkpoint_dir is not None:
+        sources += load_checkpoints(checkpoint_dir).values()
+    for result in sources:
+        if result["testId"] in test_ids:
+            known[result["testId"]] = max(known.get(result["testId"], 0.0), result["durationMs"])
+    fallback = statistics.median(known.values()) if known else DEFAULT_DURATION_MS
+    return {tc: known.get(tc, fallback) for tc in test_ids}
+
+
+def plan_shards(paths: Sequence[Path], count: int, durations: Dict[str, float]) -> List[List[Path]]:
+    """Longest-processing-time-first assignment of ``paths`` to ``count`` shards."""
+    shards: List[List[Path]] = [[] for _ in range(max(1, count))]
+    loads = [0.0] * len(shards)
+    for path in sorted(paths, key=lambda p: (-durations.get(test_id(p), 0.0), p.name)):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(path)
+        loads[lightest] += durations.get(test_id(path), 0.0)
+    return shards
+
+
+def select_shard(paths: Sequence[Path], index: int, count: int) -> List[Path]:
+    """The ``index``-th (1-based) of ``count`` balanced shards, for one CI machine.
+
+    Local checkpoints are ignored so every machine computes the same plan
+    from the committed history.
+    """
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {index} is outside 1..{count}")
+    durations = historical_durations([test_id(p) for p in paths], checkpoint_dir=None)
+    return plan_shards(paths, count, durations)[index - 1]
+
+
+def merge(results_dir: Path = CHECKPOINT_DIR, html_path: Path = report.HTML_REPORT_PATH) -> List[dict]:
+    """Merge all shard checkpoints into ``test_results.json`` and the HTML report."""
+    results = sorted(load_checkpoints(results_dir).values(), key=lambda r: r["testId"])
+    report.merge_test_results(results)
+    code_files = {test_id(path): path.name for path in discover_tests()}
+    report.write_html_report(results, code_files, html_path)
+    return results
+
+
+async def _run_shard(number: int, paths: Sequence[Path], checkpoint_dir: Path, workers: int,
+                     extra: Sequence[str]) -> int:
+    args = [sys.executable, "-m", "harness.runner", "-w", str(workers),
+            "--checkpoint", str(checkpoint_dir / f"shard-{number}.json"),
+            "--output", str(checkpoint_dir / f"results-shard-{number}.json")]
+    for path in paths:
+        args += ["-k", test_id(path)]
+    process = await asyncio.create_subprocess_exec(*args, *extra, cwd=str(SUITE_DIR))
+    return await process.wait()
+
+
+async def _gather_shards(shards: Sequence[Sequence[Path]], checkpoint_dir: Path, workers: int,
+                         extra: Sequence[str]) -> List[int]:
+    return await asyncio.gather(*(
+        _run_shard(number, shard, checkpoint_dir, workers, extra)
+        for number, shard in enumerate(shards, start=1)
+    ))
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--shards", type=int, default=2, help="runner processes to split the suite over")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="concurrent tests per shard")
+    parser.add_argument("-k", dest="patterns", action="append", default=[], help="only run TC files containing this")
+    parser.add_argument("--fresh", action="store_true", help="discard checkpoints and rerun everything")
+    parser.add_argument("--merge-only", action="store_true", help="only merge existing checkpoints into the reports")
+    parser.add_argument("--checkpoint-dir", type=Path, default=CHECKPOINT_DIR)
+    parser.add_argument("--html", type=Path, default=report.HTML_REPORT_PATH, help="HTML report to write")
+    parser.add_argument("runner_args", nargs="*", help="extra runner arguments, after --")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.fresh and args.checkpoint_dir.exists():
+        shutil.rmtree(args.checkpoint_dir)
+    args.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    if not args.merge_only:
+        done = {tc for tc, r in load_checkpoints(args.checkpoint_dir).items() if r["testStatus"] == "PASSED"}
+        paths = [p for p in discover_tests(args.patterns) if test_id(p) not in done]
+        if done:
+            print(f"Resuming: {len(done)} passed test(s) skipped", flush=True)
+        if paths:
+            durations = historical_durations([test_id(p) for p in paths], args.checkpoint_dir)
+            shards = [s for s in plan_shards(paths, args.shards, durations) if s]
+            for number, shard in enumerate(shards, start=1):
+                expected = sum(durations[test_id(p)] for p in shard) / 1000
+                print(f"Shard {number}: {' '.join(test_id(p) for p in shard)} (~{expected:.0f}s)", flush=True)
+            started = time.perf_counter()
+            asyncio.run(_gather_shards(shards, args.checkpoint_dir, args.workers, args.runner_args))
+            print(f"All shards finished in {time.perf_counter() - started:.1f}s", flush=True)
+
+    results = merge(args.checkpoint_dir, args.html)
+    passed = sum(r["testStatus"] == "PASSED" for r in results)
+    print(f"{passed}/{len(results)} passed; merged into {report.TEST_RESULTS_PATH} and {args.html}")
+    return 0 if results and passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Entry point used when a single TC script is run directly."""
+
+import os
+import sys
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from playwright import async_api
+
+from harness.auth import context_options, is_authenticated, sign_in_once
+from harness.browser_pool import BrowserPool
+from harness.perf import PerfCapture, trace_path_for, write_capture
+from harness.readiness import StepRecorder, current_recorder
+from harness.runner import test_id, test_title
+from harness.stubs import NetworkStubs, fixture_path_for, resolve_mode
+
+TestFn = Callable[[async_api.BrowserContext], Awaitable[None]]
+
+
+async def run_standalone(run_test: TestFn) -> None:
+    """Run one TC script on a private single-browser pool.
+
+    ``AUTHENTICATED`` scripts sign in first, exactly as under the runner.
+    ``TS_PERF=1`` / ``TS_TRACE=1`` enable the runner's ``--perf`` / ``--trace``,
+    and ``TS_NETWORK=record|replay|live`` works like its ``--network``.
+    """
+    module = sys.modules[run_test.__module__]
+    script = Path(module.__file__)
+    recorder = StepRecorder()
+    current_recorder.set(recorder)
+    try:
+        async with BrowserPool(size=1) as pool:
+            auth_state = await sign_in_once(pool) if is_authenticated(module) else None
+            async with pool.context(**context_options(module, auth_state)) as context:
+                fixture = fixture_path_for(test_id(script))
+                mode = resolve_mode(module, os.environ.get("TS_NETWORK") or None, fixture)
+                stubs = await NetworkStubs.attach(context, mode, fixture)
+                trace = bool(os.environ.get("TS_TRACE"))
+                capture = None
+                if trace or os.environ.get("TS_PERF"):
+                    capture = await PerfCapture.attach(context, trace_path_for(test_id(script)) if trace else None)
+                try:
+                    await run_test(context)
+                finally:
+                    if capture:
+                        path = write_capture(test_id(script), test_title(script), await capture.finish())
+                        print(f"Performance capture written to {path}")
+                    print(f"Network ({mode}): {await stubs.close()}")
+    finally:
+        for screen, stats in recorder.to_dict()["screens"].items():
+            print(f"{screen:<30} n={stats['count']:<3} p50 {stats['p50']:8.1f}ms  p95 {stats['p95']:8.1f}ms")
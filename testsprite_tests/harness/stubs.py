@@ -0,0 +1,324 @@
+"""Route-level network stubs for Firebase, Google OAuth and WhatsApp.
+
+Each test runs in one of three network modes:
+
+* ``live``: nothing is intercepted;
+* ``record``: Firestore and Firebase Auth REST traffic goes to the real
+  backend, and every response is saved to ``fixtures/network/<TC id>.json``;
+* ``replay``: the same traffic is answered from that fixture and never
+  leaves the machine.
+
+WebChannel requests carry per-session counters (``RID``, ``AID``, ``zx``,
+``ofs``...). These are stripped before matching. Writes are matched by
+shape: the operation, the document path with generated ids masked, and
+the field names, so a replayed write matches its recording although its
+ids and timestamps differ. Responses to the same request are replayed in
+recorded order. A Listen long-poll with no recorded responses left is held
+open like an idle stream. Any other request with no fixture left gets its
+last response again. Requests never recorded are aborted and counted in
+``misses``.
+
+While recording, Listen long-polls are passed through so the page sees
+each chunk as it arrives; the whole response is saved once it ends.
+
+Outside ``live`` mode, Google OAuth endpoints are answered with canned
+stubs and ``wa.me`` / ``whatsapp:`` launches are always caught. A caught
+launch never opens; it is listed in ``whatsapp_launches``, and a test
+reads it through ``current_stubs``.
+
+A script opts in with ``NETWORK = "replay"`` (or ``"record"``) once its
+fixture has been recorded with ``--network record`` and committed. The
+runner's ``--network`` flag and ``TS_NETWORK`` override it. A script set
+to replay whose fixture is missing runs live and says so.
+"""
+
+import asyncio
+import base64
+import contextvars
+import hashlib
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+from playwright import async_api
+
+from harness.auth import SUITE_DIR
+from harness.readiness import FIRESTORE_MARKERS
+
+FIXTURES_DIR = SUITE_DIR / "fixtures" / "network"
+MODES = ("live", "record", "replay")
+
+_RECORDED_MARKERS = FIRESTORE_MARKERS + ("identitytoolkit.googleapis.com", "securetoken.googleapis.com")
+_GOOGLE_OAUTH_HOSTS = ("accounts.google.com", "apis.google.com", "oauth2.googleapis.com")
+_WHATSAPP_HOSTS = ("wa.me", "api.whatsapp.com")
+
+# ``response.body()`` is already decoded, so these no longer describe it.
+_BODY_HEADERS = {"content-length", "content-encoding", "transfer-encoding"}
+
+# WebChannel/session bookkeeping that changes on every run.
+_VOLATILE_PARAMS = {"RID", "AID", "SID", "zx", "t", "ofs", "count", "gsessionid", "X-HTTP-Session-Id", "key"}
+
+# JSON keys whose values change on every run.
+_VOLATILE_JSON_KEYS = {"streamToken", "resumeToken", "readTime", "timestampValue", "updateTime", "createTime"}
+
+# Document ids the app generates: uuids, Firestore auto-ids, millisecond
+# timestamps (``1712345678901_rev``) and day keys (``2026-03-01``).
+_GENERATED_ID = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    r"|(?=[A-Za-z]*\d)[A-Za-z0-9]{20}"
+    r"|\d{10,}(?:_.*)?"
+    r"|\d{4}-\d{2}-\d{2}"
+)
+
+# google.accounts.* shim so Google Identity Services loads without the network.
+_GSI_STUB = """
+window.google = window.google || {};
+google.accounts = google.accounts || {
+  id: { initialize() {}, prompt() {}, renderButton() {}, disableAutoSelect() {}, cancel() {} },
+  oauth2: {
+    initTokenClient: (config) => ({
+      requestAccessToken: () => config.callback && config.callback({
+        access_token: 'stub-access-token', token_type: 'Bearer', expires_in: 3600, scope: config.scope || '',
+      }),
+    }),
+    initCodeClient: (config) => ({ requestCode: () => config.callback && config.callback({ code: 'stub-code' }) }),
+    hasGrantedAllScopes: () => true,
+    revoke: (token, done) => done && done({ successful: true }),
+  },
+};
+"""
+
+_OAUTH_PAGE = "<!doctype html><title>OAuth stub</title><script>window.close()</script>"
+
+# Reports wa.me / whatsapp: launches instead of opening them.
+_LAUNCH_CATCHER = """
+(() => {
+  if (window.__tsLaunchCatcher) return;
+  window.__tsLaunchCatcher = true;
+  const isWhatsApp = (url) => /^(whatsapp:|https?:\\/\\/(wa\\.me|api\\.whatsapp\\.com)\\/)/i.test(String(url || ''));
+  const open = window.open.bind(window);
+  window.open = (url, ...rest) => {
+    if (isWhatsApp(url)) { window.__tsRecordLaunch(String(url)); return null; }
+    return open(url, ...rest);
+  };
+  document.addEventListener('click', (event) => {
+    const link = event.target && event.target.closest && event.target.closest('a[href]');
+    if (link && isWhatsApp(link.href)) { event.preventDefault(); window.__tsRecordLaunch(link.href); }
+  }, true);
+})();
+"""
+
+current_stubs: contextvars.ContextVar[Optional["NetworkStubs"]] = contextvars.ContextVar(
+    "current_stubs", default=None
+)
+
+
+def fixture_path_for(test_id: str, directory: Path = FIXTURES_DIR) -> Path:
+    return directory / f"{test_id}.json"
+
+
+def resolve_mode(module, override: Optional[str], fixture: Path) -> str:
+    """Effective mode for a TC module: override, then ``NETWORK``, then live."""
+    mode = override or getattr(module, "NETWORK", "live")
+    if mode not in MODES:
+        raise ValueError(f"unknown network mode {mode!r}; expected one of {MODES}")
+    if mode == "replay" and not fixture.exists():
+        print(f"No network fixture at {fixture}; running live (record it with --network record)", flush=True)
+        return "live"
+    return mode
+
+
+def _masked_path(name: str) -> str:
+    path = name.split("/documents/", 1)[-1]
+    return "/".join("*" if _GENERATED_ID.fullmatch(part) else part for part in path.split("/"))
+
+
+def _write_shape(write: dict) -> list:
+    """What a write does, without its generated ids and values."""
+    transforms = write.get("updateTransforms") or write.get("transform", {}).get("fieldTransforms", [])
+    if "delete" in write:
+        return ["delete", _masked_path(write["delete"])]
+    update = write.get("update", {})
+    return [
+        "update" if "update" in write else "transform",
+        _masked_path(update.get("name") or write.get("transform", {}).get("document", "")),
+        sorted(update.get("fields", {})),
+        sorted(write.get("updateMask", {}).get("fieldPaths", [])),
+        sorted(t.get("fieldPath", "") for t in transforms),
+    ]
+
+
+def _scrub(value):
+    if isinstance(value, dict):
+        return {k: _scrub(v) for k, v in value.items() if k not in _VOLATILE_JSON_KEYS}
+    if isinstance(value, list):
+        return [_scrub(v) for v in value]
+    return value
+
+
+def _normalized_body(body: str) -> str:
+    """A JSON body with writes reduced to their shape and run-specific values dropped."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(payload, dict) and "writes" in payload:
+        payload = {**payload, "writes": [_write_shape(w) for w in payload["writes"]]}
+    return json.dumps(_scrub(payload), sort_keys=True)
+
+
+def request_key(method: str, url: str, post_data: Optional[str]) -> str:
+    """Run-independent identity of a request, used to match fixtures."""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in _VOLATILE_PARAMS)
+    body = ""
+    if post_data:
+        is_form = "=" in post_data and not post_data.lstrip().startswith(("{", "["))
+        fields = parse_qsl(post_data, keep_blank_values=True) if is_form else []
+        if fields:
+            # ``req0___data__``, ``req1___data__``... are numbered per session.
+            body = urlencode([(k.split("___", 1)[-1], _normalized_body(unquote(v)))
+                              for k, v in fields if k not in _VOLATILE_PARAMS])
+        else:
+            body = _normalized_body(post_data)
+    digest = hashlib.sha1(body.encode()).hexdigest()[:12] if body else "-"
+    return f"{method} {parts.netloc}{parts.path}?{urlencode(query)} {digest}"
+
+
+def _is_long_poll(method: str, url: str) -> bool:
+    return method == "GET" and "TYPE=xmlhttp" in url
+
+
+class NetworkStubs:
+    """Network interception for one test context. Create with ``await NetworkStubs.attach(...)``."""
+
+    def __init__(self, context: async_api.BrowserContext, mode: str, fixture: Path):
+        self.context = context
+        self.mode = mode
+        self.fixture = fixture
+        self.whatsapp_launches: List[str] = []
+        self.served = 0
+        self.misses: List[str] = []
+        self._recorded: Dict[str, List[dict]] = defaultdict(list)
+        self._replay: Dict[str, List[dict]] = {}
+        self._last: Dict[str, dict] = {}
+        self._held: List[async_api.Route] = []
+        self._streaming: Set[asyncio.Task] = set()
+
+    @classmethod
+    async def attach(cls, context: async_api.BrowserContext, mode: str, fixture: Path) -> "NetworkStubs":
+        stubs = cls(context, mode, fixture)
+        current_stubs.set(stubs)
+        await context.expose_binding("__tsRecordLaunch", lambda source, url: stubs.whatsapp_launches.append(url))
+        await context.add_init_script(_LAUNCH_CATCHER)
+        if mode == "live":
+            return stubs
+        if mode == "replay":
+            entries = json.loads(fixture.read_text(encoding="utf-8")).get("entries", {})
+            stubs._replay = {key: list(responses) for key, responses in entries.items()}
+        await context.route(lambda url: any(m in url for m in _RECORDED_MARKERS), stubs._handle_recorded)
+        await context.route(lambda url: urlsplit(url).hostname in _GOOGLE_OAUTH_HOSTS, stubs._handle_oauth)
+        await context.route(lambda url: urlsplit(url).hostname in _WHATSAPP_HOSTS, stubs._handle_whatsapp)
+        return stubs
+
+    async def _handle_recorded(self, route: async_api.Route) -> None:
+        request = route.request
+        key = request_key(request.method, request.url, request.post_data)
+        if self.mode == "record":
+            if _is_long_poll(request.method, request.url):
+                # route.fetch() would hold every chunk until the server ends the poll.
+                await route.continue_()
+                task = asyncio.ensure_future(self._record_when_done(key, request))
+                self._streaming.add(task)
+                task.add_done_callback(self._streaming.discard)
+                return
+            try:
+                response = await route.fetch()
+            except async_api.Error:
+                await route.abort()
+                return
+            body = await response.body()
+            self._record(key, response, body)
+            await route.fulfill(response=response, body=body)
+            return
+
+        queue = self._replay.get(key)
+        if queue:
+            entry = self._last[key] = queue.pop(0)
+        elif _is_long_poll(request.method, request.url):
+            self._held.append(route)  # Idle Listen stream: answered by close().
+            return
+        elif key in self._last:
+            entry = self._last[key]
+        else:
+            self.misses.append(key)
+            await route.abort("internetdisconnected")
+            return
+        self.served += 1
+        await route.fulfill(status=entry["status"], headers=entry["headers"], body=base64.b64decode(entry["body"]))
+
+    def _record(self, key: str, response, body: bytes) -> None:
+        self._recorded[key].append({
+            "status": response.status,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in _BODY_HEADERS},
+            "body": base64.b64encode(body).decode(),
+        })
+
+    async def _record_when_done(self, key: str, request: async_api.Request) -> None:
+        try:
+            response = await request.response()
+            if response is not None:
+                self._record(key, response, await response.body())
+        except async_api.Error:
+            pass  # The page went away mid-poll; nothing complete to save.
+
+    async def _handle_oauth(self, route: async_api.Route) -> None:
+        url = route.request.url
+        if "/gsi/client" in url or url.endswith(".js") or "/js/" in url:
+            await route.fulfill(status=200, content_type="application/javascript", body=_GSI_STUB)
+        elif "/token" in url:
+            await route.fulfill(status=200, content_type="application/json", body=json.dumps({
+                "access_token": "stub-access-token", "expires_in": 3600, "token_type": "Bearer",
+                "id_token": "stub-id-token", "scope": "openid email profile",
+            }))
+        else:
+            await route.fulfill(status=200, content_type="text/html", body=_OAUTH_PAGE)
+
+    async def _handle_whatsapp(self, route: async_api.Route) -> None:
+        self.whatsapp_launches.append(route.request.url)
+        await route.fulfill(status=200, content_type="text/html", body="<!doctype html><title>WhatsApp stub</title>")
+
+    async def wait_for_whatsapp_launch(self, timeout_ms: float = 5000) -> str:
+        """Return the first caught WhatsApp launch URL, waiting up to ``timeout_ms``."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_ms / 1000
+        while not self.whatsapp_launches:
+            if loop.time() >= deadline:
+                raise async_api.TimeoutError(f"No WhatsApp launch within {timeout_ms:g}ms")
+            await asyncio.sleep(0.05)
+        return self.whatsapp_launches[0]
+
+    async def close(self) -> dict:
+        """Release held long-polls, save a recording and return a summary."""
+        for route in self._held:
+            try:
+                await route.abort()
+            except async_api.Error:
+                pass
+        self._held = []
+        for task in list(self._streaming):
+            task.cancel()
+        if self.mode == "record":
+            self.fixture.parent.mkdir(parents=True, exist_ok=True)
+            self.fixture.write_text(json.dumps({"entries": self._recorded}, indent=1, sort_keys=True),
+                                    encoding="utf-8")
+        return {
+            "mode": self.mode,
+            "served": self.served,
+            "misses": len(self.misses),
+            "recorded": sum(len(v) for v in self._recorded.values()),
+            "whatsappLaunches": list(self.whatsapp_launches),
+        }
@@ -0,0 +1,84 @@
+"""Unit tests for the benchmark regression gate.
+
+Run from ``testsprite_tests/``: ``python -m pytest tests``.
+"""
+
+from harness.benchmarks import SHIFT_RUNS, compare
+
+METRIC = "TC011 measure loadDashboardData"
+
+
+def _run(value, **extra):
+    return {"metrics": {METRIC: value}, **extra}
+
+
+def _flagged(result):
+    regressions, improvements, unbaselined = result
+    return [f.metric for f in regressions]
+
+
+def _record(history, value):
+    """Append a run the way ``check`` records it; returns whether it was flagged."""
+    regressions = _flagged(compare({METRIC: value}, history))
+    history.append(_run(value, regressed=bool(regressions), regressions=regressions))
+    return bool(regressions)
+
+
+def test_flags_a_slowdown_at_the_threshold():
+    history = [_run(100.0) for _ in range(5)]
+    assert _flagged(compare({METRIC: 120.0}, history)) == [METRIC]
+    assert _flagged(compare({METRIC: 124.0}, history)) == [METRIC]
+    assert _flagged(compare({METRIC: 119.0}, history)) == []
+
+
+def test_flags_small_medians():
+    history = [_run(40.0) for _ in range(5)]
+    assert _flagged(compare({METRIC: 60.0}, history)) == [METRIC]
+    assert _flagged(compare({METRIC: 45.0}, history)) == []
+
+
+def test_noisy_metrics_need_a_larger_jump():
+    history = [_run(v) for v in (80.0, 100.0, 120.0, 90.0, 110.0)]
+    assert _flagged(compare({METRIC: 125.0}, history)) == []
+    assert _flagged(compare({METRIC: 200.0}, history)) == [METRIC]
+
+
+def test_needs_enough_history():
+    regressions, _, unbaselined = compare({METRIC: 500.0}, [_run(100.0), _run(100.0)])
+    assert regressions == [] and unbaselined == [METRIC]
+
+
+def test_improvements_are_reported_separately():
+    regressions, improvements, _ = compare({METRIC: 50.0}, [_run(100.0) for _ in range(5)])
+    assert regressions == [] and [f.metric for f in improvements] == [METRIC]
+
+
+def test_one_slow_run_stays_out_of_the_baseline():
+    history = [_run(100.0) for _ in range(5)]
+    assert _record(history, 150.0)
+    assert not _record(history, 100.0)
+    assert _record(history, 150.0)
+
+
+def test_a_shipped_slowdown_becomes_the_baseline():
+    history = [_run(100.0) for _ in range(10)]
+    flags = [_record(history, 130.0) for _ in range(12)]
+    assert flags == [True] * SHIFT_RUNS + [False] * (12 - SHIFT_RUNS)
+    # Measured from the new level: going back is an improvement, and a
+    # further slowdown is flagged.
+    _, improvements, _ = compare({METRIC: 100.0}, history)
+    assert [f.metric for f in improvements] == [METRIC]
+    assert _flagged(compare({METRIC: 156.0}, history)) == [METRIC]
+
+
+def test_rebaseline_accepts_the_current_level():
+    history = [_run(100.0) for _ in range(10)]
+    history.append(_run(130.0, rebaseline=True))
+    history += [_run(130.0) for _ in range(2)]
+    assert _flagged(compare({METRIC: 130.0}, history)) == []
+    assert _flagged(compare({METRIC: 160.0}, history)) == [METRIC]
+
+
+def test_runs_recorded_without_per_metric_flags_count_as_flagged():
+    history = [_run(100.0) for _ in range(5)] + [_run(300.0, regressed=True)]
+    assert _flagged(compare({METRIC: 125.0}, history)) == [METRIC]
@@ -0,0 +1,62 @@
+"""Unit tests for the documents the seeder derives from its invoices and movements.
+
+Run from ``testsprite_tests/``: ``python -m pytest tests``.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from harness.seed import STOCK_SIGN, SeedSpec, e2e_fixture, generate
+
+NOW = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def docs():
+    return dict(generate("u1", SeedSpec(customers=5, items=10, invoices=200, returns=5), now=NOW))
+
+
+def _collection(docs, name):
+    return {path.rsplit("/", 1)[1]: fields for path, fields in docs.items() if path.split("/")[2] == name}
+
+
+def test_ledgers_match_movements_and_item_stock(docs):
+    ledgers = _collection(docs, "stock_ledger")
+    movements = _collection(docs, "stock_movements").values()
+    assert all(m["ledgered"] for m in movements)
+    for item_id, item in _collection(docs, "inventory_items").items():
+        own = [m for m in movements if m["itemId"] == item_id]
+        balance = sum(STOCK_SIGN[m["type"]] * m["quantity"] for m in own)
+        assert ledgers[item_id]["balance"] == pytest.approx(balance) == pytest.approx(item["current_stock"])
+        assert ledgers[item_id]["checkpointCount"] == ledgers[item_id]["movementCount"] == len(own)
+
+
+def test_rollups_cover_every_invoice_and_outflow(docs):
+    invoices = list(_collection(docs, "invoices").values())
+    assert all(i["rolledUp"] for i in invoices)
+    days = {k: v for k, v in _collection(docs, "analytics_rollups").items() if k != "_coverage"}
+    counted = sum(day.get(kind, {}).get("invoiceCount", 0) for day in days.values() for kind in ("sales", "purchase"))
+    assert counted == sum(1 for i in invoices if i["status"] != "cancelled")
+    assert _collection(docs, "analytics_rollups")["_coverage"]["complete"] is True
+
+    sold = sum(q for day, fields in _collection(docs, "sales_rollups").items() if day != "_coverage"
+               for q in fields["items"].values())
+    outflows = sum(m["quantity"] for m in _collection(docs, "stock_movements").values() if m["type"] == "OUT")
+    assert sold == pytest.approx(outflows)
+
+
+def test_customer_aggregates_are_reconciled(docs):
+    invoices = _collection(docs, "invoices").values()
+    for customer_id, customer in _collection(docs, "customers").items():
+        own = [i for i in invoices if i.get("customerId") == customer_id and i["status"] != "cancelled"]
+        assert customer["invoiceCount"] == len(own)
+        assert customer["totalSpent"] == pytest.approx(sum(i["revenue"] for i in own))
+        assert customer["outstandingBalance"] == pytest.approx(sum(i["revenue"] - i["amountPaid"] for i in own))
+        assert customer["statsReconciledAt"] == NOW
+
+
+def test_e2e_fixture_customer_owes_the_pending_invoice():
+    customers = [fields for path, fields in e2e_fixture("u1", now=NOW) if "/customers/" in path]
+    assert customers[0]["outstandingBalance"] == 640.0
+    assert customers[0]["invoiceCount"] == 1
@@ -0,0 +1,51 @@
+"""Unit tests for fixture matching in the network stubs.
+
+Run from ``testsprite_tests/``: ``python -m pytest tests``.
+"""
+
+import json
+from urllib.parse import urlencode
+
+from harness.stubs import request_key
+
+WRITE_URL = "https://firestore.googleapis.com/google.firestore.v1.Firestore/Write/channel?VER=8&database=x&RID=1"
+DOCS = "projects/demo/databases/(default)/documents/users/u8PqLw2nXc4RkT7mYa1bZs9dEe3F"
+
+
+def _write(invoice_id, created_at, stream_token, number="INV-202603001"):
+    frame = {
+        "streamToken": stream_token,
+        "writes": [{
+            "update": {
+                "name": f"{DOCS}/invoices/{invoice_id}",
+                "fields": {"invoiceNumber": {"stringValue": number},
+                           "createdAt": {"timestampValue": created_at}},
+            },
+            "currentDocument": {"exists": False},
+        }, {
+            "update": {"name": f"{DOCS}/analytics_rollups/2026-03-01", "fields": {}},
+            "updateMask": {"fieldPaths": []},
+            "updateTransforms": [{"fieldPath": "sales.revenue", "increment": {"doubleValue": 250}}],
+        }],
+    }
+    return urlencode({"count": 1, "ofs": 4, "req0___data__": json.dumps(frame)})
+
+
+def test_writes_match_across_runs_despite_generated_ids_and_timestamps():
+    first = request_key("POST", WRITE_URL, _write("0f8a3c52-9d1e-4b7a-8c2f-5e6d7a8b9c0d",
+                                                  "2026-03-01T10:00:00Z", "token-a"))
+    second = request_key("POST", WRITE_URL.replace("RID=1", "RID=9"),
+                         _write("7b1e2d34-5c6f-4a8b-9c0d-1e2f3a4b5c6d", "2026-03-02T09:30:00Z", "token-b"))
+    assert first == second
+
+
+def test_writes_to_different_collections_or_fields_do_not_match():
+    base = _write("0f8a3c52-9d1e-4b7a-8c2f-5e6d7a8b9c0d", "2026-03-01T10:00:00Z", "token-a")
+    other_collection = base.replace("invoices", "returns")
+    assert request_key("POST", WRITE_URL, base) != request_key("POST", WRITE_URL, other_collection)
+
+
+def test_non_json_bodies_are_hashed_as_sent():
+    url = "https://identitytoolkit.googleapis.com/v1/accounts:lookup"
+    assert request_key("POST", url, "a=1&b=2") == request_key("POST", url, "a=1&b=2")
+    assert request_key("POST", url, "a=1&b=2") != request_key("POST", url, "a=1&b=3")